@@ -0,0 +1,127 @@
+"""
+Bulk write benchmark
+
+Inserts ``--rows`` orders and ``--rows`` notifications for one consumer,
+once through the ORM (``session.add_all`` + commit) and once through the
+bulk repository functions, and reports rows per second:
+
+    orm                 Order(...) / Notification(...) objects, one flush
+    bulk                bulk_create_orders / bulk_create_notifications
+
+Both paths issue order numbers and write the outbox and status history of
+the created orders. On PostgreSQL with asyncpg, batches of at least
+BULK_COPY_MIN_ROWS rows use COPY.
+
+Usage (from apps/delivery-system):
+    python benchmarks/bulk_writes.py [--rows 10000]
+
+Without DATABASE_URL a temporary SQLite database is created.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_tmp.name}/bench.db")
+os.environ.setdefault("REDIS_URL", "memory://")
+
+from sqlalchemy import delete, insert  # noqa: E402
+
+from src.core.database import Base, close_db, get_async_engine, get_async_sessionmaker  # noqa: E402
+from src.models import Notification, NotificationType, Order, OutboxEvent, User, UserRole  # noqa: E402
+from src.models.status_event import StatusEvent  # noqa: E402
+from src.repositories import bulk_create_notifications, bulk_create_orders  # noqa: E402
+from src.services.order_number_service import order_numbers  # noqa: E402
+
+CONSUMER_ID = "00000000-0000-0000-0000-00000000be01"
+
+
+def order_values(number: int) -> dict:
+    return {
+        "consumer_id": CONSUMER_ID,
+        "item_description": f"benchmark item {number}",
+        "pickup_contact_name": "A", "pickup_contact_phone": "1",
+        "pickup_address_line1": "Rua A, 1", "pickup_city": "São Paulo", "pickup_state": "SP",
+        "pickup_latitude": -23.55, "pickup_longitude": -46.63,
+        "delivery_contact_name": "B", "delivery_contact_phone": "2",
+        "delivery_address_line1": "Rua B, 2", "delivery_city": "São Paulo", "delivery_state": "SP",
+        "delivery_latitude": -23.56, "delivery_longitude": -46.65,
+    }
+
+
+def notification_values(number: int) -> dict:
+    return {"user_id": CONSUMER_ID, "type": NotificationType.WHATSAPP, "message": f"Pedido {number} a caminho"}
+
+
+async def reset() -> None:
+    """Create the schema and leave only the benchmark consumer"""
+    async with get_async_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for model in (Notification, StatusEvent, OutboxEvent, Order):
+            await conn.execute(delete(model))
+        await conn.execute(delete(User).where(User.id == CONSUMER_ID))
+        await conn.execute(insert(User), [{
+            "id": CONSUMER_ID, "email": "bench@pyloto.test", "phone": "+5500000000000",
+            "password_hash": "-", "first_name": "Bench", "last_name": "Consumer", "role": UserRole.CONSUMER,
+        }])
+
+
+async def orm_path(rows: int) -> dict:
+    timings = {}
+    async with get_async_sessionmaker()() as session:
+        started = time.perf_counter()
+        orders = []
+        for number in range(rows):
+            values = order_values(number)
+            orders.append(Order(order_number=await order_numbers.issue(values["pickup_state"]), **values))
+        session.add_all(orders)
+        await session.commit()
+        timings["orders"] = rows / (time.perf_counter() - started)
+        
+        started = time.perf_counter()
+        session.add_all([Notification(**notification_values(number)) for number in range(rows)])
+        await session.commit()
+        timings["notifications"] = rows / (time.perf_counter() - started)
+    return timings
+
+
+async def bulk_path(rows: int) -> dict:
+    timings = {}
+    async with get_async_sessionmaker()() as session:
+        started = time.perf_counter()
+        await bulk_create_orders(session, [order_values(number) for number in range(rows)])
+        await session.commit()
+        timings["orders"] = rows / (time.perf_counter() - started)
+        
+        started = time.perf_counter()
+        await bulk_create_notifications(session, [notification_values(number) for number in range(rows)])
+        await session.commit()
+        timings["notifications"] = rows / (time.perf_counter() - started)
+    return timings
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    args = parser.parse_args()
+    
+    results = {}
+    for name, path in (("orm", orm_path), ("bulk", bulk_path)):
+        await reset()
+        results[name] = await path(args.rows)
+    
+    print(f"{'path':<6} {'orders/s':>12} {'notifications/s':>16}")
+    for name, timings in results.items():
+        print(f"{name:<6} {timings['orders']:>12,.0f} {timings['notifications']:>16,.0f}")
+    
+    await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
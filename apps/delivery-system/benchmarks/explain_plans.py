@@ -0,0 +1,122 @@
+"""
+Query plan regression check for the hot order/notification/payment queries
+
+Runs EXPLAIN for each repository query and fails (exit code 1) when the
+plan does not use the index it was designed for, e.g. after a model change
+drops an index or a query stops matching a partial index predicate.
+
+Usage (from apps/delivery-system, database migrated to head):
+    python benchmarks/explain_plans.py
+    DATABASE_URL=postgresql+asyncpg://... python benchmarks/explain_plans.py
+
+tests/test_query_plans.py runs the same checks on SQLite.
+
+On PostgreSQL sequential scans are disabled for the check, so an empty
+database still shows whether the index *can* serve the query. Indexes of
+partitions (orders, notifications) are reported under their parent index.
+"""
+import asyncio
+import re
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import text  # noqa: E402
+
+from src.core.database import close_db, get_async_engine  # noqa: E402
+from src.core.pagination import PageParams, encode_cursor, keyset_query  # noqa: E402
+from src.models.notification import Notification  # noqa: E402
+from src.models.order import Order, OrderStatus  # noqa: E402
+from src.repositories.notifications import notifications_due_for_retry_query, user_notifications_query  # noqa: E402
+from src.repositories.orders import (  # noqa: E402
+    active_orders_by_status_query,
+    active_orders_for_consumer_query,
+    orders_query,
+    scheduled_orders_query,
+)
+from src.repositories.payments import payments_awaiting_webhook_query, pix_expirations_query  # noqa: E402
+
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+CONSUMER_ID = "00000000-0000-0000-0000-00000000be01"
+NEXT_PAGE = PageParams(cursor=encode_cursor(NOW, "01920000-0000-7000-8000-000000000001"))
+
+# (description, query, index the plan must use, or a tuple of acceptable ones)
+EXPECTED_PLANS = [
+    (
+        "active orders for consumer",
+        active_orders_for_consumer_query(CONSUMER_ID),
+        ("ix_orders_consumer_status_created", "ix_orders_consumer_created_id"),
+    ),
+    ("dashboard: live orders", active_orders_by_status_query(), "ix_orders_active_status_created"),
+    ("dashboard: paid orders", active_orders_by_status_query(OrderStatus.PAID), "ix_orders_active_status_created"),
+    ("notifications due for retry", notifications_due_for_retry_query(NOW), "ix_notifications_status_next_retry"),
+    (
+        "user notifications, next page",
+        keyset_query(user_notifications_query(CONSUMER_ID), Notification, NEXT_PAGE),
+        "ix_notifications_user_created_id",
+    ),
+    ("orders list, next page", keyset_query(orders_query(), Order, NEXT_PAGE), "ix_orders_created_id"),
+    (
+        "consumer orders, next page",
+        keyset_query(orders_query(consumer_id=CONSUMER_ID), Order, NEXT_PAGE),
+        "ix_orders_consumer_created_id",
+    ),
+    ("payments awaiting webhook", payments_awaiting_webhook_query(NOW), "ix_payments_awaiting_status_pix_expiration"),
+    ("scheduler: pix expirations", pix_expirations_query(), "ix_payments_awaiting_status_pix_expiration"),
+    ("scheduler: scheduled pickups", scheduled_orders_query(NOW), "ix_orders_active_status_created"),
+]
+
+
+# Per-partition index -> partitioned (parent) index
+PARTITION_INDEXES_QUERY = text(
+    "SELECT child.relname, parent.relname FROM pg_inherits "
+    "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+    "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+    "WHERE child.relkind = 'i'"
+)
+
+
+async def explain(conn, query) -> str:
+    """Get the plan of a query as text"""
+    compiled = query.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    rows = (await conn.execute(text(prefix + str(compiled)))).all()
+    return "\n".join(" ".join(str(column) for column in row) for row in rows)
+
+
+async def check_plan(conn, query, index_names, parent_indexes=None) -> Tuple[bool, str]:
+    """Whether the plan of ``query`` uses one of ``index_names``, and the plan"""
+    if isinstance(index_names, str):
+        index_names = (index_names,)
+    parent_indexes = parent_indexes or {}
+    plan = await explain(conn, query)
+    plan = re.sub(r"\w+", lambda match: parent_indexes.get(match.group(0), match.group(0)), plan)
+    return any(name in plan for name in index_names), plan
+
+
+async def main() -> int:
+    failures = 0
+    parent_indexes = {}
+    async with get_async_engine().connect() as conn:
+        if conn.dialect.name == "postgresql":
+            await conn.execute(text("SET enable_seqscan = off"))
+            parent_indexes = dict((await conn.execute(PARTITION_INDEXES_QUERY)).all())
+        
+        for description, query, index_names in EXPECTED_PLANS:
+            if isinstance(index_names, str):
+                index_names = (index_names,)
+            ok, plan = await check_plan(conn, query, index_names, parent_indexes)
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {description:<30} expects {' or '.join(index_names)}")
+            if not ok:
+                print("     " + plan.replace("\n", "\n     "))
+    
+    await close_db()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
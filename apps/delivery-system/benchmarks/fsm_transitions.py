@@ -0,0 +1,192 @@
+"""
+Order FSM throughput under concurrent drivers
+
+Seeds ``--orders`` paid orders, then ``--drivers`` concurrent workers walk
+the order list in random order and try to take each one ("assign_driver");
+the winner drives it to DELIVERED, one transaction per event. Every order
+is contended by every driver, so most assignments lose the race.
+
+Modes:
+    cas                 src.services.fsm_service (conditional UPDATE ... RETURNING)
+    select_for_update   SELECT ... FOR UPDATE, check, then UPDATE (PostgreSQL only)
+
+Usage (from apps/delivery-system):
+    python benchmarks/fsm_transitions.py [--orders 2000] [--drivers 16] [--mode cas]
+    DATABASE_URL=postgresql+asyncpg://... python benchmarks/fsm_transitions.py --mode select_for_update
+
+Without DATABASE_URL a temporary SQLite database is created. SQLite
+serializes writers, so there the drivers take turns writing (an in-process
+lock instead of "database is locked" errors once busy waits time out);
+compare modes and concurrency on PostgreSQL.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_tmp.name}/bench.db")
+os.environ.setdefault("REDIS_URL", "memory://")
+
+from sqlalchemy import delete, insert, select, update  # noqa: E402
+
+from src.core.database import Base, close_db, get_async_engine, get_async_sessionmaker  # noqa: E402
+from src.core.ids import new_id  # noqa: E402
+from src.core.partitioning import utcnow  # noqa: E402
+from src.models import Order, OrderStatus, OutboxEvent, User, UserRole  # noqa: E402
+from src.services.fsm_service import InvalidTransition, OrderFSMService  # noqa: E402
+
+CONSUMER_ID = "00000000-0000-0000-0000-00000000be01"
+DRIVER_EVENTS = ["start_pickup", "pick_up", "start_delivery", "deliver"]
+
+
+def driver_id(number: int) -> str:
+    return f"00000000-0000-0000-0001-{number:012d}"
+
+
+async def seed(orders: int, drivers: int) -> list:
+    """Create the schema, the users and ``orders`` orders in PAID status"""
+    engine = get_async_engine()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(delete(OutboxEvent))
+        await conn.execute(delete(Order).where(Order.consumer_id == CONSUMER_ID))
+        await conn.execute(delete(User).where(User.id.in_([CONSUMER_ID] + [driver_id(d) for d in range(drivers)])))
+        await conn.execute(insert(User), [
+            {
+                "id": user_id, "email": f"bench-{i}@pyloto.test", "phone": f"+55{i:011d}",
+                "password_hash": "-", "first_name": "Bench", "last_name": "User", "role": role,
+            }
+            for i, (user_id, role) in enumerate(
+                [(CONSUMER_ID, UserRole.CONSUMER)] + [(driver_id(d), UserRole.DRIVER) for d in range(drivers)]
+            )
+        ])
+        ids = [new_id() for _ in range(orders)]
+        await conn.execute(insert(Order), [
+            {
+                "id": order_id,
+                "order_number": f"F{i:07d}",
+                "consumer_id": CONSUMER_ID,
+                "status": OrderStatus.PAID,
+                "item_description": "benchmark item",
+                "pickup_contact_name": "A", "pickup_contact_phone": "1",
+                "pickup_address_line1": "Rua A, 1", "pickup_city": "São Paulo", "pickup_state": "SP",
+                "delivery_contact_name": "B", "delivery_contact_phone": "2",
+                "delivery_address_line1": "Rua B, 2", "delivery_city": "São Paulo", "delivery_state": "SP",
+            }
+            for i, order_id in enumerate(ids)
+        ])
+    return ids
+
+
+async def apply_cas(fsm: OrderFSMService, order_id: str, event: str, **values) -> bool:
+    """One event as a conditional UPDATE; False if another driver won"""
+    async with get_async_sessionmaker()() as session:
+        try:
+            async with session.begin():
+                await fsm.apply(session, order_id, event, **values)
+            return True
+        except InvalidTransition:
+            return False
+
+
+async def apply_locked(fsm: OrderFSMService, order_id: str, event: str, **values) -> bool:
+    """One event as SELECT ... FOR UPDATE, check, UPDATE"""
+    transition = fsm.transition(event)
+    async with get_async_sessionmaker()() as session:
+        async with session.begin():
+            status = await session.scalar(
+                select(Order.status).where(Order.id == order_id).with_for_update()
+            )
+            if status not in transition.sources:
+                return False
+            assignments = {"status": transition.target, **values}
+            if transition.timestamp:
+                assignments[transition.timestamp] = utcnow()
+            await session.execute(
+                update(Order).where(Order.id == order_id).values(**assignments)
+                .execution_options(synchronize_session=False)
+            )
+            return True
+
+
+def serialized(apply):
+    """Run one event at a time (SQLite has a single writer)"""
+    lock = asyncio.Lock()
+    
+    async def apply_serialized(fsm: OrderFSMService, order_id: str, event: str, **values) -> bool:
+        async with lock:
+            return await apply(fsm, order_id, event, **values)
+    return apply_serialized
+
+
+async def driver(driver_id: str, order_ids: list, apply, fsm: OrderFSMService, latencies: list, counts: dict) -> None:
+    """Try to take every order; deliver the ones won"""
+    for order_id in random.sample(order_ids, len(order_ids)):
+        started = time.perf_counter()
+        won = await apply(fsm, order_id, "assign_driver", assigned_driver_id=driver_id)
+        latencies.append(time.perf_counter() - started)
+        if not won:
+            counts["conflicts"] += 1
+            continue
+        counts["transitions"] += 1
+        
+        for event in DRIVER_EVENTS:
+            started = time.perf_counter()
+            if not await apply(fsm, order_id, event):
+                raise RuntimeError(f"{event} rejected for {order_id} owned by {driver_id}")
+            latencies.append(time.perf_counter() - started)
+            counts["transitions"] += 1
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--drivers", type=int, default=16)
+    parser.add_argument("--mode", choices=("cas", "select_for_update"), default="cas")
+    args = parser.parse_args()
+    
+    if args.mode == "select_for_update" and get_async_engine().dialect.name != "postgresql":
+        parser.error("select_for_update needs PostgreSQL (SQLite has no row locks)")
+    
+    order_ids = await seed(args.orders, args.drivers)
+    fsm = OrderFSMService()
+    apply = apply_cas if args.mode == "cas" else apply_locked
+    if get_async_engine().dialect.name == "sqlite":
+        apply = serialized(apply)
+    latencies: list = []
+    counts = {"transitions": 0, "conflicts": 0}
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        driver(driver_id(d), order_ids, apply, fsm, latencies, counts)
+        for d in range(args.drivers)
+    ))
+    elapsed = time.perf_counter() - started
+    
+    async with get_async_sessionmaker()() as session:
+        delivered = await session.scalar(
+            select(Order.id).where(Order.consumer_id == CONSUMER_ID, Order.status != OrderStatus.DELIVERED).limit(1)
+        )
+    assert delivered is None, "some orders were not delivered"
+    assert counts["transitions"] == args.orders * (1 + len(DRIVER_EVENTS)), "lost or duplicated transitions"
+    
+    latencies.sort()
+    print(f"mode {args.mode}, {args.orders} orders, {args.drivers} drivers, {get_async_engine().dialect.name}")
+    print(f"transitions      {counts['transitions']} in {elapsed:.2f}s ({counts['transitions'] / elapsed:,.0f}/s)")
+    print(f"lost races       {counts['conflicts']}")
+    print(f"latency p50      {statistics.median(latencies) * 1000:.2f} ms")
+    print(f"latency p99      {latencies[int(len(latencies) * 0.99) - 1] * 1000:.2f} ms")
+    
+    await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
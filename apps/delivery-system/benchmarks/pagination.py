@@ -0,0 +1,144 @@
+"""
+Keyset vs OFFSET pagination benchmark
+
+Seeds ``--rows`` orders and times fetching page 1 and page ``--page`` of
+the consumer order listing with OFFSET/LIMIT and with the keyset helper
+(src.core.pagination). Keyset pages should cost the same at any depth.
+Orders share timestamps in runs of seven, and the keyset pages are checked
+against OFFSET ones, so a cursor that breaks ties wrongly fails the run.
+
+Usage (from apps/delivery-system):
+    python benchmarks/pagination.py [--rows 200000] [--page 10000] [--page-size 20]
+    DATABASE_URL=postgresql+asyncpg://... python benchmarks/pagination.py --no-seed
+
+Without DATABASE_URL a temporary SQLite database is created.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_tmp.name}/bench.db")
+os.environ.setdefault("REDIS_URL", "memory://")
+
+from sqlalchemy import insert  # noqa: E402
+
+from src.core.database import Base, close_db, get_async_engine, get_async_sessionmaker  # noqa: E402
+from src.core.ids import new_id  # noqa: E402
+from src.core.pagination import PageParams, encode_cursor, paginate  # noqa: E402
+from src.models import Order, User, UserRole  # noqa: E402
+from src.repositories.orders import orders_query  # noqa: E402
+
+CONSUMER_ID = "00000000-0000-0000-0000-00000000be01"
+
+
+async def seed(rows: int) -> None:
+    """Create the schema and insert ``rows`` orders for one consumer"""
+    engine = get_async_engine()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User), [{
+            "id": CONSUMER_ID, "email": "bench@pyloto.test", "phone": "+5500000000000",
+            "password_hash": "-", "first_name": "Bench", "last_name": "Consumer", "role": UserRole.CONSUMER,
+        }])
+    
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    chunk = 5000
+    for offset in range(0, rows, chunk):
+        batch = [
+            {
+                "id": new_id(),
+                "order_number": f"B{i:09d}",
+                "consumer_id": CONSUMER_ID,
+                "item_description": "benchmark item",
+                "pickup_contact_name": "A", "pickup_contact_phone": "1",
+                "pickup_address_line1": "Rua A, 1", "pickup_city": "São Paulo", "pickup_state": "SP",
+                "delivery_contact_name": "B", "delivery_contact_phone": "2",
+                "delivery_address_line1": "Rua B, 2", "delivery_city": "São Paulo", "delivery_state": "SP",
+                # Seven orders per timestamp, so pages also end inside runs of ties (id breaks them)
+                "created_at": start + timedelta(seconds=i // 7),
+            }
+            for i in range(offset, min(offset + chunk, rows))
+        ]
+        async with engine.begin() as conn:
+            await conn.execute(insert(Order), batch)
+
+
+async def time_query(func, repeat: int) -> float:
+    """Median wall time of ``func`` in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--page", type=int, default=10_000)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--no-seed", action="store_true", help="Use existing rows for CONSUMER_ID")
+    args = parser.parse_args()
+    
+    if not args.no_seed:
+        started = time.perf_counter()
+        await seed(args.rows)
+        print(f"seeded {args.rows} orders in {time.perf_counter() - started:.1f}s")
+    
+    query = orders_query(consumer_id=CONSUMER_ID)
+    skip = (args.page - 1) * args.page_size
+    
+    async with get_async_sessionmaker()() as session:
+        # Cursor of the last row before the requested page
+        boundary = (await session.execute(
+            query.order_by(Order.created_at.desc(), Order.id.desc()).offset(skip - 1).limit(1)
+        )).scalar_one()
+        deep_cursor = encode_cursor(boundary.created_at, boundary.id)
+        
+        async def offset_page(page_offset):
+            result = await session.execute(
+                query.order_by(Order.created_at.desc(), Order.id.desc()).offset(page_offset).limit(args.page_size)
+            )
+            return result.scalars().all()
+        
+        async def keyset_page(cursor):
+            return await paginate(session, query, Order, PageParams(limit=args.page_size, cursor=cursor))
+        
+        deep_offset = await offset_page(skip)
+        deep_keyset = await keyset_page(deep_cursor)
+        assert [o.id for o in deep_offset] == [o.id for o in deep_keyset.items], "keyset and OFFSET pages differ"
+        
+        # Consecutive pages from the first one, following next_cursor
+        cursor = None
+        for page_number in range(5):
+            keyset = await keyset_page(cursor)
+            expected = await offset_page(page_number * args.page_size)
+            assert [o.id for o in keyset.items] == [o.id for o in expected], f"keyset page {page_number + 1} differs"
+            cursor = keyset.next_cursor
+        
+        results = [
+            ("OFFSET  page 1", await time_query(lambda: offset_page(0), args.repeat)),
+            (f"OFFSET  page {args.page}", await time_query(lambda: offset_page(skip), args.repeat)),
+            ("keyset  page 1", await time_query(lambda: keyset_page(None), args.repeat)),
+            (f"keyset  page {args.page}", await time_query(lambda: keyset_page(deep_cursor), args.repeat)),
+        ]
+    
+    for label, ms in results:
+        print(f"{label:<22} median {ms:8.2f} ms")
+    
+    await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
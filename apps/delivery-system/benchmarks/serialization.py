@@ -0,0 +1,152 @@
+"""
+Order list serialization benchmark
+
+Seeds ``--orders`` orders and times producing the JSON body of one list
+response holding all of them:
+
+    to_dict             Order.to_dict + jsonable_encoder + json.dumps (FastAPI's JSONResponse path)
+    compiled            serialize_order (compiled serializer) + orjson
+    rows                ORDER_SUMMARY_COLUMNS rows (no ORM objects) + orjson
+
+Encoding is timed on objects already loaded; "total" adds the query (ORM
+objects for the first two, plain rows for the last).
+
+Usage (from apps/delivery-system):
+    python benchmarks/serialization.py [--orders 1000] [--repeat 50]
+
+Without DATABASE_URL a temporary SQLite database is created.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_tmp.name}/bench.db")
+os.environ.setdefault("REDIS_URL", "memory://")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from sqlalchemy import delete, insert, select  # noqa: E402
+
+from src.core.database import Base, close_db, get_async_engine, get_async_sessionmaker  # noqa: E402
+from src.core.ids import new_id  # noqa: E402
+from src.core.responses import dumps  # noqa: E402
+from src.models import Order, User, UserRole  # noqa: E402
+from src.models.serialization import serialize_order, serialize_rows  # noqa: E402
+from src.repositories.orders import ORDER_SUMMARY_COLUMNS  # noqa: E402
+
+CONSUMER_ID = "00000000-0000-0000-0000-00000000be01"
+
+
+async def seed(orders: int) -> None:
+    """Create the schema and insert ``orders`` priced orders for one consumer"""
+    engine = get_async_engine()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(delete(Order).where(Order.consumer_id == CONSUMER_ID))
+        await conn.execute(delete(User).where(User.id == CONSUMER_ID))
+        await conn.execute(insert(User), [{
+            "id": CONSUMER_ID, "email": "bench@pyloto.test", "phone": "+5500000000000",
+            "password_hash": "-", "first_name": "Bench", "last_name": "Consumer", "role": UserRole.CONSUMER,
+        }])
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        await conn.execute(insert(Order), [
+            {
+                "id": new_id(),
+                "order_number": f"S{i:07d}",
+                "consumer_id": CONSUMER_ID,
+                "item_description": "benchmark item",
+                "pickup_contact_name": "A", "pickup_contact_phone": "1",
+                "pickup_address_line1": "Rua A, 1", "pickup_city": "São Paulo", "pickup_state": "SP",
+                "pickup_postal_code": "01000-000",
+                "delivery_contact_name": "B", "delivery_contact_phone": "2",
+                "delivery_address_line1": "Rua B, 2", "delivery_city": "São Paulo", "delivery_state": "SP",
+                "distance_km": Decimal("4.20") + i % 10,
+                "estimated_duration_minutes": 25,
+                "final_price_cents": 1890 + i % 7 * 100,
+                "created_at": start + timedelta(minutes=i),
+                "updated_at": start + timedelta(minutes=i),
+            }
+            for i in range(orders)
+        ])
+
+
+def encode_to_dict(orders: list) -> bytes:
+    return json.dumps(jsonable_encoder({"items": [order.to_dict() for order in orders]})).encode()
+
+
+def encode_compiled(orders: list) -> bytes:
+    return dumps({"items": [serialize_order(order) for order in orders]})
+
+
+def timed(fn, repeat: int) -> float:
+    """Median seconds of ``repeat`` calls"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+async def timed_async(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    
+    await seed(args.orders)
+    orm_query = select(Order).where(Order.consumer_id == CONSUMER_ID).order_by(Order.created_at.desc())
+    rows_query = orm_query.with_only_columns(*ORDER_SUMMARY_COLUMNS)
+    
+    async with get_async_sessionmaker()() as session:
+        orders = list((await session.execute(orm_query)).scalars().all())
+        rows = serialize_rows(await session.execute(rows_query))
+        
+        legacy, compiled = encode_to_dict(orders), encode_compiled(orders)
+        assert json.loads(legacy) == json.loads(compiled), "compiled serializer output differs from to_dict"
+        
+        async def load_orm():
+            session.expunge_all()
+            return list((await session.execute(orm_query)).scalars().all())
+        
+        async def load_rows():
+            return serialize_rows(await session.execute(rows_query))
+        
+        orm_load = await timed_async(load_orm, args.repeat)
+        rows_load = await timed_async(load_rows, args.repeat)
+    
+    results = [
+        ("to_dict", timed(lambda: encode_to_dict(orders), args.repeat), orm_load, len(legacy)),
+        ("compiled", timed(lambda: encode_compiled(orders), args.repeat), orm_load, len(compiled)),
+        ("rows", timed(lambda: dumps({"items": rows}), args.repeat), rows_load, len(dumps({"items": rows}))),
+    ]
+    
+    print(f"{args.orders} orders, median of {args.repeat} runs, {get_async_engine().dialect.name}")
+    print(f"{'path':<10} {'encode':>10} {'total':>10} {'bytes':>10}")
+    for name, encode, load, size in results:
+        print(f"{name:<10} {encode * 1000:>8.2f}ms {(encode + load) * 1000:>8.2f}ms {size:>10,}")
+    
+    await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,127 @@
+"""
+Startup cost benchmark for the database layer
+
+Measures, in fresh interpreters:
+  * import time of ``src.core.database`` (no engines should be built)
+  * ``init_db()`` time per DATABASE_SCHEMA_CHECK mode (``verify`` vs the old
+    ``create_all`` behaviour) against a throwaway SQLite database
+
+Usage (from apps/delivery-system):
+    python benchmarks/startup.py [--runs 10] [--database-url sqlite+aiosqlite:///./bench.db]
+
+Run it on an older checkout with the same arguments to compare before/after.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1]
+
+IMPORT_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import src.core.database as database
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "engine_built": getattr(database, "_async_engine", True) is not None,
+}))
+"""
+
+INIT_SNIPPET = """
+import asyncio, json, time
+import src.core.database as database
+
+async def main():
+    start = time.perf_counter()
+    await database.init_db()
+    elapsed = time.perf_counter() - start
+    close_db = getattr(database, "close_db", None)
+    if close_db:
+        await close_db()
+    else:
+        await database.async_engine.dispose()
+    print(json.dumps({"seconds": elapsed}))
+
+asyncio.run(main())
+"""
+
+
+def run_snippet(snippet: str, env: dict) -> dict:
+    """Run a snippet in a fresh interpreter and return its JSON output"""
+    result = subprocess.run(
+        [sys.executable, "-c", snippet],
+        cwd=APP_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "failed")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def prepare_database(env: dict) -> None:
+    """Migrate the benchmark database to head so ``verify`` succeeds"""
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        cwd=APP_DIR,
+        env=env,
+        capture_output=True,
+        check=True,
+        timeout=120,
+    )
+
+
+def summarize(label: str, samples: list) -> None:
+    """Print median / min / max in milliseconds"""
+    ms = [s * 1000 for s in samples]
+    print(
+        f"{label:<28} median {statistics.median(ms):8.1f} ms   "
+        f"min {min(ms):8.1f} ms   max {max(ms):8.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite+aiosqlite:///{tmp}/bench.db"
+        env = dict(os.environ, DATABASE_URL=database_url, REDIS_URL=os.environ.get("REDIS_URL", "memory://"))
+        
+        samples, engine_built = [], False
+        for _ in range(args.runs):
+            result = run_snippet(IMPORT_SNIPPET, env)
+            samples.append(result["seconds"])
+            engine_built = engine_built or result["engine_built"]
+        summarize("import src.core.database", samples)
+        print(f"{'engines built at import':<28} {engine_built}")
+        
+        try:
+            prepare_database(env)
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            print("alembic upgrade failed; 'verify' mode will be skipped")
+        
+        for mode in ("create_all", "verify"):
+            try:
+                samples = [
+                    run_snippet(INIT_SNIPPET, dict(env, DATABASE_SCHEMA_CHECK=mode))["seconds"]
+                    for _ in range(args.runs)
+                ]
+            except RuntimeError as e:
+                print(f"{'init_db (' + mode + ')':<28} failed: {e}")
+                continue
+            summarize(f"init_db ({mode})", samples)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Primary key storage benchmark
+
+Inserts ``--rows`` rows into three throwaway tables shaped like the order
+keys (a primary key plus an indexed reference to one of ``--parents``
+existing keys, like orders.consumer_id) and reports insert throughput and
+the size of the table and of each index:
+
+    varchar_uuid4       String(36) keys, random uuid4 (the previous models)
+    uuid_uuid4          Uuid keys, random uuid4
+    uuid_uuid7          Uuid keys, time-ordered UUIDv7 (src.core.ids, the current models)
+
+Uuid is the native uuid type on PostgreSQL (16 bytes) and CHAR(32) on
+SQLite, where only the key order makes a difference. Sizes come from
+pg_relation_size on PostgreSQL and the dbstat table on SQLite. The tables
+are dropped at the end.
+
+Usage (from apps/delivery-system):
+    python benchmarks/uuid_keys.py [--rows 200000] [--chunk 1000] [--parents 1000]
+
+Without DATABASE_URL a temporary SQLite database is created.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_tmp.name}/bench.db")
+os.environ.setdefault("REDIS_URL", "memory://")
+
+from sqlalchemy import Column, Index, MetaData, String, Table, Uuid, insert, text  # noqa: E402
+
+from src.core.database import close_db, get_async_engine  # noqa: E402
+from src.core.ids import new_id  # noqa: E402
+
+metadata = MetaData()
+
+
+def key_table(name: str, key_type) -> Table:
+    return Table(
+        f"bench_keys_{name}", metadata,
+        Column("id", key_type, primary_key=True),
+        Column("parent_id", key_type, nullable=False),
+        Index(f"ix_bench_keys_{name}_parent_id", "parent_id"),
+    )
+
+
+def uuid4_str() -> str:
+    return str(uuid.uuid4())
+
+
+# name -> (table, key generator)
+STRATEGIES = {
+    "varchar_uuid4": (key_table("varchar_uuid4", String(36)), uuid4_str),
+    "uuid_uuid4": (key_table("uuid_uuid4", Uuid(as_uuid=False)), uuid4_str),
+    "uuid_uuid7": (key_table("uuid_uuid7", Uuid(as_uuid=False)), new_id),
+}
+
+PG_SIZES = text(
+    "SELECT :table, pg_relation_size(CAST(:table AS regclass)) "
+    "UNION ALL SELECT indexname, pg_relation_size(CAST(indexname AS regclass)) FROM pg_indexes WHERE tablename = :table"
+)
+SQLITE_SIZES = text(
+    "SELECT s.name, sum(s.pgsize) FROM dbstat s JOIN sqlite_master m ON m.name = s.name "
+    "WHERE m.tbl_name = :table GROUP BY s.name"
+)
+
+
+async def insert_rows(table: Table, generate, rows: int, chunk: int, parents: int) -> float:
+    """Insert ``rows`` rows in transactions of ``chunk`` rows; returns rows per second"""
+    engine = get_async_engine()
+    parent_ids = [generate() for _ in range(parents)]
+    started = time.perf_counter()
+    for offset in range(0, rows, chunk):
+        batch = [
+            {"id": generate(), "parent_id": random.choice(parent_ids)}
+            for _ in range(min(chunk, rows - offset))
+        ]
+        async with engine.begin() as conn:
+            await conn.execute(insert(table), batch)
+    return rows / (time.perf_counter() - started)
+
+
+async def relation_sizes(table: Table) -> dict:
+    """Size in bytes of the table and of each of its indexes"""
+    engine = get_async_engine()
+    query = PG_SIZES if engine.dialect.name == "postgresql" else SQLITE_SIZES
+    async with engine.connect() as conn:
+        result = await conn.execute(query, {"table": table.name})
+        return {name: size for name, size in result.all()}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--chunk", type=int, default=1000, help="Rows per insert transaction")
+    parser.add_argument("--parents", type=int, default=1000, help="Distinct parent_id values")
+    args = parser.parse_args()
+    
+    engine = get_async_engine()
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata.drop_all)
+        await conn.run_sync(metadata.create_all)
+    
+    try:
+        for name, (table, generate) in STRATEGIES.items():
+            rate = await insert_rows(table, generate, args.rows, args.chunk, args.parents)
+            sizes = await relation_sizes(table)
+            print(f"{name:<14} {rate:>10,.0f} rows/s")
+            for relation, size in sorted(sizes.items()):
+                print(f"    {relation:<46} {size / 1024 / 1024:8.2f} MiB")
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(metadata.drop_all)
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,18 +5,25 @@ Main application entry point
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest, multiprocess
 import uvicorn
 import logging
+import os
+import shutil
+import tempfile
 from contextlib import asynccontextmanager
 
 from src.core.config import settings
-from src.core.database import init_db
-from src.core.cache import init_redis
+from src.core.database import init_db, close_db
+from src.core.cache import init_redis, cache
+from src.core.responses import ORJSONResponse
 from src.api.v1.api import api_router
 from src.middleware.logging import LoggingMiddleware
 from src.middleware.auth import AuthMiddleware
 from src.middleware.rate_limit import RateLimitMiddleware
+from src.middleware.query_stats import QueryStatsMiddleware
+from src.middleware.idempotency import IdempotencyMiddleware
 
 
 # Configure logging
@@ -51,6 +58,7 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("🛑 Shutting down Pyloto Delivery System...")
+    await close_db()
 
 
 # Create FastAPI app
@@ -60,6 +68,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs" if settings.DEBUG else None,
     redoc_url="/redoc" if settings.DEBUG else None,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -77,9 +86,12 @@ app.add_middleware(
     allowed_hosts=settings.ALLOWED_HOSTS
 )
 
+# Inside auth and rate limiting, so replays are authenticated and counted
+app.add_middleware(IdempotencyMiddleware)
 app.add_middleware(LoggingMiddleware)
 app.add_middleware(AuthMiddleware)
 app.add_middleware(RateLimitMiddleware)
+app.add_middleware(QueryStatsMiddleware)
 
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
@@ -107,11 +119,31 @@ async def health_check():
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics, of all workers when PROMETHEUS_MULTIPROC_DIR is set"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+if settings.DEBUG:
+    @app.get("/metrics/cache/hot-keys")
+    async def cache_hot_keys(limit: int = 20):
+        """Sampled report of the most accessed cache keys of this worker (keys may contain PII)"""
+        return {
+            "sample_rate": cache.hot_key_sampler.sample_rate,
+            "keys": cache.hot_keys(limit)
+        }
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler"""
     logger.error(f"Global exception: {exc}", exc_info=True)
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "detail": "Internal server error",
@@ -120,11 +152,29 @@ async def global_exception_handler(request: Request, exc: Exception):
     )
 
 
+def prepare_multiprocess_metrics() -> None:
+    """
+    Give the workers a shared, empty PROMETHEUS_MULTIPROC_DIR
+    
+    Must run before the workers start (they import prometheus_client with
+    it set); values of previous runs are removed.
+    """
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+    else:
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="pyloto-metrics-")
+
+
 if __name__ == "__main__":
+    workers = 1 if settings.DEBUG else 4
+    if workers > 1:
+        prepare_multiprocess_metrics()
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8000,
         reload=settings.DEBUG,
-        workers=1 if settings.DEBUG else 4
+        workers=workers
     )
\ No newline at end of file
@@ -0,0 +1,88 @@
+"""
+Alembic environment for the delivery system
+
+Uses the synchronous driver derived from DATABASE_URL, so migrations run
+with the same configuration as the application.
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+from sqlalchemy.engine import make_url
+
+from src.core.config import get_database_url
+from src.core.database import Base
+from src.core.partitioning import is_partition_of, is_partitioned
+import src.models  # noqa: F401 - register all models with Base
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+config.set_main_option(
+    "sqlalchemy.url",
+    get_database_url().replace("+asyncpg", "").replace("+aiosqlite", "")
+)
+
+target_metadata = Base.metadata
+
+PARTITIONED_TABLES = [table.name for table in target_metadata.sorted_tables if is_partitioned(table)]
+
+
+def include_object_for(dialect_name: str):
+    """
+    Skip objects restricted to other dialects with ``.ddl_if(dialect=...)``
+    and the partitions of partitioned tables (managed by src.jobs.partitions)
+    """
+    def include_object(obj, name, type_, reflected, compare_to):
+        if type_ == "table" and reflected and any(is_partition_of(table, name) for table in PARTITIONED_TABLES):
+            return False
+        ddl_if = getattr(obj, "_ddl_if", None)
+        if ddl_if is not None and ddl_if.dialect and ddl_if.dialect != dialect_name:
+            return False
+        return True
+    
+    return include_object
+
+
+def run_migrations_offline() -> None:
+    """Emit SQL to stdout instead of running against a database"""
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url"),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        compare_type=True,
+        include_object=include_object_for(make_url(config.get_main_option("sqlalchemy.url")).get_backend_name()),
+    )
+    
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run migrations against the configured database"""
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+    
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            compare_type=True,
+            render_as_batch=connection.dialect.name == "sqlite",
+            include_object=include_object_for(connection.dialect.name),
+        )
+        
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
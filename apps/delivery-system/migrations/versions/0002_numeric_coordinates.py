@@ -0,0 +1,142 @@
+"""numeric coordinates and geohash indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 12:05:10.214377
+
+Converts the String(20) latitude/longitude columns to double precision
+(unparseable values become NULL), adds an indexed geohash column per point
+and backfills it in batches (online mode only: with --sql the geohashes
+are left NULL and must be backfilled by running the online migration).
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from src.core.geo import geohash_or_none
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+# table -> [(latitude column, longitude column, geohash column)]
+POINTS = {
+    'orders': [
+        ('pickup_latitude', 'pickup_longitude', 'pickup_geohash'),
+        ('delivery_latitude', 'delivery_longitude', 'delivery_geohash'),
+    ],
+    'deliveries': [('current_latitude', 'current_longitude', 'current_geohash')],
+    'users': [('latitude', 'longitude', 'geohash')],
+}
+
+NUMERIC_PATTERN = r'^\s*[-+]?[0-9]+(\.[0-9]+)?\s*$'
+
+
+def _to_float_using(column: str) -> str:
+    return f"CASE WHEN {column} ~ '{NUMERIC_PATTERN}' THEN {column}::double precision END"
+
+
+def _null_invalid_coordinates(table: str, column: str) -> None:
+    """Clear unparseable values before a copy-based (SQLite) type change, which would cast them to 0.0"""
+    bind = op.get_bind()
+    rows_table = sa.table(table, sa.column('id', sa.String), sa.column(column, sa.String))
+    invalid = []
+    for row_id, value in bind.execute(
+        sa.select(rows_table.c.id, rows_table.c[column]).where(rows_table.c[column].isnot(None))
+    ):
+        try:
+            float(value)
+        except ValueError:
+            invalid.append({'row_id': row_id})
+    if invalid:
+        bind.execute(
+            rows_table.update().where(rows_table.c.id == sa.bindparam('row_id')).values({column: None}),
+            invalid,
+        )
+
+
+def _backfill_geohash(table: str, latitude: str, longitude: str, geohash: str) -> None:
+    """Compute geohashes in primary-key order, BATCH_SIZE rows at a time"""
+    bind = op.get_bind()
+    rows_table = sa.table(
+        table,
+        sa.column('id', sa.String),
+        sa.column(latitude, sa.Float),
+        sa.column(longitude, sa.Float),
+        sa.column(geohash, sa.String),
+    )
+    last_id = ''
+    while True:
+        rows = bind.execute(
+            sa.select(rows_table.c.id, rows_table.c[latitude], rows_table.c[longitude])
+            .where(rows_table.c.id > last_id)
+            .where(rows_table.c[latitude].isnot(None))
+            .where(rows_table.c[longitude].isnot(None))
+            .order_by(rows_table.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            rows_table.update()
+            .where(rows_table.c.id == sa.bindparam('row_id'))
+            .values({geohash: sa.bindparam('hash')}),
+            [{'row_id': row[0], 'hash': geohash_or_none(row[1], row[2])} for row in rows],
+        )
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+
+    for table, points in POINTS.items():
+        if not is_postgres:
+            for latitude, longitude, _ in points:
+                _null_invalid_coordinates(table, latitude)
+                _null_invalid_coordinates(table, longitude)
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for latitude, longitude, geohash in points:
+                for column in (latitude, longitude):
+                    batch_op.alter_column(
+                        column,
+                        existing_type=sa.String(length=20),
+                        type_=sa.Float(),
+                        existing_nullable=True,
+                        postgresql_using=_to_float_using(column) if is_postgres else None,
+                    )
+                batch_op.add_column(sa.Column(geohash, sa.String(length=12), nullable=True))
+
+        # Geohashes are computed in Python, which a --sql script cannot do
+        if not context.is_offline_mode():
+            for latitude, longitude, geohash in points:
+                _backfill_geohash(table, latitude, longitude, geohash)
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for _, _, geohash in points:
+                batch_op.create_index(batch_op.f(f'ix_{table}_{geohash}'), [geohash], unique=False)
+
+
+def downgrade() -> None:
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+
+    for table, points in POINTS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for latitude, longitude, geohash in points:
+                batch_op.drop_index(batch_op.f(f'ix_{table}_{geohash}'))
+                batch_op.drop_column(geohash)
+                for column in (latitude, longitude):
+                    batch_op.alter_column(
+                        column,
+                        existing_type=sa.Float(),
+                        type_=sa.String(length=20),
+                        existing_nullable=True,
+                        postgresql_using=f'{column}::text' if is_postgres else None,
+                    )
@@ -0,0 +1,66 @@
+"""hot query indexes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 11:28:14.019948
+
+Composite and partial indexes for the status dashboards, "active orders
+for consumer", the notification retry worker and payments awaiting the
+gateway webhook. On PostgreSQL they are built CONCURRENTLY so the tables
+stay writable during the migration.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+ACTIVE_ORDERS = (
+    "status IN ('QUOTED', 'PENDING_PAYMENT', 'PAID', 'ASSIGNED', 'PICKUP_PENDING', 'PICKED_UP', 'IN_TRANSIT') "
+    "AND deleted_at IS NULL"
+)
+AWAITING_PAYMENTS = "status IN ('PENDING', 'PROCESSING')"
+
+# (name, table, columns, partial index predicate)
+INDEXES = [
+    ('ix_orders_consumer_status_created', 'orders', ['consumer_id', 'status', 'created_at'], None),
+    ('ix_orders_merchant_status_created', 'orders', ['merchant_id', 'status', 'created_at'], None),
+    ('ix_orders_driver_status', 'orders', ['assigned_driver_id', 'status'], None),
+    ('ix_orders_active_status_created', 'orders', ['status', 'created_at'], ACTIVE_ORDERS),
+    ('ix_notifications_status_next_retry', 'notifications', ['status', 'next_retry_at'], 'next_retry_at IS NOT NULL'),
+    ('ix_notifications_user_created', 'notifications', ['user_id', 'created_at'], None),
+    ('ix_payments_awaiting_status_pix_expiration', 'payments', ['status', 'pix_expiration'], AWAITING_PAYMENTS),
+]
+
+
+def upgrade() -> None:
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            where_clause = sa.text(where) if where else None
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_where=where_clause,
+                sqlite_where=where_clause,
+                postgresql_concurrently=is_postgres,
+            )
+
+
+def downgrade() -> None:
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=is_postgres)
@@ -0,0 +1,198 @@
+"""json documents
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 13:41:52.508113
+
+Moves the JSON-in-Text columns to JSONB (PostgreSQL) / JSON (SQLite) and
+adds GIN indexes on the columns we filter on.
+
+Each column is converted through a shadow column so the table is never
+rewritten under a long lock: add <column>_json, copy BATCH_SIZE rows per
+transaction (values that are not valid JSON are kept as JSON strings),
+then drop the old column and rename the shadow column. On PostgreSQL a
+trigger keeps the shadow columns of inserted and updated rows in sync while
+the copy runs, so writes of the running release are not lost; it is dropped
+in the transaction that drops the old columns. SQLite rebuilds the tables
+(not online).
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 2000
+
+JSON_TYPE = sa.JSON(none_as_null=True).with_variant(postgresql.JSONB(none_as_null=True), 'postgresql')
+
+COLUMNS = {
+    'orders': ['price_factors', 'metadata'],
+    'deliveries': ['route_data', 'metadata'],
+    'payments': ['gateway_response', 'fraud_analysis', 'metadata'],
+    'notifications': ['external_response', 'template_variables', 'metadata'],
+    'users': ['notification_preferences', 'metadata'],
+}
+
+# (name, table, column)
+GIN_INDEXES = [
+    ('ix_orders_metadata_gin', 'orders', 'metadata'),
+    ('ix_orders_price_factors_gin', 'orders', 'price_factors'),
+    ('ix_payments_gateway_response_gin', 'payments', 'gateway_response'),
+    ('ix_users_notification_preferences_gin', 'users', 'notification_preferences'),
+]
+
+
+# PostgreSQL conversions used by the sync triggers, matching _parse/_dump
+TEXT_TO_JSONB_FUNCTION = """
+CREATE FUNCTION migration_0004_text_to_jsonb(value text) RETURNS jsonb LANGUAGE plpgsql IMMUTABLE AS $$
+BEGIN
+    IF value IS NULL OR value = '' THEN
+        RETURN NULL;
+    END IF;
+    RETURN value::jsonb;
+EXCEPTION WHEN invalid_text_representation THEN
+    RETURN to_jsonb(value);
+END $$
+"""
+
+JSONB_TO_TEXT_FUNCTION = """
+CREATE FUNCTION migration_0004_jsonb_to_text(value jsonb) RETURNS text LANGUAGE sql IMMUTABLE AS $$
+    SELECT CASE WHEN jsonb_typeof(value) = 'string' THEN value #>> '{}' ELSE value::text END
+$$
+"""
+
+SYNC_FUNCTION = """
+CREATE FUNCTION {table}_json_sync() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+{assignments}
+    RETURN NEW;
+END $$
+"""
+
+
+def _parse(value):
+    if value is None or value == '':
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value  # Not JSON: keep the text as a JSON string
+
+
+def _dump(value):
+    if value is None:
+        return None
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+
+def _copy_in_batches(table: str, source: str, target: str, source_type, target_type, convert) -> None:
+    """Copy ``source`` into ``target`` in primary-key order, one transaction per batch"""
+    bind = op.get_bind()
+    rows_table = sa.table(
+        table,
+        sa.column('id', sa.String),
+        sa.column(source, source_type),
+        sa.column(target, target_type),
+    )
+    last_id = ''
+    while True:
+        rows = bind.execute(
+            sa.select(rows_table.c.id, rows_table.c[source])
+            .where(rows_table.c.id > last_id)
+            .where(rows_table.c[source].isnot(None))
+            .order_by(rows_table.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            rows_table.update()
+            .where(rows_table.c.id == sa.bindparam('row_id'))
+            .values({target: sa.bindparam('value', type_=target_type)}),
+            [{'row_id': row_id, 'value': convert(value)} for row_id, value in rows],
+        )
+        last_id = rows[-1][0]
+
+
+def _create_sync_trigger(table: str, columns, cast_function: str) -> None:
+    """Fill the shadow columns of rows written during the copy (PostgreSQL)"""
+    assignments = '\n'.join(f'    NEW.{column}_json := {cast_function}(NEW.{column});' for column in columns)
+    op.execute(SYNC_FUNCTION.format(table=table, assignments=assignments))
+    op.execute(
+        f'CREATE TRIGGER {table}_json_sync BEFORE INSERT OR UPDATE ON {table} '
+        f'FOR EACH ROW EXECUTE FUNCTION {table}_json_sync()'
+    )
+
+
+def _drop_sync_trigger(table: str) -> None:
+    op.execute(f'DROP TRIGGER {table}_json_sync ON {table}')
+    op.execute(f'DROP FUNCTION {table}_json_sync()')
+
+
+def _convert(source_type, target_type, convert) -> None:
+    postgres = op.get_context().dialect.name == 'postgresql'
+    cast_function = 'migration_0004_text_to_jsonb' if isinstance(target_type, sa.JSON) else 'migration_0004_jsonb_to_text'
+    if postgres:
+        op.execute(TEXT_TO_JSONB_FUNCTION if isinstance(target_type, sa.JSON) else JSONB_TO_TEXT_FUNCTION)
+
+    for table, columns in COLUMNS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in columns:
+                batch_op.add_column(sa.Column(f'{column}_json', target_type, nullable=True))
+        if postgres:
+            _create_sync_trigger(table, columns, cast_function)
+
+        with op.get_context().autocommit_block():
+            for column in columns:
+                if context.is_offline_mode():
+                    # SQL script: let the server convert (same rules as the trigger)
+                    op.execute(f'UPDATE {table} SET {column}_json = {cast_function}({column}) WHERE {column} IS NOT NULL')
+                else:
+                    _copy_in_batches(table, column, f'{column}_json', source_type, target_type, convert)
+
+        if postgres:
+            _drop_sync_trigger(table)
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in columns:
+                batch_op.drop_column(column)
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in columns:
+                batch_op.alter_column(f'{column}_json', new_column_name=column, existing_type=target_type)
+
+    if postgres:
+        op.execute(f'DROP FUNCTION {cast_function}')
+
+
+def upgrade() -> None:
+    _convert(sa.Text(), JSON_TYPE, _parse)
+
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, column in GIN_INDEXES:
+                op.create_index(
+                    name,
+                    table,
+                    [column],
+                    postgresql_using='gin',
+                    postgresql_ops={column: 'jsonb_path_ops'},
+                    postgresql_concurrently=True,
+                )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, _ in reversed(GIN_INDEXES):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+    _convert(JSON_TYPE, sa.Text(), _dump)
@@ -0,0 +1,56 @@
+"""keyset pagination indexes
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 14:20:37.118402
+
+(created_at, id) indexes, optionally prefixed by the owner column, so
+every listing page is a bounded index range scan. Replaces
+ix_notifications_user_created with the (user_id, created_at, id) variant.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns)
+INDEXES = [
+    ('ix_orders_created_id', 'orders', ['created_at', 'id']),
+    ('ix_orders_consumer_created_id', 'orders', ['consumer_id', 'created_at', 'id']),
+    ('ix_orders_merchant_created_id', 'orders', ['merchant_id', 'created_at', 'id']),
+    ('ix_deliveries_driver_created_id', 'deliveries', ['driver_id', 'created_at', 'id']),
+    ('ix_notifications_user_created_id', 'notifications', ['user_id', 'created_at', 'id']),
+    ('ix_users_created_id', 'users', ['created_at', 'id']),
+]
+
+REPLACED = ('ix_notifications_user_created', 'notifications', ['user_id', 'created_at'])
+
+
+def upgrade() -> None:
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=is_postgres)
+
+        name, table, _ = REPLACED
+        op.drop_index(name, table_name=table, postgresql_concurrently=is_postgres)
+
+
+def downgrade() -> None:
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+
+    with op.get_context().autocommit_block():
+        name, table, columns = REPLACED
+        op.create_index(name, table, columns, unique=False, postgresql_concurrently=is_postgres)
+
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=is_postgres)
@@ -0,0 +1,212 @@
+"""monthly partitions for orders and notifications
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 15:02:44.530172
+
+PostgreSQL: rebuilds orders and notifications as tables range-partitioned
+by created_at month. The primary key becomes (id, created_at) and the
+unique order_number index becomes a plain one, since unique constraints on
+a partitioned table must include the partition key. Foreign keys that
+reference orders (payments, deliveries, notifications) are dropped for the
+same reason. Partitions are created from the oldest row's month to three
+months ahead, plus a default one; rows are copied into them.
+
+The copy holds an exclusive lock on both tables for its whole duration, so
+run this upgrade in a maintenance window.
+
+SQLite has no partitioning: the key, index and foreign key changes are
+applied so the schema matches the models.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PREMAKE_MONTHS = 3
+
+ACTIVE_ORDERS = (
+    "status IN ('QUOTED', 'PENDING_PAYMENT', 'PAID', 'ASSIGNED', 'PICKUP_PENDING', 'PICKED_UP', 'IN_TRANSIT') "
+    "AND deleted_at IS NULL"
+)
+
+# table -> [(name, columns, partial index predicate)]
+INDEXES = {
+    'orders': [
+        ('ix_orders_consumer_id', ['consumer_id'], None),
+        ('ix_orders_merchant_id', ['merchant_id'], None),
+        ('ix_orders_assigned_driver_id', ['assigned_driver_id'], None),
+        ('ix_orders_order_number', ['order_number'], None),
+        ('ix_orders_pickup_geohash', ['pickup_geohash'], None),
+        ('ix_orders_delivery_geohash', ['delivery_geohash'], None),
+        ('ix_orders_consumer_status_created', ['consumer_id', 'status', 'created_at'], None),
+        ('ix_orders_merchant_status_created', ['merchant_id', 'status', 'created_at'], None),
+        ('ix_orders_driver_status', ['assigned_driver_id', 'status'], None),
+        ('ix_orders_active_status_created', ['status', 'created_at'], ACTIVE_ORDERS),
+        ('ix_orders_created_id', ['created_at', 'id'], None),
+        ('ix_orders_consumer_created_id', ['consumer_id', 'created_at', 'id'], None),
+        ('ix_orders_merchant_created_id', ['merchant_id', 'created_at', 'id'], None),
+    ],
+    'notifications': [
+        ('ix_notifications_user_id', ['user_id'], None),
+        ('ix_notifications_order_id', ['order_id'], None),
+        ('ix_notifications_status_next_retry', ['status', 'next_retry_at'], 'next_retry_at IS NOT NULL'),
+        ('ix_notifications_user_created_id', ['user_id', 'created_at', 'id'], None),
+    ],
+}
+
+# PostgreSQL-only GIN indexes: (name, table, column)
+GIN_INDEXES = [
+    ('ix_orders_metadata_gin', 'orders', 'metadata'),
+    ('ix_orders_price_factors_gin', 'orders', 'price_factors'),
+]
+
+# Foreign keys of the rebuilt tables: (table, column)
+USER_FOREIGN_KEYS = [
+    ('orders', 'consumer_id'),
+    ('orders', 'merchant_id'),
+    ('orders', 'assigned_driver_id'),
+    ('notifications', 'user_id'),
+]
+
+# Foreign keys to orders.id that cannot exist once it is partitioned
+ORDER_FOREIGN_KEYS = ['payments', 'deliveries', 'notifications']
+
+# Alembic batch mode needs names for SQLite's unnamed constraints
+SQLITE_NAMING = {
+    'pk': 'pk_%(table_name)s',
+    'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s',
+}
+
+# Monthly partitions from the oldest row (or now) up to PREMAKE_MONTHS ahead;
+# names and UTC bounds match src.core.partitioning
+CREATE_PARTITIONS = """
+DO $$
+DECLARE
+    partition_month timestamp := date_trunc('month', COALESCE((SELECT min(created_at) FROM {source}), now()) AT TIME ZONE 'UTC');
+    last_month timestamp := date_trunc('month', now() AT TIME ZONE 'UTC') + interval '{premake} months';
+BEGIN
+    WHILE partition_month <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF {table} FOR VALUES FROM (%L) TO (%L)',
+            '{table}_' || to_char(partition_month, 'YYYY_MM'),
+            partition_month::text || '+00',
+            (partition_month + interval '1 month')::text || '+00'
+        );
+        partition_month := partition_month + interval '1 month';
+    END LOOP;
+END $$
+"""
+
+
+def _create_indexes(table: str, unique_order_number: bool = False) -> None:
+    for name, columns, where in INDEXES[table]:
+        where_clause = sa.text(where) if where else None
+        op.create_index(
+            name,
+            table,
+            columns,
+            unique=unique_order_number and name == 'ix_orders_order_number',
+            postgresql_where=where_clause,
+        )
+    for name, gin_table, column in GIN_INDEXES:
+        if gin_table == table:
+            op.create_index(name, table, [column], postgresql_using='gin', postgresql_ops={column: 'jsonb_path_ops'})
+
+
+def _drop_indexes(table: str, table_name: str) -> None:
+    for name, _, _ in INDEXES[table]:
+        op.drop_index(name, table_name=table_name)
+    for name, gin_table, _ in GIN_INDEXES:
+        if gin_table == table:
+            op.drop_index(name, table_name=table_name)
+
+
+def _create_user_foreign_keys(table: str) -> None:
+    for fk_table, column in USER_FOREIGN_KEYS:
+        if fk_table == table:
+            op.create_foreign_key(f'{table}_{column}_fkey', table, 'users', [column], ['id'])
+
+
+def _rebuild_postgres(table: str, partitioned: bool) -> None:
+    """Copy ``table`` into a new (un)partitioned table of the same shape and swap them"""
+    old = f'{table}_old'
+    op.rename_table(table, old)
+    _drop_indexes(table, old)
+    op.drop_constraint(f'{table}_pkey', old, type_='primary')
+
+    partition_by = ' PARTITION BY RANGE (created_at)' if partitioned else ''
+    op.execute(f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS){partition_by}')
+    op.create_primary_key(f'{table}_pkey', table, ['id', 'created_at'] if partitioned else ['id'])
+    _create_user_foreign_keys(table)
+    if partitioned:
+        op.execute(CREATE_PARTITIONS.format(source=old, table=table, premake=PREMAKE_MONTHS))
+        op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+
+    op.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+    op.drop_table(old)
+    # Built after the copy; on a partitioned table each index cascades to the partitions
+    _create_indexes(table, unique_order_number=not partitioned)
+
+
+def _normalize_sqlite_timestamps(table: str) -> None:
+    """Store server-default timestamps in SQLAlchemy's format: created_at is now matched in UPDATE/DELETE"""
+    op.execute(
+        f"UPDATE {table} SET created_at = strftime('%Y-%m-%d %H:%M:%f000', created_at) "
+        f"WHERE created_at NOT LIKE '%.%'"
+    )
+
+
+def upgrade() -> None:
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+
+    for table in ORDER_FOREIGN_KEYS:
+        if is_postgres:
+            op.drop_constraint(f'{table}_order_id_fkey', table, type_='foreignkey')
+        else:
+            with op.batch_alter_table(table, schema=None, naming_convention=SQLITE_NAMING) as batch_op:
+                batch_op.drop_constraint(f'fk_{table}_order_id_orders', type_='foreignkey')
+
+    for table in INDEXES:
+        if is_postgres:
+            _rebuild_postgres(table, partitioned=True)
+            continue
+
+        _normalize_sqlite_timestamps(table)
+        with op.batch_alter_table(table, schema=None, recreate='always', naming_convention=SQLITE_NAMING) as batch_op:
+            batch_op.drop_constraint(f'pk_{table}', type_='primary')
+            batch_op.create_primary_key(f'pk_{table}', ['id', 'created_at'])
+            if table == 'orders':
+                batch_op.drop_index('ix_orders_order_number')
+                batch_op.create_index('ix_orders_order_number', ['order_number'], unique=False)
+
+
+def downgrade() -> None:
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+
+    for table in INDEXES:
+        if is_postgres:
+            _rebuild_postgres(table, partitioned=False)
+            continue
+
+        with op.batch_alter_table(table, schema=None, recreate='always', naming_convention=SQLITE_NAMING) as batch_op:
+            batch_op.drop_constraint(f'pk_{table}', type_='primary')
+            batch_op.create_primary_key(f'pk_{table}', ['id'])
+            if table == 'orders':
+                batch_op.drop_index('ix_orders_order_number')
+                batch_op.create_index('ix_orders_order_number', ['order_number'], unique=True)
+
+    for table in ORDER_FOREIGN_KEYS:
+        if is_postgres:
+            op.create_foreign_key(f'{table}_order_id_fkey', table, 'orders', ['order_id'], ['id'])
+        else:
+            with op.batch_alter_table(table, schema=None, naming_convention=SQLITE_NAMING) as batch_op:
+                batch_op.create_foreign_key(f'fk_{table}_order_id_orders', 'orders', ['order_id'], ['id'])
@@ -0,0 +1,62 @@
+"""outbox events
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 17:02:41.530118
+
+Transactional outbox: events written in the same transaction as an
+order/payment/delivery status change and published to the queue by the
+relay (src.jobs.outbox_relay).
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+JSON_TYPE = sa.JSON(none_as_null=True).with_variant(postgresql.JSONB(none_as_null=True), 'postgresql')
+
+# (name, columns, partial index predicate)
+INDEXES = [
+    ('ix_outbox_events_unpublished', ['created_at', 'id'], 'published_at IS NULL'),
+    ('ix_outbox_events_published_at', ['published_at'], 'published_at IS NOT NULL'),
+    ('ix_outbox_events_aggregate', ['aggregate_type', 'aggregate_id', 'created_at'], None),
+]
+
+
+def upgrade() -> None:
+    op.create_table('outbox_events',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('aggregate_type', sa.String(length=50), nullable=False),
+    sa.Column('aggregate_id', sa.String(), nullable=False),
+    sa.Column('event_type', sa.String(length=100), nullable=False),
+    sa.Column('payload', JSON_TYPE, nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('published_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    for name, columns, where in INDEXES:
+        where_clause = sa.text(where) if where else None
+        op.create_index(
+            name,
+            'outbox_events',
+            columns,
+            unique=False,
+            postgresql_where=where_clause,
+            sqlite_where=where_clause,
+        )
+
+
+def downgrade() -> None:
+    for name, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name='outbox_events')
+    op.drop_table('outbox_events')
@@ -0,0 +1,88 @@
+"""status events
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 18:11:06.402957
+
+Append-only status history of orders, deliveries and payments, written
+by the FSM service and the ORM flush listener. Existing orders and
+deliveries are backfilled from their creation and stage timestamp columns
+(previous status unknown, actor 'backfill'), so timelines and stage
+durations also cover rows created before this revision.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, columns)
+INDEXES = [
+    ('ix_status_events_entity_created', ['entity_type', 'entity_id', 'created_at']),
+    ('ix_status_events_type_created', ['entity_type', 'created_at']),
+]
+
+# entity type -> (table, [(timestamp column, status entered)])
+BACKFILL = {
+    'order': ('orders', [
+        ('created_at', 'draft'),
+        ('quote_generated_at', 'quoted'),
+        ('payment_confirmed_at', 'paid'),
+        ('driver_assigned_at', 'assigned'),
+        ('pickup_started_at', 'pickup_pending'),
+        ('picked_up_at', 'picked_up'),
+        ('delivery_started_at', 'in_transit'),
+        ('delivered_at', 'delivered'),
+        ('cancelled_at', 'cancelled'),
+    ]),
+    'delivery': ('deliveries', [
+        ('assigned_at', 'assigned'),
+        ('heading_to_pickup_at', 'heading_to_pickup'),
+        ('arrived_at_pickup_at', 'at_pickup'),
+        ('picked_up_at', 'picked_up'),
+        ('in_transit_at', 'in_transit'),
+        ('arrived_at_delivery_at', 'at_delivery'),
+        ('delivered_at', 'delivered'),
+        ('failed_at', 'failed'),
+        ('cancelled_at', 'cancelled'),
+    ]),
+}
+
+
+def upgrade() -> None:
+    op.create_table('status_events',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+    sa.Column('entity_type', sa.String(length=20), nullable=False),
+    sa.Column('entity_id', sa.String(), nullable=False),
+    sa.Column('from_status', sa.String(length=30), nullable=True),
+    sa.Column('to_status', sa.String(length=30), nullable=False),
+    sa.Column('event', sa.String(length=50), nullable=True),
+    sa.Column('actor', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    # Backfill before indexing: one INSERT ... SELECT per stage column
+    for entity_type, (table, stages) in BACKFILL.items():
+        for column, status in stages:
+            op.execute(
+                f"INSERT INTO status_events (entity_type, entity_id, to_status, actor, created_at) "
+                f"SELECT '{entity_type}', id, '{status}', 'backfill', {column} FROM {table} "
+                f"WHERE {column} IS NOT NULL"
+            )
+
+    for name, columns in INDEXES:
+        op.create_index(name, 'status_events', columns, unique=False)
+
+
+def downgrade() -> None:
+    for name, _ in reversed(INDEXES):
+        op.drop_index(name, table_name='status_events')
+    op.drop_table('status_events')
@@ -0,0 +1,34 @@
+"""order number blocks
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 19:02:17.845120
+
+Sequence order_number_blocks: each nextval reserves a block of 100 order
+number sequence values for one worker (src.services.order_number_service).
+PostgreSQL only; databases without sequences use the Redis counter.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ORDER_NUMBER_BLOCKS = sa.Sequence('order_number_blocks', increment=100)
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.supports_sequences:
+        op.execute(sa.schema.CreateSequence(ORDER_NUMBER_BLOCKS))
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.supports_sequences:
+        op.execute(sa.schema.DropSequence(ORDER_NUMBER_BLOCKS))
@@ -0,0 +1,75 @@
+"""uuid keys: expand
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 19:41:52.117302
+
+First step of moving the primary and foreign keys from varchar to native
+uuid without rewriting the tables under a lock (PostgreSQL):
+
+1. This revision adds a nullable ``<column>_uuid`` shadow column next to
+   every key column, and a trigger that fills the shadows of inserted and
+   updated rows. The previous release keeps running (do not restart it
+   with DATABASE_SCHEMA_CHECK=verify until step 3).
+2. ``python -m src.jobs.uuid_backfill`` fills the shadows of existing rows
+   in small committed batches, online.
+3. Revision 0011 swaps the shadows in and rebuilds the keys and indexes
+   (short exclusive lock per table), deployed with the release that uses
+   UUIDType.
+
+SQLite has nothing to do here; 0011 converts it in place.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table -> key columns converted to uuid
+KEY_COLUMNS = {
+    'users': ['id'],
+    'orders': ['id', 'consumer_id', 'merchant_id', 'assigned_driver_id'],
+    'deliveries': ['id', 'order_id', 'driver_id'],
+    'payments': ['id', 'order_id'],
+    'notifications': ['id', 'user_id', 'order_id'],
+    'outbox_events': ['id', 'aggregate_id'],
+    'status_events': ['entity_id'],
+}
+
+SYNC_FUNCTION = """
+CREATE FUNCTION {table}_uuid_sync() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+{assignments}
+    RETURN NEW;
+END $$
+"""
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name != 'postgresql':
+        return
+
+    for table, columns in KEY_COLUMNS.items():
+        op.execute(f'ALTER TABLE {table} ' + ', '.join(f'ADD COLUMN {column}_uuid uuid' for column in columns))
+        assignments = '\n'.join(f'    NEW.{column}_uuid := NEW.{column}::uuid;' for column in columns)
+        op.execute(SYNC_FUNCTION.format(table=table, assignments=assignments))
+        op.execute(
+            f'CREATE TRIGGER {table}_uuid_sync BEFORE INSERT OR UPDATE ON {table} '
+            f'FOR EACH ROW EXECUTE FUNCTION {table}_uuid_sync()'
+        )
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name != 'postgresql':
+        return
+
+    for table, columns in reversed(KEY_COLUMNS.items()):
+        op.execute(f'DROP TRIGGER {table}_uuid_sync ON {table}')
+        op.execute(f'DROP FUNCTION {table}_uuid_sync()')
+        op.execute(f'ALTER TABLE {table} ' + ', '.join(f'DROP COLUMN {column}_uuid' for column in columns))
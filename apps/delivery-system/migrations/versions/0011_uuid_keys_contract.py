@@ -0,0 +1,193 @@
+"""uuid keys: contract
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 19:58:03.640871
+
+Last step of the varchar -> uuid key migration (see 0010).
+
+PostgreSQL: fills the shadow columns of any rows src.jobs.uuid_backfill did
+not reach (every row, if it was not run), drops the sync triggers and the
+varchar columns, renames the shadows into place and rebuilds the primary
+keys, foreign keys and indexes on them. Each table is locked exclusively
+while its indexes are built; with the backfill done beforehand, no table
+rewrite happens here.
+
+SQLite: keys are rewritten in place as 32-char hex (the CHAR(32) storage
+of SQLAlchemy's Uuid type) and the columns retyped.
+
+Existing keys keep their values; new rows get time-ordered UUIDv7 keys
+(src.core.ids).
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table -> key columns converted to uuid
+KEY_COLUMNS = {
+    'users': ['id'],
+    'orders': ['id', 'consumer_id', 'merchant_id', 'assigned_driver_id'],
+    'deliveries': ['id', 'order_id', 'driver_id'],
+    'payments': ['id', 'order_id'],
+    'notifications': ['id', 'user_id', 'order_id'],
+    'outbox_events': ['id', 'aggregate_id'],
+    'status_events': ['entity_id'],
+}
+
+NULLABLE = {('orders', 'merchant_id'), ('orders', 'assigned_driver_id'), ('notifications', 'order_id')}
+
+# table -> primary key columns (status_events keeps its bigint key)
+PRIMARY_KEYS = {
+    'users': ['id'],
+    'orders': ['id', 'created_at'],
+    'deliveries': ['id'],
+    'payments': ['id'],
+    'notifications': ['id', 'created_at'],
+    'outbox_events': ['id'],
+}
+
+# Indexes on the key columns: (name, table, columns, unique, partial index predicate)
+INDEXES = [
+    ('ix_users_created_id', 'users', ['created_at', 'id'], False, None),
+    ('ix_orders_consumer_id', 'orders', ['consumer_id'], False, None),
+    ('ix_orders_merchant_id', 'orders', ['merchant_id'], False, None),
+    ('ix_orders_assigned_driver_id', 'orders', ['assigned_driver_id'], False, None),
+    ('ix_orders_consumer_status_created', 'orders', ['consumer_id', 'status', 'created_at'], False, None),
+    ('ix_orders_merchant_status_created', 'orders', ['merchant_id', 'status', 'created_at'], False, None),
+    ('ix_orders_driver_status', 'orders', ['assigned_driver_id', 'status'], False, None),
+    ('ix_orders_created_id', 'orders', ['created_at', 'id'], False, None),
+    ('ix_orders_consumer_created_id', 'orders', ['consumer_id', 'created_at', 'id'], False, None),
+    ('ix_orders_merchant_created_id', 'orders', ['merchant_id', 'created_at', 'id'], False, None),
+    ('ix_deliveries_order_id', 'deliveries', ['order_id'], True, None),
+    ('ix_deliveries_driver_id', 'deliveries', ['driver_id'], False, None),
+    ('ix_deliveries_driver_created_id', 'deliveries', ['driver_id', 'created_at', 'id'], False, None),
+    ('ix_payments_order_id', 'payments', ['order_id'], True, None),
+    ('ix_notifications_user_id', 'notifications', ['user_id'], False, None),
+    ('ix_notifications_order_id', 'notifications', ['order_id'], False, None),
+    ('ix_notifications_user_created_id', 'notifications', ['user_id', 'created_at', 'id'], False, None),
+    ('ix_outbox_events_unpublished', 'outbox_events', ['created_at', 'id'], False, 'published_at IS NULL'),
+    ('ix_outbox_events_aggregate', 'outbox_events', ['aggregate_type', 'aggregate_id', 'created_at'], False, None),
+    ('ix_status_events_entity_created', 'status_events', ['entity_type', 'entity_id', 'created_at'], False, None),
+]
+
+# Foreign keys to users.id: (table, column)
+USER_FOREIGN_KEYS = [
+    ('orders', 'consumer_id'),
+    ('orders', 'merchant_id'),
+    ('orders', 'assigned_driver_id'),
+    ('deliveries', 'driver_id'),
+    ('notifications', 'user_id'),
+]
+
+SYNC_FUNCTION = """
+CREATE FUNCTION {table}_uuid_sync() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+{assignments}
+    RETURN NEW;
+END $$
+"""
+
+# Alembic batch mode needs names for SQLite's unnamed constraints
+SQLITE_NAMING = {
+    'pk': 'pk_%(table_name)s',
+    'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s',
+}
+
+
+def _create_keys_and_indexes() -> None:
+    for table, columns in PRIMARY_KEYS.items():
+        op.create_primary_key(f'{table}_pkey', table, columns)
+    for name, table, columns, unique, where in INDEXES:
+        op.create_index(name, table, columns, unique=unique, postgresql_where=sa.text(where) if where else None)
+    for table, column in USER_FOREIGN_KEYS:
+        op.create_foreign_key(f'{table}_{column}_fkey', table, 'users', [column], ['id'])
+
+
+def _upgrade_postgres() -> None:
+    for table, columns in KEY_COLUMNS.items():
+        first = columns[0]
+        op.execute(
+            f'UPDATE {table} SET ' + ', '.join(f'{column}_uuid = {column}::uuid' for column in columns)
+            + f' WHERE {first}_uuid IS NULL'
+        )
+        op.execute(f'DROP TRIGGER {table}_uuid_sync ON {table}')
+        op.execute(f'DROP FUNCTION {table}_uuid_sync()')
+
+    # CASCADE drops the keys, foreign keys and indexes on the old columns
+    for table, columns in KEY_COLUMNS.items():
+        op.execute(f'ALTER TABLE {table} ' + ', '.join(f'DROP COLUMN {column} CASCADE' for column in columns))
+        for column in columns:
+            op.execute(f'ALTER TABLE {table} RENAME COLUMN {column}_uuid TO {column}')
+            if (table, column) not in NULLABLE:
+                op.execute(f'ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL')
+
+    _create_keys_and_indexes()
+
+
+def _downgrade_postgres() -> None:
+    for table, column in USER_FOREIGN_KEYS:
+        op.drop_constraint(f'{table}_{column}_fkey', table, type_='foreignkey')
+    for table, columns in KEY_COLUMNS.items():
+        op.execute(
+            f'ALTER TABLE {table} '
+            + ', '.join(f'ALTER COLUMN {column} TYPE varchar USING {column}::text' for column in columns)
+        )
+    for table, column in USER_FOREIGN_KEYS:
+        op.create_foreign_key(f'{table}_{column}_fkey', table, 'users', [column], ['id'])
+
+    # Back to the state after 0010: empty shadow columns kept in sync by the triggers
+    for table, columns in KEY_COLUMNS.items():
+        op.execute(f'ALTER TABLE {table} ' + ', '.join(f'ADD COLUMN {column}_uuid uuid' for column in columns))
+        assignments = '\n'.join(f'    NEW.{column}_uuid := NEW.{column}::uuid;' for column in columns)
+        op.execute(SYNC_FUNCTION.format(table=table, assignments=assignments))
+        op.execute(
+            f'CREATE TRIGGER {table}_uuid_sync BEFORE INSERT OR UPDATE ON {table} '
+            f'FOR EACH ROW EXECUTE FUNCTION {table}_uuid_sync()'
+        )
+
+
+def _retype_sqlite(to_uuid: bool) -> None:
+    # Parents and children are rewritten in the same transaction
+    op.execute('PRAGMA defer_foreign_keys = ON')
+    for table, columns in KEY_COLUMNS.items():
+        if to_uuid:
+            values = [f"{column} = replace({column}, '-', '')" for column in columns]
+        else:
+            values = [
+                f"{column} = substr({column}, 1, 8) || '-' || substr({column}, 9, 4) || '-' || "
+                f"substr({column}, 13, 4) || '-' || substr({column}, 17, 4) || '-' || substr({column}, 21)"
+                for column in columns
+            ]
+        op.execute(f'UPDATE {table} SET ' + ', '.join(values))
+
+        with op.batch_alter_table(table, schema=None, recreate='always', naming_convention=SQLITE_NAMING) as batch_op:
+            for column in columns:
+                batch_op.alter_column(
+                    column,
+                    type_=sa.Uuid(as_uuid=False) if to_uuid else sa.String(),
+                    existing_type=sa.String() if to_uuid else sa.Uuid(as_uuid=False),
+                    existing_nullable=(table, column) in NULLABLE,
+                )
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name == 'postgresql':
+        _upgrade_postgres()
+    else:
+        _retype_sqlite(to_uuid=True)
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name == 'postgresql':
+        _downgrade_postgres()
+    else:
+        _retype_sqlite(to_uuid=False)
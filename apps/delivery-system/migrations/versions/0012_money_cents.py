@@ -0,0 +1,86 @@
+"""money in integer cents
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19 21:07:44.392518
+
+Order and delivery amounts move from numeric(10, 2) reais to integer
+cents (src.core.money), like the payment amounts already are:
+orders.item_value, base_price and final_price, deliveries.driver_earnings
+and driver_tip become <column>_cents, rounded half away from zero.
+
+On PostgreSQL the type change rewrites orders (every partition) and
+deliveries under an exclusive lock; run it in a maintenance window.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0012'
+down_revision: Union[str, None] = '0011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table -> numeric columns converted to <column>_cents
+MONEY_COLUMNS = {
+    'orders': ['item_value', 'base_price', 'final_price'],
+    'deliveries': ['driver_earnings', 'driver_tip'],
+}
+
+# Alembic batch mode needs names for SQLite's unnamed constraints
+SQLITE_NAMING = {
+    'pk': 'pk_%(table_name)s',
+    'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s',
+}
+
+
+def upgrade() -> None:
+    postgres = op.get_context().dialect.name == 'postgresql'
+    for table, columns in MONEY_COLUMNS.items():
+        if postgres:
+            op.execute(
+                f'ALTER TABLE {table} '
+                + ', '.join(f'ALTER COLUMN {column} TYPE integer USING round({column} * 100)' for column in columns)
+            )
+            for column in columns:
+                op.execute(f'ALTER TABLE {table} RENAME COLUMN {column} TO {column}_cents')
+            continue
+
+        op.execute(f'UPDATE {table} SET ' + ', '.join(f'{column} = round({column} * 100)' for column in columns))
+        with op.batch_alter_table(table, schema=None, recreate='always', naming_convention=SQLITE_NAMING) as batch_op:
+            for column in columns:
+                batch_op.alter_column(
+                    column,
+                    new_column_name=f'{column}_cents',
+                    type_=sa.Integer(),
+                    existing_type=sa.Numeric(precision=10, scale=2),
+                    existing_nullable=True,
+                )
+
+
+def downgrade() -> None:
+    postgres = op.get_context().dialect.name == 'postgresql'
+    for table, columns in MONEY_COLUMNS.items():
+        if postgres:
+            for column in columns:
+                op.execute(f'ALTER TABLE {table} RENAME COLUMN {column}_cents TO {column}')
+            op.execute(
+                f'ALTER TABLE {table} '
+                + ', '.join(f'ALTER COLUMN {column} TYPE numeric(10, 2) USING {column} / 100.0' for column in columns)
+            )
+            continue
+
+        with op.batch_alter_table(table, schema=None, recreate='always', naming_convention=SQLITE_NAMING) as batch_op:
+            for column in columns:
+                batch_op.alter_column(
+                    f'{column}_cents',
+                    new_column_name=column,
+                    type_=sa.Numeric(precision=10, scale=2),
+                    existing_type=sa.Integer(),
+                    existing_nullable=True,
+                )
+        op.execute(f'UPDATE {table} SET ' + ', '.join(f'{column} = {column} / 100.0' for column in columns))
@@ -0,0 +1,64 @@
+"""payment webhook events
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19 23:18:52.604117
+
+Inbox of payment gateway notifications (src.models.payment_webhook): one
+row per reported charge status, unique on (gateway,
+gateway_transaction_id, gateway_status) so redeliveries are dropped, and
+applied to payments in batches by src.jobs.payment_webhooks.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0013'
+down_revision: Union[str, None] = '0012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+JSON_TYPE = sa.JSON(none_as_null=True).with_variant(postgresql.JSONB(none_as_null=True), 'postgresql')
+
+# (name, columns, partial index predicate)
+INDEXES = [
+    ('ix_payment_webhook_events_unprocessed', ['received_at', 'id'], 'processed_at IS NULL'),
+    ('ix_payment_webhook_events_processed_at', ['processed_at'], 'processed_at IS NOT NULL'),
+]
+
+
+def upgrade() -> None:
+    op.create_table('payment_webhook_events',
+    sa.Column('id', sa.Uuid(as_uuid=False), nullable=False),
+    sa.Column('gateway', sa.String(length=50), nullable=False),
+    sa.Column('gateway_transaction_id', sa.String(length=200), nullable=False),
+    sa.Column('gateway_status', sa.String(length=50), nullable=False),
+    sa.Column('payload', JSON_TYPE, nullable=False),
+    sa.Column('received_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('result', sa.String(length=30), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('gateway', 'gateway_transaction_id', 'gateway_status', name='uq_payment_webhook_events_charge_status')
+    )
+
+    for name, columns, where in INDEXES:
+        where_clause = sa.text(where) if where else None
+        op.create_index(
+            name,
+            'payment_webhook_events',
+            columns,
+            unique=False,
+            postgresql_where=where_clause,
+            sqlite_where=where_clause,
+        )
+
+
+def downgrade() -> None:
+    for name, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name='payment_webhook_events')
+    op.drop_table('payment_webhook_events')
@@ -0,0 +1,34 @@
+"""payment webhook retries
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-19 23:52:10.118305
+
+Inbox events whose charge matches no payment yet are retried instead of
+being closed as unknown_payment at once: ``attempts`` counts the batches
+that found no payment, ``retry_at`` holds the event back until its next
+attempt.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0014'
+down_revision: Union[str, None] = '0013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('payment_webhook_events', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('payment_webhook_events', sa.Column('retry_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('payment_webhook_events') as batch_op:
+        batch_op.drop_column('retry_at')
+        batch_op.drop_column('attempts')
@@ -3,12 +3,20 @@ WhatsApp webhook endpoint for O.T.T.O integration
 """
 from fastapi import APIRouter, Request, HTTPException, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
+import json
 import logging
 from typing import Dict, Any
 
-from ...core import get_async_session
+from ...core import get_async_session, settings
+from ...core.metrics import PAYMENT_WEBHOOKS
 from ...services.otto import OTTOService
 from ...services.auth import AuthService
+from ...services.payment_webhooks import (
+    WebhookSignatureError,
+    parse_pagseguro_notification,
+    record_notifications,
+    verify_pagseguro_signature,
+)
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -191,4 +199,37 @@ async def send_whatsapp_message(
         raise
     except Exception as e:
         logger.error(f"Error sending WhatsApp message: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/pagseguro")
+async def pagseguro_webhook(
+    request: Request,
+    db: AsyncSession = Depends(get_async_session)
+):
+    """
+    Receive PagSeguro charge notifications
+    
+    Only verifies and records them (duplicates are dropped); the payment
+    webhook worker (src.jobs.payment_webhooks) applies them in batches.
+    """
+    body = await request.body()
+    try:
+        verify_pagseguro_signature(body, request.headers.get("x-authenticity-token"), settings.PAGSEGURO_TOKEN)
+    except WebhookSignatureError as e:
+        logger.warning(f"PagSeguro webhook rejected: {e}")
+        PAYMENT_WEBHOOKS.labels(outcome="rejected").inc()
+        raise HTTPException(status_code=401, detail="Invalid signature")
+    
+    try:
+        rows = parse_pagseguro_notification(json.loads(body))
+    except ValueError as e:  # Invalid JSON or WebhookPayloadError
+        PAYMENT_WEBHOOKS.labels(outcome="invalid").inc()
+        raise HTTPException(status_code=400, detail=f"Invalid notification: {e}")
+    
+    received = await record_notifications(db, rows)
+    await db.commit()
+    
+    PAYMENT_WEBHOOKS.labels(outcome="received").inc(received)
+    PAYMENT_WEBHOOKS.labels(outcome="duplicate").inc(len(rows) - received)
+    return {"status": "accepted", "received": received, "duplicates": len(rows) - received}
@@ -3,12 +3,13 @@ Core module initialization
 Exposes main components for easy importing
 """
 from .config import settings
-from .database import get_async_session, get_sync_session, init_db, Base
+from .database import get_async_session, get_read_session, get_sync_session, init_db, Base
 from .cache import cache, session_manager, init_redis
 
 __all__ = [
     "settings",
     "get_async_session",
+    "get_read_session",
     "get_sync_session", 
     "init_db",
     "Base",
@@ -2,63 +2,369 @@
 Redis cache configuration and connection management
 """
 import redis.asyncio as redis
+from redis.asyncio.cluster import RedisCluster
+import fnmatch
 import json
 import pickle
-from typing import Any, Optional, Dict, Union
+import random
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Dict, List, Tuple, Union
 import logging
-from datetime import timedelta
+from datetime import datetime, timedelta
 
 from .config import settings
+from .circuit_breaker import CircuitBreaker, CircuitBreakerOpen
+from .memory_backend import InMemoryRedis
+from .metrics import CACHE_ERRORS, CACHE_HITS, CACHE_LATENCY, CACHE_MISSES, CACHE_PAYLOAD_BYTES
 
 logger = logging.getLogger(__name__)
 
-# Redis connection pool
+# Workloads get separate connection pools (and optionally separate
+# endpoints) so that e.g. queue traffic cannot starve session lookups.
+REDIS_WORKLOADS = ("cache", "session", "rate_limit", "queue")
+
+# Connection pools and clients per workload. redis_pool/redis_client are
+# kept as aliases of the "cache" workload.
+redis_pools: Dict[str, redis.ConnectionPool] = {}
+redis_clients: Dict[str, Any] = {}
 redis_pool: Optional[redis.ConnectionPool] = None
 redis_client: Optional[redis.Redis] = None
 
 
-async def init_redis():
-    """Initialize Redis connection"""
+def _create_cluster_client(url: str, **options: Any) -> RedisCluster:
+    """Create a Redis Cluster client from a ``redis+cluster://`` URL"""
+    return RedisCluster.from_url(url.replace("+cluster", "", 1), **options)
+
+
+# Alternative client factories keyed by REDIS_URL scheme. Any factory must
+# return an object implementing the redis.asyncio.Redis API subset we use.
+redis_backends: Dict[str, Callable[..., Any]] = {
+    "memory": InMemoryRedis.from_url,
+    "redis+cluster": _create_cluster_client,
+    "rediss+cluster": _create_cluster_client,
+}
+
+
+def register_redis_backend(scheme: str, factory: Callable[..., Any]) -> None:
+    """Register a client factory for a REDIS_URL scheme"""
+    redis_backends[scheme] = factory
+
+
+def hash_tag(value: Any) -> str:
+    """
+    Wrap a key part in a Redis Cluster hash tag
+    
+    Keys sharing the same tag hash to the same slot, e.g.
+    ``otto:thread:{5541...}`` and ``otto:quote:{5541...}``.
+    """
+    return f"{{{value}}}"
+
+
+def is_cluster(client: Any) -> bool:
+    """Whether a client talks to a Redis Cluster"""
+    return isinstance(client, RedisCluster)
+
+
+def open_pipeline(client: Any, transaction: bool = True):
+    """
+    Create a pipeline, falling back to a non-transactional one on a cluster
+    
+    Redis Cluster cannot run MULTI across slots; cluster pipelines route
+    each command to its node instead.
+    """
+    return client.pipeline(transaction=transaction and not is_cluster(client))
+
+
+def _workload_settings(workload: str) -> Tuple[str, int]:
+    """Get the URL and pool size configured for a workload"""
+    if workload == "cache":
+        return settings.REDIS_URL, settings.REDIS_MAX_CONNECTIONS
+    prefix = f"REDIS_{workload.upper()}"
+    url = getattr(settings, f"{prefix}_URL") or settings.REDIS_URL
+    return url, getattr(settings, f"{prefix}_MAX_CONNECTIONS")
+
+
+def _create_client(url: str, max_connections: int) -> Tuple[Optional[redis.ConnectionPool], Any]:
+    """Create a client (and its pool, for plain Redis URLs)"""
+    options = dict(
+        max_connections=max_connections,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+        decode_responses=True,
+        encoding="utf-8"
+    )
+    
+    scheme = url.split("://", 1)[0]
+    if scheme in redis_backends:
+        return None, redis_backends[scheme](url, **options)
+    
+    pool = redis.ConnectionPool.from_url(url, **options)
+    return pool, redis.Redis(connection_pool=pool)
+
+
+async def init_redis(workloads: Tuple[str, ...] = REDIS_WORKLOADS):
+    """Initialize Redis connections for the given workloads"""
     global redis_pool, redis_client
     
-    try:
-        redis_pool = redis.ConnectionPool.from_url(
-            settings.REDIS_URL,
-            max_connections=settings.REDIS_MAX_CONNECTIONS,
-            decode_responses=True,
-            encoding="utf-8"
-        )
-        
-        redis_client = redis.Redis(connection_pool=redis_pool)
-        
-        # Test connection
-        await redis_client.ping()
-        logger.info("Redis connection established successfully")
+    for workload in workloads:
+        url, max_connections = _workload_settings(workload)
+        try:
+            pool, client = _create_client(url, max_connections)
+            
+            # Test connection
+            await client.ping()
+            
+            if pool is not None:
+                redis_pools[workload] = pool
+            redis_clients[workload] = client
+            logger.info(
+                f"Redis connection established successfully "
+                f"(workload={workload}, scheme={url.split('://', 1)[0]}, max_connections={max_connections})"
+            )
         
-    except Exception as e:
-        logger.error(f"Error connecting to Redis: {e}")
-        raise
+        except Exception as e:
+            logger.error(f"Error connecting to Redis for workload {workload}: {e}")
+            raise
+    
+    redis_pool = redis_pools.get("cache")
+    redis_client = redis_clients.get("cache")
+
+
+async def get_redis(workload: str = "cache") -> redis.Redis:
+    """Get the Redis client for a workload"""
+    if workload not in redis_clients:
+        await init_redis((workload,))
+    return redis_clients[workload]
+
+
+# Failures that count against the Redis circuit breaker. Command errors such
+# as WRONGTYPE are application bugs, not an unhealthy server.
+REDIS_FAILURE_EXCEPTIONS = (redis.ConnectionError, redis.TimeoutError, OSError)
+
+
+class LocalCache:
+    """
+    Small in-process LRU cache with per-entry TTL
+    
+    Used by CacheManager as an L1 fallback so reads can still be served
+    (possibly slightly stale) while Redis is unavailable.
+    """
+    
+    def __init__(self, max_entries: int = 1024, ttl: int = 60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a value, dropping it if expired"""
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+    
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Store a value, evicting the least recently used entry if full"""
+        if self.max_entries <= 0:
+            return
+        ttl = min(ttl, self.ttl) if ttl else self.ttl
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+    
+    def delete(self, key: str) -> bool:
+        """Remove a value"""
+        return self._data.pop(key, None) is not None
+    
+    def contains(self, key: str) -> bool:
+        """Check whether a non-expired value is present"""
+        sentinel = object()
+        return self.get(key, sentinel) is not sentinel
+    
+    def delete_pattern(self, pattern: str) -> int:
+        """Remove all values whose key matches a glob pattern"""
+        keys = [key for key in self._data if fnmatch.fnmatchcase(key, pattern)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+    
+    def clear(self) -> None:
+        """Remove all values"""
+        self._data.clear()
+
+
+def key_namespace(key: Optional[str]) -> str:
+    """
+    Derive a low-cardinality metrics label from a cache key
+    
+    Keeps up to two leading segments and always drops the last one, which is
+    the identifier: ``otto:thread:+5541...`` -> ``otto:thread``,
+    ``session:<uuid>`` -> ``session``.
+    """
+    if not key:
+        return "none"
+    parts = key.split(":")
+    if len(parts) == 1:
+        return "other"
+    return ":".join(parts[:min(2, len(parts) - 1)])
 
 
-async def get_redis() -> redis.Redis:
-    """Get Redis client instance"""
-    if redis_client is None:
-        await init_redis()
-    return redis_client
+class HotKeySampler:
+    """
+    Sampled per-key access counter for finding hot keys
+    
+    Only ``sample_rate`` of accesses are counted, and the table is trimmed
+    back to the ``capacity`` most frequent keys whenever it doubles, so
+    memory and CPU stay bounded on the hot path.
+    """
+    
+    def __init__(self, sample_rate: float = 0.01, capacity: int = 1000):
+        self.sample_rate = sample_rate
+        self.capacity = capacity
+        self._counts: Counter = Counter()
+    
+    def record(self, key: str) -> None:
+        """Count an access to ``key`` with probability ``sample_rate``"""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return
+        self._counts[key] += 1
+        if len(self._counts) > self.capacity * 2:
+            self._counts = Counter(dict(self._counts.most_common(self.capacity)))
+    
+    def report(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most accessed keys with their estimated access counts"""
+        return [
+            {
+                "key": key,
+                "namespace": key_namespace(key),
+                "samples": samples,
+                "estimated_accesses": int(samples / self.sample_rate),
+            }
+            for key, samples in self._counts.most_common(limit)
+        ]
+    
+    def reset(self) -> None:
+        """Discard collected samples"""
+        self._counts.clear()
 
 
 class CacheManager:
-    """Cache manager for handling different types of data"""
+    """
+    Cache manager for handling different types of data
     
-    def __init__(self):
+    Each instance is bound to a Redis workload (see REDIS_WORKLOADS) and
+    uses that workload's connection pool.
+    
+    Every Redis call goes through a circuit breaker with a per-operation
+    timeout. While the breaker is open, calls fail fast without touching the
+    network: reads are served from the in-process L1 cache (or fall through
+    to the loader in ``get_or_load``) and writes only update L1.
+    
+    Hits, misses, latency, payload size and errors are exported to
+    Prometheus per key namespace (see ``key_namespace``), and a sample of
+    accessed keys feeds ``hot_keys()``.
+    """
+    
+    def __init__(self, workload: str = "cache"):
+        self.workload = workload
         self.redis_client = None
+        self.breaker = CircuitBreaker(
+            name=f"redis_{workload}",
+            failure_threshold=settings.REDIS_BREAKER_FAILURE_THRESHOLD,
+            recovery_timeout=settings.REDIS_BREAKER_RECOVERY_TIMEOUT,
+            operation_timeout=settings.REDIS_OPERATION_TIMEOUT,
+            failure_exceptions=REDIS_FAILURE_EXCEPTIONS,
+        )
+        self.local = LocalCache(
+            max_entries=settings.CACHE_L1_MAX_ENTRIES,
+            ttl=settings.CACHE_L1_TTL,
+        )
+        self.hot_key_sampler = HotKeySampler(
+            sample_rate=settings.CACHE_HOT_KEY_SAMPLE_RATE,
+            capacity=settings.CACHE_HOT_KEY_CAPACITY,
+        )
     
     async def _get_client(self) -> redis.Redis:
         """Get Redis client"""
         if self.redis_client is None:
-            self.redis_client = await get_redis()
+            self.redis_client = await get_redis(self.workload)
         return self.redis_client
     
+    async def _execute(
+        self,
+        func: Callable[[redis.Redis], Awaitable[Any]],
+        timeout: Optional[float] = None,
+        operation: str = "command",
+        key: Optional[str] = None
+    ) -> Any:
+        """
+        Run a Redis operation through the circuit breaker
+        
+        Args:
+            func: Coroutine function receiving the Redis client
+            timeout: Override for the per-operation timeout
+            operation: Operation name used as a metrics label
+            key: Key the operation targets, used for the namespace label
+        
+        Raises:
+            CircuitBreakerOpen: If Redis is currently considered unavailable
+        """
+        async def run():
+            client = await self._get_client()
+            return await func(client)
+        
+        namespace = key_namespace(key)
+        if key is not None:
+            self.hot_key_sampler.record(key)
+        
+        latency = CACHE_LATENCY.labels(namespace=namespace, operation=operation)
+        start = time.perf_counter()
+        try:
+            result = await self.breaker.call(run, timeout=timeout)
+        except CircuitBreakerOpen:
+            raise
+        except Exception:
+            latency.observe(time.perf_counter() - start)
+            CACHE_ERRORS.labels(namespace=namespace, operation=operation).inc()
+            raise
+        
+        latency.observe(time.perf_counter() - start)
+        return result
+    
+    @staticmethod
+    def _record_lookup(key: str, hit: bool, tier: str = "redis", size: Optional[int] = None) -> None:
+        """Record a cache hit or miss"""
+        namespace = key_namespace(key)
+        if hit:
+            CACHE_HITS.labels(namespace=namespace, tier=tier).inc()
+        else:
+            CACHE_MISSES.labels(namespace=namespace).inc()
+        if size is not None:
+            CACHE_PAYLOAD_BYTES.labels(namespace=namespace, operation="get").observe(size)
+    
+    def _local_fallback(self, key: str, default: Any) -> Any:
+        """Serve a read from L1 while Redis is unavailable"""
+        sentinel = object()
+        value = self.local.get(key, sentinel)
+        self._record_lookup(key, hit=value is not sentinel, tier="l1")
+        return default if value is sentinel else value
+    
+    def hot_keys(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Report the most frequently accessed keys (sampled)"""
+        return self.hot_key_sampler.report(limit)
+    
+    @property
+    def available(self) -> bool:
+        """Whether Redis calls are currently allowed by the breaker"""
+        return not self.breaker.is_open
+    
     async def set(
         self,
         key: str,
@@ -75,9 +381,13 @@ class CacheManager:
             expire: Expiration time in seconds or timedelta
             serialize: Serialization method ('json' or 'pickle')
         """
+        # Set expiration
+        if isinstance(expire, timedelta):
+            expire = int(expire.total_seconds())
+        
+        self.local.set(key, value, ttl=expire)
+        
         try:
-            client = await self._get_client()
-            
             # Serialize value
             if serialize == "json":
                 serialized_value = json.dumps(value, default=str)
@@ -86,13 +396,18 @@ class CacheManager:
             else:
                 serialized_value = str(value)
             
-            # Set expiration
-            if isinstance(expire, timedelta):
-                expire = int(expire.total_seconds())
-            
-            await client.set(key, serialized_value, ex=expire)
+            CACHE_PAYLOAD_BYTES.labels(namespace=key_namespace(key), operation="set").observe(
+                len(serialized_value)
+            )
+            await self._execute(
+                lambda client: client.set(key, serialized_value, ex=expire),
+                operation="set",
+                key=key
+            )
             return True
-            
+        
+        except CircuitBreakerOpen:
+            return False
         except Exception as e:
             logger.error(f"Error setting cache key {key}: {e}")
             return False
@@ -112,30 +427,61 @@ class CacheManager:
             serialize: Serialization method used when setting
         """
         try:
-            client = await self._get_client()
-            value = await client.get(key)
+            value = await self._execute(lambda client: client.get(key), operation="get", key=key)
             
             if value is None:
+                self._record_lookup(key, hit=False)
+                self.local.delete(key)
                 return default
             
+            self._record_lookup(key, hit=True, size=len(value))
+            
             # Deserialize value
             if serialize == "json":
-                return json.loads(value)
+                value = json.loads(value)
             elif serialize == "pickle":
-                return pickle.loads(value)
-            else:
-                return value
-                
+                value = pickle.loads(value)
+            
+            self.local.set(key, value)
+            return value
+        
+        except CircuitBreakerOpen:
+            return self._local_fallback(key, default)
         except Exception as e:
             logger.error(f"Error getting cache key {key}: {e}")
-            return default
+            return self._local_fallback(key, default)
+    
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        expire: Optional[Union[int, timedelta]] = None,
+        serialize: str = "json"
+    ) -> Any:
+        """
+        Get a value from cache, calling ``loader`` and caching its result on a miss
+        
+        While Redis is unavailable the loader is called directly (after an
+        L1 lookup) without waiting on the network.
+        """
+        sentinel = object()
+        value = await self.get(key, default=sentinel, serialize=serialize)
+        if value is not sentinel:
+            return value
+        
+        value = await loader()
+        if value is not None:
+            await self.set(key, value, expire=expire, serialize=serialize)
+        return value
     
     async def delete(self, key: str) -> bool:
         """Delete a key from cache"""
+        self.local.delete(key)
         try:
-            client = await self._get_client()
-            result = await client.delete(key)
+            result = await self._execute(lambda client: client.delete(key), operation="delete", key=key)
             return bool(result)
+        except CircuitBreakerOpen:
+            return False
         except Exception as e:
             logger.error(f"Error deleting cache key {key}: {e}")
             return False
@@ -143,19 +489,24 @@ class CacheManager:
     async def exists(self, key: str) -> bool:
         """Check if key exists in cache"""
         try:
-            client = await self._get_client()
-            result = await client.exists(key)
+            result = await self._execute(lambda client: client.exists(key), operation="exists", key=key)
             return bool(result)
+        except CircuitBreakerOpen:
+            return self.local.contains(key)
         except Exception as e:
             logger.error(f"Error checking cache key {key}: {e}")
-            return False
+            return self.local.contains(key)
     
     async def increment(self, key: str, amount: int = 1) -> Optional[int]:
         """Increment a numeric value in cache"""
         try:
-            client = await self._get_client()
-            result = await client.incrby(key, amount)
-            return result
+            return await self._execute(
+                lambda client: client.incrby(key, amount),
+                operation="increment",
+                key=key
+            )
+        except CircuitBreakerOpen:
+            return None
         except Exception as e:
             logger.error(f"Error incrementing cache key {key}: {e}")
             return None
@@ -163,21 +514,37 @@ class CacheManager:
     async def expire(self, key: str, seconds: int) -> bool:
         """Set expiration time for a key"""
         try:
-            client = await self._get_client()
-            result = await client.expire(key, seconds)
+            result = await self._execute(
+                lambda client: client.expire(key, seconds),
+                operation="expire",
+                key=key
+            )
             return bool(result)
+        except CircuitBreakerOpen:
+            return False
         except Exception as e:
             logger.error(f"Error setting expiration for cache key {key}: {e}")
             return False
     
     async def clear_pattern(self, pattern: str) -> int:
         """Clear all keys matching a pattern"""
-        try:
-            client = await self._get_client()
+        self.local.delete_pattern(pattern)
+        
+        async def _clear(client: redis.Redis) -> int:
             keys = await client.keys(pattern)
             if keys:
-                result = await client.delete(*keys)
-                return result
+                return await client.delete(*keys)
+            return 0
+        
+        try:
+            # Scanning the keyspace is slower than a single command
+            return await self._execute(
+                _clear,
+                timeout=settings.REDIS_SOCKET_TIMEOUT * 5,
+                operation="clear_pattern",
+                key=pattern
+            )
+        except CircuitBreakerOpen:
             return 0
         except Exception as e:
             logger.error(f"Error clearing cache pattern {pattern}: {e}")
@@ -190,46 +557,243 @@ cache = CacheManager()
 
 # Session storage for user sessions
 class SessionManager:
-    """Manage user sessions in Redis"""
+    """
+    Manage user sessions in Redis
     
-    def __init__(self, prefix: str = "session:"):
+    Sessions use the dedicated "session" Redis workload. Each session is
+    stored as a hash (``session:<id>``) so individual fields
+    can be updated in place with HSET/HINCRBY instead of rewriting the whole
+    payload. Field values are JSON encoded, which keeps integers compatible
+    with HINCRBY. A per-user set (``session:user:<user_id>``) indexes the
+    sessions of each user so they can all be revoked at once. The index has
+    no TTL, so it never expires while one of the user's sessions lives;
+    instead the ids of sessions that expired on their own are pruned when
+    it grows past ``index_prune_threshold`` on login, and the whole index
+    goes away with ``delete_user_sessions``.
+    """
+    
+    def __init__(self, prefix: str = "session:", store: Optional[CacheManager] = None):
         self.prefix = prefix
         self.default_expire = 60 * 60 * 24 * 7  # 7 days
+        self.index_prune_threshold = 32  # index size above which a login prunes it
+        self.store = store or CacheManager(workload="session")
+    
+    def _session_key(self, session_id: str) -> str:
+        """Build the Redis key for a session hash"""
+        return f"{self.prefix}{session_id}"
+    
+    def _user_index_key(self, user_id: str) -> str:
+        """Build the Redis key for a user's session index"""
+        return f"{self.prefix}user:{user_id}"
+    
+    async def _prune_user_index(self, client: redis.Redis, index_key: str) -> List[str]:
+        """Remove the ids of expired sessions from a user's index, returning the live ones"""
+        session_ids = list(await client.smembers(index_key))
+        if not session_ids:
+            return []
+        async with open_pipeline(client, transaction=False) as pipe:
+            # One EXISTS per key so a cluster pipeline can route each to its slot
+            for sid in session_ids:
+                pipe.exists(self._session_key(sid))
+            alive = await pipe.execute()
+        
+        dead = [sid for sid, exists in zip(session_ids, alive) if not exists]
+        if dead:
+            await client.srem(index_key, *dead)
+        return [sid for sid, exists in zip(session_ids, alive) if exists]
     
-    async def create_session(self, user_id: str, data: Dict[str, Any]) -> str:
+    @staticmethod
+    def _encode(data: Dict[str, Any]) -> Dict[str, str]:
+        """Encode session fields for storage in a hash"""
+        return {field: json.dumps(value, default=str) for field, value in data.items()}
+    
+    @staticmethod
+    def _decode(data: Dict[str, str]) -> Dict[str, Any]:
+        """Decode session fields read from a hash"""
+        decoded = {}
+        for field, value in data.items():
+            try:
+                decoded[field] = json.loads(value)
+            except (TypeError, ValueError):
+                decoded[field] = value
+        return decoded
+    
+    async def create_session(
+        self,
+        user_id: str,
+        data: Dict[str, Any],
+        expire: Optional[int] = None
+    ) -> str:
         """Create a new session"""
-        import uuid
         session_id = str(uuid.uuid4())
-        session_key = f"{self.prefix}{session_id}"
+        session_key = self._session_key(session_id)
+        expire = expire or self.default_expire
         
         session_data = {
             "user_id": user_id,
-            "created_at": str(datetime.utcnow()),
+            "created_at": datetime.utcnow().isoformat(),
             **data
         }
         
-        await cache.set(session_key, session_data, expire=self.default_expire)
+        index_key = self._user_index_key(user_id)
+        
+        async def _create(client: redis.Redis):
+            async with open_pipeline(client) as pipe:
+                pipe.hset(session_key, mapping=self._encode(session_data))
+                pipe.expire(session_key, expire)
+                pipe.sadd(index_key, session_id)
+                pipe.scard(index_key)
+                results = await pipe.execute()
+            
+            # Only users who keep logging in without logging out pay for pruning
+            if results[-1] > self.index_prune_threshold:
+                await self._prune_user_index(client, index_key)
+            return results
+        
+        await self.store._execute(_create, operation="session_create", key=session_key)
         return session_id
     
-    async def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
-        """Get session data"""
-        session_key = f"{self.prefix}{session_id}"
-        return await cache.get(session_key)
+    async def get_session(self, session_id: str, touch: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Get session data
+        
+        Args:
+            session_id: Session identifier
+            touch: Refresh the sliding expiration in the same round trip
+        """
+        session_key = self._session_key(session_id)
+        
+        async def _get(client: redis.Redis):
+            async with open_pipeline(client, transaction=False) as pipe:
+                pipe.hgetall(session_key)
+                if touch:
+                    pipe.expire(session_key, self.default_expire)
+                return await pipe.execute()
+        
+        try:
+            results = await self.store._execute(_get, operation="session_get", key=session_key)
+            self.store._record_lookup(session_key, hit=bool(results[0]))
+            if not results[0]:
+                return None
+            return self._decode(results[0])
+        
+        except CircuitBreakerOpen:
+            return None
+        except Exception as e:
+            logger.error(f"Error getting session {session_id}: {e}")
+            return None
+    
+    async def _update_existing(self, session_key: str, command: Callable[[Any], Any]) -> Tuple[bool, Any]:
+        """
+        Apply a write to an existing session hash and refresh its expiration
+        
+        Runs as one MULTI pipeline. EXPIRE returns 0 for a missing key, which
+        tells us whether the session still existed before the write
+        (re)created it; in that case the orphan hash is removed.
+        """
+        async def _update(client: redis.Redis):
+            async with open_pipeline(client) as pipe:
+                pipe.expire(session_key, self.default_expire)
+                command(pipe)
+                pipe.expire(session_key, self.default_expire)
+                existed, result, _ = await pipe.execute()
+            
+            if not existed:
+                await client.delete(session_key)
+            return bool(existed), result
+        
+        return await self.store._execute(_update, operation="session_update", key=session_key)
     
     async def update_session(self, session_id: str, data: Dict[str, Any]) -> bool:
-        """Update session data"""
-        session_key = f"{self.prefix}{session_id}"
-        existing_data = await self.get_session(session_id)
+        """
+        Update session fields in place and refresh its expiration
+        
+        Only the given fields are written, so concurrent updates to
+        different fields do not overwrite each other.
+        """
+        if not data:
+            return await self.touch_session(session_id)
+        
+        session_key = self._session_key(session_id)
+        encoded = self._encode(data)
         
-        if existing_data:
-            existing_data.update(data)
-            return await cache.set(session_key, existing_data, expire=self.default_expire)
-        return False
+        try:
+            existed, _ = await self._update_existing(
+                session_key,
+                lambda pipe: pipe.hset(session_key, mapping=encoded)
+            )
+            return existed
+        
+        except CircuitBreakerOpen:
+            return False
+        except Exception as e:
+            logger.error(f"Error updating session {session_id}: {e}")
+            return False
+    
+    async def increment_field(self, session_id: str, field: str, amount: int = 1) -> Optional[int]:
+        """Atomically increment a numeric session field"""
+        session_key = self._session_key(session_id)
+        
+        try:
+            existed, value = await self._update_existing(
+                session_key,
+                lambda pipe: pipe.hincrby(session_key, field, amount)
+            )
+            return value if existed else None
+        
+        except CircuitBreakerOpen:
+            return None
+        except Exception as e:
+            logger.error(f"Error incrementing session field {session_id}.{field}: {e}")
+            return None
+    
+    async def touch_session(self, session_id: str) -> bool:
+        """Refresh the sliding expiration of a session"""
+        return await self.store.expire(self._session_key(session_id), self.default_expire)
     
     async def delete_session(self, session_id: str) -> bool:
         """Delete a session"""
-        session_key = f"{self.prefix}{session_id}"
-        return await cache.delete(session_key)
+        session_key = self._session_key(session_id)
+        
+        async def _delete(client: redis.Redis):
+            async with open_pipeline(client) as pipe:
+                pipe.hget(session_key, "user_id")
+                pipe.delete(session_key)
+                user_id, deleted = await pipe.execute()
+            
+            if user_id:
+                await client.srem(self._user_index_key(json.loads(user_id)), session_id)
+            return bool(deleted)
+        
+        try:
+            return await self.store._execute(_delete, operation="session_delete", key=session_key)
+        except CircuitBreakerOpen:
+            return False
+        except Exception as e:
+            logger.error(f"Error deleting session {session_id}: {e}")
+            return False
+    
+    async def delete_user_sessions(self, user_id: str) -> int:
+        """Delete every session of a user (log out everywhere)"""
+        index_key = self._user_index_key(user_id)
+        
+        async def _delete_all(client: redis.Redis):
+            session_ids = await client.smembers(index_key)
+            async with open_pipeline(client) as pipe:
+                # One DEL per key so a cluster pipeline can route each to its slot
+                for sid in session_ids:
+                    pipe.delete(self._session_key(sid))
+                pipe.delete(index_key)
+                results = await pipe.execute()
+            return sum(results[:-1])
+        
+        try:
+            return await self.store._execute(_delete_all, operation="session_delete_user", key=index_key)
+        except CircuitBreakerOpen:
+            return 0
+        except Exception as e:
+            logger.error(f"Error deleting sessions for user {user_id}: {e}")
+            return 0
 
 
 # Global session manager
@@ -240,8 +804,8 @@ session_manager = SessionManager()
 async def check_redis_health() -> bool:
     """Check if Redis is healthy"""
     try:
-        client = await get_redis()
-        await client.ping()
+        await cache._execute(lambda client: client.ping(), operation="ping")
+        await session_manager.store._execute(lambda client: client.ping(), operation="ping")
         return True
     except Exception as e:
         logger.error(f"Redis health check failed: {e}")
@@ -0,0 +1,178 @@
+"""
+Circuit breaker for calls to external backends (Redis, HTTP APIs, ...)
+"""
+import asyncio
+import time
+from enum import Enum
+from typing import Any, Awaitable, Callable, Optional, Tuple, Type
+import logging
+
+from .metrics import CIRCUIT_BREAKER_REJECTED, CIRCUIT_BREAKER_STATE, CIRCUIT_BREAKER_TRANSITIONS
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str, Enum):
+    """Circuit breaker states"""
+    CLOSED = "closed"        # Calls flow normally
+    HALF_OPEN = "half_open"  # Probing whether the backend recovered
+    OPEN = "open"            # Calls are rejected immediately
+
+
+_STATE_GAUGE_VALUES = {
+    CircuitState.CLOSED: 0,
+    CircuitState.HALF_OPEN: 1,
+    CircuitState.OPEN: 2,
+}
+
+
+class CircuitBreakerOpen(Exception):
+    """Raised when a call is rejected because the breaker is open"""
+    
+    def __init__(self, name: str):
+        super().__init__(f"Circuit breaker '{name}' is open")
+        self.name = name
+
+
+class CircuitBreaker:
+    """
+    Async circuit breaker
+    
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    rejects calls for ``recovery_timeout`` seconds. It then lets up to
+    ``half_open_max_calls`` probe calls through: one success closes it again,
+    one failure re-opens it. Exceptions outside ``failure_exceptions`` count
+    as successes (the backend responded); a cancelled call counts as neither.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        operation_timeout: Optional[float] = None,
+        failure_exceptions: Tuple[Type[BaseException], ...] = (Exception,),
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.operation_timeout = operation_timeout
+        self.failure_exceptions = failure_exceptions + (asyncio.TimeoutError,)
+        
+        self._state = CircuitState.CLOSED
+        self._failure_count = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        CIRCUIT_BREAKER_STATE.labels(breaker=name).set(_STATE_GAUGE_VALUES[self._state])
+    
+    @property
+    def state(self) -> CircuitState:
+        """Current state, moving OPEN to HALF_OPEN once the recovery timeout elapsed"""
+        if (
+            self._state == CircuitState.OPEN
+            and time.monotonic() - self._opened_at >= self.recovery_timeout
+        ):
+            self._transition(CircuitState.HALF_OPEN)
+        return self._state
+    
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are currently being rejected"""
+        return not self.allow_request(reserve=False)
+    
+    def allow_request(self, reserve: bool = True) -> bool:
+        """
+        Check whether a call may go through
+        
+        Args:
+            reserve: Count the call against the half-open probe budget
+        """
+        state = self.state
+        if state == CircuitState.CLOSED:
+            return True
+        if state == CircuitState.HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+            if reserve:
+                self._half_open_calls += 1
+            return True
+        return False
+    
+    def record_success(self) -> None:
+        """Record a successful call"""
+        self._failure_count = 0
+        if self._state != CircuitState.CLOSED:
+            self._transition(CircuitState.CLOSED)
+    
+    def record_failure(self) -> None:
+        """Record a failed call"""
+        self._failure_count += 1
+        if self._state == CircuitState.HALF_OPEN or self._failure_count >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            if self._state != CircuitState.OPEN:
+                self._transition(CircuitState.OPEN)
+    
+    async def call(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        *args: Any,
+        timeout: Optional[float] = None,
+        **kwargs: Any
+    ) -> Any:
+        """
+        Run ``func`` through the breaker
+        
+        Raises:
+            CircuitBreakerOpen: If the breaker rejects the call
+        """
+        if not self.allow_request():
+            CIRCUIT_BREAKER_REJECTED.labels(breaker=self.name).inc()
+            raise CircuitBreakerOpen(self.name)
+        
+        timeout = timeout if timeout is not None else self.operation_timeout
+        try:
+            if timeout:
+                result = await asyncio.wait_for(func(*args, **kwargs), timeout)
+            else:
+                result = await func(*args, **kwargs)
+        except self.failure_exceptions:
+            self.record_failure()
+            raise
+        except Exception:
+            # The backend answered (e.g. a Redis ResponseError): not an outage
+            self.record_success()
+            raise
+        except BaseException:
+            # Cancelled: no verdict, give a half-open probe slot back
+            self._release_probe()
+            raise
+        
+        self.record_success()
+        return result
+    
+    def _release_probe(self) -> None:
+        """Return a probe slot reserved by a call that ended without success or failure"""
+        if self._state == CircuitState.HALF_OPEN and self._half_open_calls > 0:
+            self._half_open_calls -= 1
+    
+    def reset(self) -> None:
+        """Force the breaker back to CLOSED"""
+        self._failure_count = 0
+        if self._state != CircuitState.CLOSED:
+            self._transition(CircuitState.CLOSED)
+    
+    def _transition(self, new_state: CircuitState) -> None:
+        """Move to a new state and export the change"""
+        old_state = self._state
+        self._state = new_state
+        self._half_open_calls = 0
+        
+        CIRCUIT_BREAKER_STATE.labels(breaker=self.name).set(_STATE_GAUGE_VALUES[new_state])
+        CIRCUIT_BREAKER_TRANSITIONS.labels(
+            breaker=self.name,
+            from_state=old_state.value,
+            to_state=new_state.value,
+        ).inc()
+        
+        log = logger.warning if new_state == CircuitState.OPEN else logger.info
+        log(f"Circuit breaker '{self.name}' {old_state.value} -> {new_state.value}")
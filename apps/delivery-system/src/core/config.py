@@ -35,10 +35,94 @@ class Settings(BaseSettings):
     )
     DATABASE_POOL_SIZE: int = Field(default=10, env="DATABASE_POOL_SIZE")
     DATABASE_MAX_OVERFLOW: int = Field(default=20, env="DATABASE_MAX_OVERFLOW")
+    DATABASE_SCHEMA_CHECK: str = Field(default="verify", env="DATABASE_SCHEMA_CHECK")  # verify | create_all | off
+    
+    # Query instrumentation
+    DATABASE_SLOW_QUERY_MS: float = Field(default=200.0, env="DATABASE_SLOW_QUERY_MS")
+    DATABASE_SERVER_TIMING: bool = Field(default=True, env="DATABASE_SERVER_TIMING")  # Server-Timing response header
+    DATABASE_QUERY_BUDGET: int = Field(default=0, env="DATABASE_QUERY_BUDGET")  # Max queries per request in tests (0 = off)
+    
+    # Read replicas (comma-separated URLs); reads fall back to the primary
+    DATABASE_REPLICA_URLS: str = Field(default="", env="DATABASE_REPLICA_URLS")
+    DATABASE_REPLICA_MAX_LAG_SECONDS: float = Field(default=5.0, env="DATABASE_REPLICA_MAX_LAG_SECONDS")
+    DATABASE_REPLICA_LAG_CHECK_INTERVAL: float = Field(default=5.0, env="DATABASE_REPLICA_LAG_CHECK_INTERVAL")  # seconds
+    DATABASE_REPLICA_LAG_CHECK_TIMEOUT: float = Field(default=2.0, env="DATABASE_REPLICA_LAG_CHECK_TIMEOUT")  # seconds, connect + query
+    DATABASE_READ_YOUR_WRITES_SECONDS: int = Field(default=5, env="DATABASE_READ_YOUR_WRITES_SECONDS")
+    
+    # Monthly partitions of orders/notifications (PostgreSQL)
+    PARTITION_PREMAKE_MONTHS: int = Field(default=3, env="PARTITION_PREMAKE_MONTHS")  # Future months created ahead
+    PARTITION_HOT_MONTHS: int = Field(default=3, env="PARTITION_HOT_MONTHS")  # hot_window_start(): opt-in since= bound of live queries
+    ORDERS_RETENTION_MONTHS: int = Field(default=24, env="ORDERS_RETENTION_MONTHS")
+    NOTIFICATIONS_RETENTION_MONTHS: int = Field(default=6, env="NOTIFICATIONS_RETENTION_MONTHS")
+    PARTITION_ARCHIVE_DIR: str = Field(default="./data/archive", env="PARTITION_ARCHIVE_DIR")
     
     # Redis
     REDIS_URL: str = Field(default="redis://localhost:6379/0", env="REDIS_URL")
     REDIS_MAX_CONNECTIONS: int = Field(default=20, env="REDIS_MAX_CONNECTIONS")
+    REDIS_SOCKET_TIMEOUT: float = Field(default=1.0, env="REDIS_SOCKET_TIMEOUT")  # seconds
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = Field(default=1.0, env="REDIS_SOCKET_CONNECT_TIMEOUT")  # seconds
+    REDIS_OPERATION_TIMEOUT: float = Field(default=0.5, env="REDIS_OPERATION_TIMEOUT")  # seconds
+    REDIS_BREAKER_FAILURE_THRESHOLD: int = Field(default=5, env="REDIS_BREAKER_FAILURE_THRESHOLD")
+    REDIS_BREAKER_RECOVERY_TIMEOUT: float = Field(default=30.0, env="REDIS_BREAKER_RECOVERY_TIMEOUT")  # seconds
+    
+    # Per-workload Redis endpoints and pools (URL defaults to REDIS_URL).
+    # Use redis+cluster:// (or rediss+cluster://) URLs for Redis Cluster.
+    REDIS_SESSION_URL: Optional[str] = Field(default=None, env="REDIS_SESSION_URL")
+    REDIS_SESSION_MAX_CONNECTIONS: int = Field(default=20, env="REDIS_SESSION_MAX_CONNECTIONS")
+    REDIS_RATE_LIMIT_URL: Optional[str] = Field(default=None, env="REDIS_RATE_LIMIT_URL")
+    REDIS_RATE_LIMIT_MAX_CONNECTIONS: int = Field(default=10, env="REDIS_RATE_LIMIT_MAX_CONNECTIONS")
+    REDIS_QUEUE_URL: Optional[str] = Field(default=None, env="REDIS_QUEUE_URL")
+    REDIS_QUEUE_MAX_CONNECTIONS: int = Field(default=10, env="REDIS_QUEUE_MAX_CONNECTIONS")
+    
+    # In-process (L1) cache used as a fallback while Redis is unavailable
+    CACHE_L1_MAX_ENTRIES: int = Field(default=1024, env="CACHE_L1_MAX_ENTRIES")
+    CACHE_L1_TTL: int = Field(default=60, env="CACHE_L1_TTL")  # seconds
+    
+    # Cache instrumentation
+    CACHE_HOT_KEY_SAMPLE_RATE: float = Field(default=0.01, env="CACHE_HOT_KEY_SAMPLE_RATE")
+    CACHE_HOT_KEY_CAPACITY: int = Field(default=1000, env="CACHE_HOT_KEY_CAPACITY")
+    
+    # Transactional outbox relay (src.jobs.outbox_relay)
+    OUTBOX_STREAM: str = Field(default="outbox:events", env="OUTBOX_STREAM")
+    OUTBOX_STREAM_MAXLEN: int = Field(default=100000, env="OUTBOX_STREAM_MAXLEN")  # approximate
+    OUTBOX_BATCH_SIZE: int = Field(default=100, env="OUTBOX_BATCH_SIZE")
+    OUTBOX_POLL_INTERVAL: float = Field(default=1.0, env="OUTBOX_POLL_INTERVAL")  # seconds, when idle
+    OUTBOX_RETENTION_HOURS: int = Field(default=72, env="OUTBOX_RETENTION_HOURS")  # published events
+    
+    # Order numbers (src.services.order_number_service)
+    ORDER_NUMBER_BACKEND: str = Field(default="auto", env="ORDER_NUMBER_BACKEND")  # auto, sequence, redis
+    ORDER_NUMBER_BLOCK_SIZE: int = Field(default=100, env="ORDER_NUMBER_BLOCK_SIZE")  # redis backend
+    ORDER_NUMBER_REDIS_KEY: str = Field(default="order_number:next", env="ORDER_NUMBER_REDIS_KEY")
+    ORDER_NUMBER_DEFAULT_REGION: str = Field(default="BR", env="ORDER_NUMBER_DEFAULT_REGION")
+    ORDER_NUMBER_TIMEZONE: str = Field(default="America/Sao_Paulo", env="ORDER_NUMBER_TIMEZONE")
+    
+    # Bulk writes (src.repositories.bulk)
+    BULK_COPY_MIN_ROWS: int = Field(default=10000, env="BULK_COPY_MIN_ROWS")  # COPY instead of INSERT (asyncpg)
+    
+    # Idempotency-Key (src.middleware.idempotency)
+    IDEMPOTENCY_PATH_PREFIXES: str = Field(
+        default="/api/v1/orders,/api/v1/payments,/api/v1/webhooks/whatsapp/send",
+        env="IDEMPOTENCY_PATH_PREFIXES"
+    )  # Comma-separated
+    IDEMPOTENCY_TTL_SECONDS: int = Field(default=86400, env="IDEMPOTENCY_TTL_SECONDS")  # Stored responses
+    IDEMPOTENCY_LOCK_SECONDS: float = Field(default=30.0, env="IDEMPOTENCY_LOCK_SECONDS")  # Lock lease, renewed while the request runs
+    IDEMPOTENCY_WAIT_SECONDS: float = Field(default=10.0, env="IDEMPOTENCY_WAIT_SECONDS")  # Duplicates, then 409
+    IDEMPOTENCY_POLL_INTERVAL: float = Field(default=0.05, env="IDEMPOTENCY_POLL_INTERVAL")  # seconds
+    
+    # Delayed jobs (src.services.scheduler, src.jobs.scheduler)
+    SCHEDULER_KEY: str = Field(default="scheduler:jobs", env="SCHEDULER_KEY")
+    SCHEDULER_BATCH_SIZE: int = Field(default=100, env="SCHEDULER_BATCH_SIZE")
+    SCHEDULER_POLL_INTERVAL: float = Field(default=1.0, env="SCHEDULER_POLL_INTERVAL")  # seconds, when idle
+    SCHEDULER_RETRY_SECONDS: int = Field(default=30, env="SCHEDULER_RETRY_SECONDS")  # Failed jobs
+    SCHEDULER_RECONCILE_INTERVAL: int = Field(default=3600, env="SCHEDULER_RECONCILE_INTERVAL")  # seconds
+    SCHEDULER_PICKUP_LEAD_MINUTES: int = Field(default=30, env="SCHEDULER_PICKUP_LEAD_MINUTES")  # Dispatch before pickup
+    
+    # Payment webhook inbox (src.jobs.payment_webhooks)
+    PAYMENT_WEBHOOK_BATCH_SIZE: int = Field(default=200, env="PAYMENT_WEBHOOK_BATCH_SIZE")
+    PAYMENT_WEBHOOK_POLL_INTERVAL: float = Field(default=0.5, env="PAYMENT_WEBHOOK_POLL_INTERVAL")  # seconds, when idle
+    PAYMENT_WEBHOOK_RETENTION_DAYS: int = Field(default=30, env="PAYMENT_WEBHOOK_RETENTION_DAYS")  # processed events (dedupe window)
+    PAYMENT_WEBHOOK_UNKNOWN_RETRY_SECONDS: float = Field(default=30.0, env="PAYMENT_WEBHOOK_UNKNOWN_RETRY_SECONDS")  # Charge not matched yet
+    PAYMENT_WEBHOOK_UNKNOWN_GRACE_SECONDS: float = Field(default=3600.0, env="PAYMENT_WEBHOOK_UNKNOWN_GRACE_SECONDS")  # then unknown_payment
     
     # Celery
     CELERY_BROKER_URL: str = Field(default="redis://localhost:6379/1", env="CELERY_BROKER_URL")
@@ -108,6 +192,16 @@ def get_database_url() -> str:
     return settings.DATABASE_URL
 
 
+def get_replica_urls() -> List[str]:
+    """Get read replica database URLs"""
+    return [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
+
+def get_idempotency_path_prefixes() -> List[str]:
+    """Get the path prefixes whose mutating requests honor Idempotency-Key"""
+    return [prefix.strip() for prefix in settings.IDEMPOTENCY_PATH_PREFIXES.split(",") if prefix.strip()]
+
+
 def is_development() -> bool:
     """Check if running in development mode"""
     return settings.ENVIRONMENT == "development" or settings.DEBUG
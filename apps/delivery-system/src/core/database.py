@@ -1,75 +1,279 @@
 """
 Database configuration and connection management
+
+Engines and session factories are created lazily on first use (normally in
+the application lifespan via ``init_db``), so importing this module does not
+open pools or touch the network.
 """
-from sqlalchemy import create_engine, event
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy import JSON, Index, Uuid, create_engine, event, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import NullPool, QueuePool
+from sqlalchemy.util import await_only
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+import asyncio
+import hashlib
+import itertools
+import json
 import logging
 
-from .config import settings, get_database_url
+from fastapi import Request
+
+from .config import settings, get_database_url, get_replica_urls
+from .cache import cache
+from .metrics import DB_REPLICA_LAG
+from . import query_stats  # noqa: F401 - registers the SQL instrumentation hooks
 
 logger = logging.getLogger(__name__)
 
 # Create the declarative base
 Base = declarative_base()
 
-# Async engine for FastAPI
-async_engine = create_async_engine(
-    get_database_url(),
-    echo=settings.DEBUG,
-    pool_size=settings.DATABASE_POOL_SIZE,
-    max_overflow=settings.DATABASE_MAX_OVERFLOW,
-    pool_pre_ping=True,
-    pool_recycle=3600,  # Recycle connections every hour
-)
-
-# Sync engine for migrations and CLI tools
-sync_engine = create_engine(
-    get_database_url().replace("+asyncpg", ""),
-    echo=settings.DEBUG,
-    pool_size=settings.DATABASE_POOL_SIZE,
-    max_overflow=settings.DATABASE_MAX_OVERFLOW,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-)
-
-# Session factories
-AsyncSessionLocal = async_sessionmaker(
-    bind=async_engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
-)
-
-SessionLocal = sessionmaker(
-    bind=sync_engine,
-    autocommit=False,
-    autoflush=False,
-)
+# JSON document column: JSONB on PostgreSQL (indexable, parsed once by the
+# server), JSON text elsewhere. Values are (de)serialized by the driver.
+JSONType = JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql")
+
+# Primary and foreign keys: native 16-byte uuid on PostgreSQL, CHAR(32) hex
+# elsewhere. Values are canonical UUID strings on the Python side (see
+# src.core.ids.new_id for the time-ordered defaults).
+UUIDType = Uuid(as_uuid=False)
+
+
+def json_gin_index(name: str, column: str) -> Index:
+    """
+    GIN index for containment queries (``column.contains({...})``) on a JSONB column
+    
+    Only created on PostgreSQL; jsonb_path_ops keeps the index small and
+    serves the ``@>`` operator.
+    """
+    return Index(
+        name,
+        column,
+        postgresql_using="gin",
+        postgresql_ops={column: "jsonb_path_ops"},
+    ).ddl_if(dialect="postgresql")
+
+# Alembic configuration (apps/delivery-system/alembic.ini)
+ALEMBIC_INI_PATH = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+# Lazily created engines and session factories
+_async_engine: Optional[AsyncEngine] = None
+_sync_engine: Optional[Engine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+_sync_session_factory: Optional[sessionmaker] = None
+_replica_engines: Optional[List[AsyncEngine]] = None
+_replica_router: Optional["ReplicaRouter"] = None
+
+
+def json_serializer(value: Any) -> str:
+    """Serialize JSON columns (Decimal, datetime, enums, ... as strings)"""
+    return json.dumps(value, default=str, ensure_ascii=False)
+
+
+def _engine_options(url: str) -> Dict[str, Any]:
+    """Common engine options (SQLite does not take pool sizing arguments)"""
+    options: Dict[str, Any] = {
+        "echo": settings.DEBUG,
+        "pool_pre_ping": True,
+        "json_serializer": json_serializer,
+    }
+    if not url.startswith("sqlite"):
+        options.update(
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_recycle=3600,  # Recycle connections every hour
+        )
+    return options
+
+
+def get_async_engine() -> AsyncEngine:
+    """Get the async engine for FastAPI, creating it on first use"""
+    global _async_engine
+    if _async_engine is None:
+        url = get_database_url()
+        _async_engine = create_async_engine(url, **_engine_options(url))
+        event.listen(_async_engine.sync_engine, "connect", set_async_sqlite_pragma)
+    return _async_engine
+
+
+def get_sync_engine() -> Engine:
+    """Get the sync engine for migrations and CLI tools, creating it on first use"""
+    global _sync_engine
+    if _sync_engine is None:
+        url = get_database_url().replace("+asyncpg", "").replace("+aiosqlite", "")
+        _sync_engine = create_engine(url, **_engine_options(url))
+        event.listen(_sync_engine, "connect", set_sqlite_pragma)
+    return _sync_engine
+
+
+def get_async_sessionmaker() -> async_sessionmaker:
+    """Get the async session factory bound to the primary"""
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = async_sessionmaker(
+            bind=get_async_engine(),
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autocommit=False,
+            autoflush=False,
+        )
+    return _async_session_factory
+
+
+def get_sessionmaker() -> sessionmaker:
+    """Get the sync session factory"""
+    global _sync_session_factory
+    if _sync_session_factory is None:
+        _sync_session_factory = sessionmaker(
+            bind=get_sync_engine(),
+            autocommit=False,
+            autoflush=False,
+        )
+    return _sync_session_factory
+
+
+def get_replica_engines() -> List[AsyncEngine]:
+    """Get read replica engines (listings, tracking polls, analytics)"""
+    global _replica_engines
+    if _replica_engines is None:
+        _replica_engines = [
+            create_async_engine(url, **_engine_options(url))
+            for url in get_replica_urls()
+        ]
+    return _replica_engines
+
+
+def get_replica_router() -> "ReplicaRouter":
+    """Get the replica router"""
+    global _replica_router
+    if _replica_router is None:
+        _replica_router = ReplicaRouter(
+            get_replica_engines(),
+            max_lag=settings.DATABASE_REPLICA_MAX_LAG_SECONDS,
+            check_interval=settings.DATABASE_REPLICA_LAG_CHECK_INTERVAL,
+            check_timeout=settings.DATABASE_REPLICA_LAG_CHECK_TIMEOUT,
+        )
+    return _replica_router
+
+
+_LAZY_ATTRIBUTES = {
+    "async_engine": get_async_engine,
+    "sync_engine": get_sync_engine,
+    "AsyncSessionLocal": get_async_sessionmaker,
+    "SessionLocal": get_sessionmaker,
+    "replica_engines": get_replica_engines,
+    "replica_router": get_replica_router,
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Keep the old module-level engine and factory names working"""
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_head_revision() -> Optional[str]:
+    """Get the Alembic head revision from the migration scripts"""
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+    
+    config = Config(str(ALEMBIC_INI_PATH))
+    config.set_main_option("script_location", str(ALEMBIC_INI_PATH.parent / "migrations"))
+    return ScriptDirectory.from_config(config).get_current_head()
+
+
+async def get_current_revision() -> Optional[str]:
+    """Get the Alembic revision the database is stamped with"""
+    from alembic.runtime.migration import MigrationContext
+    
+    async with get_async_engine().connect() as conn:
+        return await conn.run_sync(
+            lambda sync_conn: MigrationContext.configure(sync_conn).get_current_revision()
+        )
+
+
+async def verify_schema_revision() -> None:
+    """
+    Check that the database is migrated to the Alembic head revision
+    
+    Raises:
+        RuntimeError: If the database revision does not match the code
+    """
+    current, head = await get_current_revision(), get_head_revision()
+    if current != head:
+        raise RuntimeError(
+            f"Database schema is at revision {current!r} but the code expects {head!r}; "
+            f"run 'alembic upgrade head'"
+        )
+    logger.info(f"Database schema at revision {current}")
 
 
 async def init_db():
-    """Initialize database and create tables"""
+    """
+    Initialize database engines and check the schema
+    
+    Schema changes are applied by Alembic (``alembic upgrade head``), not at
+    boot. DATABASE_SCHEMA_CHECK selects what happens here: ``verify`` (check
+    the Alembic revision), ``create_all`` (create missing tables, for
+    throwaway SQLite/test databases) or ``off``.
+    """
     try:
-        # Import all models to register them with Base
-        from ..models import user, order, delivery, payment, notification  # noqa
+        engine = get_async_engine()
+        mode = settings.DATABASE_SCHEMA_CHECK
         
-        # Create tables
-        async with async_engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
+        if mode == "verify":
+            await verify_schema_revision()
+        elif mode == "create_all":
+            # Import all models to register them with Base
+            from ..models import user, order, delivery, payment, notification  # noqa
+            
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            logger.info("Database tables created successfully")
         
-        logger.info("Database tables created successfully")
+        # Start the replica lag checks before the first read needs them
+        get_replica_router().start()
+    
     except Exception as e:
         logger.error(f"Error initializing database: {e}")
         raise
 
 
-async def get_async_session() -> AsyncSession:
-    """Dependency to get async database session"""
-    async with AsyncSessionLocal() as session:
+async def close_db():
+    """Dispose engines and their connection pools"""
+    global _async_engine, _sync_engine, _async_session_factory, _sync_session_factory
+    global _replica_engines, _replica_router
+    
+    if _replica_router is not None:
+        await _replica_router.stop()
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _sync_engine is not None:
+        _sync_engine.dispose()
+    for engine in _replica_engines or []:
+        await engine.dispose()
+    
+    _async_engine = _sync_engine = None
+    _async_session_factory = _sync_session_factory = None
+    _replica_engines = None
+    _replica_router = None
+
+
+async def get_async_session(request: Request = None) -> AsyncSession:
+    """
+    Dependency to get async database session (primary)
+    
+    Commits that wrote pin the client to the primary (``mark_recent_write``)
+    as part of the commit, so before the response is sent.
+    """
+    async with get_async_sessionmaker()() as session:
+        if request is not None:
+            session.info["request"] = request
         try:
             yield session
         except Exception as e:
@@ -79,9 +283,161 @@ async def get_async_session() -> AsyncSession:
             await session.close()
 
 
+class ReplicaRouter:
+    """
+    Route read-only sessions to healthy read replicas
+    
+    Replicas are used round-robin. A background task checks each replica's
+    replication lag every ``check_interval`` seconds (each check bounded by
+    ``check_timeout``), so choosing a replica never waits on the network;
+    replicas lagging more than ``max_lag`` seconds, failing the check, or
+    not checked yet are skipped. When no replica is usable, reads go to the
+    primary.
+    """
+    
+    LAG_QUERY = text(
+        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+    )
+    
+    def __init__(self, engines: List[AsyncEngine], max_lag: float, check_interval: float, check_timeout: float = 2.0):
+        self.engines = engines
+        self.session_factories = [
+            async_sessionmaker(
+                bind=engine,
+                class_=AsyncSession,
+                expire_on_commit=False,
+                autocommit=False,
+                autoflush=False,
+                info={"read_only": True},
+            )
+            for engine in engines
+        ]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self._lag: List[Optional[float]] = [None] * len(engines)
+        self._order = itertools.cycle(range(len(engines)))
+        self._refresher: Optional[asyncio.Task] = None
+    
+    async def _measure_lag(self, engine: AsyncEngine) -> float:
+        async with engine.connect() as conn:
+            if engine.dialect.name == "postgresql":
+                return float((await conn.execute(self.LAG_QUERY)).scalar() or 0)
+            await conn.execute(text("SELECT 1"))
+            return 0.0
+    
+    async def _check_lag(self, index: int) -> Optional[float]:
+        """Measure a replica's replication lag (None when the check fails)"""
+        try:
+            lag = await asyncio.wait_for(self._measure_lag(self.engines[index]), self.check_timeout)
+        except Exception as e:
+            logger.warning(f"Replica {index} lag check failed: {e!r}")
+            lag = None
+        
+        self._lag[index] = lag
+        DB_REPLICA_LAG.labels(replica=str(index)).set(lag if lag is not None else -1)
+        return lag
+    
+    async def refresh(self) -> None:
+        """Check all replicas concurrently"""
+        await asyncio.gather(*(self._check_lag(index) for index in range(len(self.engines))))
+    
+    async def _refresh_forever(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.check_interval)
+    
+    def start(self) -> None:
+        """Start the background lag checks (idempotent; needs a running event loop)"""
+        if self.engines and (self._refresher is None or self._refresher.done()):
+            self._refresher = asyncio.get_running_loop().create_task(self._refresh_forever())
+    
+    async def stop(self) -> None:
+        """Stop the background lag checks"""
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+    
+    async def choose(self) -> Optional[async_sessionmaker]:
+        """Pick a session factory for a usable replica, or None for the primary"""
+        self.start()
+        for _ in range(len(self.engines)):
+            index = next(self._order)
+            lag = self._lag[index]
+            if lag is not None and lag <= self.max_lag:
+                return self.session_factories[index]
+        return None
+
+
+def _sticky_key(request: Optional[Request]) -> Optional[str]:
+    """Identify the client for read-your-writes stickiness"""
+    if request is None:
+        return None
+    user_id = getattr(request.state, "user_id", None)
+    if user_id:
+        return f"user:{user_id}"
+    authorization = request.headers.get("authorization")
+    if authorization:
+        return f"token:{hashlib.sha256(authorization.encode()).hexdigest()[:32]}"
+    if request.client:
+        return f"ip:{request.client.host}"
+    return None
+
+
+async def mark_recent_write(request: Optional[Request]) -> None:
+    """Pin the client's reads to the primary for a short window after a write"""
+    key = _sticky_key(request)
+    if key and get_replica_engines():
+        await cache.set(f"db:recent_write:{key}", 1, expire=settings.DATABASE_READ_YOUR_WRITES_SECONDS)
+
+
+async def _has_recent_write(request: Optional[Request]) -> bool:
+    """Check whether the client wrote within the read-your-writes window"""
+    key = _sticky_key(request)
+    return bool(key) and await cache.exists(f"db:recent_write:{key}")
+
+
+@asynccontextmanager
+async def read_session(use_primary: bool = False) -> AsyncIterator[AsyncSession]:
+    """
+    Open a read-only session on a replica (falling back to the primary)
+    
+    Args:
+        use_primary: Force the primary, e.g. to read your own writes
+    """
+    factory = None if use_primary else await get_replica_router().choose()
+    if factory is None:
+        factory = get_async_sessionmaker()
+    
+    async with factory() as session:
+        session.info["read_only"] = True
+        try:
+            yield session
+        finally:
+            # Never leave a transaction open on a read-only session
+            await session.rollback()
+
+
+async def get_read_session(request: Request = None) -> AsyncSession:
+    """
+    Dependency to get a session for read-only work
+    
+    Routes to a replica unless the client wrote within the last
+    DATABASE_READ_YOUR_WRITES_SECONDS, in which case the primary is used.
+    """
+    use_primary = not get_replica_engines() or await _has_recent_write(request)
+    async with read_session(use_primary=use_primary) as session:
+        yield session
+
+
 def get_sync_session() -> Session:
     """Get synchronous database session (for migrations, etc.)"""
-    session = SessionLocal()
+    session = get_sessionmaker()()
     try:
         yield session
     except Exception as e:
@@ -92,7 +448,43 @@ def get_sync_session() -> Session:
 
 
 # Database event listeners
-@event.listens_for(sync_engine, "connect")
+@event.listens_for(Session, "after_flush")
+def track_session_writes(session, flush_context):
+    """Remember that a session wrote, for read-your-writes routing"""
+    session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def mark_committed_writes(session):
+    """Pin the request's client to the primary once its writes are committed"""
+    request = session.info.get("request")
+    if session.info.pop("has_writes", False) and request is not None:
+        # Only request sessions (get_async_session) carry a request; their
+        # commit runs in SQLAlchemy's async greenlet, so the cache call can
+        # be awaited here
+        await_only(mark_recent_write(request))
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_session_writes(session):
+    """Rolled back writes need no read-your-writes window"""
+    session.info.pop("has_writes", None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def track_bulk_writes(orm_execute_state):
+    """Track ORM-enabled INSERT/UPDATE/DELETE statements as writes"""
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "before_flush")
+def reject_read_only_flush(session, flush_context, instances):
+    """Prevent writes through read-only (replica) sessions"""
+    if session.info.get("read_only") and (session.new or session.dirty or session.deleted):
+        raise RuntimeError("Attempted to write through a read-only database session")
+
+
 def set_sqlite_pragma(dbapi_connection, connection_record):
     """Set SQLite pragmas for better performance (if using SQLite)"""
     if "sqlite" in settings.DATABASE_URL:
@@ -105,7 +497,6 @@ def set_sqlite_pragma(dbapi_connection, connection_record):
         cursor.close()
 
 
-@event.listens_for(async_engine.sync_engine, "connect")
 def set_async_sqlite_pragma(dbapi_connection, connection_record):
     """Set SQLite pragmas for async engine"""
     if "sqlite" in settings.DATABASE_URL:
@@ -120,9 +511,9 @@ def set_async_sqlite_pragma(dbapi_connection, connection_record):
 async def check_database_health() -> bool:
     """Check if database is healthy"""
     try:
-        async with AsyncSessionLocal() as session:
-            result = await session.execute("SELECT 1")
+        async with get_async_sessionmaker()() as session:
+            result = await session.execute(text("SELECT 1"))
             return result.scalar() == 1
     except Exception as e:
         logger.error(f"Database health check failed: {e}")
-        return False
\ No newline at end of file
+        return False
@@ -0,0 +1,829 @@
+"""
+In-process Redis stand-in for tests, benchmarks and local development
+
+Selected with ``REDIS_URL=memory://``. Implements the subset of the
+``redis.asyncio.Redis`` API used by the application (strings, hashes, sets,
+sorted sets, TTL, INCR, pipelines, pub/sub, GEO and streams) with
+``decode_responses=True`` semantics. State is per process, so it is not a
+replacement for Redis when running more than one worker.
+"""
+import asyncio
+import fnmatch
+import math
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from redis.exceptions import ResponseError
+
+WRONGTYPE = "WRONGTYPE Operation against a key holding the wrong kind of value"
+
+EARTH_RADIUS_M = 6372797.560856  # Same constant Redis uses for GEO commands
+
+GEO_UNITS = {"m": 1.0, "km": 1000.0, "mi": 1609.34, "ft": 0.3048}
+
+
+def _encode(value: Any) -> str:
+    """Normalize a value the way redis-py does before sending it"""
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def _parse_score(value: Union[str, float, int]) -> float:
+    """Parse a sorted set score bound (supports -inf/+inf and exclusive '(')"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = value.strip()
+    if value.startswith("("):
+        value = value[1:]
+    if value in ("-inf", "-"):
+        return -math.inf
+    if value in ("+inf", "inf", "+"):
+        return math.inf
+    return float(value)
+
+
+def _haversine_m(lon1: float, lat1: float, lon2: float, lat2: float) -> float:
+    """Great-circle distance in meters"""
+    lat1_r, lat2_r = math.radians(lat1), math.radians(lat2)
+    dlat = lat2_r - lat1_r
+    dlon = math.radians(lon2 - lon1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(lat1_r) * math.cos(lat2_r) * math.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def _parse_stream_id(stream_id: str) -> Tuple[int, int]:
+    """Parse a '<ms>-<seq>' stream ID"""
+    if stream_id in ("-", "0"):
+        return (0, 0)
+    if stream_id == "+":
+        return (2 ** 63, 2 ** 63)
+    ms, _, seq = stream_id.partition("-")
+    return (int(ms), int(seq or 0))
+
+
+class InMemoryStore:
+    """
+    Synchronous command implementations over a plain dict keyspace
+    
+    Values are stored as (type, data) tuples. Commands never await, so a
+    sequence of them executed back to back (as a pipeline does) is atomic
+    with respect to other coroutines.
+    """
+    
+    def __init__(self):
+        self._data: Dict[str, Tuple[str, Any]] = {}
+        self._expires: Dict[str, float] = {}
+        self._subscribers: List["InMemoryPubSub"] = []
+    
+    # -- keyspace helpers -------------------------------------------------
+    
+    def _alive(self, key: str) -> bool:
+        expires_at = self._expires.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+            return False
+        return key in self._data
+    
+    def _get_typed(self, key: str, kind: str) -> Optional[Any]:
+        if not self._alive(key):
+            return None
+        stored_kind, data = self._data[key]
+        if stored_kind != kind:
+            raise ResponseError(WRONGTYPE)
+        return data
+    
+    def _get_or_create(self, key: str, kind: str, factory) -> Any:
+        data = self._get_typed(key, kind)
+        if data is None:
+            data = factory()
+            self._data[key] = (kind, data)
+        return data
+    
+    def _drop_if_empty(self, key: str, data: Any) -> None:
+        if not data:
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+    
+    # -- server / keys ----------------------------------------------------
+    
+    def ping(self) -> bool:
+        return True
+    
+    def flushdb(self) -> bool:
+        self._data.clear()
+        self._expires.clear()
+        return True
+    
+    def dbsize(self) -> int:
+        return len([key for key in list(self._data) if self._alive(key)])
+    
+    def delete(self, *names: str) -> int:
+        removed = 0
+        for name in names:
+            if self._alive(name):
+                removed += 1
+            self._data.pop(name, None)
+            self._expires.pop(name, None)
+        return removed
+    
+    unlink = delete
+    
+    def exists(self, *names: str) -> int:
+        return sum(1 for name in names if self._alive(name))
+    
+    def keys(self, pattern: str = "*") -> List[str]:
+        return [key for key in list(self._data) if self._alive(key) and fnmatch.fnmatchcase(key, pattern)]
+    
+    def type(self, name: str) -> str:
+        if not self._alive(name):
+            return "none"
+        kind = self._data[name][0]
+        return "zset" if kind == "geo" else kind
+    
+    def expire(self, name: str, time_seconds: Union[int, float]) -> bool:
+        if not self._alive(name):
+            return False
+        if hasattr(time_seconds, "total_seconds"):
+            time_seconds = time_seconds.total_seconds()
+        self._expires[name] = time.monotonic() + float(time_seconds)
+        return True
+    
+    def pexpire(self, name: str, time_ms: int) -> bool:
+        return self.expire(name, time_ms / 1000)
+    
+    def persist(self, name: str) -> bool:
+        return self._alive(name) and self._expires.pop(name, None) is not None
+    
+    def ttl(self, name: str) -> int:
+        if not self._alive(name):
+            return -2
+        expires_at = self._expires.get(name)
+        if expires_at is None:
+            return -1
+        return max(0, math.ceil(expires_at - time.monotonic()))
+    
+    def pttl(self, name: str) -> int:
+        if not self._alive(name):
+            return -2
+        expires_at = self._expires.get(name)
+        if expires_at is None:
+            return -1
+        return max(0, int((expires_at - time.monotonic()) * 1000))
+    
+    # -- strings ----------------------------------------------------------
+    
+    def get(self, name: str) -> Optional[str]:
+        return self._get_typed(name, "string")
+    
+    def mget(self, keys, *args) -> List[Optional[str]]:
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        return [self.get(key) for key in keys + list(args)]
+    
+    def set(
+        self,
+        name: str,
+        value: Any,
+        ex: Optional[Union[int, float]] = None,
+        px: Optional[int] = None,
+        nx: bool = False,
+        xx: bool = False,
+        keepttl: bool = False,
+        get: bool = False,
+    ) -> Optional[Union[bool, str]]:
+        exists = self._alive(name)
+        previous = self.get(name) if get else None
+        if (nx and exists) or (xx and not exists):
+            return previous if get else None
+        
+        self._data[name] = ("string", _encode(value))
+        if not keepttl:
+            self._expires.pop(name, None)
+        if ex is not None:
+            self.expire(name, ex)
+        elif px is not None:
+            self.pexpire(name, px)
+        return previous if get else True
+    
+    def setex(self, name: str, time_seconds: int, value: Any) -> bool:
+        return self.set(name, value, ex=time_seconds)
+    
+    def setnx(self, name: str, value: Any) -> bool:
+        return bool(self.set(name, value, nx=True))
+    
+    def incrby(self, name: str, amount: int = 1) -> int:
+        current = self.get(name)
+        try:
+            value = int(current or 0) + int(amount)
+        except ValueError:
+            raise ResponseError("ERR value is not an integer or out of range")
+        self._data[name] = ("string", str(value))
+        return value
+    
+    incr = incrby
+    
+    def decrby(self, name: str, amount: int = 1) -> int:
+        return self.incrby(name, -amount)
+    
+    decr = decrby
+    
+    def incrbyfloat(self, name: str, amount: float = 1.0) -> float:
+        value = float(self.get(name) or 0) + float(amount)
+        self._data[name] = ("string", repr(value))
+        return value
+    
+    # -- hashes -----------------------------------------------------------
+    
+    def hset(
+        self,
+        name: str,
+        key: Optional[str] = None,
+        value: Any = None,
+        mapping: Optional[Dict[str, Any]] = None,
+        items: Optional[List[Any]] = None,
+    ) -> int:
+        fields: Dict[str, Any] = {}
+        if key is not None:
+            fields[key] = value
+        if mapping:
+            fields.update(mapping)
+        if items:
+            fields.update(zip(items[::2], items[1::2]))
+        
+        data = self._get_or_create(name, "hash", dict)
+        added = 0
+        for field, field_value in fields.items():
+            field = _encode(field)
+            if field not in data:
+                added += 1
+            data[field] = _encode(field_value)
+        return added
+    
+    def hget(self, name: str, key: str) -> Optional[str]:
+        data = self._get_typed(name, "hash")
+        return data.get(_encode(key)) if data else None
+    
+    def hmget(self, name: str, keys, *args) -> List[Optional[str]]:
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        return [self.hget(name, key) for key in keys + list(args)]
+    
+    def hgetall(self, name: str) -> Dict[str, str]:
+        return dict(self._get_typed(name, "hash") or {})
+    
+    def hdel(self, name: str, *keys: str) -> int:
+        data = self._get_typed(name, "hash")
+        if not data:
+            return 0
+        removed = sum(1 for key in keys if data.pop(_encode(key), None) is not None)
+        self._drop_if_empty(name, data)
+        return removed
+    
+    def hexists(self, name: str, key: str) -> bool:
+        return _encode(key) in (self._get_typed(name, "hash") or {})
+    
+    def hlen(self, name: str) -> int:
+        return len(self._get_typed(name, "hash") or {})
+    
+    def hkeys(self, name: str) -> List[str]:
+        return list(self._get_typed(name, "hash") or {})
+    
+    def hincrby(self, name: str, key: str, amount: int = 1) -> int:
+        data = self._get_or_create(name, "hash", dict)
+        key = _encode(key)
+        try:
+            value = int(data.get(key, 0)) + int(amount)
+        except ValueError:
+            raise ResponseError("ERR hash value is not an integer")
+        data[key] = str(value)
+        return value
+    
+    # -- sets -------------------------------------------------------------
+    
+    def sadd(self, name: str, *values: Any) -> int:
+        data = self._get_or_create(name, "set", set)
+        before = len(data)
+        data.update(_encode(value) for value in values)
+        return len(data) - before
+    
+    def srem(self, name: str, *values: Any) -> int:
+        data = self._get_typed(name, "set")
+        if not data:
+            return 0
+        before = len(data)
+        data.difference_update(_encode(value) for value in values)
+        self._drop_if_empty(name, data)
+        return before - len(data)
+    
+    def smembers(self, name: str) -> set:
+        return set(self._get_typed(name, "set") or set())
+    
+    def sismember(self, name: str, value: Any) -> bool:
+        return _encode(value) in (self._get_typed(name, "set") or set())
+    
+    def scard(self, name: str) -> int:
+        return len(self._get_typed(name, "set") or set())
+    
+    # -- sorted sets ------------------------------------------------------
+    
+    def zadd(
+        self,
+        name: str,
+        mapping: Dict[str, float],
+        nx: bool = False,
+        xx: bool = False,
+        ch: bool = False,
+        incr: bool = False,
+        gt: bool = False,
+        lt: bool = False,
+    ) -> Union[int, float, None]:
+        data = self._get_or_create(name, "zset", dict)
+        added = changed = 0
+        result = None
+        for member, score in mapping.items():
+            member, score = _encode(member), float(score)
+            current = data.get(member)
+            if (nx and current is not None) or (xx and current is None):
+                continue
+            if incr:
+                score = (current or 0.0) + score
+                result = score
+            if current is not None and ((gt and score <= current) or (lt and score >= current)):
+                continue
+            if current is None:
+                added += 1
+            elif current != score:
+                changed += 1
+            data[member] = score
+        self._drop_if_empty(name, data)
+        if incr:
+            return result
+        return added + changed if ch else added
+    
+    def zincrby(self, name: str, amount: float, value: Any) -> float:
+        return self.zadd(name, {value: amount}, incr=True)
+    
+    def zrem(self, name: str, *values: Any) -> int:
+        data = self._get_typed(name, "zset")
+        if not data:
+            return 0
+        removed = sum(1 for value in values if data.pop(_encode(value), None) is not None)
+        self._drop_if_empty(name, data)
+        return removed
+    
+    def zscore(self, name: str, value: Any) -> Optional[float]:
+        return (self._get_typed(name, "zset") or {}).get(_encode(value))
+    
+    def zcard(self, name: str) -> int:
+        return len(self._get_typed(name, "zset") or {})
+    
+    def _zsorted(self, name: str) -> List[Tuple[str, float]]:
+        data = self._get_typed(name, "zset") or {}
+        return sorted(data.items(), key=lambda item: (item[1], item[0]))
+    
+    @staticmethod
+    def _zformat(items: List[Tuple[str, float]], withscores: bool) -> List[Any]:
+        return [(member, score) for member, score in items] if withscores else [member for member, _ in items]
+    
+    def zrange(
+        self,
+        name: str,
+        start: int,
+        end: int,
+        desc: bool = False,
+        withscores: bool = False,
+    ) -> List[Any]:
+        items = self._zsorted(name)
+        if desc:
+            items.reverse()
+        end = len(items) + end if end < 0 else end
+        return self._zformat(items[start:end + 1], withscores)
+    
+    def zrangebyscore(
+        self,
+        name: str,
+        min: Union[str, float],
+        max: Union[str, float],
+        start: Optional[int] = None,
+        num: Optional[int] = None,
+        withscores: bool = False,
+    ) -> List[Any]:
+        low, high = _parse_score(min), _parse_score(max)
+        low_excl = isinstance(min, str) and min.startswith("(")
+        high_excl = isinstance(max, str) and max.startswith("(")
+        items = [
+            (member, score) for member, score in self._zsorted(name)
+            if (score > low if low_excl else score >= low) and (score < high if high_excl else score <= high)
+        ]
+        if start is not None and num is not None:
+            items = items[start:start + num] if num >= 0 else items[start:]
+        return self._zformat(items, withscores)
+    
+    def zremrangebyscore(self, name: str, min: Union[str, float], max: Union[str, float]) -> int:
+        members = self.zrangebyscore(name, min, max)
+        return self.zrem(name, *members) if members else 0
+    
+    def zpopmin(self, name: str, count: Optional[int] = None) -> List[Tuple[str, float]]:
+        items = self._zsorted(name)[:count or 1]
+        if items:
+            self.zrem(name, *[member for member, _ in items])
+        return items
+    
+    # -- GEO --------------------------------------------------------------
+    
+    def geoadd(self, name: str, values, nx: bool = False, xx: bool = False, ch: bool = False) -> int:
+        if len(values) % 3:
+            raise ResponseError("ERR syntax error")
+        data = self._get_or_create(name, "geo", dict)
+        added = changed = 0
+        for i in range(0, len(values), 3):
+            lon, lat, member = float(values[i]), float(values[i + 1]), _encode(values[i + 2])
+            if not (-180 <= lon <= 180 and -85.05112878 <= lat <= 85.05112878):
+                raise ResponseError(f"ERR invalid longitude,latitude pair {lon},{lat}")
+            current = data.get(member)
+            if (nx and current is not None) or (xx and current is None):
+                continue
+            if current is None:
+                added += 1
+            elif current != (lon, lat):
+                changed += 1
+            data[member] = (lon, lat)
+        self._drop_if_empty(name, data)
+        return added + changed if ch else added
+    
+    def geopos(self, name: str, *values: Any) -> List[Optional[Tuple[float, float]]]:
+        data = self._get_typed(name, "geo") or {}
+        return [data.get(_encode(value)) for value in values]
+    
+    def geodist(self, name: str, place1: Any, place2: Any, unit: Optional[str] = None) -> Optional[float]:
+        data = self._get_typed(name, "geo") or {}
+        first, second = data.get(_encode(place1)), data.get(_encode(place2))
+        if first is None or second is None:
+            return None
+        return round(_haversine_m(*first, *second) / GEO_UNITS[unit or "m"], 4)
+    
+    def geosearch(
+        self,
+        name: str,
+        member: Optional[Any] = None,
+        longitude: Optional[float] = None,
+        latitude: Optional[float] = None,
+        unit: str = "m",
+        radius: Optional[float] = None,
+        width: Optional[float] = None,
+        height: Optional[float] = None,
+        sort: Optional[str] = None,
+        count: Optional[int] = None,
+        any: bool = False,
+        withcoord: bool = False,
+        withdist: bool = False,
+        withhash: bool = False,
+    ) -> List[Any]:
+        data = self._get_typed(name, "geo") or {}
+        if member is not None:
+            origin = data.get(_encode(member))
+            if origin is None:
+                raise ResponseError("ERR could not decode requested zset member")
+        else:
+            origin = (float(longitude), float(latitude))
+        
+        factor = GEO_UNITS[unit]
+        matches = []
+        for candidate, (lon, lat) in data.items():
+            distance = _haversine_m(origin[0], origin[1], lon, lat)
+            if radius is not None:
+                inside = distance <= radius * factor
+            else:
+                # Box search: compare the east-west and north-south offsets
+                dx = _haversine_m(origin[0], lat, lon, lat)
+                dy = _haversine_m(lon, origin[1], lon, lat)
+                inside = dx <= width * factor / 2 and dy <= height * factor / 2
+            if inside:
+                matches.append((candidate, distance / factor, (lon, lat)))
+        
+        if sort == "ASC":
+            matches.sort(key=lambda match: match[1])
+        elif sort == "DESC":
+            matches.sort(key=lambda match: match[1], reverse=True)
+        if count is not None:
+            matches = matches[:count]
+        
+        if not (withcoord or withdist):
+            return [candidate for candidate, _, _ in matches]
+        results = []
+        for candidate, distance, coords in matches:
+            row = [candidate]
+            if withdist:
+                row.append(round(distance, 4))
+            if withcoord:
+                row.append(coords)
+            results.append(row)
+        return results
+    
+    def georadius(
+        self,
+        name: str,
+        longitude: float,
+        latitude: float,
+        radius: float,
+        unit: str = "m",
+        withdist: bool = False,
+        withcoord: bool = False,
+        count: Optional[int] = None,
+        sort: Optional[str] = None,
+        **kwargs: Any,
+    ) -> List[Any]:
+        return self.geosearch(
+            name, longitude=longitude, latitude=latitude, radius=radius, unit=unit,
+            withdist=withdist, withcoord=withcoord, count=count, sort=sort,
+        )
+    
+    # -- streams ----------------------------------------------------------
+    
+    def xadd(
+        self,
+        name: str,
+        fields: Dict[str, Any],
+        id: str = "*",
+        maxlen: Optional[int] = None,
+        approximate: bool = True,
+        nomkstream: bool = False,
+        minid: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> Optional[str]:
+        if nomkstream and not self._alive(name):
+            return None
+        entries = self._get_or_create(name, "stream", list)
+        last = _parse_stream_id(entries[-1][0]) if entries else (0, 0)
+        
+        if id == "*":
+            now_ms = int(time.time() * 1000)
+            new_id = (now_ms, 0) if now_ms > last[0] else (last[0], last[1] + 1)
+        else:
+            new_id = _parse_stream_id(id)
+            if new_id <= last:
+                raise ResponseError(
+                    "ERR The ID specified in XADD is equal or smaller than the target stream top item"
+                )
+        
+        entry_id = f"{new_id[0]}-{new_id[1]}"
+        entries.append((entry_id, {_encode(k): _encode(v) for k, v in fields.items()}))
+        if maxlen is not None and len(entries) > maxlen:
+            del entries[:len(entries) - maxlen]
+        return entry_id
+    
+    def xlen(self, name: str) -> int:
+        return len(self._get_typed(name, "stream") or [])
+    
+    def xrange(self, name: str, min: str = "-", max: str = "+", count: Optional[int] = None) -> List[Tuple[str, Dict[str, str]]]:
+        low, high = _parse_stream_id(min), _parse_stream_id(max)
+        entries = [
+            (entry_id, dict(fields)) for entry_id, fields in self._get_typed(name, "stream") or []
+            if low <= _parse_stream_id(entry_id) <= high
+        ]
+        return entries[:count] if count is not None else entries
+    
+    def xrevrange(self, name: str, max: str = "+", min: str = "-", count: Optional[int] = None) -> List[Tuple[str, Dict[str, str]]]:
+        entries = list(reversed(self.xrange(name, min=min, max=max)))
+        return entries[:count] if count is not None else entries
+    
+    def xdel(self, name: str, *ids: str) -> int:
+        entries = self._get_typed(name, "stream")
+        if not entries:
+            return 0
+        before = len(entries)
+        entries[:] = [entry for entry in entries if entry[0] not in ids]
+        return before - len(entries)
+    
+    def xtrim(self, name: str, maxlen: Optional[int] = None, approximate: bool = True, minid: Optional[str] = None, limit: Optional[int] = None) -> int:
+        entries = self._get_typed(name, "stream")
+        if not entries:
+            return 0
+        before = len(entries)
+        if maxlen is not None and len(entries) > maxlen:
+            del entries[:len(entries) - maxlen]
+        if minid is not None:
+            floor = _parse_stream_id(minid)
+            entries[:] = [entry for entry in entries if _parse_stream_id(entry[0]) >= floor]
+        return before - len(entries)
+    
+    def _xread_now(self, streams: Dict[str, str], count: Optional[int]) -> List[List[Any]]:
+        results = []
+        for name, last_id in streams.items():
+            entries = self._get_typed(name, "stream") or []
+            if last_id == "$":
+                continue
+            floor = _parse_stream_id(last_id)
+            new_entries = [
+                (entry_id, dict(fields)) for entry_id, fields in entries
+                if _parse_stream_id(entry_id) > floor
+            ]
+            if count is not None:
+                new_entries = new_entries[:count]
+            if new_entries:
+                results.append([name, new_entries])
+        return results
+    
+    # -- pub/sub ----------------------------------------------------------
+    
+    def publish(self, channel: str, message: Any) -> int:
+        message = _encode(message)
+        return sum(subscriber._deliver(channel, message) for subscriber in list(self._subscribers))
+
+
+class InMemoryPubSub:
+    """Subset of ``redis.asyncio.client.PubSub`` backed by an asyncio queue"""
+    
+    def __init__(self, store: InMemoryStore, ignore_subscribe_messages: bool = False):
+        self._store = store
+        self.ignore_subscribe_messages = ignore_subscribe_messages
+        self.channels: set = set()
+        self.patterns: set = set()
+        self._queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+    
+    @property
+    def subscribed(self) -> bool:
+        return bool(self.channels or self.patterns)
+    
+    def _register(self) -> None:
+        if self.subscribed and self not in self._store._subscribers:
+            self._store._subscribers.append(self)
+        elif not self.subscribed and self in self._store._subscribers:
+            self._store._subscribers.remove(self)
+    
+    def _control(self, kind: str, channel: str, count: int) -> None:
+        if not self.ignore_subscribe_messages:
+            self._queue.put_nowait({"type": kind, "pattern": None, "channel": channel, "data": count})
+    
+    def _deliver(self, channel: str, message: str) -> int:
+        received = 0
+        if channel in self.channels:
+            self._queue.put_nowait({"type": "message", "pattern": None, "channel": channel, "data": message})
+            received += 1
+        for pattern in self.patterns:
+            if fnmatch.fnmatchcase(channel, pattern):
+                self._queue.put_nowait({"type": "pmessage", "pattern": pattern, "channel": channel, "data": message})
+                received += 1
+        return received
+    
+    async def subscribe(self, *channels: str) -> None:
+        for channel in channels:
+            self.channels.add(channel)
+            self._control("subscribe", channel, len(self.channels) + len(self.patterns))
+        self._register()
+    
+    async def unsubscribe(self, *channels: str) -> None:
+        for channel in channels or list(self.channels):
+            self.channels.discard(channel)
+            self._control("unsubscribe", channel, len(self.channels) + len(self.patterns))
+        self._register()
+    
+    async def psubscribe(self, *patterns: str) -> None:
+        for pattern in patterns:
+            self.patterns.add(pattern)
+            self._control("psubscribe", pattern, len(self.channels) + len(self.patterns))
+        self._register()
+    
+    async def punsubscribe(self, *patterns: str) -> None:
+        for pattern in patterns or list(self.patterns):
+            self.patterns.discard(pattern)
+            self._control("punsubscribe", pattern, len(self.channels) + len(self.patterns))
+        self._register()
+    
+    async def get_message(self, ignore_subscribe_messages: bool = False, timeout: Optional[float] = 0.0) -> Optional[Dict[str, Any]]:
+        while True:
+            try:
+                if timeout:
+                    message = await asyncio.wait_for(self._queue.get(), timeout)
+                elif timeout is None:
+                    message = await self._queue.get()
+                else:
+                    message = self._queue.get_nowait()
+            except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                return None
+            if ignore_subscribe_messages and message["type"] not in ("message", "pmessage"):
+                continue
+            return message
+    
+    async def listen(self) -> AsyncIterator[Dict[str, Any]]:
+        while self.subscribed or not self._queue.empty():
+            yield await self._queue.get()
+    
+    async def aclose(self) -> None:
+        self.channels.clear()
+        self.patterns.clear()
+        self._register()
+    
+    close = reset = aclose
+    
+    async def __aenter__(self) -> "InMemoryPubSub":
+        return self
+    
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+
+class InMemoryPipeline:
+    """
+    Pipeline that queues commands and runs them back to back on ``execute``
+    
+    Since commands never yield to the event loop, a pipeline is always
+    atomic, whether or not ``transaction`` was requested.
+    """
+    
+    def __init__(self, store: InMemoryStore, transaction: bool = True):
+        self._store = store
+        self.transaction = transaction
+        self._commands: List[Tuple[str, tuple, dict]] = []
+    
+    def __getattr__(self, name: str):
+        command = getattr(self._store, name)
+        
+        def queue(*args: Any, **kwargs: Any) -> "InMemoryPipeline":
+            self._commands.append((command, args, kwargs))
+            return self
+        
+        return queue
+    
+    def multi(self) -> None:
+        self.transaction = True
+    
+    async def execute(self, raise_on_error: bool = True) -> List[Any]:
+        commands, self._commands = self._commands, []
+        results = []
+        for command, args, kwargs in commands:
+            try:
+                results.append(command(*args, **kwargs))
+            except ResponseError as e:
+                if raise_on_error:
+                    raise
+                results.append(e)
+        return results
+    
+    def reset(self) -> None:
+        self._commands = []
+    
+    def __len__(self) -> int:
+        return len(self._commands)
+    
+    async def __aenter__(self) -> "InMemoryPipeline":
+        return self
+    
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.reset()
+
+
+class InMemoryRedis:
+    """
+    Async client facade over an InMemoryStore
+    
+    Every store command is exposed as a coroutine with the redis-py
+    signature, so it can be used wherever ``redis.asyncio.Redis`` is.
+    """
+    
+    def __init__(self, store: Optional[InMemoryStore] = None):
+        self._store = store or InMemoryStore()
+    
+    @classmethod
+    def from_url(cls, url: str, **kwargs: Any) -> "InMemoryRedis":
+        return cls()
+    
+    def __getattr__(self, name: str):
+        command = getattr(self._store, name)
+        
+        async def run(*args: Any, **kwargs: Any) -> Any:
+            return command(*args, **kwargs)
+        
+        return run
+    
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None) -> InMemoryPipeline:
+        return InMemoryPipeline(self._store, transaction=transaction)
+    
+    def pubsub(self, ignore_subscribe_messages: bool = False, **kwargs: Any) -> InMemoryPubSub:
+        return InMemoryPubSub(self._store, ignore_subscribe_messages=ignore_subscribe_messages)
+    
+    async def xread(
+        self,
+        streams: Dict[str, str],
+        count: Optional[int] = None,
+        block: Optional[int] = None,
+    ) -> List[List[Any]]:
+        # "$" means "only entries added after this call"
+        streams = {
+            name: (self._store.xrange(name)[-1][0] if last_id == "$" and self._store.xlen(name) else
+                   "0-0" if last_id == "$" else last_id)
+            for name, last_id in streams.items()
+        }
+        deadline = time.monotonic() + block / 1000 if block else None
+        while True:
+            results = self._store._xread_now(streams, count)
+            if results or block is None or (deadline is not None and time.monotonic() >= deadline):
+                return results
+            await asyncio.sleep(0.005)
+    
+    async def aclose(self) -> None:
+        return None
+    
+    close = aclose
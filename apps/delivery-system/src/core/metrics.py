@@ -0,0 +1,200 @@
+"""
+Prometheus metrics shared by the core modules
+
+With several server workers, set PROMETHEUS_MULTIPROC_DIR (``python
+main.py`` does) so /metrics aggregates all of them; gauges then report the
+highest value across workers (``multiprocess_mode="max"``).
+"""
+from prometheus_client import Counter, Gauge, Histogram
+
+
+# Circuit breakers
+CIRCUIT_BREAKER_STATE = Gauge(
+    "pyloto_circuit_breaker_state",
+    "Current circuit breaker state (0=closed, 1=half_open, 2=open)",
+    ["breaker"],
+    multiprocess_mode="max",
+)
+
+CIRCUIT_BREAKER_TRANSITIONS = Counter(
+    "pyloto_circuit_breaker_transitions_total",
+    "Circuit breaker state transitions",
+    ["breaker", "from_state", "to_state"],
+)
+
+CIRCUIT_BREAKER_REJECTED = Counter(
+    "pyloto_circuit_breaker_rejected_total",
+    "Calls rejected without touching the backend because the breaker was open",
+    ["breaker"],
+)
+
+
+# Cache (labelled by key namespace, e.g. "otto:thread", "session")
+CACHE_HITS = Counter(
+    "pyloto_cache_hits_total",
+    "Cache lookups that found a value",
+    ["namespace", "tier"],
+)
+
+CACHE_MISSES = Counter(
+    "pyloto_cache_misses_total",
+    "Cache lookups that found nothing",
+    ["namespace"],
+)
+
+CACHE_ERRORS = Counter(
+    "pyloto_cache_errors_total",
+    "Cache operations that raised an error",
+    ["namespace", "operation"],
+)
+
+CACHE_LATENCY = Histogram(
+    "pyloto_cache_operation_seconds",
+    "Latency of cache operations against Redis",
+    ["namespace", "operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+CACHE_PAYLOAD_BYTES = Histogram(
+    "pyloto_cache_payload_bytes",
+    "Size of serialized cache payloads read or written",
+    ["namespace", "operation"],
+    buckets=(64, 256, 1024, 4096, 16384, 65536, 262144, 1048576),
+)
+
+
+# Database
+DB_REPLICA_LAG = Gauge(
+    "pyloto_db_replica_lag_seconds",
+    "Last measured replication lag per read replica (-1 when unreachable)",
+    ["replica"],
+    multiprocess_mode="max",
+)
+
+DB_QUERY_LATENCY = Histogram(
+    "pyloto_db_query_seconds",
+    "Latency of SQL statements",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+DB_SLOW_QUERIES = Counter(
+    "pyloto_db_slow_queries_total",
+    "SQL statements slower than DATABASE_SLOW_QUERY_MS",
+    ["operation"],
+)
+
+DB_REQUEST_QUERIES = Histogram(
+    "pyloto_db_queries_per_request",
+    "Number of SQL statements executed per HTTP request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+
+DB_REQUEST_TIME = Histogram(
+    "pyloto_db_time_per_request_seconds",
+    "Total SQL time per HTTP request",
+    ["route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+DB_LAZY_LOADS = Counter(
+    "pyloto_db_lazy_loads_total",
+    "Relationship lazy loads (potential N+1 queries)",
+    ["relationship"],
+)
+
+
+# Transactional outbox
+OUTBOX_PUBLISHED = Counter(
+    "pyloto_outbox_published_total",
+    "Outbox events published to the queue",
+    ["event_type"],
+)
+
+OUTBOX_PUBLISH_LAG = Histogram(
+    "pyloto_outbox_publish_lag_seconds",
+    "Time from an outbox event's commit to its publication",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+
+OUTBOX_RELAY_ERRORS = Counter(
+    "pyloto_outbox_relay_errors_total",
+    "Outbox relay batches that failed and were rolled back",
+)
+
+
+# Order number blocks (src.services.order_number_service)
+ORDER_NUMBER_BLOCKS_RESERVED = Counter(
+    "pyloto_order_number_blocks_reserved_total",
+    "Blocks of order number sequence values reserved by a worker",
+    ["backend"],
+)
+
+ORDER_NUMBER_STALLS = Counter(
+    "pyloto_order_number_stalls_total",
+    "Order numbers that had to wait for a block (the prefetch had not finished)",
+)
+
+
+# Bulk writes (src.repositories.bulk)
+BULK_ROWS_WRITTEN = Counter(
+    "pyloto_bulk_rows_written_total",
+    "Rows written by bulk inserts and upserts",
+    ["table", "operation"],
+)
+
+BULK_WRITE_SECONDS = Histogram(
+    "pyloto_bulk_write_seconds",
+    "Duration of bulk inserts and upserts",
+    ["table", "operation"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+
+# Idempotency-Key (src.middleware.idempotency)
+IDEMPOTENCY_REQUESTS = Counter(
+    "pyloto_idempotency_requests_total",
+    "Requests with an Idempotency-Key by outcome (stored, not_stored, replayed, mismatch, conflict, unavailable)",
+    ["outcome"],
+)
+
+IDEMPOTENCY_WAIT_SECONDS = Histogram(
+    "pyloto_idempotency_wait_seconds",
+    "Time duplicates of an in-flight request waited for its response",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+
+# Delayed jobs (src.services.scheduler)
+SCHEDULER_JOBS = Counter(
+    "pyloto_scheduler_jobs_total",
+    "Scheduled jobs run by kind and outcome (done, rescheduled, failed)",
+    ["kind", "outcome"],
+)
+
+SCHEDULER_JOB_LAG = Histogram(
+    "pyloto_scheduler_job_lag_seconds",
+    "Time from a job's due time to its run",
+    ["kind"],
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0),
+)
+
+
+# Payment webhooks (src.services.payment_webhooks, src.jobs.payment_webhooks)
+PAYMENT_WEBHOOKS = Counter(
+    "pyloto_payment_webhooks_total",
+    "Charge statuses received from gateway notifications by outcome (received, duplicate, rejected, invalid)",
+    ["outcome"],
+)
+
+PAYMENT_WEBHOOK_EVENTS = Counter(
+    "pyloto_payment_webhook_events_total",
+    "Inbox events handled by the payment webhook worker by result (applied, ignored, unknown_payment, deferred)",
+    ["result"],
+)
+
+PAYMENT_WEBHOOK_BATCH_ERRORS = Counter(
+    "pyloto_payment_webhook_batch_errors_total",
+    "Payment webhook batches that failed and were rolled back",
+)
@@ -0,0 +1,71 @@
+"""
+Money as integer cents
+
+Every amount (order prices, declared values, driver earnings, payments) is
+stored, computed and serialized as an integer number of cents of the row's
+currency, in ``Cents`` columns. Rates are integer basis points
+(1% = 100 bps), so pricing is integer arithmetic with explicit half-up
+rounding and no float or Decimal in between.
+
+The arithmetic helpers only use ``+``, ``*`` and ``//``, so they work the
+same on Python ints and on numpy int64 arrays (vectorized pricing and
+aggregation). Convert at the edges only: ``to_cents`` for amounts given in
+reais, ``format_cents`` for display.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Union
+import operator
+
+from sqlalchemy import Integer
+from sqlalchemy.types import TypeDecorator
+
+BPS = 10_000  # Basis points in 100%
+
+Amount = Union[int, float, str, Decimal]
+
+
+class Cents(TypeDecorator):
+    """Integer column holding an amount in cents; floats and Decimals are rejected"""
+    impl = Integer
+    cache_ok = True
+    
+    def process_bind_param(self, value: Any, dialect) -> Any:
+        if value is None:
+            return None
+        try:
+            return operator.index(value)  # int, bool or numpy integer
+        except TypeError:
+            raise TypeError(f"Money columns take integer cents, got {value!r} (see src.core.money.to_cents)") from None
+
+
+def to_cents(amount: Amount) -> int:
+    """Amount in reais (e.g. typed by a user or sent by a gateway) in cents, rounded half up"""
+    # str() first, so 18.9 is 18.9 and not its binary approximation
+    return int((Decimal(str(amount)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> Decimal:
+    """Exact amount in reais"""
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def format_cents(cents: int) -> str:
+    """Amount for display, e.g. 1890 -> "18.90" """
+    sign = "-" if cents < 0 else ""
+    whole, fraction = divmod(abs(int(cents)), 100)
+    return f"{sign}{whole}.{fraction:02d}"
+
+
+def to_bps(rate: Amount) -> int:
+    """Fractional rate (0.1 for 10%) in basis points, rounded half up"""
+    return int((Decimal(str(rate)) * BPS).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def percentage_of(cents, bps):
+    """``bps`` basis points of ``cents`` (fees, commissions), rounded half up; amounts must not be negative"""
+    return (cents * bps * 2 + BPS) // (2 * BPS)
+
+
+def apply_bps(cents, bps):
+    """``cents`` increased by ``bps`` basis points (markups, surcharges), rounded half up"""
+    return (cents * (BPS + bps) * 2 + BPS) // (2 * BPS)
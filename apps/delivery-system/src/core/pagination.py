@@ -0,0 +1,175 @@
+"""
+Keyset (cursor) pagination
+
+Listings are ordered by ``(created_at, id)`` and each page continues
+strictly after the last row of the previous one, so fetching page 10,000
+costs the same index range scan as page 1 (OFFSET has to walk and discard
+every skipped row). Cursors are opaque URL-safe strings.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+import base64
+import json
+import uuid
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import literal, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded"""
+
+
+def encode_cursor(created_at: datetime, row_id: Any) -> str:
+    """Encode the sort key of the last row of a page"""
+    payload = json.dumps([created_at.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Decode a cursor produced by ``encode_cursor``
+    
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), str(uuid.UUID(row_id))
+    except (ValueError, TypeError, AttributeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+
+@dataclass
+class PageParams:
+    """Pagination request: page size and where to continue from"""
+    limit: int = DEFAULT_PAGE_SIZE
+    cursor: Optional[str] = None
+
+
+@dataclass
+class Page(Generic[T]):
+    """One page of results"""
+    items: List[T] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+    
+    def to_dict(self, serializer: Optional[Callable[[T], Any]] = None) -> dict:
+        """
+        Convert the page to the list response format
+        
+        Items go through ``serializer``, by default the compiled serializer
+        of their model (models.serialization.serialize).
+        """
+        if serializer is None:
+            from ..models.serialization import serialize as serializer
+        
+        return {
+            "items": [serializer(item) for item in self.items],
+            "next_cursor": self.next_cursor,
+            "has_more": self.has_more,
+        }
+
+
+def page_params(
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+) -> PageParams:
+    """FastAPI dependency for list endpoints"""
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except InvalidCursor:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return PageParams(limit=limit, cursor=cursor)
+
+
+def keyset_query(query: Select, model, params: PageParams, descending: bool = True) -> Select:
+    """
+    Apply keyset ordering, the cursor condition and the page size to ``query``
+    
+    Fetches one extra row to know whether another page exists. The
+    filtered columns of ``query`` plus ``(created_at, id)`` should be
+    covered by an index for constant-time pages.
+    """
+    sort_key = tuple_(model.created_at, model.id)
+    if params.cursor:
+        created_at, row_id = decode_cursor(params.cursor)
+        # Bound with the columns' types: an untyped id would be compared as
+        # VARCHAR with the uuid column (an error on PostgreSQL, and the wrong
+        # text form on SQLite, which stores it as 32 hex digits)
+        after = tuple_(literal(created_at, model.created_at.type), literal(row_id, model.id.type))
+        query = query.where(sort_key < after if descending else sort_key > after)
+        # Implied by the row comparison, but only a plain bound on
+        # created_at lets PostgreSQL skip the partitions past the cursor
+        query = query.where(model.created_at <= created_at if descending else model.created_at >= created_at)
+    
+    if descending:
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        query = query.order_by(model.created_at.asc(), model.id.asc())
+    return query.limit(params.limit + 1)
+
+
+async def paginate(
+    session: AsyncSession,
+    query: Select,
+    model,
+    params: PageParams,
+    descending: bool = True
+) -> Page:
+    """
+    Fetch one page of ``query`` ordered by ``(created_at, id)``
+    
+    Args:
+        session: Database session
+        query: Filtered select of ``model`` (without ORDER BY/LIMIT)
+        model: Model providing ``created_at`` and ``id``
+        params: Page size and cursor
+        descending: Newest first (default) or oldest first
+    """
+    result = await session.execute(keyset_query(query, model, params, descending))
+    rows = list(result.unique().scalars().all())  # unique(): joined eager loads repeat the parent row
+    return _page(rows, params, lambda last: (last.created_at, last.id))
+
+
+async def paginate_rows(
+    session: AsyncSession,
+    query: Select,
+    model,
+    params: PageParams,
+    descending: bool = True
+) -> Page[Dict[str, Any]]:
+    """
+    Fetch one page of a column query as dictionaries keyed by column label
+    
+    Same as ``paginate`` without building ORM objects, for large listings
+    serialized straight from the rows. ``query`` must select
+    ``model.created_at`` and ``model.id`` (the cursor is built from them).
+    """
+    result = await session.execute(keyset_query(query, model, params, descending))
+    keys = tuple(result.keys())
+    rows = [dict(zip(keys, row)) for row in result]
+    return _page(rows, params, lambda last: (last["created_at"], last["id"]))
+
+
+def _page(rows: List[Any], params: PageParams, sort_key: Callable[[Any], Tuple[datetime, Any]]) -> Page:
+    """Trim the extra row fetched by keyset_query and build the next cursor from the last row"""
+    next_cursor = None
+    if len(rows) > params.limit:
+        rows = rows[:params.limit]
+        next_cursor = encode_cursor(*sort_key(rows[-1]))
+    
+    return Page(items=rows, next_cursor=next_cursor)
@@ -0,0 +1,111 @@
+"""
+Monthly range partitioning by ``created_at`` (PostgreSQL)
+
+Partitioned tables (orders, notifications) keep one partition per UTC
+month, e.g. ``orders_2025_01`` holds ``[2025-01-01, 2025-02-01)``, plus a
+``<table>_default`` partition for rows outside the created ranges (it should
+stay empty). Queries that bound ``created_at`` only scan the matching
+partitions; months past the retention window are archived and dropped by
+src.jobs.partitions. On SQLite the tables are not partitioned.
+"""
+from datetime import datetime, timezone
+from typing import List, Optional
+import re
+
+from sqlalchemy import Table, event, text
+
+from .config import settings
+
+# Table options for a model partitioned by month
+MONTHLY_PARTITIONS = {"postgresql_partition_by": "RANGE (created_at)"}
+
+
+def utcnow() -> datetime:
+    """Default of partition keys, set client-side so the target partition is known before the INSERT"""
+    return datetime.now(timezone.utc)
+
+
+def month_start(value: datetime) -> datetime:
+    """First instant (UTC) of the month containing ``value``"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    """Shift a month start by ``months`` (may be negative)"""
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    """Name of the partition holding ``month``, e.g. orders_2025_01"""
+    return f"{table}_{month:%Y_%m}"
+
+
+def partition_month(table: str, name: str) -> Optional[datetime]:
+    """Month of a partition created by ``partition_name`` (None for others, e.g. the default one)"""
+    match = re.fullmatch(rf"{re.escape(table)}_(\d{{4}})_(\d{{2}})", name)
+    if match is None:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+
+
+def is_partition_of(table: str, name: str) -> bool:
+    """Check whether ``name`` is a partition (monthly or default) of ``table``"""
+    return name == f"{table}_default" or partition_month(table, name) is not None
+
+
+def create_partition_sql(table: str, month: datetime) -> str:
+    """DDL creating the partition of ``table`` for ``month`` if missing"""
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def attach_partition_sql(table: str, month: datetime) -> str:
+    """DDL attaching a detached monthly partition back to ``table``"""
+    return (
+        f"ALTER TABLE {table} ATTACH PARTITION {partition_name(table, month)} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def create_default_partition_sql(table: str) -> str:
+    """DDL creating the catch-all partition of ``table`` if missing"""
+    return f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"
+
+
+def months_to_create(now: Optional[datetime] = None, months_ahead: Optional[int] = None) -> List[datetime]:
+    """The current month and the next ``months_ahead`` (PARTITION_PREMAKE_MONTHS)"""
+    current = month_start(now or datetime.now(timezone.utc))
+    if months_ahead is None:
+        months_ahead = settings.PARTITION_PREMAKE_MONTHS
+    return [add_months(current, offset) for offset in range(months_ahead + 1)]
+
+
+def hot_window_start(now: Optional[datetime] = None) -> datetime:
+    """
+    Lower ``created_at`` bound for queries over live rows
+    
+    Aligned to a month so whole partitions are pruned: the current month
+    plus the previous PARTITION_HOT_MONTHS.
+    """
+    current = month_start(now or datetime.now(timezone.utc))
+    return add_months(current, -settings.PARTITION_HOT_MONTHS)
+
+
+def is_partitioned(table: Table) -> bool:
+    """Check whether a table is declared with MONTHLY_PARTITIONS"""
+    return bool(table.dialect_options["postgresql"].get("partition_by"))
+
+
+@event.listens_for(Table, "after_create")
+def _create_initial_partitions(table, connection, **kw):
+    """Give tables created by ``create_all`` a default and the upcoming month partitions"""
+    if connection.dialect.name != "postgresql" or not is_partitioned(table):
+        return
+    connection.execute(text(create_default_partition_sql(table.name)))
+    for month in months_to_create():
+        connection.execute(text(create_partition_sql(table.name, month)))
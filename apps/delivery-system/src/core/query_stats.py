@@ -0,0 +1,152 @@
+"""
+SQL instrumentation: per-request query count, DB time, slow-query log and
+N+1 (lazy load) detection
+
+Statements are timed by cursor execute hooks registered on every Engine.
+The numbers are attributed to the QueryStats active in the current
+context (one per HTTP request, see middleware.query_stats, or opened
+explicitly with ``track_queries``).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional
+import logging
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import RelationshipProperty, Session
+
+from .config import settings
+from .metrics import DB_LAZY_LOADS, DB_QUERY_LATENCY, DB_SLOW_QUERIES
+
+logger = logging.getLogger(__name__)
+
+_current_stats: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block runs more queries or lazy loads than allowed"""
+
+
+@dataclass
+class QueryStats:
+    """Statements executed within one request or block"""
+    count: int = 0
+    total_time: float = 0.0  # seconds
+    slowest_time: float = 0.0
+    slowest_statement: Optional[str] = None
+    lazy_loads: List[str] = field(default_factory=list)
+    
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.total_time += duration
+        if duration > self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_statement = statement
+    
+    def server_timing(self) -> str:
+        """Value for the Server-Timing response header"""
+        return (
+            f'db;dur={self.total_time * 1000:.2f};desc="{self.count} queries", '
+            f'db-slowest;dur={self.slowest_time * 1000:.2f}'
+        )
+
+
+def current_stats() -> Optional[QueryStats]:
+    """Get the QueryStats collecting for the current context, if any"""
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Collect statistics for the statements executed inside the block"""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int, allow_lazy_loads: bool = False) -> Iterator[QueryStats]:
+    """
+    Fail when the block runs more than ``max_queries`` statements
+    
+    Meant for tests, e.g. ``with assert_max_queries(3): await client.get(...)``.
+    
+    Raises:
+        QueryBudgetExceeded: On too many statements or, unless allowed, any
+            relationship lazy load (the usual source of N+1 queries)
+    """
+    with track_queries() as stats:
+        yield stats
+    check_budget(stats, max_queries, allow_lazy_loads)
+
+
+def check_budget(stats: QueryStats, max_queries: int, allow_lazy_loads: bool = False) -> None:
+    """Raise QueryBudgetExceeded if ``stats`` is over budget"""
+    if stats.count > max_queries:
+        raise QueryBudgetExceeded(
+            f"{stats.count} queries executed, at most {max_queries} allowed "
+            f"(slowest: {stats.slowest_statement})"
+        )
+    if stats.lazy_loads and not allow_lazy_loads:
+        raise QueryBudgetExceeded(f"Lazy relationship loads (N+1): {', '.join(stats.lazy_loads)}")
+
+
+def _operation(statement: str) -> str:
+    """First SQL keyword, used as metric label"""
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+    return keyword if keyword in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH") else "OTHER"
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start_time"].pop()
+    duration = time.perf_counter() - started
+    operation = _operation(statement)
+    
+    DB_QUERY_LATENCY.labels(operation=operation).observe(duration)
+    if duration * 1000 >= settings.DATABASE_SLOW_QUERY_MS:
+        DB_SLOW_QUERIES.labels(operation=operation).inc()
+        logger.warning(f"Slow query ({duration * 1000:.1f} ms): {statement}")
+    
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # Keep the timing stack balanced when a statement fails
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start_time"):
+        conn.info["query_start_time"].pop()
+
+
+def _relationship_name(orm_execute_state) -> str:
+    """Name of the lazily loaded relationship, e.g. Order.consumer"""
+    path = orm_execute_state.loader_strategy_path
+    for element in reversed(path.path if path is not None else ()):
+        if isinstance(element, RelationshipProperty):
+            return str(element)
+    return "unknown"
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_lazy_loads(orm_execute_state):
+    if not orm_execute_state.is_select or orm_execute_state.lazy_loaded_from is None:
+        return
+    relationship = _relationship_name(orm_execute_state)
+    DB_LAZY_LOADS.labels(relationship=relationship).inc()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.lazy_loads.append(relationship)
@@ -0,0 +1,36 @@
+"""
+JSON responses encoded with orjson
+
+orjson encodes datetime, date, UUID, Enum and dataclasses natively (in C),
+so serializers can hand model values over as they are instead of calling
+``isoformat()``/``.value`` per field. Returning an ``ORJSONResponse`` from
+an endpoint also skips FastAPI's ``jsonable_encoder`` pass over the content.
+"""
+from decimal import Decimal
+from typing import Any
+
+from fastapi.responses import JSONResponse
+import orjson
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def orjson_default(value: Any) -> Any:
+    """Types orjson does not encode natively"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode ``content`` as JSON bytes"""
+    return orjson.dumps(content, default=orjson_default, option=ORJSON_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (the application's default response class)"""
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,4 @@
+"""
+Background jobs
+Run on a schedule (cron, Kubernetes CronJob) with ``python -m src.jobs.<job>``
+"""
@@ -0,0 +1,183 @@
+"""
+Outbox relay: publishes outbox_events to the queue
+
+Each batch claims the oldest unpublished events with
+``SELECT ... FOR UPDATE SKIP LOCKED`` (so several relays can run side by
+side without publishing the same rows), XADDs them to the OUTBOX_STREAM
+Redis stream and marks them published in the same transaction. If
+publishing fails the transaction rolls back and the events are retried.
+An event can reach the stream twice (relay crash after XADD, before
+commit), so consumers deduplicate on its ``id``.
+
+Usage (from apps/delivery-system), as a long-running worker:
+    python -m src.jobs.outbox_relay [--once]
+"""
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+import argparse
+import asyncio
+import logging
+import signal
+import time
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.cache import get_redis, open_pipeline
+from ..core.config import settings
+from ..core.database import close_db, get_async_sessionmaker
+from ..core.metrics import OUTBOX_PUBLISH_LAG, OUTBOX_PUBLISHED, OUTBOX_RELAY_ERRORS
+from ..core.partitioning import utcnow
+from ..models.outbox import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+PURGE_INTERVAL = 300  # seconds between purges of published events
+
+
+async def claim_events(session: AsyncSession, limit: int) -> List[OutboxEvent]:
+    """Lock the oldest unpublished events, skipping rows claimed by another relay"""
+    query = (
+        select(OutboxEvent)
+        .where(OutboxEvent.published_at.is_(None))
+        .order_by(OutboxEvent.created_at, OutboxEvent.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return list((await session.execute(query)).scalars().all())
+
+
+async def publish_events(events: List[OutboxEvent]) -> None:
+    """XADD the events to OUTBOX_STREAM, in order, in one round trip"""
+    client = await get_redis("queue")
+    pipe = open_pipeline(client, transaction=False)
+    for outbox_event in events:
+        pipe.xadd(
+            settings.OUTBOX_STREAM,
+            outbox_event.to_message(),
+            maxlen=settings.OUTBOX_STREAM_MAXLEN,
+            approximate=True,
+        )
+    await pipe.execute()
+
+
+async def relay_batch(limit: Optional[int] = None) -> int:
+    """
+    Publish one batch of events
+    
+    Returns:
+        Number of events published
+    """
+    async with get_async_sessionmaker()() as session:
+        async with session.begin():
+            events = await claim_events(session, limit or settings.OUTBOX_BATCH_SIZE)
+            if not events:
+                return 0
+            
+            await publish_events(events)
+            
+            now = utcnow()
+            await session.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_([outbox_event.id for outbox_event in events]))
+                .values(published_at=now)
+                .execution_options(synchronize_session=False)
+            )
+    
+    for outbox_event in events:
+        OUTBOX_PUBLISHED.labels(event_type=outbox_event.event_type).inc()
+        created_at = outbox_event.created_at
+        if created_at is not None:
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)  # SQLite returns naive UTC
+            OUTBOX_PUBLISH_LAG.observe(max((now - created_at).total_seconds(), 0.0))
+    return len(events)
+
+
+async def purge_published_events(now: Optional[datetime] = None, batch_size: int = 1000) -> int:
+    """Delete events published more than OUTBOX_RETENTION_HOURS ago, in batches"""
+    cutoff = (now or utcnow()) - timedelta(hours=settings.OUTBOX_RETENTION_HOURS)
+    expired = (
+        select(OutboxEvent.id)
+        .where(OutboxEvent.published_at.isnot(None), OutboxEvent.published_at < cutoff)
+        .limit(batch_size)
+    )
+    
+    purged = 0
+    while True:
+        async with get_async_sessionmaker()() as session:
+            async with session.begin():
+                result = await session.execute(
+                    delete(OutboxEvent)
+                    .where(OutboxEvent.id.in_(expired.scalar_subquery()))
+                    .execution_options(synchronize_session=False)
+                )
+        purged += result.rowcount
+        if result.rowcount < batch_size:
+            return purged
+
+
+async def run_relay(stop: Optional[asyncio.Event] = None, once: bool = False) -> int:
+    """
+    Publish events until ``stop`` is set (or the backlog is drained, with ``once``)
+    
+    Returns:
+        Number of events published
+    """
+    stop = stop or asyncio.Event()
+    published = 0
+    last_purge = 0.0
+    
+    while not stop.is_set():
+        try:
+            count = await relay_batch()
+            published += count
+            
+            # Backlog drained: clean up now and then, then wait for new events
+            if count < settings.OUTBOX_BATCH_SIZE and time.monotonic() - last_purge >= PURGE_INTERVAL:
+                last_purge = time.monotonic()
+                purged = await purge_published_events()
+                if purged:
+                    logger.info(f"Purged {purged} published outbox events")
+        except Exception as e:
+            if once:
+                raise
+            OUTBOX_RELAY_ERRORS.inc()
+            logger.error(f"Outbox relay batch failed, retrying: {e}")
+            count = 0
+        
+        if count < settings.OUTBOX_BATCH_SIZE:
+            if once:
+                break
+            try:
+                await asyncio.wait_for(stop.wait(), settings.OUTBOX_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+    
+    return published
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Publish transactional outbox events to the queue")
+    parser.add_argument("--once", action="store_true", help="Publish the current backlog and exit")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=settings.LOG_LEVEL, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    
+    async def run():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        
+        try:
+            published = await run_relay(stop, once=args.once)
+            logger.info(f"Published {published} outbox events")
+        finally:
+            await close_db()
+    
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
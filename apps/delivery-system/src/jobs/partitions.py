@@ -0,0 +1,290 @@
+"""
+Partition maintenance for the monthly partitioned tables (PostgreSQL)
+
+- Creates the partitions of the current month and the next
+  PARTITION_PREMAKE_MONTHS, so new rows never land in the default one.
+- Archives months older than the table's retention: the partition is
+  detached first (``DETACH PARTITION CONCURRENTLY``, outside a transaction),
+  so the export never holds a lock that order or notification updates wait
+  on. The standalone table is then exported with COPY to
+  ``PARTITION_ARCHIVE_DIR/<table>/<partition>.csv.gz`` and dropped.
+  Partitions that still hold live rows (active orders, unsent notifications)
+  are kept, or attached back if such a row is found after the detach.
+
+PostgreSQL does not allow a concurrent detach while the table has a default
+partition; then a plain DETACH runs in its own short transaction under
+DETACH_LOCK_TIMEOUT (it takes the parent's lock before the partition's, like
+every writer, and gives up instead of queueing writes behind it). Tables left
+detached by an interrupted run are archived by the next one.
+
+Usage (from apps/delivery-system), daily:
+    python -m src.jobs.partitions [--dry-run]
+"""
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import gzip
+import logging
+
+from sqlalchemy import Column, column, exists, select, table as table_clause, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.sql import ColumnElement
+from sqlalchemy.sql.visitors import replacement_traverse
+
+from ..core.config import settings
+from ..core.database import close_db, get_async_engine
+from ..core.partitioning import (
+    add_months,
+    attach_partition_sql,
+    create_partition_sql,
+    month_start,
+    months_to_create,
+    partition_month,
+    partition_name,
+)
+from ..models.notification import Notification, NotificationStatus
+from ..models.order import Order
+from ..repositories.orders import ACTIVE_ORDER_FILTER
+
+logger = logging.getLogger(__name__)
+
+PARTITIONS_QUERY = text(
+    "SELECT child.relname FROM pg_inherits "
+    "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+    "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+    "WHERE parent.relname = :table AND parent.relnamespace = to_regnamespace(current_schema()) "
+    "ORDER BY child.relname"
+)
+
+# Plain tables named like partitions: left over by a run interrupted after the detach
+DETACHED_QUERY = text(
+    "SELECT relname FROM pg_class "
+    "WHERE relkind = 'r' AND NOT relispartition AND relname LIKE :pattern "
+    "AND relnamespace = to_regnamespace(current_schema()) "
+    "ORDER BY relname"
+)
+
+# A concurrent detach interrupted between its two transactions must be finalized
+DETACH_PENDING_QUERY = text("SELECT inhdetachpending FROM pg_inherits WHERE inhrelid = to_regclass(:name)")
+
+DETACH_LOCK_TIMEOUT = "5s"  # Plain DETACH (tables with a default partition)
+
+
+@dataclass
+class PartitionPolicy:
+    """Retention of a partitioned table"""
+    model: type
+    retention_months: int
+    keep: Optional[ColumnElement] = None  # Partitions with rows matching this are not archived
+    
+    @property
+    def table(self) -> str:
+        return self.model.__tablename__
+    
+    def keep_in(self, name: str) -> ColumnElement:
+        """``keep`` against the standalone table ``name`` (a detached partition)"""
+        source = self.model.__table__
+        standalone = table_clause(name, *(column(col.name, col.type) for col in source.c))
+        
+        def swap(element):
+            if isinstance(element, Column) and element.table is source:
+                return standalone.c[element.name]
+            return None
+        
+        return replacement_traverse(self.keep, {}, swap)
+
+
+def partition_policies() -> List[PartitionPolicy]:
+    """Retention policies of the partitioned tables"""
+    return [
+        PartitionPolicy(Order, settings.ORDERS_RETENTION_MONTHS, keep=ACTIVE_ORDER_FILTER),
+        PartitionPolicy(
+            Notification,
+            settings.NOTIFICATIONS_RETENTION_MONTHS,
+            keep=Notification.status.in_([NotificationStatus.PENDING, NotificationStatus.SENDING]),
+        ),
+    ]
+
+
+async def list_partitions(conn: AsyncConnection, table: str) -> List[str]:
+    """Names of the partitions attached to ``table``"""
+    return list((await conn.execute(PARTITIONS_QUERY, {"table": table})).scalars().all())
+
+
+async def list_detached(conn: AsyncConnection, table: str) -> List[str]:
+    """Monthly partitions of ``table`` that were detached but not dropped"""
+    names = (await conn.execute(DETACHED_QUERY, {"pattern": f"{table}\\_%"})).scalars().all()
+    return [name for name in names if partition_month(table, name) is not None]
+
+
+async def create_upcoming_partitions(
+    conn: AsyncConnection,
+    table: str,
+    now: Optional[datetime] = None,
+    dry_run: bool = False
+) -> List[str]:
+    """Create the missing partitions of the current and next PARTITION_PREMAKE_MONTHS months"""
+    existing = set(await list_partitions(conn, table))
+    created = []
+    for month in months_to_create(now):
+        name = partition_name(table, month)
+        if name in existing:
+            continue
+        if not dry_run:
+            await conn.execute(text(create_partition_sql(table, month)))
+        created.append(name)
+    return created
+
+
+async def export_partition(conn: AsyncConnection, name: str, path: Path) -> int:
+    """COPY a partition into a gzip-compressed CSV file (with header), returning the row count"""
+    raw = await conn.get_raw_connection()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    
+    with gzip.open(path, "wb") as archive:
+        async def write(chunk: bytes) -> None:
+            archive.write(chunk)
+        
+        status = await raw.driver_connection.copy_from_table(name, output=write, format="csv", header=True)
+    return int(status.split()[-1])  # "COPY <rows>"
+
+
+async def detach_partition(conn: AsyncConnection, table: str, name: str) -> None:
+    """
+    Detach a partition without holding locks that writers would queue behind
+    
+    ``conn`` must be in autocommit mode: a concurrent detach cannot run in a
+    transaction block.
+    """
+    if await conn.scalar(DETACH_PENDING_QUERY, {"name": name}):
+        await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name} FINALIZE"))
+        return
+    
+    if f"{table}_default" not in await list_partitions(conn, table):
+        await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name} CONCURRENTLY"))
+        return
+    
+    await conn.execute(text(f"SET lock_timeout = '{DETACH_LOCK_TIMEOUT}'"))
+    try:
+        await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+    finally:
+        await conn.execute(text("RESET lock_timeout"))
+
+
+async def archive_partition(
+    conn: AsyncConnection,
+    policy: PartitionPolicy,
+    name: str,
+    month: datetime,
+    archive_dir: Path,
+    dry_run: bool = False,
+    attached: bool = True
+) -> Optional[Path]:
+    """
+    Detach, export and drop one partition
+    
+    Args:
+        conn: Connection in autocommit mode
+        attached: False for a table an interrupted run already detached
+    
+    Returns:
+        Path of the archive, or None if the partition was kept
+    """
+    path = archive_dir / policy.table / f"{name}.csv.gz"
+    partial = path.with_name(path.name + ".partial")
+    
+    if attached and policy.keep is not None:
+        # Cheap check first, so a partition with live rows is not detached at all
+        in_month = (policy.model.created_at >= month) & (policy.model.created_at < add_months(month, 1))
+        if await conn.scalar(select(exists().where(in_month, policy.keep))):
+            logger.warning(f"Keeping partition {name}: it still has live rows")
+            return None
+    
+    if dry_run:
+        logger.info(f"Would archive {name} to {path}")
+        return path
+    
+    if attached:
+        await detach_partition(conn, policy.table, name)
+    
+    # Standalone now: nothing writes to it, no lock is needed for the export
+    if policy.keep is not None and await conn.scalar(select(exists().where(policy.keep_in(name)))):
+        logger.warning(f"Attaching {name} back: a row became live before the detach")
+        await conn.execute(text(attach_partition_sql(policy.table, month)))
+        return None
+    
+    rows = await export_partition(conn, name, partial)
+    partial.replace(path)
+    await conn.execute(text(f"DROP TABLE {name}"))
+    
+    logger.info(f"Archived {rows} rows of {name} to {path}")
+    return path
+
+
+async def maintain_partitions(now: Optional[datetime] = None, dry_run: bool = False) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Create upcoming partitions and archive expired ones for every partitioned table
+    
+    Returns:
+        Per table, the ``created`` and ``archived`` partition names
+    """
+    now = now or datetime.now(timezone.utc)
+    archive_dir = Path(settings.PARTITION_ARCHIVE_DIR)
+    summary: Dict[str, Dict[str, List[str]]] = {}
+    
+    engine = get_async_engine()
+    if engine.dialect.name != "postgresql":
+        logger.info("Partition maintenance skipped: tables are only partitioned on PostgreSQL")
+        return summary
+    
+    async with engine.connect() as conn:
+        # DETACH PARTITION CONCURRENTLY cannot run in a transaction block
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for policy in partition_policies():
+            table = policy.table
+            created = await create_upcoming_partitions(conn, table, now, dry_run)
+            partitions = await list_partitions(conn, table)
+            detached = await list_detached(conn, table)
+            default_rows = await conn.scalar(text(f"SELECT count(*) FROM {table}_default"))
+            
+            if default_rows:
+                logger.warning(f"{table}_default holds {default_rows} rows; create partitions for their months")
+            
+            cutoff = add_months(month_start(now), -policy.retention_months)
+            archived = []
+            for name in partitions + detached:
+                month = partition_month(table, name)
+                if month is None or (month >= cutoff and name in partitions):
+                    continue
+                if await archive_partition(
+                    conn, policy, name, month, archive_dir, dry_run, attached=name in partitions
+                ):
+                    archived.append(name)
+            
+            summary[table] = {"created": created, "archived": archived}
+            logger.info(f"{table}: created {created or 'no'} partitions, archived {archived or 'none'}")
+    
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Create upcoming and archive expired monthly partitions")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be created/archived")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=settings.LOG_LEVEL, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    
+    async def run():
+        try:
+            await maintain_partitions(dry_run=args.dry_run)
+        finally:
+            await close_db()
+    
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
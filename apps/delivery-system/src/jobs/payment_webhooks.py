@@ -0,0 +1,164 @@
+"""
+Payment webhook worker: applies the payment_webhook_events inbox
+
+Each batch claims the oldest unprocessed events that are not waiting for a
+retry with ``SELECT ... FOR UPDATE SKIP LOCKED`` (several workers can run
+side by side), applies them to payments and orders through the FSM in bulk
+(src.services.payment_webhooks) and marks them processed in the same
+transaction. Scheduled orders confirmed by a batch get their dispatch job
+(src.services.scheduler) after the commit.
+
+Usage (from apps/delivery-system), as a long-running worker:
+    python -m src.jobs.payment_webhooks [--once]
+"""
+from datetime import datetime, timedelta
+from typing import List, Optional
+import argparse
+import asyncio
+import logging
+import signal
+import time
+
+from sqlalchemy import delete, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..core.database import close_db, get_async_sessionmaker
+from ..core.metrics import PAYMENT_WEBHOOK_BATCH_ERRORS
+from ..core.partitioning import utcnow
+from ..models.payment_webhook import PaymentWebhookEvent
+from ..services.payment_webhooks import apply_webhook_events
+from ..services.scheduler import schedule_pickup
+
+logger = logging.getLogger(__name__)
+
+PURGE_INTERVAL = 3600  # seconds between purges of processed events
+
+
+async def claim_events(session: AsyncSession, limit: int, now: Optional[datetime] = None) -> List[PaymentWebhookEvent]:
+    """Lock the oldest unprocessed events due now, skipping rows claimed by another worker"""
+    query = (
+        select(PaymentWebhookEvent)
+        .where(
+            PaymentWebhookEvent.processed_at.is_(None),
+            or_(PaymentWebhookEvent.retry_at.is_(None), PaymentWebhookEvent.retry_at <= (now or utcnow())),
+        )
+        .order_by(PaymentWebhookEvent.received_at, PaymentWebhookEvent.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return list((await session.execute(query)).scalars().all())
+
+
+async def process_batch(limit: Optional[int] = None) -> int:
+    """
+    Apply one batch of events
+    
+    Returns:
+        Number of events claimed (deferred ones included)
+    """
+    async with get_async_sessionmaker()() as session:
+        async with session.begin():
+            events = await claim_events(session, limit or settings.PAYMENT_WEBHOOK_BATCH_SIZE)
+            if not events:
+                return 0
+            batch = await apply_webhook_events(session, events)
+    
+    for order in batch.paid_orders:
+        if order["is_scheduled"] and order["pickup_scheduled_at"] is not None:
+            await schedule_pickup(order["id"], order["pickup_scheduled_at"])
+    if batch.completed_payments:
+        logger.info(
+            f"Applied {len(events)} payment webhook events: {len(batch.completed_payments)} payments completed, "
+            f"{len(batch.paid_orders)} orders paid"
+        )
+    return len(events)
+
+
+async def purge_processed_events(now: Optional[datetime] = None, batch_size: int = 1000) -> int:
+    """Delete events processed more than PAYMENT_WEBHOOK_RETENTION_DAYS ago, in batches"""
+    cutoff = (now or utcnow()) - timedelta(days=settings.PAYMENT_WEBHOOK_RETENTION_DAYS)
+    expired = (
+        select(PaymentWebhookEvent.id)
+        .where(PaymentWebhookEvent.processed_at.isnot(None), PaymentWebhookEvent.processed_at < cutoff)
+        .limit(batch_size)
+    )
+    
+    purged = 0
+    while True:
+        async with get_async_sessionmaker()() as session:
+            async with session.begin():
+                result = await session.execute(
+                    delete(PaymentWebhookEvent)
+                    .where(PaymentWebhookEvent.id.in_(expired.scalar_subquery()))
+                    .execution_options(synchronize_session=False)
+                )
+        purged += result.rowcount
+        if result.rowcount < batch_size:
+            return purged
+
+
+async def run_worker(stop: Optional[asyncio.Event] = None, once: bool = False) -> int:
+    """
+    Apply events until ``stop`` is set (or the backlog is drained, with ``once``)
+    
+    Returns:
+        Number of events claimed (deferred ones included)
+    """
+    stop = stop or asyncio.Event()
+    processed = 0
+    last_purge = 0.0
+    
+    while not stop.is_set():
+        try:
+            count = await process_batch()
+            processed += count
+            
+            # Backlog drained: clean up now and then, then wait for new events
+            if count < settings.PAYMENT_WEBHOOK_BATCH_SIZE and time.monotonic() - last_purge >= PURGE_INTERVAL:
+                last_purge = time.monotonic()
+                purged = await purge_processed_events()
+                if purged:
+                    logger.info(f"Purged {purged} processed payment webhook events")
+        except Exception as e:
+            if once:
+                raise
+            PAYMENT_WEBHOOK_BATCH_ERRORS.inc()
+            logger.error(f"Payment webhook batch failed, retrying: {e}")
+            count = 0
+        
+        if count < settings.PAYMENT_WEBHOOK_BATCH_SIZE:
+            if once:
+                break
+            try:
+                await asyncio.wait_for(stop.wait(), settings.PAYMENT_WEBHOOK_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+    
+    return processed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply payment gateway webhook events to payments and orders")
+    parser.add_argument("--once", action="store_true", help="Apply the current backlog and exit")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=settings.LOG_LEVEL, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    
+    async def run():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        
+        try:
+            processed = await run_worker(stop, once=args.once)
+            logger.info(f"Processed {processed} payment webhook events")
+        finally:
+            await close_db()
+    
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
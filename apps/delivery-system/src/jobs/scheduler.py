@@ -0,0 +1,87 @@
+"""
+Delayed job worker: runs due jobs of src.services.scheduler
+
+Claims due jobs in batches of SCHEDULER_BATCH_SIZE (PIX expirations,
+scheduled pickups) and runs each in its own transaction. On start and every
+SCHEDULER_RECONCILE_INTERVAL it re-adds jobs missing from Redis (see
+``DelayedJobScheduler.reconcile``). Several workers can run side by side.
+
+Usage (from apps/delivery-system), as a long-running worker:
+    python -m src.jobs.scheduler [--once]
+"""
+from typing import Optional
+import argparse
+import asyncio
+import logging
+import signal
+import time
+
+from ..core.config import settings
+from ..core.database import close_db
+from ..services.scheduler import scheduler
+
+logger = logging.getLogger(__name__)
+
+
+async def run_scheduler(stop: Optional[asyncio.Event] = None, once: bool = False) -> int:
+    """
+    Run due jobs until ``stop`` is set (or none is due, with ``once``)
+    
+    Returns:
+        Number of jobs run
+    """
+    stop = stop or asyncio.Event()
+    ran = 0
+    last_reconcile = None
+    
+    while not stop.is_set():
+        try:
+            if last_reconcile is None or time.monotonic() - last_reconcile >= settings.SCHEDULER_RECONCILE_INTERVAL:
+                last_reconcile = time.monotonic()
+                added = await scheduler.reconcile()
+                if added:
+                    logger.info(f"Reconcile scheduled {added} missing jobs")
+            
+            count = await scheduler.run_due()
+            ran += count
+        except Exception as e:
+            if once:
+                raise
+            logger.error(f"Scheduler batch failed, retrying: {e}")
+            count = 0
+        
+        if count < settings.SCHEDULER_BATCH_SIZE:
+            if once:
+                break
+            try:
+                await asyncio.wait_for(stop.wait(), settings.SCHEDULER_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+    
+    return ran
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run due delayed jobs (PIX expirations, scheduled pickups)")
+    parser.add_argument("--once", action="store_true", help="Run the jobs due now and exit")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=settings.LOG_LEVEL, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    
+    async def run():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        
+        try:
+            ran = await run_scheduler(stop, once=args.once)
+            logger.info(f"Ran {ran} scheduled jobs")
+        finally:
+            await close_db()
+    
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
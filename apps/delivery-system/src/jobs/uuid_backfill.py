@@ -0,0 +1,135 @@
+"""
+Online backfill of the uuid shadow key columns (PostgreSQL)
+
+Step 2 of the varchar -> uuid key migration (revisions 0010 and 0011).
+Walks each table in primary key order and fills the ``<column>_uuid``
+shadows of existing rows, ``--batch-size`` rows per transaction, so only a
+few row locks are held at a time and the application keeps writing (the
+0010 trigger fills the shadows of new and updated rows). Safe to stop and
+rerun: rows already filled are skipped.
+
+Usage (from apps/delivery-system), after ``alembic upgrade 0010``:
+    python -m src.jobs.uuid_backfill [--batch-size 1000] [--pause 0.05] [--table orders]
+then ``alembic upgrade head``.
+"""
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import logging
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from ..core.config import settings
+from ..core.database import close_db, get_async_engine
+
+logger = logging.getLogger(__name__)
+
+# table -> key columns with a shadow (the first one is never NULL)
+KEY_COLUMNS: Dict[str, List[str]] = {
+    "users": ["id"],
+    "orders": ["id", "consumer_id", "merchant_id", "assigned_driver_id"],
+    "deliveries": ["id", "order_id", "driver_id"],
+    "payments": ["id", "order_id"],
+    "notifications": ["id", "user_id", "order_id"],
+    "outbox_events": ["id", "aggregate_id"],
+    "status_events": ["entity_id"],
+}
+
+SHADOW_EXISTS = text(
+    "SELECT 1 FROM information_schema.columns "
+    "WHERE table_schema = current_schema() AND table_name = :table AND column_name = :column"
+)
+
+
+async def has_shadow(conn: AsyncConnection, table: str) -> bool:
+    """Whether ``table`` still has its shadow columns (0010 applied, 0011 not yet)"""
+    column = f"{KEY_COLUMNS[table][0]}_uuid"
+    return await conn.scalar(SHADOW_EXISTS, {"table": table, "column": column}) is not None
+
+
+async def backfill_table(conn: AsyncConnection, table: str, batch_size: int, pause: float) -> int:
+    """
+    Fill the shadow columns of ``table`` in primary key order
+    
+    Returns:
+        Number of rows updated
+    """
+    columns = KEY_COLUMNS[table]
+    assignments = ", ".join(f"{column}_uuid = {column}::uuid" for column in columns)
+    update = text(f"UPDATE {table} SET {assignments} WHERE id = ANY(:ids) AND {columns[0]}_uuid IS NULL")
+    first_batch = text(f"SELECT id FROM {table} ORDER BY id LIMIT :limit")
+    next_batch = text(f"SELECT id FROM {table} WHERE id > :after ORDER BY id LIMIT :limit")
+    
+    updated = batches = 0
+    after: Optional[object] = None
+    started = time.monotonic()
+    while True:
+        async with conn.begin():
+            if after is None:
+                result = await conn.execute(first_batch, {"limit": batch_size})
+            else:
+                result = await conn.execute(next_batch, {"after": after, "limit": batch_size})
+            ids = list(result.scalars().all())
+            if not ids:
+                break
+            updated += (await conn.execute(update, {"ids": ids})).rowcount
+        
+        after = ids[-1]
+        batches += 1
+        if batches % 100 == 0:
+            logger.info(f"{table}: {updated} rows updated ({updated / (time.monotonic() - started):,.0f}/s)")
+        if pause:
+            await asyncio.sleep(pause)
+    
+    async with conn.begin():
+        remaining = await conn.scalar(text(f"SELECT count(*) FROM {table} WHERE {columns[0]}_uuid IS NULL"))
+    logger.info(f"{table}: {updated} rows updated, {remaining} left (rows written meanwhile are filled by the trigger)")
+    return updated
+
+
+async def backfill(tables: Optional[List[str]] = None, batch_size: int = 1000, pause: float = 0.05) -> Dict[str, int]:
+    """
+    Backfill the shadow columns of ``tables`` (default: all)
+    
+    Returns:
+        Rows updated per table
+    """
+    engine = get_async_engine()
+    if engine.dialect.name != "postgresql":
+        logger.info("Nothing to backfill: revision 0011 converts the keys in place on this database")
+        return {}
+    
+    summary: Dict[str, int] = {}
+    async with engine.connect() as conn:
+        for table in tables or list(KEY_COLUMNS):
+            async with conn.begin():
+                pending = await has_shadow(conn, table)
+            if not pending:
+                logger.info(f"{table}: no shadow columns (revision 0010 not applied, or 0011 already applied)")
+                continue
+            summary[table] = await backfill_table(conn, table, batch_size, pause)
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fill the uuid shadow key columns in small batches")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per transaction")
+    parser.add_argument("--pause", type=float, default=0.05, help="Seconds to sleep between batches")
+    parser.add_argument("--table", action="append", choices=list(KEY_COLUMNS), help="Only these tables")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=settings.LOG_LEVEL, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    
+    async def run():
+        try:
+            await backfill(args.table, args.batch_size, args.pause)
+        finally:
+            await close_db()
+    
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""
+Idempotency-Key middleware
+
+Clients retrying a POST/PUT/PATCH (timeouts, lost connections, gateway
+retries) send the same ``Idempotency-Key`` header, and the request must run
+at most once. For the configured path prefixes the middleware:
+
+1. takes a Redis lock on the key (``SET NX PX``); the lock value carries a
+   fingerprint of the request (method, path, query string and body),
+2. runs the request, renewing the lock every third of
+   IDEMPOTENCY_LOCK_SECONDS so a slow request keeps it, and stores its final
+   response (status, headers and body) under the key for
+   IDEMPOTENCY_TTL_SECONDS, then releases the lock (compare-and-delete),
+3. replays the stored response to later requests with the same key, with an
+   ``Idempotent-Replayed: true`` header.
+
+A duplicate that arrives while the first request is still running waits for
+its result (up to IDEMPOTENCY_WAIT_SECONDS, then 409). Reusing a key for a
+different request is a 422. Keys are scoped by the caller's Authorization
+header, so two clients cannot read each other's responses. 5xx responses
+are not stored: the client may retry them.
+
+Requests without the header pass through unchanged.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import base64
+import contextlib
+import hashlib
+import json
+import logging
+import time
+import uuid
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..core.cache import get_redis
+from ..core.config import get_idempotency_path_prefixes, settings
+from ..core.metrics import IDEMPOTENCY_REQUESTS, IDEMPOTENCY_WAIT_SECONDS
+from ..core.responses import ORJSONResponse
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = b"idempotent-replayed"
+MUTATING_METHODS = ("POST", "PUT", "PATCH")
+MAX_KEY_LENGTH = 255
+
+# Lock operations that must only apply while the lock still holds our token
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+RENEW_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class IdempotencyMiddleware:
+    """
+    Run mutating requests that carry an ``Idempotency-Key`` at most once
+    
+    A pure ASGI middleware (not ``BaseHTTPMiddleware``): the request body is
+    read once for the fingerprint and replayed to the application, and the
+    response is forwarded as it is produced while being recorded.
+    """
+    
+    def __init__(self, app: ASGIApp, prefixes: Optional[List[str]] = None):
+        self.app = app
+        self.prefixes = tuple(prefixes if prefixes is not None else get_idempotency_path_prefixes())
+    
+    def _applies(self, scope: Scope) -> bool:
+        return (
+            scope["type"] == "http"
+            and scope["method"] in MUTATING_METHODS
+            and scope["path"].startswith(self.prefixes)
+        )
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        headers = dict(scope["headers"]) if self._applies(scope) else {}
+        key = headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        
+        key = key.decode("latin-1").strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await _error(scope, receive, send, 400, f"Idempotency-Key must have 1 to {MAX_KEY_LENGTH} characters")
+            return
+        
+        body = await _read_body(receive)
+        if body is None:
+            return  # Client went away before sending the whole body
+        fingerprint = _fingerprint(scope, body)
+        record_key = _record_key(headers.get(b"authorization", b""), key)
+        
+        try:
+            redis = await get_redis("cache")
+            outcome = await _claim(redis, record_key, fingerprint)
+        except Exception as e:
+            # Without the store a retry could charge or dispatch twice: refuse instead
+            logger.error(f"Idempotency store unavailable for {scope['method']} {scope['path']}: {e}")
+            IDEMPOTENCY_REQUESTS.labels(outcome="unavailable").inc()
+            await _error(scope, receive, send, 503, "Idempotency store unavailable, retry later")
+            return
+        
+        kind, value = outcome
+        if kind == "replay":
+            IDEMPOTENCY_REQUESTS.labels(outcome="replayed").inc()
+            await _replay(send, value)
+            return
+        if kind == "mismatch":
+            IDEMPOTENCY_REQUESTS.labels(outcome="mismatch").inc()
+            await _error(scope, receive, send, 422, "Idempotency-Key was already used for a different request")
+            return
+        if kind == "in_flight":
+            IDEMPOTENCY_REQUESTS.labels(outcome="conflict").inc()
+            await _error(
+                scope, receive, send, 409, "A request with this Idempotency-Key is still in progress",
+                headers={"Retry-After": "1"},
+            )
+            return
+        
+        await self._execute(scope, _replay_body(body, receive), send, redis, record_key, fingerprint, value)
+    
+    async def _execute(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        redis: Any,
+        record_key: str,
+        fingerprint: str,
+        lock_token: str
+    ) -> None:
+        """Run the request while holding (and renewing) the lock and store its response"""
+        status = 500
+        response_headers: List[Tuple[bytes, bytes]] = []
+        chunks: List[bytes] = []
+        
+        async def recording_send(message: Message) -> None:
+            nonlocal status, response_headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+        
+        renewal = asyncio.create_task(_keep_lock(redis, record_key, lock_token))
+        try:
+            await self.app(scope, receive, recording_send)
+        finally:
+            renewal.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await renewal
+            try:
+                if status < 500:
+                    record = _encode_record(fingerprint, status, response_headers, b"".join(chunks))
+                    await redis.set(record_key, record, ex=settings.IDEMPOTENCY_TTL_SECONDS)
+                    IDEMPOTENCY_REQUESTS.labels(outcome="stored").inc()
+                else:
+                    IDEMPOTENCY_REQUESTS.labels(outcome="not_stored").inc()
+            except Exception as e:
+                logger.error(f"Could not store idempotent response for {scope['method']} {scope['path']}: {e}")
+            finally:
+                # Even without a stored response: duplicates must not wait for the lock to expire
+                try:
+                    await _release(redis, record_key, lock_token)
+                except Exception as e:
+                    logger.error(f"Could not release idempotency lock {_lock_key(record_key)}: {e}")
+
+
+def _record_key(authorization: bytes, key: str) -> str:
+    """Redis key of a client's Idempotency-Key"""
+    caller = hashlib.sha256(authorization).hexdigest()[:16]
+    return f"idempotency:{caller}:{key}"
+
+
+def _lock_key(record_key: str) -> str:
+    return f"{record_key}:lock"
+
+
+def _fingerprint(scope: Scope, body: bytes) -> str:
+    """Hash of what makes two requests "the same request\""""
+    digest = hashlib.sha256()
+    for part in (scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+async def _read_body(receive: Receive) -> Optional[bytes]:
+    """Read the whole request body (None if the client disconnected first)"""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+def _replay_body(body: bytes, receive: Receive) -> Receive:
+    """``receive`` that hands the buffered body to the application first"""
+    pending = [{"type": "http.request", "body": body, "more_body": False}]
+    
+    async def replay() -> Message:
+        if pending:
+            return pending.pop()
+        return await receive()
+    
+    return replay
+
+
+async def _claim(redis: Any, record_key: str, fingerprint: str) -> Tuple[str, Any]:
+    """
+    Take the key's lock, or wait for the response of the request holding it
+    
+    Returns:
+        ("execute", lock token), ("replay", stored record), ("mismatch", None)
+        or ("in_flight", None) when the wait timed out
+    """
+    started = time.monotonic()
+    deadline = started + settings.IDEMPOTENCY_WAIT_SECONDS
+    token = f"{uuid.uuid4().hex}:{fingerprint}"
+    waited = False
+    while True:
+        stored = await redis.get(record_key)
+        if stored is not None:
+            record = json.loads(stored)
+            if waited:
+                IDEMPOTENCY_WAIT_SECONDS.observe(time.monotonic() - started)
+            if record["fingerprint"] != fingerprint:
+                return "mismatch", None
+            return "replay", record
+        
+        if await redis.set(_lock_key(record_key), token, nx=True, px=_lock_ms()):
+            # The first request may have finished between GET and SET
+            stored = await redis.get(record_key)
+            if stored is not None:
+                await _release(redis, record_key, token)
+                continue
+            return "execute", token
+        
+        holder = await redis.get(_lock_key(record_key))
+        if holder is not None and holder.partition(":")[2] != fingerprint:
+            return "mismatch", None
+        if time.monotonic() >= deadline:
+            IDEMPOTENCY_WAIT_SECONDS.observe(time.monotonic() - started)
+            return "in_flight", None
+        waited = True
+        await asyncio.sleep(settings.IDEMPOTENCY_POLL_INTERVAL)
+
+
+def _lock_ms() -> int:
+    return int(settings.IDEMPOTENCY_LOCK_SECONDS * 1000)
+
+
+async def _keep_lock(redis: Any, record_key: str, token: str) -> None:
+    """Extend the lock while the request runs; stop once it is no longer ours"""
+    interval = settings.IDEMPOTENCY_LOCK_SECONDS / 3
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            renewed = await _renew(redis, record_key, token)
+        except Exception as e:
+            # Try again next round: the lease still has two intervals left
+            logger.warning(f"Could not renew idempotency lock {record_key}: {e}")
+            continue
+        if not renewed:
+            logger.warning(f"Idempotency lock {record_key} expired while its request was running")
+            return
+
+
+# The in-process stand-in has no EVAL. Its commands never yield to the event
+# loop, so there the check and the change cannot interleave with another request.
+
+async def _renew(redis: Any, record_key: str, token: str) -> bool:
+    """Reset the lock's TTL if it is still ours"""
+    lock_key = _lock_key(record_key)
+    if hasattr(redis, "eval"):
+        return bool(await redis.eval(RENEW_SCRIPT, 1, lock_key, token, _lock_ms()))
+    return await redis.get(lock_key) == token and await redis.pexpire(lock_key, _lock_ms())
+
+
+async def _release(redis: Any, record_key: str, token: str) -> None:
+    """Delete the lock if it is still ours (it may have expired and been taken over)"""
+    lock_key = _lock_key(record_key)
+    if hasattr(redis, "eval"):
+        await redis.eval(RELEASE_SCRIPT, 1, lock_key, token)
+    elif await redis.get(lock_key) == token:
+        await redis.delete(lock_key)
+
+
+def _encode_record(fingerprint: str, status: int, headers: List[Tuple[bytes, bytes]], body: bytes) -> str:
+    return json.dumps({
+        "fingerprint": fingerprint,
+        "status": status,
+        "headers": [[name.decode("latin-1"), value.decode("latin-1")] for name, value in headers],
+        "body": base64.b64encode(body).decode("ascii"),
+    })
+
+
+async def _replay(send: Send, record: Dict[str, Any]) -> None:
+    """Send a stored response"""
+    headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in record["headers"]]
+    headers.append((REPLAYED_HEADER, b"true"))
+    await send({"type": "http.response.start", "status": record["status"], "headers": headers})
+    await send({"type": "http.response.body", "body": base64.b64decode(record["body"])})
+
+
+async def _error(
+    scope: Scope,
+    receive: Receive,
+    send: Send,
+    status_code: int,
+    detail: str,
+    headers: Optional[Dict[str, str]] = None
+) -> None:
+    response = ORJSONResponse({"detail": detail}, status_code=status_code, headers=headers)
+    await response(scope, receive, send)
@@ -0,0 +1,44 @@
+"""
+Per-request SQL statistics middleware
+"""
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+import logging
+
+from ..core.config import settings, is_testing
+from ..core.metrics import DB_REQUEST_QUERIES, DB_REQUEST_TIME
+from ..core.query_stats import check_budget, track_queries
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStatsMiddleware(BaseHTTPMiddleware):
+    """
+    Count the SQL statements and DB time of each request
+    
+    Exports them to Prometheus per route and, when DATABASE_SERVER_TIMING
+    is on, in the ``Server-Timing`` response header. In test mode a
+    non-zero DATABASE_QUERY_BUDGET makes requests that exceed it (or that
+    trigger relationship lazy loads) fail with QueryBudgetExceeded.
+    """
+    
+    async def dispatch(self, request: Request, call_next):
+        with track_queries() as stats:
+            response = await call_next(request)
+        
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        DB_REQUEST_QUERIES.labels(route=route).observe(stats.count)
+        DB_REQUEST_TIME.labels(route=route).observe(stats.total_time)
+        
+        if stats.lazy_loads:
+            logger.warning(f"{request.method} {route}: lazy loads (N+1) {', '.join(stats.lazy_loads)}")
+        
+        if settings.DATABASE_SERVER_TIMING:
+            existing = response.headers.get("server-timing")
+            timing = stats.server_timing()
+            response.headers["Server-Timing"] = f"{existing}, {timing}" if existing else timing
+        
+        if is_testing() and settings.DATABASE_QUERY_BUDGET:
+            check_budget(stats, settings.DATABASE_QUERY_BUDGET)
+        
+        return response
@@ -7,6 +7,9 @@ from .order import Order, OrderStatus, OrderPriority, ItemCategory
 from .delivery import Delivery, DeliveryStatus
 from .payment import Payment, PaymentStatus, PaymentMethod
 from .notification import Notification, NotificationStatus, NotificationType
+from .outbox import OutboxEvent
+from .payment_webhook import PaymentWebhookEvent
+from .status_event import StatusEvent
 
 __all__ = [
     "User",
@@ -23,5 +26,8 @@ __all__ = [
     "PaymentMethod",
     "Notification",
     "NotificationStatus",
-    "NotificationType"
+    "NotificationType",
+    "OutboxEvent",
+    "PaymentWebhookEvent",
+    "StatusEvent"
 ]
\ No newline at end of file
@@ -1,13 +1,16 @@
 """
 Delivery model for tracking delivery execution
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Enum as SQLEnum, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Enum as SQLEnum, ForeignKey, Numeric, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from enum import Enum
-import uuid
 
-from ..core.database import Base
+from ..core.database import Base, JSONType, UUIDType
+from ..core.ids import new_id
+from ..core.geo import track_geohash
+from ..core.money import Cents
+from .outbox import track_status_changes
 
 
 class DeliveryStatus(str, Enum):
@@ -28,18 +31,19 @@ class Delivery(Base):
     __tablename__ = "deliveries"
     
     # Primary fields
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDType, primary_key=True, default=new_id)
     
     # Relationships
-    order_id = Column(String, ForeignKey("orders.id"), nullable=False, unique=True, index=True)
-    driver_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    order_id = Column(UUIDType, nullable=False, unique=True, index=True)  # orders.id (orders is partitioned, no foreign key)
+    driver_id = Column(UUIDType, ForeignKey("users.id"), nullable=False, index=True)
     
     # Status tracking
     status = Column(SQLEnum(DeliveryStatus), nullable=False, default=DeliveryStatus.ASSIGNED)
     
     # Driver location tracking
-    current_latitude = Column(String(20), nullable=True)
-    current_longitude = Column(String(20), nullable=True)
+    current_latitude = Column(Float, nullable=True)
+    current_longitude = Column(Float, nullable=True)
+    current_geohash = Column(String(12), nullable=True, index=True)  # Maintained from the coordinates
     last_location_update = Column(DateTime(timezone=True), nullable=True)
     
     # Estimated times
@@ -75,25 +79,30 @@ class Delivery(Base):
     customer_feedback = Column(Text, nullable=True)
     
     # Route optimization
-    route_data = Column(Text, nullable=True)  # JSON with route information
+    route_data = Column(JSONType, nullable=True)  # Route information
     actual_distance_km = Column(Numeric(8, 2), nullable=True)
     actual_duration_minutes = Column(Integer, nullable=True)
     
     # Driver earnings
-    driver_earnings = Column(Numeric(10, 2), nullable=True)
-    driver_tip = Column(Numeric(10, 2), nullable=True)
+    driver_earnings_cents = Column(Cents, nullable=True)
+    driver_tip_cents = Column(Cents, nullable=True)
     
     # System metadata
-    metadata = Column(Text, nullable=True)  # JSON for additional data
+    extra_metadata = Column("metadata", JSONType, nullable=True)  # Additional data
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
     
     # Relationships
-    order = relationship("Order", back_populates="delivery")
+    order = relationship("Order", primaryjoin="foreign(Delivery.order_id) == Order.id", back_populates="delivery")
     driver = relationship("User", back_populates="deliveries")
     
+    __table_args__ = (
+        # Driver history, keyset pagination over (created_at, id)
+        Index("ix_deliveries_driver_created_id", "driver_id", "created_at", "id"),
+    )
+    
     def __repr__(self):
         return f"<Delivery(id={self.id}, order_id={self.order_id}, status={self.status})>"
     
@@ -116,20 +125,11 @@ class Delivery(Base):
         return self.status in [DeliveryStatus.DELIVERED, DeliveryStatus.FAILED, DeliveryStatus.CANCELLED]
     
     def to_dict(self) -> dict:
-        """Convert delivery to dictionary"""
-        return {
-            "id": self.id,
-            "order_id": self.order_id,
-            "driver_id": self.driver_id,
-            "status": self.status.value,
-            "current_latitude": self.current_latitude,
-            "current_longitude": self.current_longitude,
-            "last_location_update": self.last_location_update.isoformat() if self.last_location_update else None,
-            "estimated_pickup_time": self.estimated_pickup_time.isoformat() if self.estimated_pickup_time else None,
-            "estimated_delivery_time": self.estimated_delivery_time.isoformat() if self.estimated_delivery_time else None,
-            "delivered_at": self.delivered_at.isoformat() if self.delivered_at else None,
-            "driver_rating": self.driver_rating,
-            "customer_rating": self.customer_rating,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-        }
\ No newline at end of file
+        """Convert delivery to dictionary (see models.serialization.serialize_delivery)"""
+        from .serialization import serialize_delivery
+        
+        return serialize_delivery(self)
+
+
+track_geohash(Delivery, "current_latitude", "current_longitude", "current_geohash")
+track_status_changes(Delivery, "delivery", ("order_id", "driver_id"))
\ No newline at end of file
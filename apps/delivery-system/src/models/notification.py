@@ -1,13 +1,14 @@
 """
 Notification model for managing all types of notifications
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Enum as SQLEnum, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Enum as SQLEnum, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from enum import Enum
-import uuid
 
-from ..core.database import Base
+from ..core.database import Base, JSONType, UUIDType
+from ..core.ids import new_id
+from ..core.partitioning import MONTHLY_PARTITIONS, utcnow
 
 
 class NotificationType(str, Enum):
@@ -36,11 +37,11 @@ class Notification(Base):
     __tablename__ = "notifications"
     
     # Primary fields
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDType, primary_key=True, default=new_id)
     
     # Relationships
-    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
-    order_id = Column(String, ForeignKey("orders.id"), nullable=True, index=True)
+    user_id = Column(UUIDType, ForeignKey("users.id"), nullable=False, index=True)
+    order_id = Column(UUIDType, nullable=True, index=True)  # orders.id (orders is partitioned, no foreign key)
     
     # Notification details
     type = Column(SQLEnum(NotificationType), nullable=False)
@@ -58,7 +59,7 @@ class Notification(Base):
     # Delivery tracking
     external_id = Column(String(200), nullable=True)  # ID from external service
     external_status = Column(String(50), nullable=True)
-    external_response = Column(Text, nullable=True)  # JSON response
+    external_response = Column(JSONType, nullable=True)  # Raw response from the provider
     
     # Scheduling
     scheduled_at = Column(DateTime(timezone=True), nullable=True)
@@ -78,7 +79,7 @@ class Notification(Base):
     
     # Template and personalization
     template_id = Column(String(100), nullable=True)
-    template_variables = Column(Text, nullable=True)  # JSON with variables
+    template_variables = Column(JSONType, nullable=True)  # Template variables
     
     # Priority and categorization
     priority = Column(Integer, default=5, nullable=False)  # 1-10, 10 being highest
@@ -90,15 +91,31 @@ class Notification(Base):
     click_url = Column(String(500), nullable=True)
     
     # System metadata
-    metadata = Column(Text, nullable=True)  # JSON for additional data
+    extra_metadata = Column("metadata", JSONType, nullable=True)  # Additional data
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    created_at = Column(DateTime(timezone=True), primary_key=True, default=utcnow, server_default=func.now())  # Partition key
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
     
     # Relationships
     user = relationship("User", back_populates="notifications")
-    order = relationship("Order", back_populates="notifications")
+    order = relationship("Order", primaryjoin="foreign(Notification.order_id) == Order.id", back_populates="notifications")
+    
+    __table_args__ = (
+        # Retry worker: "pending/failed notifications whose next_retry_at is due"
+        Index(
+            "ix_notifications_status_next_retry",
+            "status",
+            "next_retry_at",
+            postgresql_where=next_retry_at.isnot(None),
+            sqlite_where=next_retry_at.isnot(None),
+        ),
+        # User inbox, newest first (keyset pagination over (created_at, id))
+        Index("ix_notifications_user_created_id", "user_id", "created_at", "id"),
+        # Partitioned by month on PostgreSQL, table key (id, created_at)
+        MONTHLY_PARTITIONS,
+    )
+    __mapper_args__ = {"primary_key": [id]}
     
     def __repr__(self):
         return f"<Notification(id={self.id}, type={self.type}, status={self.status})>"
@@ -131,24 +148,7 @@ class Notification(Base):
         )
     
     def to_dict(self) -> dict:
-        """Convert notification to dictionary"""
-        return {
-            "id": self.id,
-            "user_id": self.user_id,
-            "order_id": self.order_id,
-            "type": self.type.value,
-            "status": self.status.value,
-            "title": self.title,
-            "message": self.message,
-            "scheduled_at": self.scheduled_at.isoformat() if self.scheduled_at else None,
-            "sent_at": self.sent_at.isoformat() if self.sent_at else None,
-            "delivered_at": self.delivered_at.isoformat() if self.delivered_at else None,
-            "read_at": self.read_at.isoformat() if self.read_at else None,
-            "failed_at": self.failed_at.isoformat() if self.failed_at else None,
-            "retry_count": self.retry_count,
-            "priority": self.priority,
-            "category": self.category,
-            "clicked": self.clicked,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-        }
\ No newline at end of file
+        """Convert notification to dictionary (see models.serialization.serialize_notification)"""
+        from .serialization import serialize_notification
+        
+        return serialize_notification(self)
\ No newline at end of file
@@ -1,13 +1,17 @@
 """
 Order model for managing delivery requests
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Enum as SQLEnum, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Enum as SQLEnum, ForeignKey, Numeric, Float, Index, Sequence
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from enum import Enum
-import uuid
 
-from ..core.database import Base
+from ..core.database import Base, JSONType, UUIDType, json_gin_index
+from ..core.ids import new_id
+from ..core.geo import track_geohash
+from ..core.money import Cents
+from ..core.partitioning import MONTHLY_PARTITIONS, utcnow
+from .outbox import track_status_changes
 
 
 class OrderStatus(str, Enum):
@@ -47,18 +51,34 @@ class ItemCategory(str, Enum):
     OTHER = "other"
 
 
+# States in which an order is still being worked on
+ACTIVE_ORDER_STATUSES = [
+    OrderStatus.QUOTED,
+    OrderStatus.PENDING_PAYMENT,
+    OrderStatus.PAID,
+    OrderStatus.ASSIGNED,
+    OrderStatus.PICKUP_PENDING,
+    OrderStatus.PICKED_UP,
+    OrderStatus.IN_TRANSIT
+]
+
+# Source of order_number sequence values on PostgreSQL: each nextval reserves
+# a block of INCREMENT values for one worker (src.services.order_number_service)
+ORDER_NUMBER_BLOCKS = Sequence("order_number_blocks", increment=100, metadata=Base.metadata)
+
+
 class Order(Base):
     """Order model representing a delivery request"""
     __tablename__ = "orders"
     
     # Primary fields
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    order_number = Column(String(20), unique=True, index=True, nullable=False)  # Human-readable ID
+    id = Column(UUIDType, primary_key=True, default=new_id)
+    order_number = Column(String(20), index=True, nullable=False)  # Human-readable ID, unique by construction (see src.services.order_number_service)
     
     # Relationships
-    consumer_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
-    merchant_id = Column(String, ForeignKey("users.id"), nullable=True, index=True)
-    assigned_driver_id = Column(String, ForeignKey("users.id"), nullable=True, index=True)
+    consumer_id = Column(UUIDType, ForeignKey("users.id"), nullable=False, index=True)
+    merchant_id = Column(UUIDType, ForeignKey("users.id"), nullable=True, index=True)
+    assigned_driver_id = Column(UUIDType, ForeignKey("users.id"), nullable=True, index=True)
     
     # Status and priority
     status = Column(SQLEnum(OrderStatus), nullable=False, default=OrderStatus.DRAFT)
@@ -68,7 +88,7 @@ class Order(Base):
     item_description = Column(Text, nullable=False)
     item_category = Column(SQLEnum(ItemCategory), nullable=False, default=ItemCategory.OTHER)
     item_weight_kg = Column(Numeric(5, 2), nullable=True)
-    item_value = Column(Numeric(10, 2), nullable=True)  # Declared value for insurance
+    item_value_cents = Column(Cents, nullable=True)  # Declared value for insurance
     item_photo_url = Column(String(500), nullable=True)
     special_instructions = Column(Text, nullable=True)
     
@@ -80,8 +100,9 @@ class Order(Base):
     pickup_city = Column(String(100), nullable=False)
     pickup_state = Column(String(100), nullable=False)
     pickup_postal_code = Column(String(20), nullable=True)
-    pickup_latitude = Column(String(20), nullable=True)
-    pickup_longitude = Column(String(20), nullable=True)
+    pickup_latitude = Column(Float, nullable=True)
+    pickup_longitude = Column(Float, nullable=True)
+    pickup_geohash = Column(String(12), nullable=True, index=True)  # Maintained from the coordinates
     pickup_instructions = Column(Text, nullable=True)
     
     # Delivery information
@@ -92,19 +113,20 @@ class Order(Base):
     delivery_city = Column(String(100), nullable=False)
     delivery_state = Column(String(100), nullable=False)
     delivery_postal_code = Column(String(20), nullable=True)
-    delivery_latitude = Column(String(20), nullable=True)
-    delivery_longitude = Column(String(20), nullable=True)
+    delivery_latitude = Column(Float, nullable=True)
+    delivery_longitude = Column(Float, nullable=True)
+    delivery_geohash = Column(String(12), nullable=True, index=True)  # Maintained from the coordinates
     delivery_instructions = Column(Text, nullable=True)
     
     # Route and pricing information
     distance_km = Column(Numeric(8, 2), nullable=True)
     estimated_duration_minutes = Column(Integer, nullable=True)
-    base_price = Column(Numeric(10, 2), nullable=True)
-    final_price = Column(Numeric(10, 2), nullable=True)
+    base_price_cents = Column(Cents, nullable=True)
+    final_price_cents = Column(Cents, nullable=True)
     currency = Column(String(3), default="BRL", nullable=False)
     
     # Pricing factors (for transparency and debugging)
-    price_factors = Column(Text, nullable=True)  # JSON with pricing breakdown
+    price_factors = Column(JSONType, nullable=True)  # Pricing breakdown
     
     # Scheduling
     pickup_scheduled_at = Column(DateTime(timezone=True), nullable=True)
@@ -139,20 +161,49 @@ class Order(Base):
     driver_feedback = Column(Text, nullable=True)
     
     # System metadata
-    metadata = Column(Text, nullable=True)  # JSON for flexible additional data
+    extra_metadata = Column("metadata", JSONType, nullable=True)  # Flexible additional data
     internal_notes = Column(Text, nullable=True)  # Admin notes
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    created_at = Column(DateTime(timezone=True), primary_key=True, default=utcnow, server_default=func.now())  # Partition key
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
     deleted_at = Column(DateTime(timezone=True), nullable=True)  # Soft delete
     
     # Relationships
     consumer = relationship("User", foreign_keys=[consumer_id], back_populates="orders_as_consumer")
     merchant = relationship("User", foreign_keys=[merchant_id], back_populates="orders_as_merchant")
-    delivery = relationship("Delivery", back_populates="order", uselist=False)
-    payment = relationship("Payment", back_populates="order", uselist=False)
-    notifications = relationship("Notification", back_populates="order")
+    # No foreign keys reference the partitioned table, so the joins are explicit
+    delivery = relationship("Delivery", primaryjoin="Order.id == foreign(Delivery.order_id)", back_populates="order", uselist=False)
+    payment = relationship("Payment", primaryjoin="Order.id == foreign(Payment.order_id)", back_populates="order", uselist=False)
+    notifications = relationship("Notification", primaryjoin="Order.id == foreign(Notification.order_id)", back_populates="order")
+    
+    __table_args__ = (
+        # "My orders" / merchant dashboards filtered by status, newest first
+        Index("ix_orders_consumer_status_created", "consumer_id", "status", "created_at"),
+        Index("ix_orders_merchant_status_created", "merchant_id", "status", "created_at"),
+        Index("ix_orders_driver_status", "assigned_driver_id", "status"),
+        # Keyset pagination over (created_at, id)
+        Index("ix_orders_created_id", "created_at", "id"),
+        Index("ix_orders_consumer_created_id", "consumer_id", "created_at", "id"),
+        Index("ix_orders_merchant_created_id", "merchant_id", "created_at", "id"),
+        # Operations dashboard: only live orders are indexed
+        Index(
+            "ix_orders_active_status_created",
+            "status",
+            "created_at",
+            postgresql_where=status.in_(ACTIVE_ORDER_STATUSES) & deleted_at.is_(None),
+            sqlite_where=status.in_(ACTIVE_ORDER_STATUSES) & deleted_at.is_(None),
+        ),
+        # JSONB containment filters (e.g. metadata @> '{"campaign": "..."}')
+        json_gin_index("ix_orders_metadata_gin", "metadata"),
+        json_gin_index("ix_orders_price_factors_gin", "price_factors"),
+        # Partitioned by month on PostgreSQL. The table key is (id, created_at)
+        # because a partitioned table's unique constraints must include the
+        # partition key; for the same reason order_number cannot be unique
+        # across partitions and has to be unique by construction.
+        MONTHLY_PARTITIONS,
+    )
+    __mapper_args__ = {"primary_key": [id]}  # Identity is still the id alone
     
     def __repr__(self):
         return f"<Order(id={self.id}, number={self.order_number}, status={self.status})>"
@@ -182,16 +233,7 @@ class Order(Base):
     @property
     def is_active(self) -> bool:
         """Check if order is in an active state"""
-        active_states = [
-            OrderStatus.QUOTED,
-            OrderStatus.PENDING_PAYMENT,
-            OrderStatus.PAID,
-            OrderStatus.ASSIGNED,
-            OrderStatus.PICKUP_PENDING,
-            OrderStatus.PICKED_UP,
-            OrderStatus.IN_TRANSIT
-        ]
-        return self.status in active_states
+        return self.status in ACTIVE_ORDER_STATUSES
     
     @property
     def is_completed(self) -> bool:
@@ -205,33 +247,12 @@ class Order(Base):
         return self.status in completed_states
     
     def to_dict(self, include_sensitive: bool = False) -> dict:
-        """Convert order to dictionary"""
-        data = {
-            "id": self.id,
-            "order_number": self.order_number,
-            "status": self.status.value,
-            "priority": self.priority.value,
-            "item_description": self.item_description,
-            "item_category": self.item_category.value,
-            "pickup_address": self.full_pickup_address,
-            "delivery_address": self.full_delivery_address,
-            "distance_km": float(self.distance_km) if self.distance_km else None,
-            "estimated_duration_minutes": self.estimated_duration_minutes,
-            "final_price": float(self.final_price) if self.final_price else None,
-            "currency": self.currency,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-        }
-        
-        if include_sensitive:
-            data.update({
-                "pickup_contact_name": self.pickup_contact_name,
-                "pickup_contact_phone": self.pickup_contact_phone,
-                "delivery_contact_name": self.delivery_contact_name,
-                "delivery_contact_phone": self.delivery_contact_phone,
-                "consumer_id": self.consumer_id,
-                "merchant_id": self.merchant_id,
-                "assigned_driver_id": self.assigned_driver_id,
-            })
+        """Convert order to dictionary (see models.serialization.serialize_order)"""
+        from .serialization import serialize_order
         
-        return data
\ No newline at end of file
+        return serialize_order(self, include_sensitive=include_sensitive)
+
+
+track_geohash(Order, "pickup_latitude", "pickup_longitude", "pickup_geohash")
+track_geohash(Order, "delivery_latitude", "delivery_longitude", "delivery_geohash")
+track_status_changes(Order, "order", ("order_number", "consumer_id", "merchant_id", "assigned_driver_id"))
\ No newline at end of file
@@ -0,0 +1,183 @@
+"""
+Transactional outbox
+
+Side effects of a state change (WhatsApp notifications, cache invalidation,
+analytics) are recorded as ``outbox_events`` rows in the same transaction
+as the change itself, and published to the queue afterwards by the relay
+(src.jobs.outbox_relay). A crash between commit and publish can no longer
+lose them; consumers deduplicate on the event id, since an event may be
+published more than once.
+
+Models registered with ``track_status_changes`` get a ``<type>.status_changed``
+event (and a status_events history row) on every ORM flush that inserts
+them or changes their status. Statements that bypass the unit of work
+(``update(...)`` etc.) must add both themselves, as the FSM service does.
+"""
+from sqlalchemy import Column, String, DateTime, Index, event, inspect, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from typing import Any, Dict, Optional, Tuple
+
+from ..core.database import Base, JSONType, UUIDType, json_serializer
+from ..core.ids import new_id
+from ..core.partitioning import utcnow
+from .status_event import StatusEvent, status_event_values
+
+
+class OutboxEvent(Base):
+    """Event waiting to be published to the queue"""
+    __tablename__ = "outbox_events"
+    
+    id = Column(UUIDType, primary_key=True, default=new_id)
+    
+    # What changed
+    aggregate_type = Column(String(50), nullable=False)  # order, payment, delivery
+    aggregate_id = Column(UUIDType, nullable=False)
+    event_type = Column(String(100), nullable=False)  # e.g. order.status_changed
+    payload = Column(JSONType, nullable=False)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), nullable=False, default=utcnow, server_default=func.now())
+    published_at = Column(DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        # Relay: oldest unpublished events first
+        Index(
+            "ix_outbox_events_unpublished",
+            "created_at",
+            "id",
+            postgresql_where=published_at.is_(None),
+            sqlite_where=published_at.is_(None),
+        ),
+        # Purge of published events past retention
+        Index(
+            "ix_outbox_events_published_at",
+            "published_at",
+            postgresql_where=published_at.isnot(None),
+            sqlite_where=published_at.isnot(None),
+        ),
+        # Event history of one order/payment/delivery
+        Index("ix_outbox_events_aggregate", "aggregate_type", "aggregate_id", "created_at"),
+    )
+    
+    def __repr__(self):
+        return f"<OutboxEvent(id={self.id}, type={self.event_type}, aggregate_id={self.aggregate_id})>"
+    
+    def to_message(self) -> Dict[str, str]:
+        """Flat string fields for a Redis stream entry"""
+        return {
+            "id": self.id,
+            "event_type": self.event_type,
+            "aggregate_type": self.aggregate_type,
+            "aggregate_id": self.aggregate_id,
+            "payload": json_serializer(self.payload),
+            "created_at": self.created_at.isoformat() if self.created_at else "",
+        }
+
+
+# Models whose status changes are recorded: model -> (aggregate type, payload attributes)
+_tracked_models: Dict[type, Tuple[str, Tuple[str, ...]]] = {}
+
+
+def _value(value: Any) -> Any:
+    return getattr(value, "value", value)  # Enum members as their value
+
+
+def status_change_values(
+    aggregate_type: str,
+    aggregate_id: str,
+    old_status: Any,
+    new_status: Any,
+    **context: Any
+) -> Dict[str, Any]:
+    """
+    Column values of a ``<aggregate_type>.status_changed`` event
+    
+    Args:
+        aggregate_type: order, payment or delivery
+        aggregate_id: Id of the changed row
+        old_status: Previous status (None on creation)
+        new_status: New status
+        context: Extra payload fields (order_id, driver_id, ...)
+    """
+    payload = {
+        "id": aggregate_id,
+        "from": _value(old_status),
+        "to": _value(new_status),
+        **{key: _value(value) for key, value in context.items()},
+    }
+    return {
+        "id": new_id(),
+        "aggregate_type": aggregate_type,
+        "aggregate_id": aggregate_id,
+        "event_type": f"{aggregate_type}.status_changed",
+        "payload": payload,
+        "created_at": utcnow(),
+    }
+
+
+def track_status_changes(model: type, aggregate_type: str, context: Tuple[str, ...] = ()) -> None:
+    """Record an outbox event whenever the ORM inserts ``model`` or changes its ``status``"""
+    _tracked_models[model] = (aggregate_type, context)
+
+
+def tracked_status_context(model: type) -> Optional[Tuple[str, Tuple[str, ...]]]:
+    """Aggregate type and payload attributes registered for ``model``, if tracked"""
+    return _tracked_models.get(model)
+
+
+def _status_change(obj: Any, is_new: bool) -> Optional[Tuple[Any, Any]]:
+    """(previous, new) status of a flushed object, or None if its status did not change"""
+    if is_new:
+        return None, obj.status
+    history = inspect(obj).attrs.status.history
+    if not history.added:
+        return None
+    old_status = history.deleted[0] if history.deleted else None  # None if it was never loaded
+    if old_status == history.added[0]:
+        return None
+    return old_status, obj.status
+
+
+@event.listens_for(Session, "after_flush")
+def record_status_changes(session, flush_context):
+    """
+    Insert the outbox events and status history of the flushed status
+    changes, in the flush's transaction
+    
+    The actor of the changes is taken from ``session.info["actor"]``.
+    """
+    if not _tracked_models:
+        return
+    
+    outbox_rows, history_rows = [], []
+    # new/dirty still hold the pre-flush state here, with ids and defaults assigned
+    for obj in (*session.new, *session.dirty):
+        if type(obj) not in _tracked_models:
+            continue
+        change = _status_change(obj, obj in session.new)
+        if change is None:
+            continue
+        
+        aggregate_type, context = _tracked_models[type(obj)]
+        old_status, new_status = change
+        outbox_rows.append(status_change_values(
+            aggregate_type,
+            obj.id,
+            old_status,
+            new_status,
+            **{attribute: getattr(obj, attribute) for attribute in context},
+        ))
+        history_rows.append(status_event_values(
+            aggregate_type,
+            obj.id,
+            old_status,
+            new_status,
+            actor=session.info.get("actor"),
+            created_at=outbox_rows[-1]["created_at"],
+        ))
+    
+    if outbox_rows:
+        connection = session.connection()
+        connection.execute(insert(OutboxEvent.__table__), outbox_rows)
+        connection.execute(insert(StatusEvent.__table__), history_rows)
@@ -1,13 +1,16 @@
 """
 Payment model for handling order payments
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Enum as SQLEnum, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Enum as SQLEnum, Numeric, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from decimal import Decimal
 from enum import Enum
-import uuid
 
-from ..core.database import Base
+from ..core.database import Base, JSONType, UUIDType, json_gin_index
+from ..core.ids import new_id
+from ..core.money import Cents, from_cents
+from .outbox import track_status_changes
 
 
 class PaymentStatus(str, Enum):
@@ -30,22 +33,29 @@ class PaymentMethod(str, Enum):
     WALLET = "wallet"           # Digital wallet (balance)
 
 
+# States in which a payment still waits for the gateway (and can expire)
+AWAITING_PAYMENT_STATUSES = [
+    PaymentStatus.PENDING,
+    PaymentStatus.PROCESSING,
+]
+
+
 class Payment(Base):
     """Payment processing and tracking"""
     __tablename__ = "payments"
     
     # Primary fields
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDType, primary_key=True, default=new_id)
     
     # Relationships
-    order_id = Column(String, ForeignKey("orders.id"), nullable=False, unique=True, index=True)
+    order_id = Column(UUIDType, nullable=False, unique=True, index=True)  # orders.id (orders is partitioned, no foreign key)
     
     # Payment details
     method = Column(SQLEnum(PaymentMethod), nullable=False, default=PaymentMethod.PIX)
     status = Column(SQLEnum(PaymentStatus), nullable=False, default=PaymentStatus.PENDING)
     
-    # Amounts (in cents to avoid floating point issues)
-    amount_cents = Column(Integer, nullable=False)
+    # Amounts in cents (src.core.money)
+    amount_cents = Column(Cents, nullable=False)
     currency = Column(String(3), default="BRL", nullable=False)
     
     # Gateway information
@@ -53,7 +63,7 @@ class Payment(Base):
     gateway_transaction_id = Column(String(200), nullable=True, index=True)
     gateway_reference_id = Column(String(200), nullable=True)
     gateway_status = Column(String(50), nullable=True)
-    gateway_response = Column(Text, nullable=True)  # JSON response from gateway
+    gateway_response = Column(JSONType, nullable=True)  # Response from gateway
     
     # PIX specific fields
     pix_qr_code = Column(Text, nullable=True)  # PIX QR code string
@@ -66,9 +76,9 @@ class Payment(Base):
     installments = Column(Integer, default=1, nullable=False)
     
     # Fees and costs
-    gateway_fee_cents = Column(Integer, default=0, nullable=False)
-    platform_fee_cents = Column(Integer, default=0, nullable=False)
-    net_amount_cents = Column(Integer, nullable=True)  # Amount after fees
+    gateway_fee_cents = Column(Cents, default=0, nullable=False)
+    platform_fee_cents = Column(Cents, default=0, nullable=False)
+    net_amount_cents = Column(Cents, nullable=True)  # Amount after fees
     
     # Processing timestamps
     initiated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -78,7 +88,7 @@ class Payment(Base):
     cancelled_at = Column(DateTime(timezone=True), nullable=True)
     
     # Refund information
-    refund_amount_cents = Column(Integer, default=0, nullable=False)
+    refund_amount_cents = Column(Cents, default=0, nullable=False)
     refund_reason = Column(String(500), nullable=True)
     refunded_at = Column(DateTime(timezone=True), nullable=True)
     refund_gateway_id = Column(String(200), nullable=True)
@@ -98,7 +108,7 @@ class Payment(Base):
     
     # Fraud detection
     risk_score = Column(Integer, nullable=True)  # 0-100
-    fraud_analysis = Column(Text, nullable=True)  # JSON with fraud analysis
+    fraud_analysis = Column(JSONType, nullable=True)  # Fraud analysis
     
     # Webhook tracking
     webhook_attempts = Column(Integer, default=0, nullable=False)
@@ -106,7 +116,7 @@ class Payment(Base):
     webhook_status = Column(String(50), nullable=True)
     
     # System metadata
-    metadata = Column(Text, nullable=True)  # JSON for additional data
+    extra_metadata = Column("metadata", JSONType, nullable=True)  # Additional data
     notes = Column(Text, nullable=True)     # Admin notes
     
     # Timestamps
@@ -114,35 +124,48 @@ class Payment(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
     
     # Relationships
-    order = relationship("Order", back_populates="payment")
+    order = relationship("Order", primaryjoin="foreign(Payment.order_id) == Order.id", back_populates="payment")
+    
+    __table_args__ = (
+        # Payments still waiting for the gateway webhook, by PIX expiration
+        Index(
+            "ix_payments_awaiting_status_pix_expiration",
+            "status",
+            "pix_expiration",
+            postgresql_where=status.in_([PaymentStatus.PENDING, PaymentStatus.PROCESSING]),
+            sqlite_where=status.in_([PaymentStatus.PENDING, PaymentStatus.PROCESSING]),
+        ),
+        # Reconciliation lookups on gateway payload fields
+        json_gin_index("ix_payments_gateway_response_gin", "gateway_response"),
+    )
     
     def __repr__(self):
         return f"<Payment(id={self.id}, order_id={self.order_id}, status={self.status})>"
     
     @property
-    def amount_brl(self) -> float:
+    def amount_brl(self) -> Decimal:
         """Get amount in BRL (converting from cents)"""
-        return self.amount_cents / 100
+        return from_cents(self.amount_cents)
     
     @property
-    def gateway_fee_brl(self) -> float:
+    def gateway_fee_brl(self) -> Decimal:
         """Get gateway fee in BRL"""
-        return self.gateway_fee_cents / 100
+        return from_cents(self.gateway_fee_cents)
     
     @property
-    def platform_fee_brl(self) -> float:
+    def platform_fee_brl(self) -> Decimal:
         """Get platform fee in BRL"""
-        return self.platform_fee_cents / 100
+        return from_cents(self.platform_fee_cents)
     
     @property
-    def net_amount_brl(self) -> float:
+    def net_amount_brl(self) -> Decimal:
         """Get net amount in BRL"""
-        return (self.net_amount_cents or 0) / 100
+        return from_cents(self.net_amount_cents or 0)
     
     @property
-    def refund_amount_brl(self) -> float:
+    def refund_amount_brl(self) -> Decimal:
         """Get refund amount in BRL"""
-        return self.refund_amount_cents / 100
+        return from_cents(self.refund_amount_cents)
     
     @property
     def is_pending(self) -> bool:
@@ -160,28 +183,10 @@ class Payment(Base):
         return self.status in [PaymentStatus.FAILED, PaymentStatus.CANCELLED]
     
     def to_dict(self, include_sensitive: bool = False) -> dict:
-        """Convert payment to dictionary"""
-        data = {
-            "id": self.id,
-            "order_id": self.order_id,
-            "method": self.method.value,
-            "status": self.status.value,
-            "amount_brl": self.amount_brl,
-            "currency": self.currency,
-            "gateway": self.gateway,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
-        }
-        
-        if include_sensitive:
-            data.update({
-                "gateway_transaction_id": self.gateway_transaction_id,
-                "pix_code": self.pix_code,
-                "pix_qr_code": self.pix_qr_code,
-                "pix_expiration": self.pix_expiration.isoformat() if self.pix_expiration else None,
-                "gateway_fee_brl": self.gateway_fee_brl,
-                "platform_fee_brl": self.platform_fee_brl,
-                "net_amount_brl": self.net_amount_brl,
-            })
+        """Convert payment to dictionary (see models.serialization.serialize_payment)"""
+        from .serialization import serialize_payment
         
-        return data
\ No newline at end of file
+        return serialize_payment(self, include_sensitive=include_sensitive)
+
+
+track_status_changes(Payment, "payment", ("order_id", "method"))
\ No newline at end of file
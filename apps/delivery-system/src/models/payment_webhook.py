@@ -0,0 +1,75 @@
+"""
+Payment gateway webhook inbox
+
+A gateway notification is acknowledged by inserting one row per charge
+status it reports (INSERT ... ON CONFLICT DO NOTHING). Gateways redeliver
+notifications, so the unique key (gateway, gateway_transaction_id,
+gateway_status) drops duplicates before they reach a payment. The webhook
+worker (src.jobs.payment_webhooks) applies unprocessed rows to payments in
+batches through the FSM. A row whose charge matches no payment yet (the
+notification beat the commit that stored the charge id) stays unprocessed
+and is retried at ``retry_at`` until PAYMENT_WEBHOOK_UNKNOWN_GRACE_SECONDS
+after it was received.
+"""
+from sqlalchemy import Column, String, DateTime, Index, Integer, UniqueConstraint
+from sqlalchemy.sql import func
+
+from ..core.database import Base, JSONType, UUIDType
+from ..core.ids import new_id
+from ..core.partitioning import utcnow
+
+
+class PaymentWebhookResult:
+    """Outcome of an applied webhook event (``result`` column)"""
+    APPLIED = "applied"                  # Moved the payment through the FSM
+    IGNORED = "ignored"                  # Status already reached, or not a transition from the current one
+    UNKNOWN_PAYMENT = "unknown_payment"  # No payment with this gateway_transaction_id within the grace period
+
+
+class PaymentWebhookEvent(Base):
+    """Charge status reported by a gateway notification"""
+    __tablename__ = "payment_webhook_events"
+    
+    id = Column(UUIDType, primary_key=True, default=new_id)
+    
+    # What the gateway reported
+    gateway = Column(String(50), nullable=False)  # pagseguro
+    gateway_transaction_id = Column(String(200), nullable=False)  # Charge id (payments.gateway_transaction_id)
+    gateway_status = Column(String(50), nullable=False)  # Gateway's status name, e.g. PAID
+    payload = Column(JSONType, nullable=False)  # The charge as sent
+    
+    # Processing
+    received_at = Column(DateTime(timezone=True), nullable=False, default=utcnow, server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+    result = Column(String(30), nullable=True)  # PaymentWebhookResult
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")  # Batches that found no payment
+    retry_at = Column(DateTime(timezone=True), nullable=True)  # Not claimed again before this
+    
+    __table_args__ = (
+        # Redelivered notifications
+        UniqueConstraint(
+            "gateway", "gateway_transaction_id", "gateway_status",
+            name="uq_payment_webhook_events_charge_status",
+        ),
+        # Worker: oldest unprocessed events first
+        Index(
+            "ix_payment_webhook_events_unprocessed",
+            "received_at",
+            "id",
+            postgresql_where=processed_at.is_(None),
+            sqlite_where=processed_at.is_(None),
+        ),
+        # Purge of processed events past retention
+        Index(
+            "ix_payment_webhook_events_processed_at",
+            "processed_at",
+            postgresql_where=processed_at.isnot(None),
+            sqlite_where=processed_at.isnot(None),
+        ),
+    )
+    
+    def __repr__(self):
+        return (
+            f"<PaymentWebhookEvent(id={self.id}, transaction={self.gateway_transaction_id}, "
+            f"status={self.gateway_status})>"
+        )
@@ -0,0 +1,321 @@
+"""
+Serializers that only read loaded data
+
+Relationships are included when the query loaded them (see the
+repositories.loading profiles) and left out otherwise, so serializing
+never triggers a lazy load. Expired or deferred columns raise
+UnloadedAttributeError instead of being refreshed with a hidden query.
+
+Each model's fields are read by a serializer compiled once per field set
+(``model_serializer``). Values keep their Python types (Enum, datetime,
+Decimal) and are encoded by src.core.responses (orjson) without
+per-field conversions. The models' ``to_dict`` and ``Page.to_dict``
+delegate here. Large listings can skip the ORM entirely with
+``serialize_rows``.
+"""
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Result
+
+from .delivery import Delivery
+from .notification import Notification
+from .order import Order
+from .payment import Payment
+from .user import User, UserRole
+
+Field = Union[str, Tuple[str, str]]  # Attribute, or (output key, attribute)
+
+ORDER_FIELDS: Tuple[Field, ...] = (
+    "id",
+    "order_number",
+    "status",
+    "priority",
+    "item_description",
+    "item_category",
+    ("pickup_address", "full_pickup_address"),
+    ("delivery_address", "full_delivery_address"),
+    "distance_km",
+    "estimated_duration_minutes",
+    "final_price_cents",
+    "currency",
+    "created_at",
+    "updated_at",
+)
+ORDER_SENSITIVE_FIELDS: Tuple[Field, ...] = ORDER_FIELDS + (
+    "pickup_contact_name",
+    "pickup_contact_phone",
+    "delivery_contact_name",
+    "delivery_contact_phone",
+    "consumer_id",
+    "merchant_id",
+    "assigned_driver_id",
+)
+
+DELIVERY_FIELDS: Tuple[Field, ...] = (
+    "id",
+    "order_id",
+    "driver_id",
+    "status",
+    "current_latitude",
+    "current_longitude",
+    "last_location_update",
+    "estimated_pickup_time",
+    "estimated_delivery_time",
+    "delivered_at",
+    "driver_rating",
+    "customer_rating",
+    "created_at",
+    "updated_at",
+)
+
+PAYMENT_FIELDS: Tuple[Field, ...] = (
+    "id",
+    "order_id",
+    "method",
+    "status",
+    "amount_cents",
+    "currency",
+    "gateway",
+    "created_at",
+    "completed_at",
+)
+PAYMENT_SENSITIVE_FIELDS: Tuple[Field, ...] = PAYMENT_FIELDS + (
+    "gateway_transaction_id",
+    "pix_code",
+    "pix_qr_code",
+    "pix_expiration",
+    "gateway_fee_cents",
+    "platform_fee_cents",
+    "net_amount_cents",
+)
+
+NOTIFICATION_FIELDS: Tuple[Field, ...] = (
+    "id",
+    "user_id",
+    "order_id",
+    "type",
+    "status",
+    "title",
+    "message",
+    "scheduled_at",
+    "sent_at",
+    "delivered_at",
+    "read_at",
+    "failed_at",
+    "retry_count",
+    "priority",
+    "category",
+    "clicked",
+    "created_at",
+    "updated_at",
+)
+
+USER_SUMMARY_FIELDS: Tuple[Field, ...] = ("id", "display_name", "role")
+USER_FIELDS: Tuple[Field, ...] = (
+    "id",
+    "email",
+    "phone",
+    "first_name",
+    "last_name",
+    "display_name",
+    "role",
+    "status",
+    "email_verified",
+    "phone_verified",
+    "is_active",
+    "created_at",
+    "updated_at",
+)
+USER_ROLE_FIELDS: Dict[UserRole, Tuple[Field, ...]] = {
+    UserRole.DRIVER: ("vehicle_type", "vehicle_model", "driver_rating", "driver_status"),
+    UserRole.MERCHANT: ("business_name", "business_type"),
+}
+USER_SENSITIVE_FIELDS: Tuple[Field, ...] = ("address_line1", "city", "state", "latitude", "longitude")
+
+
+class UnloadedAttributeError(RuntimeError):
+    """Raised when serializing an object whose columns are not loaded"""
+
+
+def is_loaded(obj: Any, attribute: str) -> bool:
+    """Check whether ``attribute`` of ``obj`` can be read without a query"""
+    state = inspect(obj)
+    # Same test as ``attribute not in state.unloaded``, without building the
+    # set of every unloaded attribute on each call
+    return attribute in state.dict or attribute in state.committed_state
+
+
+@lru_cache(maxsize=None)
+def model_serializer(model: type, fields: Tuple[Field, ...]) -> Callable[[Any], Dict[str, Any]]:
+    """
+    Compile a serializer of ``fields`` for instances of ``model``
+    
+    Built once per model and field set: a single attrgetter reads all
+    values and the output keys are zipped in.
+    
+    Raises:
+        AttributeError: If ``model`` has no such attribute
+    """
+    keys = tuple(field if isinstance(field, str) else field[0] for field in fields)
+    attributes = tuple(field if isinstance(field, str) else field[1] for field in fields)
+    missing = [attribute for attribute in attributes if not hasattr(model, attribute)]
+    if missing:
+        raise AttributeError(f"{model.__name__} has no attributes: {', '.join(missing)}")
+    
+    getter = attrgetter(*attributes)
+    if len(attributes) == 1:
+        key = keys[0]
+        return lambda obj: {key: getter(obj)}
+    return lambda obj: dict(zip(keys, getter(obj)))
+
+
+def serialize_rows(result: Result) -> List[Dict[str, Any]]:
+    """
+    Convert the rows of a column query to dictionaries keyed by column label
+    
+    For large listings: no ORM objects, identity map or attribute
+    instrumentation are involved.
+    """
+    keys = tuple(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+@lru_cache(maxsize=None)
+def _user_fields(role: UserRole, include_sensitive: bool) -> Tuple[Field, ...]:
+    return USER_FIELDS + USER_ROLE_FIELDS.get(role, ()) + (USER_SENSITIVE_FIELDS if include_sensitive else ())
+
+
+@lru_cache(maxsize=None)
+def _column_keys(mapper: Any) -> Tuple[frozenset, frozenset]:
+    """(all, deferred) column attribute keys of a mapper"""
+    return (
+        frozenset(mapper.column_attrs.keys()),
+        frozenset(prop.key for prop in mapper.column_attrs if prop.deferred),
+    )
+
+
+def _require_columns_loaded(obj: Any) -> None:
+    state = inspect(obj)
+    # Columns never set on a new object read as None without a query; only
+    # expired and deferred ones would be loaded on access
+    columns, deferred = _column_keys(state.mapper)
+    missing = state.expired_attributes & columns
+    if deferred:
+        missing = missing | (state.unloaded & deferred)
+    if missing:
+        raise UnloadedAttributeError(
+            f"{type(obj).__name__} {state.identity} has unloaded columns: {', '.join(sorted(missing))} "
+            f"(refresh it with 'await session.refresh(obj)' before serializing)"
+        )
+
+
+def _loaded(obj: Any, attribute: str) -> Optional[Any]:
+    """Value of a relationship if loaded, else None"""
+    return getattr(obj, attribute) if is_loaded(obj, attribute) else None
+
+
+def serialize_user_summary(user: User) -> dict:
+    """Public identification of a user nested in other objects"""
+    _require_columns_loaded(user)
+    return model_serializer(User, USER_SUMMARY_FIELDS)(user)
+
+
+def serialize_payment(payment: Payment, include_sensitive: bool = False) -> dict:
+    """Convert a payment to dictionary"""
+    _require_columns_loaded(payment)
+    return model_serializer(Payment, PAYMENT_SENSITIVE_FIELDS if include_sensitive else PAYMENT_FIELDS)(payment)
+
+
+def serialize_notification(notification: Notification) -> dict:
+    """Convert a notification to dictionary"""
+    _require_columns_loaded(notification)
+    return model_serializer(Notification, NOTIFICATION_FIELDS)(notification)
+
+
+def serialize_delivery(delivery: Delivery, include_order: bool = True) -> dict:
+    """Convert a delivery to dictionary, with its driver and order if loaded"""
+    _require_columns_loaded(delivery)
+    data = model_serializer(Delivery, DELIVERY_FIELDS)(delivery)
+    
+    driver = _loaded(delivery, "driver")
+    if driver is not None:
+        data["driver"] = serialize_user_summary(driver)
+    
+    order = _loaded(delivery, "order") if include_order else None
+    if order is not None:
+        data["order"] = serialize_order(order, include_sensitive=True, include_delivery=False)
+    
+    return data
+
+
+def serialize_order(order: Order, include_sensitive: bool = False, include_delivery: bool = True) -> dict:
+    """
+    Convert an order to dictionary, with the loaded relationships
+    
+    Args:
+        order: Order to serialize
+        include_sensitive: Include contact details and user ids
+        include_delivery: Include the delivery (off when nested in one)
+    """
+    _require_columns_loaded(order)
+    data = model_serializer(Order, ORDER_SENSITIVE_FIELDS if include_sensitive else ORDER_FIELDS)(order)
+    
+    for attribute in ("consumer", "merchant"):
+        user = _loaded(order, attribute)
+        if user is not None:
+            data[attribute] = serialize_user_summary(user)
+    
+    payment = _loaded(order, "payment")
+    if payment is not None:
+        data["payment"] = serialize_payment(payment)
+    
+    delivery = _loaded(order, "delivery") if include_delivery else None
+    if delivery is not None:
+        data["delivery"] = serialize_delivery(delivery, include_order=False)
+    
+    if is_loaded(order, "notifications"):
+        data["notifications"] = [serialize_notification(notification) for notification in order.notifications]
+    
+    return data
+
+
+def serialize_user(user: User, include_sensitive: bool = False) -> dict:
+    """Convert a user to dictionary, with the loaded order history"""
+    _require_columns_loaded(user)
+    data = model_serializer(User, _user_fields(user.role, include_sensitive))(user)
+    
+    for attribute in ("orders_as_consumer", "orders_as_merchant"):
+        if is_loaded(user, attribute):
+            data[attribute] = [serialize_order(order) for order in getattr(user, attribute)]
+    
+    return data
+
+
+SERIALIZERS: Dict[type, Callable[[Any], dict]] = {
+    Order: serialize_order,
+    Payment: serialize_payment,
+    Delivery: serialize_delivery,
+    Notification: serialize_notification,
+    User: serialize_user,
+}
+
+
+def serialize(obj: Any) -> Any:
+    """
+    Serialize a model instance with its compiled serializer
+    
+    Dictionaries (rows from ``serialize_rows``) are returned as they are.
+    
+    Raises:
+        TypeError: If there is no serializer for the object's type
+    """
+    if isinstance(obj, dict):
+        return obj
+    try:
+        serializer = SERIALIZERS[type(obj)]
+    except KeyError:
+        raise TypeError(f"No serializer for {type(obj).__name__}") from None
+    return serializer(obj)
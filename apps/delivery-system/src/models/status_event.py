@@ -0,0 +1,78 @@
+"""
+Append-only status history
+
+One narrow row per status change of an order, delivery or payment, so
+retries and repeated transitions are kept (the entity rows only hold the
+latest status and one timestamp per stage). Rows are never updated.
+Timelines and stage durations are computed from it in SQL
+(src.repositories.status_events).
+"""
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String
+from sqlalchemy.sql import func
+from typing import Any, Dict, Optional
+
+from ..core.database import Base, UUIDType
+from ..core.partitioning import utcnow
+
+
+class StatusEvent(Base):
+    """Status change of an order, delivery or payment"""
+    __tablename__ = "status_events"
+    
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)  # Insertion order
+    
+    entity_type = Column(String(20), nullable=False)  # order, delivery, payment
+    entity_id = Column(UUIDType, nullable=False)
+    from_status = Column(String(30), nullable=True)  # None on creation (or when unknown)
+    to_status = Column(String(30), nullable=False)
+    event = Column(String(50), nullable=True)  # FSM event name, if applied through the FSM
+    actor = Column(String, nullable=True)  # User id, or the component (otto, pagseguro, ...) that caused it
+    
+    created_at = Column(DateTime(timezone=True), nullable=False, default=utcnow, server_default=func.now())
+    
+    __table_args__ = (
+        # Timeline of one entity
+        Index("ix_status_events_entity_created", "entity_type", "entity_id", "created_at"),
+        # Stage analytics over a period
+        Index("ix_status_events_type_created", "entity_type", "created_at"),
+    )
+    
+    def __repr__(self):
+        return f"<StatusEvent({self.entity_type} {self.entity_id}: {self.from_status} -> {self.to_status})>"
+    
+    def to_dict(self) -> dict:
+        """Convert status event to dictionary"""
+        return {
+            "entity_type": self.entity_type,
+            "entity_id": self.entity_id,
+            "from_status": self.from_status,
+            "to_status": self.to_status,
+            "event": self.event,
+            "actor": self.actor,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
+
+def _value(value: Any) -> Optional[str]:
+    return getattr(value, "value", value)  # Enum members as their value
+
+
+def status_event_values(
+    entity_type: str,
+    entity_id: str,
+    from_status: Any,
+    to_status: Any,
+    event: Optional[str] = None,
+    actor: Optional[str] = None,
+    created_at: Optional[Any] = None
+) -> Dict[str, Any]:
+    """Column values of a status_events row"""
+    return {
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "from_status": _value(from_status),
+        "to_status": _value(to_status),
+        "event": event,
+        "actor": actor,
+        "created_at": created_at or utcnow(),
+    }
@@ -1,13 +1,14 @@
 """
 User model for authentication and user management
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Enum as SQLEnum, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from enum import Enum
-import uuid
 
-from ..core.database import Base
+from ..core.database import Base, JSONType, UUIDType, json_gin_index
+from ..core.ids import new_id
+from ..core.geo import track_geohash
 
 
 class UserRole(str, Enum):
@@ -32,7 +33,7 @@ class User(Base):
     __tablename__ = "users"
     
     # Primary fields
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDType, primary_key=True, default=new_id)
     email = Column(String(255), unique=True, index=True, nullable=False)
     phone = Column(String(20), index=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
@@ -69,8 +70,9 @@ class User(Base):
     country = Column(String(100), default="Brasil", nullable=False)
     
     # Geolocation
-    latitude = Column(String(20), nullable=True)
-    longitude = Column(String(20), nullable=True)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    geohash = Column(String(12), nullable=True, index=True)  # Maintained from the coordinates
     
     # Driver-specific fields
     driver_license = Column(String(50), nullable=True)
@@ -89,14 +91,14 @@ class User(Base):
     # Preferences and settings
     language = Column(String(10), default="pt-BR", nullable=False)
     timezone = Column(String(50), default="America/Sao_Paulo", nullable=False)
-    notification_preferences = Column(Text, nullable=True)  # JSON string
+    notification_preferences = Column(JSONType, nullable=True)  # {"whatsapp": true, "email": false, ...}
     
     # WhatsApp integration
     whatsapp_id = Column(String(50), nullable=True)
     whatsapp_verified = Column(Boolean, default=False, nullable=False)
     
     # Metadata
-    metadata = Column(Text, nullable=True)  # JSON for flexible additional data
+    extra_metadata = Column("metadata", JSONType, nullable=True)  # Flexible additional data
     notes = Column(Text, nullable=True)  # Admin notes
     
     # Timestamps
@@ -110,6 +112,13 @@ class User(Base):
     deliveries = relationship("Delivery", back_populates="driver")
     notifications = relationship("Notification", back_populates="user")
     
+    __table_args__ = (
+        # Keyset pagination over (created_at, id)
+        Index("ix_users_created_id", "created_at", "id"),
+        # Audience selection, e.g. notification_preferences @> '{"whatsapp": true}'
+        json_gin_index("ix_users_notification_preferences_gin", "notification_preferences"),
+    )
+    
     def __repr__(self):
         return f"<User(id={self.id}, email={self.email}, role={self.role})>"
     
@@ -171,4 +180,7 @@ class User(Base):
                 "longitude": self.longitude,
             })
         
-        return data
\ No newline at end of file
+        return data
+
+
+track_geohash(User, "latitude", "longitude", "geohash")
\ No newline at end of file
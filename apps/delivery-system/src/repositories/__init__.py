@@ -0,0 +1,45 @@
+"""
+Repository package initialization
+Query helpers shared by endpoints and services
+"""
+from .bulk import BulkResult, bulk_create, bulk_upsert
+from .loading import LoadProfile, ORDER_LIST, ORDER_DETAIL, DRIVER_DASHBOARD, USER_ORDERS
+from .orders import orders_within_radius, get_order, list_orders, list_order_summaries, bulk_create_orders, get_active_orders_for_consumer, get_active_orders_by_status
+from .deliveries import deliveries_in_bounding_box, get_driver_dashboard, list_deliveries
+from .notifications import get_notifications_due_for_retry, list_user_notifications, bulk_create_notifications, bulk_upsert_notifications
+from .payments import get_expired_pix_payments
+from .status_events import get_timeline, get_stage_durations, get_stage_duration_stats
+from .users import get_user, list_users, bulk_create_users, bulk_upsert_users
+
+__all__ = [
+    "BulkResult",
+    "bulk_create",
+    "bulk_upsert",
+    "LoadProfile",
+    "ORDER_LIST",
+    "ORDER_DETAIL",
+    "DRIVER_DASHBOARD",
+    "USER_ORDERS",
+    "orders_within_radius",
+    "get_order",
+    "list_orders",
+    "list_order_summaries",
+    "bulk_create_orders",
+    "get_active_orders_for_consumer",
+    "get_active_orders_by_status",
+    "deliveries_in_bounding_box",
+    "get_driver_dashboard",
+    "list_deliveries",
+    "get_notifications_due_for_retry",
+    "list_user_notifications",
+    "bulk_create_notifications",
+    "bulk_upsert_notifications",
+    "get_expired_pix_payments",
+    "get_timeline",
+    "get_stage_durations",
+    "get_stage_duration_stats",
+    "get_user",
+    "list_users",
+    "bulk_create_users",
+    "bulk_upsert_users"
+]
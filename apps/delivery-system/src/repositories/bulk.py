@@ -0,0 +1,291 @@
+"""
+Bulk inserts and upserts
+
+For imports and fan-outs that would otherwise add thousands of ORM objects
+one by one. Rows are dicts keyed by attribute name (as for the model
+constructor) and are completed the way an ORM insert would be:
+
+- Python-side column defaults (UUIDv7 ids, created_at, enum defaults, ...)
+- geohashes of tracked coordinates (``track_geohash``)
+- for status-tracked models (``track_status_changes``), the outbox event
+  and status_events row of each created row
+
+Server-side defaults (e.g. users.created_at) are left to the database.
+Rows are written with one executemany INSERT (ON CONFLICT ... RETURNING
+for upserts), which SQLAlchemy sends as multi-row ``INSERT ... VALUES``
+batches, or with COPY (asyncpg) for batches of at least
+BULK_COPY_MIN_ROWS rows. Everything runs in the session's transaction;
+the caller commits.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+import logging
+import time
+import uuid
+
+from sqlalchemy import Column, func, inspect, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from ..core.config import settings
+from ..core.geo import geohash_or_none, tracked_geohashes
+from ..core.metrics import BULK_ROWS_WRITTEN, BULK_WRITE_SECONDS
+from ..models.outbox import OutboxEvent, status_change_values, tracked_status_context
+from ..models.status_event import StatusEvent, status_event_values
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class BulkResult:
+    """Rows written by a bulk operation"""
+    table: str
+    operation: str
+    rows: List[Dict[str, Any]]  # Created rows (all values) or upsert RETURNING rows
+    seconds: float
+    
+    @property
+    def count(self) -> int:
+        return len(self.rows)
+    
+    @property
+    def rows_per_second(self) -> float:
+        return self.count / self.seconds if self.seconds else 0.0
+
+
+@lru_cache(maxsize=None)
+def _columns(model: type) -> Dict[str, Column]:
+    """Attribute name -> column of a mapped class"""
+    return {prop.key: prop.columns[0] for prop in inspect(model).column_attrs}
+
+
+def _default(column: Column) -> Any:
+    """Value of a column's Python-side default"""
+    default = column.default
+    if default.is_callable:
+        return default.arg(None)
+    return default.arg
+
+
+def prepare_rows(model: type, rows: Iterable[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Complete rows with the defaults and derived columns an ORM insert would set
+    
+    Raises:
+        ValueError: A row has an attribute the model does not map
+    """
+    columns = _columns(model)
+    defaults = [(attribute, column) for attribute, column in columns.items() if column.default is not None]
+    geohashes = tracked_geohashes(model)
+    
+    prepared = []
+    for row in rows:
+        unknown = row.keys() - columns.keys()
+        if unknown:
+            raise ValueError(f"Unknown {model.__name__} attributes: {', '.join(sorted(unknown))}")
+        values = dict(row)
+        for attribute, column in defaults:
+            if attribute not in values:
+                values[attribute] = _default(column)
+        for latitude, longitude, geohash in geohashes:
+            values[geohash] = geohash_or_none(values.get(latitude), values.get(longitude))
+        prepared.append(values)
+    return prepared
+
+
+def _groups(rows: List[Dict[str, Any]]) -> Iterable[List[Dict[str, Any]]]:
+    """
+    Rows grouped by the attributes they set
+    
+    One statement takes one column list; a row that leaves out a column with
+    a server default (users.created_at) must not send NULL for it.
+    """
+    groups: Dict[frozenset, List[Dict[str, Any]]] = {}
+    for values in rows:
+        groups.setdefault(frozenset(values), []).append(values)
+    return groups.values()
+
+
+def _insert(conn: AsyncConnection, model: type):
+    """Dialect INSERT (for ON CONFLICT) of a model's table"""
+    if conn.dialect.name == "postgresql":
+        return postgresql.insert(model.__table__)
+    if conn.dialect.name == "sqlite":
+        return sqlite.insert(model.__table__)
+    return insert(model.__table__)
+
+
+def _column_values(columns: Dict[str, Column], values: Dict[str, Any]) -> Dict[str, Any]:
+    return {columns[attribute].key: value for attribute, value in values.items()}
+
+
+def _can_copy(conn: AsyncConnection, rows: List[Dict[str, Any]]) -> bool:
+    return (
+        conn.dialect.driver == "asyncpg"
+        and len(rows) >= settings.BULK_COPY_MIN_ROWS
+    )
+
+
+async def _copy(conn: AsyncConnection, model: type, rows: List[Dict[str, Any]]) -> None:
+    """Write rows with COPY ... FROM STDIN, encoded by the columns' bind processors"""
+    columns = _columns(model)
+    attributes = list(rows[0])
+    processors = [
+        columns[attribute].type.dialect_impl(conn.dialect).bind_processor(conn.dialect) for attribute in attributes
+    ]
+    records = [
+        tuple(process(values[attribute]) if process else values[attribute]
+              for attribute, process in zip(attributes, processors))
+        for values in rows
+    ]
+    # asyncpg transactions begin lazily: make sure the session's has started
+    await conn.execute(select(1))
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        model.__table__.name,
+        records=records,
+        columns=[columns[attribute].name for attribute in attributes],
+        schema_name=model.__table__.schema,
+    )
+
+
+async def _record_created(session: AsyncSession, conn: AsyncConnection, model: type, rows: List[Dict[str, Any]]) -> None:
+    """Outbox events and status history of created rows of a status-tracked model"""
+    tracked = tracked_status_context(model)
+    if tracked is None or not rows:
+        return
+    aggregate_type, context = tracked
+    outbox_rows, history_rows = [], []
+    for values in rows:
+        outbox_rows.append(status_change_values(
+            aggregate_type,
+            values["id"],
+            None,
+            values["status"],
+            **{attribute: values.get(attribute) for attribute in context},
+        ))
+        history_rows.append(status_event_values(
+            aggregate_type,
+            values["id"],
+            None,
+            values["status"],
+            actor=session.info.get("actor"),
+            created_at=outbox_rows[-1]["created_at"],
+        ))
+    await conn.execute(insert(OutboxEvent.__table__), outbox_rows)
+    await conn.execute(insert(StatusEvent.__table__), history_rows)
+
+
+def _finish(model: type, operation: str, rows: List[Dict[str, Any]], started: float) -> BulkResult:
+    result = BulkResult(model.__tablename__, operation, rows, time.perf_counter() - started)
+    BULK_ROWS_WRITTEN.labels(table=result.table, operation=operation).inc(result.count)
+    BULK_WRITE_SECONDS.labels(table=result.table, operation=operation).observe(result.seconds)
+    logger.info(
+        f"bulk {operation} {result.table}: {result.count} rows in {result.seconds:.3f}s "
+        f"({result.rows_per_second:,.0f} rows/s)"
+    )
+    return result
+
+
+async def bulk_create(
+    session: AsyncSession,
+    model: type,
+    rows: Iterable[Mapping[str, Any]],
+    ignore_conflicts: bool = False
+) -> BulkResult:
+    """
+    Insert many rows in the session's transaction
+    
+    Args:
+        session: Session whose transaction the rows are written in
+        model: Mapped class (Order, Notification, User, ...)
+        rows: Attribute values per row
+        ignore_conflicts: Skip rows that violate a unique constraint
+            (ON CONFLICT DO NOTHING) instead of failing; never uses COPY
+    
+    Returns:
+        The inserted rows with their defaults (skipped rows left out)
+    """
+    started = time.perf_counter()
+    columns = _columns(model)
+    conn = await session.connection()
+    
+    written = []
+    for group in _groups(prepare_rows(model, rows)):
+        if not ignore_conflicts and _can_copy(conn, group):
+            await _copy(conn, model, group)
+            written.extend(group)
+            continue
+        parameters = [_column_values(columns, values) for values in group]
+        if not ignore_conflicts:
+            await conn.execute(insert(model.__table__), parameters)
+            written.extend(group)
+            continue
+        statement = _insert(conn, model).on_conflict_do_nothing().returning(columns["id"])
+        inserted = {uuid.UUID(str(value)) for value in (await conn.execute(statement, parameters)).scalars()}
+        written.extend(values for values in group if uuid.UUID(str(values["id"])) in inserted)
+    
+    await _record_created(session, conn, model, written)
+    return _finish(model, "create", written, started)
+
+
+async def bulk_upsert(
+    session: AsyncSession,
+    model: type,
+    rows: Iterable[Mapping[str, Any]],
+    conflict: Sequence[str],
+    update: Optional[Sequence[str]] = None,
+    returning: Sequence[str] = ("id",)
+) -> BulkResult:
+    """
+    Insert many rows, updating the ones that already exist
+    
+    Args:
+        session: Session whose transaction the rows are written in
+        model: Mapped class without status tracking
+        rows: Attribute values per row; the last one wins when several share a key
+        conflict: Attributes of the unique constraint that identifies a row
+        update: Attributes overwritten on existing rows (default: the ones
+            given in ``rows``, except the key and created_at)
+        returning: Attributes returned per written row
+    
+    Raises:
+        ValueError: ``model`` tracks its status; status changes must go
+            through the FSM services so they reach the outbox
+    """
+    if tracked_status_context(model) is not None:
+        raise ValueError(
+            f"{model.__name__} status changes must go through the FSM; use bulk_create(ignore_conflicts=True)"
+        )
+    
+    started = time.perf_counter()
+    rows = list(rows)
+    unique = {}
+    for values in prepare_rows(model, rows):
+        unique[tuple(values.get(attribute) for attribute in conflict)] = values
+    
+    columns = _columns(model)
+    if update is None:
+        given = set().union(*rows)
+        derived = {geohash for latitude, longitude, geohash in tracked_geohashes(model) if {latitude, longitude} & given}
+        keys = {attribute for attribute, column in columns.items() if column.primary_key}
+        update = sorted((given | derived) - set(conflict) - keys - {"created_at"})
+    
+    conn = await session.connection()
+    written = []
+    for group in _groups(list(unique.values())):
+        statement = _insert(conn, model)
+        assignments = {
+            columns[attribute].key: statement.excluded[columns[attribute].key]
+            for attribute in update if attribute in group[0]
+        }
+        if "updated_at" in columns and "updated_at" not in assignments:
+            assignments["updated_at"] = func.now()
+        statement = statement.on_conflict_do_update(
+            index_elements=[columns[attribute] for attribute in conflict],
+            set_=assignments,
+        ).returning(*(columns[attribute] for attribute in returning))
+        result = await conn.execute(statement, [_column_values(columns, values) for values in group])
+        written.extend(dict(zip(returning, row)) for row in result.all())
+    
+    return _finish(model, "upsert", written, started)
@@ -0,0 +1,77 @@
+"""
+Delivery queries
+"""
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.geo import BoundingBox, box_filter
+from ..core.pagination import Page, PageParams, paginate
+from ..models.delivery import Delivery, DeliveryStatus
+from .loading import DRIVER_DASHBOARD, LoadProfile
+
+ACTIVE_DELIVERY_STATUSES = [
+    DeliveryStatus.ASSIGNED,
+    DeliveryStatus.HEADING_TO_PICKUP,
+    DeliveryStatus.AT_PICKUP,
+    DeliveryStatus.PICKED_UP,
+    DeliveryStatus.IN_TRANSIT,
+    DeliveryStatus.AT_DELIVERY
+]
+
+
+async def deliveries_in_bounding_box(
+    session: AsyncSession,
+    box: BoundingBox,
+    active_only: bool = True,
+    limit: int = 500
+) -> List[Delivery]:
+    """
+    Get deliveries whose driver's last known position lies inside ``box``
+    
+    Args:
+        session: Database session
+        box: Area to search (e.g. the map viewport)
+        active_only: Skip finished, failed and cancelled deliveries
+        limit: Maximum number of deliveries
+    """
+    query = (
+        select(Delivery)
+        .where(box_filter(Delivery.current_latitude, Delivery.current_longitude, Delivery.current_geohash, box))
+        .limit(limit)
+    )
+    if active_only:
+        query = query.where(Delivery.status.in_(ACTIVE_DELIVERY_STATUSES))
+    
+    return list((await session.execute(query)).scalars().all())
+
+
+async def get_driver_dashboard(session: AsyncSession, driver_id: str, limit: int = 20) -> List[Delivery]:
+    """Get a driver's active deliveries, newest first, with their orders (DRIVER_DASHBOARD)"""
+    query = DRIVER_DASHBOARD.apply(
+        select(Delivery)
+        .where(Delivery.driver_id == driver_id)
+        .where(Delivery.status.in_(ACTIVE_DELIVERY_STATUSES))
+        .order_by(Delivery.created_at.desc(), Delivery.id.desc())
+        .limit(limit)
+    )
+    return list((await session.execute(query)).unique().scalars().all())
+
+
+async def list_deliveries(
+    session: AsyncSession,
+    params: PageParams,
+    driver_id: Optional[str] = None,
+    status: Optional[DeliveryStatus] = None,
+    profile: Optional[LoadProfile] = None
+) -> Page[Delivery]:
+    """Get a page of deliveries, newest first, optionally with the relationships of ``profile``"""
+    query = select(Delivery)
+    if profile is not None:
+        query = profile.apply(query)
+    if driver_id is not None:
+        query = query.where(Delivery.driver_id == driver_id)
+    if status is not None:
+        query = query.where(Delivery.status == status)
+    return await paginate(session, query, Delivery, params)
@@ -0,0 +1,73 @@
+"""
+Relationship loading profiles
+
+Relationships are lazy by default, which under AsyncSession fails on first
+access (MissingGreenlet) or, when awaited one by one, costs one query per
+row. A profile names the relationships a use case needs and how to load
+them: ``joinedload`` for many-to-one/one-to-one references (one JOIN, no
+extra round trip) and ``selectinload`` for collections (one ``IN`` query per
+relationship, no row multiplication). Everything else is ``raiseload``, so
+a missing relationship fails loudly instead of querying.
+
+Usage:
+    query = ORDER_DETAIL.apply(select(Order).where(Order.id == order_id))
+
+Serialize the results with src.models.serialization, which only reads
+what the profile loaded.
+"""
+from dataclasses import dataclass
+from typing import Tuple
+
+from sqlalchemy.orm import joinedload, raiseload, selectinload
+from sqlalchemy.orm.interfaces import ORMOption
+from sqlalchemy.sql import Select
+
+from ..models.delivery import Delivery
+from ..models.order import Order
+from ..models.user import User
+
+
+@dataclass(frozen=True)
+class LoadProfile:
+    """Named set of loader options for one use case"""
+    name: str
+    options: Tuple[ORMOption, ...]
+    
+    def apply(self, query: Select) -> Select:
+        """Add the profile's loader options to ``query``"""
+        return query.options(*self.options)
+
+
+# Order listings: who ordered, from which merchant, payment and delivery state
+ORDER_LIST = LoadProfile("order_list", (
+    joinedload(Order.consumer),
+    joinedload(Order.merchant),
+    joinedload(Order.payment),
+    joinedload(Order.delivery),
+    raiseload("*"),
+))
+
+# Order page: the list data plus the assigned driver and the notifications sent
+ORDER_DETAIL = LoadProfile("order_detail", (
+    joinedload(Order.consumer),
+    joinedload(Order.merchant),
+    joinedload(Order.payment),
+    joinedload(Order.delivery).joinedload(Delivery.driver),
+    selectinload(Order.notifications),
+    raiseload("*"),
+))
+
+# Driver app: the driver's deliveries with their order, merchant (pickup) and payment
+DRIVER_DASHBOARD = LoadProfile("driver_dashboard", (
+    joinedload(Delivery.order).joinedload(Order.merchant),
+    joinedload(Delivery.order).joinedload(Order.payment),
+    joinedload(Delivery.order).raiseload("*"),
+    raiseload("*"),
+))
+
+# User profile with order history (consumer and merchant sides)
+USER_ORDERS = LoadProfile("user_orders", (
+    selectinload(User.orders_as_consumer),
+    selectinload(User.orders_as_merchant),
+    raiseload("*"),
+))
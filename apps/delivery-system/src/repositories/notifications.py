@@ -0,0 +1,77 @@
+"""
+Notification queries
+"""
+from datetime import datetime, timezone
+from typing import Any, Iterable, List, Mapping, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from ..core.pagination import Page, PageParams, paginate
+from ..models.notification import Notification, NotificationStatus
+from .bulk import BulkResult, bulk_create, bulk_upsert
+
+RETRYABLE_NOTIFICATION_STATUSES = [NotificationStatus.PENDING, NotificationStatus.FAILED]
+
+
+def notifications_due_for_retry_query(
+    now: Optional[datetime] = None,
+    limit: int = 100,
+    since: Optional[datetime] = None
+) -> Select:
+    """
+    Notifications whose next retry is due, oldest first (ix_notifications_status_next_retry)
+    
+    With ``since`` (e.g. ``hot_window_start(now)``) only notifications created
+    since then are retried, so older partitions are not scanned.
+    """
+    now = now or datetime.now(timezone.utc)
+    query = (
+        select(Notification)
+        .where(Notification.status.in_(RETRYABLE_NOTIFICATION_STATUSES))
+        .where(Notification.next_retry_at <= now)
+        .where(Notification.retry_count < Notification.max_retries)
+    )
+    if since is not None:
+        query = query.where(Notification.created_at >= since)
+    return query.order_by(Notification.next_retry_at).limit(limit)
+
+
+def user_notifications_query(user_id: str) -> Select:
+    """User's notifications (paginated over ix_notifications_user_created_id)"""
+    return select(Notification).where(Notification.user_id == user_id)
+
+
+async def get_notifications_due_for_retry(
+    session: AsyncSession,
+    now: Optional[datetime] = None,
+    limit: int = 100,
+    since: Optional[datetime] = None
+) -> List[Notification]:
+    """Get notifications the retry worker should send again"""
+    return list((await session.execute(notifications_due_for_retry_query(now, limit, since))).scalars().all())
+
+
+async def list_user_notifications(session: AsyncSession, user_id: str, params: PageParams) -> Page[Notification]:
+    """Get a page of a user's notifications, newest first"""
+    return await paginate(session, user_notifications_query(user_id), Notification, params)
+
+
+async def bulk_create_notifications(session: AsyncSession, rows: Iterable[Mapping[str, Any]]) -> BulkResult:
+    """Insert many notifications in the session's transaction, e.g. a fan-out (see ``bulk_create``)"""
+    return await bulk_create(session, Notification, rows)
+
+
+async def bulk_upsert_notifications(
+    session: AsyncSession,
+    rows: Iterable[Mapping[str, Any]],
+    update: Optional[Sequence[str]] = None
+) -> BulkResult:
+    """
+    Create notifications or update the existing ones (e.g. provider status
+    callbacks), matched on the table key (id, created_at)
+    
+    See ``bulk_upsert``.
+    """
+    return await bulk_upsert(session, Notification, rows, ("id", "created_at"), update)
@@ -0,0 +1,226 @@
+"""
+Order queries
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from ..core.geo import bounding_box, box_filter, haversine_km, squared_distance_km
+from ..core.pagination import Page, PageParams, paginate, paginate_rows
+from ..core.partitioning import utcnow
+from .bulk import BulkResult, bulk_create
+from .loading import ORDER_DETAIL, ORDER_LIST, LoadProfile
+from ..models.order import ACTIVE_ORDER_STATUSES, Order, OrderStatus
+from ..services.order_number_service import order_numbers
+
+# Rendered as literals (not bind parameters) so the planner can match the
+# partial index ix_orders_active_status_created even with prepared statements
+ACTIVE_ORDER_FILTER = Order.status.in_([
+    literal(status, Order.status.type, literal_execute=True) for status in ACTIVE_ORDER_STATUSES
+]) & Order.deleted_at.is_(None)
+
+# Columns of order listings served straight from rows (no ORM objects)
+ORDER_SUMMARY_COLUMNS = (
+    Order.id,
+    Order.order_number,
+    Order.status,
+    Order.priority,
+    Order.item_description,
+    Order.item_category,
+    Order.pickup_city,
+    Order.delivery_city,
+    Order.distance_km,
+    Order.final_price_cents,
+    Order.currency,
+    Order.created_at,
+    Order.updated_at,
+)
+
+
+def active_orders_for_consumer_query(consumer_id: str, limit: int = 20, since: Optional[datetime] = None) -> Select:
+    """
+    Consumer's live orders, newest first (ix_orders_consumer_status_created)
+    
+    With ``since`` (e.g. ``hot_window_start()``) only orders created since
+    then are looked up, so older partitions are pruned; orders still active
+    past that window are then left out.
+    """
+    query = (
+        select(Order)
+        .where(Order.consumer_id == consumer_id)
+        .where(ACTIVE_ORDER_FILTER)
+    )
+    if since is not None:
+        query = query.where(Order.created_at >= since)
+    return query.order_by(Order.created_at.desc()).limit(limit)
+
+
+def active_orders_by_status_query(
+    status: Optional[OrderStatus] = None,
+    limit: int = 100,
+    since: Optional[datetime] = None
+) -> Select:
+    """
+    Operations dashboard: live orders, optionally in one state (ix_orders_active_status_created)
+    
+    ``since`` bounds ``created_at`` as in ``active_orders_for_consumer_query``.
+    """
+    query = select(Order).where(ACTIVE_ORDER_FILTER)
+    if since is not None:
+        query = query.where(Order.created_at >= since)
+    if status is not None:
+        query = query.where(Order.status == status)
+    return query.order_by(Order.created_at.desc()).limit(limit)
+
+
+def scheduled_orders_query(pickup_from: datetime) -> Select:
+    """Id and pickup time of paid scheduled orders picked up from ``pickup_from`` on (ix_orders_active_status_created)"""
+    return select(Order.id, Order.pickup_scheduled_at).where(
+        ACTIVE_ORDER_FILTER,
+        Order.status == literal(OrderStatus.PAID, Order.status.type, literal_execute=True),
+        Order.is_scheduled.is_(True),
+        Order.pickup_scheduled_at >= pickup_from,
+    )
+
+
+def orders_query(
+    consumer_id: Optional[str] = None,
+    merchant_id: Optional[str] = None,
+    driver_id: Optional[str] = None,
+    status: Optional[OrderStatus] = None
+) -> Select:
+    """Non-deleted orders, optionally for one consumer/merchant/driver or in one state"""
+    query = select(Order).where(Order.deleted_at.is_(None))
+    if consumer_id is not None:
+        query = query.where(Order.consumer_id == consumer_id)
+    if merchant_id is not None:
+        query = query.where(Order.merchant_id == merchant_id)
+    if driver_id is not None:
+        query = query.where(Order.assigned_driver_id == driver_id)
+    if status is not None:
+        query = query.where(Order.status == status)
+    return query
+
+
+async def get_order(session: AsyncSession, order_id: str, profile: LoadProfile = ORDER_DETAIL) -> Optional[Order]:
+    """Get an order with the relationships of ``profile``"""
+    query = profile.apply(select(Order).where(Order.id == order_id))
+    return (await session.execute(query)).unique().scalar_one_or_none()
+
+
+async def list_orders(
+    session: AsyncSession,
+    params: PageParams,
+    consumer_id: Optional[str] = None,
+    merchant_id: Optional[str] = None,
+    driver_id: Optional[str] = None,
+    status: Optional[OrderStatus] = None,
+    profile: LoadProfile = ORDER_LIST
+) -> Page[Order]:
+    """Get a page of orders, newest first, with the relationships of ``profile``"""
+    query = profile.apply(orders_query(consumer_id, merchant_id, driver_id, status))
+    return await paginate(session, query, Order, params)
+
+
+async def list_order_summaries(
+    session: AsyncSession,
+    params: PageParams,
+    consumer_id: Optional[str] = None,
+    merchant_id: Optional[str] = None,
+    driver_id: Optional[str] = None,
+    status: Optional[OrderStatus] = None
+) -> Page[Dict[str, Any]]:
+    """
+    Get a page of orders as ORDER_SUMMARY_COLUMNS dictionaries, newest first
+    
+    For large listings: rows are read without building Order objects and
+    can be returned as is (orjson encodes the enums and datetimes).
+    """
+    query = orders_query(consumer_id, merchant_id, driver_id, status).with_only_columns(*ORDER_SUMMARY_COLUMNS)
+    return await paginate_rows(session, query, Order, params)
+
+
+async def bulk_create_orders(session: AsyncSession, rows: Iterable[Mapping[str, Any]]) -> BulkResult:
+    """
+    Insert many orders in the session's transaction (e.g. merchant imports)
+    
+    Orders without an order_number get one from ``order_numbers``, issued
+    for their created_at; the creation of each order reaches the outbox and
+    status history as with ``session.add``. See ``bulk_create``.
+    
+    Not idempotent: the only unique key of the partitioned table is
+    (id, created_at), so there is no natural key to skip an order already
+    imported, and running an import twice creates its orders twice.
+    """
+    rows = [dict(row) for row in rows]
+    for row in rows:
+        row.setdefault("created_at", utcnow())
+        if not row.get("order_number"):
+            row["order_number"] = await order_numbers.issue(row.get("pickup_state"), row["created_at"])
+    return await bulk_create(session, Order, rows)
+
+
+async def get_active_orders_for_consumer(session: AsyncSession, consumer_id: str, limit: int = 20) -> List[Order]:
+    """Get a consumer's live orders, newest first"""
+    return list((await session.execute(active_orders_for_consumer_query(consumer_id, limit))).scalars().all())
+
+
+async def get_active_orders_by_status(
+    session: AsyncSession,
+    status: Optional[OrderStatus] = None,
+    limit: int = 100
+) -> List[Order]:
+    """Get live orders for the operations dashboard"""
+    return list((await session.execute(active_orders_by_status_query(status, limit))).scalars().all())
+
+
+async def orders_within_radius(
+    session: AsyncSession,
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    point: str = "pickup",
+    statuses: Optional[Iterable[OrderStatus]] = None,
+    limit: int = 50
+) -> List[Tuple[Order, float]]:
+    """
+    Get orders whose pickup (or delivery) point lies within ``radius_km`` of a point
+    
+    Args:
+        session: Database session
+        latitude: Center latitude
+        longitude: Center longitude
+        radius_km: Search radius in kilometers
+        point: "pickup" or "delivery" coordinates
+        statuses: Only orders in these states
+        limit: Maximum number of orders
+    
+    Returns:
+        (order, distance_km) pairs, closest first
+    """
+    if point not in ("pickup", "delivery"):
+        raise ValueError(f"Unknown order point: {point}")
+    
+    latitude_col = getattr(Order, f"{point}_latitude")
+    longitude_col = getattr(Order, f"{point}_longitude")
+    geohash_col = getattr(Order, f"{point}_geohash")
+    
+    distance = squared_distance_km(latitude_col, longitude_col, latitude, longitude)
+    query = (
+        select(Order)
+        .where(box_filter(latitude_col, longitude_col, geohash_col, bounding_box(latitude, longitude, radius_km)))
+        .where(distance <= radius_km * radius_km)
+        .order_by(distance)
+        .limit(limit)
+    )
+    if statuses is not None:
+        query = query.where(Order.status.in_(list(statuses)))
+    
+    orders = (await session.execute(query)).scalars().all()
+    return [
+        (order, haversine_km(latitude, longitude, getattr(order, f"{point}_latitude"), getattr(order, f"{point}_longitude")))
+        for order in orders
+    ]
@@ -0,0 +1,40 @@
+"""
+Payment queries
+"""
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from ..models.payment import Payment, PaymentStatus
+
+# Literals so the partial index ix_payments_awaiting_status_pix_expiration matches
+AWAITING_PAYMENT_FILTER = Payment.status.in_([
+    literal(status, Payment.status.type, literal_execute=True)
+    for status in (PaymentStatus.PENDING, PaymentStatus.PROCESSING)
+])
+
+
+def payments_awaiting_webhook_query(expiring_before: Optional[datetime] = None, limit: int = 100) -> Select:
+    """Payments still waiting for the gateway, soonest PIX expiration first"""
+    query = select(Payment).where(AWAITING_PAYMENT_FILTER)
+    if expiring_before is not None:
+        query = query.where(Payment.pix_expiration <= expiring_before)
+    return query.order_by(Payment.pix_expiration).limit(limit)
+
+
+def pix_expirations_query() -> Select:
+    """Id and PIX expiration of the payments still waiting for the gateway"""
+    return select(Payment.id, Payment.pix_expiration).where(AWAITING_PAYMENT_FILTER, Payment.pix_expiration.isnot(None))
+
+
+async def get_expired_pix_payments(
+    session: AsyncSession,
+    now: Optional[datetime] = None,
+    limit: int = 100
+) -> List[Payment]:
+    """Get PIX payments that expired without a gateway confirmation"""
+    now = now or datetime.now(timezone.utc)
+    return list((await session.execute(payments_awaiting_webhook_query(now, limit))).scalars().all())
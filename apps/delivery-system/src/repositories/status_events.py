@@ -0,0 +1,125 @@
+"""
+Status history queries: timelines and stage durations
+
+A stage is the time an entity spent in one status: from the event that
+entered it to the next event of the same entity (LEAD over
+ix_status_events_entity_created). Durations are computed by the database,
+so analytics read the narrow status_events rows instead of the wide
+order/delivery rows.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Float, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.expression import FunctionElement
+
+from ..models.status_event import StatusEvent
+
+
+class seconds_between(FunctionElement):
+    """Seconds from the first to the second timestamp expression"""
+    type = Float()
+    inherit_cache = True
+    name = "seconds_between"
+
+
+@compiles(seconds_between)
+def _seconds_between_default(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return f"EXTRACT(EPOCH FROM ({compiler.process(end, **kw)} - {compiler.process(start, **kw)}))"
+
+
+@compiles(seconds_between, "sqlite")
+def _seconds_between_sqlite(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return f"((julianday({compiler.process(end, **kw)}) - julianday({compiler.process(start, **kw)})) * 86400.0)"
+
+
+def timeline_query(entity_type: str, entity_id: str) -> Select:
+    """Status events of one entity, oldest first"""
+    return (
+        select(StatusEvent)
+        .where(StatusEvent.entity_type == entity_type, StatusEvent.entity_id == entity_id)
+        .order_by(StatusEvent.created_at, StatusEvent.id)
+    )
+
+
+def stages_query(
+    entity_type: str,
+    entity_id: Optional[str] = None,
+    since: Optional[datetime] = None
+) -> Select:
+    """
+    One row per stage: entity_id, status, entered_at, left_at, seconds
+    
+    ``left_at``/``seconds`` are NULL for the current stage. With ``since``,
+    only events from then on are read (stages entered before are left out).
+    """
+    query = select(
+        StatusEvent.entity_id,
+        StatusEvent.to_status.label("status"),
+        StatusEvent.created_at.label("entered_at"),
+        func.lead(StatusEvent.created_at, type_=StatusEvent.created_at.type).over(
+            partition_by=StatusEvent.entity_id,
+            order_by=(StatusEvent.created_at, StatusEvent.id),
+        ).label("left_at"),
+    ).where(StatusEvent.entity_type == entity_type)
+    
+    if entity_id is not None:
+        query = query.where(StatusEvent.entity_id == entity_id)
+    if since is not None:
+        query = query.where(StatusEvent.created_at >= since)
+    
+    stages = query.subquery("stages")
+    return select(
+        stages.c.entity_id,
+        stages.c.status,
+        stages.c.entered_at,
+        stages.c.left_at,
+        seconds_between(stages.c.entered_at, stages.c.left_at).label("seconds"),
+    )
+
+
+def stage_duration_stats_query(
+    entity_type: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> Select:
+    """Per status: completed stages, average, min and max seconds, for stages entered in [since, until)"""
+    stages = stages_query(entity_type, since=since).subquery("completed")
+    query = select(
+        stages.c.status,
+        func.count().label("count"),
+        func.avg(stages.c.seconds).label("avg_seconds"),
+        func.min(stages.c.seconds).label("min_seconds"),
+        func.max(stages.c.seconds).label("max_seconds"),
+    ).where(stages.c.left_at.isnot(None))
+    
+    if until is not None:
+        query = query.where(stages.c.entered_at < until)
+    return query.group_by(stages.c.status).order_by(stages.c.status)
+
+
+async def get_timeline(session: AsyncSession, entity_type: str, entity_id: str) -> List[StatusEvent]:
+    """Get the status history of an order, delivery or payment"""
+    return list((await session.execute(timeline_query(entity_type, entity_id))).scalars().all())
+
+
+async def get_stage_durations(session: AsyncSession, entity_type: str, entity_id: str) -> List[Dict[str, Any]]:
+    """Get the stages of one entity with their durations, oldest first"""
+    query = stages_query(entity_type, entity_id).order_by("entered_at")
+    return [dict(row) for row in (await session.execute(query)).mappings().all()]
+
+
+async def get_stage_duration_stats(
+    session: AsyncSession,
+    entity_type: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """Get how long entities of a type stay in each status"""
+    query = stage_duration_stats_query(entity_type, since, until)
+    return [dict(row) for row in (await session.execute(query)).mappings().all()]
@@ -0,0 +1,60 @@
+"""
+User queries
+"""
+from typing import Any, Iterable, Mapping, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.pagination import Page, PageParams, paginate
+from ..models.user import User, UserRole, UserStatus
+from .bulk import BulkResult, bulk_create, bulk_upsert
+from .loading import LoadProfile
+
+
+async def get_user(session: AsyncSession, user_id: str, profile: Optional[LoadProfile] = None) -> Optional[User]:
+    """Get a user, optionally with the relationships of ``profile`` (e.g. USER_ORDERS)"""
+    query = select(User).where(User.id == user_id)
+    if profile is not None:
+        query = profile.apply(query)
+    return (await session.execute(query)).unique().scalar_one_or_none()
+
+
+async def list_users(
+    session: AsyncSession,
+    params: PageParams,
+    role: Optional[UserRole] = None,
+    status: Optional[UserStatus] = None
+) -> Page[User]:
+    """Get a page of non-deleted users, newest first"""
+    query = select(User).where(User.deleted_at.is_(None))
+    if role is not None:
+        query = query.where(User.role == role)
+    if status is not None:
+        query = query.where(User.status == status)
+    return await paginate(session, query, User, params)
+
+
+async def bulk_create_users(
+    session: AsyncSession,
+    rows: Iterable[Mapping[str, Any]],
+    ignore_conflicts: bool = False
+) -> BulkResult:
+    """Insert many users in the session's transaction (see ``bulk_create``)"""
+    return await bulk_create(session, User, rows, ignore_conflicts)
+
+
+async def bulk_upsert_users(
+    session: AsyncSession,
+    rows: Iterable[Mapping[str, Any]],
+    conflict: Sequence[str] = ("email",),
+    update: Optional[Sequence[str]] = None
+) -> BulkResult:
+    """
+    Create users or update the existing ones, matched on ``conflict``
+    
+    ``conflict`` must be a unique key of users (email or id). Returns the
+    id and email of every written user, e.g. to map imported contacts to
+    their accounts. See ``bulk_upsert``.
+    """
+    return await bulk_upsert(session, User, rows, conflict, update, returning=("id", "email"))
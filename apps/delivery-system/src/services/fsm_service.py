@@ -0,0 +1,412 @@
+"""
+Order, delivery and payment state machines
+
+Each event is applied with one conditional statement:
+
+    UPDATE orders SET status = :target, picked_up_at = :now, ...
+    WHERE id = :id AND status IN (:sources) RETURNING ...
+
+so there is no SELECT-then-UPDATE and no row lock held between the two.
+When two callers race for the same transition (two drivers accepting one
+order) exactly one UPDATE matches; the other gets InvalidTransition. The
+status the row had is returned by the same statement (see
+``FSMService._execute``), and the outbox event and status_events history
+row of the change are added to the same transaction.
+
+Usage:
+    async with session.begin():
+        result = await OrderFSMService().apply(session, order_id, "confirm_payment")
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Update
+
+from ..core.partitioning import utcnow
+from ..models.delivery import Delivery, DeliveryStatus
+from ..models.order import Order, OrderStatus
+from ..models.payment import Payment, PaymentStatus
+from ..models.outbox import OutboxEvent, status_change_values, tracked_status_context
+from ..models.status_event import StatusEvent, status_event_values
+
+
+class TransitionError(Exception):
+    """Base class of state machine errors"""
+
+
+class UnknownEvent(TransitionError, ValueError):
+    """The event is not in the state machine's transition table"""
+    
+    def __init__(self, event: str, known: List[str]):
+        self.event = event
+        super().__init__(f"Unknown event '{event}' (expected one of: {', '.join(sorted(known))})")
+
+
+class InvalidTransition(TransitionError):
+    """The row is not in a state the event can be applied from (or does not exist)"""
+    
+    def __init__(self, entity: str, entity_id: str, event: str, current_status: Optional[Enum]):
+        self.entity_id = entity_id
+        self.event = event
+        self.current_status = current_status
+        if current_status is None:
+            message = f"{entity} {entity_id} not found"
+        else:
+            message = f"Cannot apply '{event}' to {entity} {entity_id} in status '{current_status.value}'"
+        super().__init__(message)
+
+
+@dataclass(frozen=True)
+class Transition:
+    """Row of a transition table: from any of ``sources`` to ``target``"""
+    sources: Tuple[Enum, ...]
+    target: Enum
+    timestamp: Optional[str] = None  # Column set to the transition time
+
+
+@dataclass
+class TransitionResult:
+    """Outcome of an applied event"""
+    id: str
+    event: str
+    previous_status: Enum
+    status: Enum
+    at: datetime
+    row: Dict[str, Any]  # Returned columns (outbox payload attributes)
+
+
+ORDER_TRANSITIONS: Dict[str, Transition] = {
+    "request_quote": Transition((OrderStatus.DRAFT,), OrderStatus.PENDING_QUOTE),
+    "quote": Transition((OrderStatus.DRAFT, OrderStatus.PENDING_QUOTE), OrderStatus.QUOTED, "quote_generated_at"),
+    "request_payment": Transition((OrderStatus.QUOTED,), OrderStatus.PENDING_PAYMENT),
+    "confirm_payment": Transition((OrderStatus.QUOTED, OrderStatus.PENDING_PAYMENT), OrderStatus.PAID, "payment_confirmed_at"),
+    "assign_driver": Transition((OrderStatus.PAID,), OrderStatus.ASSIGNED, "driver_assigned_at"),
+    "start_pickup": Transition((OrderStatus.ASSIGNED,), OrderStatus.PICKUP_PENDING, "pickup_started_at"),
+    "pick_up": Transition((OrderStatus.ASSIGNED, OrderStatus.PICKUP_PENDING), OrderStatus.PICKED_UP, "picked_up_at"),
+    "start_delivery": Transition((OrderStatus.PICKED_UP,), OrderStatus.IN_TRANSIT, "delivery_started_at"),
+    "deliver": Transition((OrderStatus.PICKED_UP, OrderStatus.IN_TRANSIT), OrderStatus.DELIVERED, "delivered_at"),
+    "cancel": Transition(
+        (
+            OrderStatus.DRAFT,
+            OrderStatus.PENDING_QUOTE,
+            OrderStatus.QUOTED,
+            OrderStatus.PENDING_PAYMENT,
+            OrderStatus.PAID,
+            OrderStatus.ASSIGNED,
+            OrderStatus.PICKUP_PENDING,
+        ),
+        OrderStatus.CANCELLED,
+        "cancelled_at",
+    ),
+    "fail": Transition(
+        (OrderStatus.ASSIGNED, OrderStatus.PICKUP_PENDING, OrderStatus.PICKED_UP, OrderStatus.IN_TRANSIT),
+        OrderStatus.FAILED,
+    ),
+    "refund": Transition((OrderStatus.PAID, OrderStatus.CANCELLED, OrderStatus.FAILED), OrderStatus.REFUNDED),
+}
+
+DELIVERY_TRANSITIONS: Dict[str, Transition] = {
+    "head_to_pickup": Transition((DeliveryStatus.ASSIGNED,), DeliveryStatus.HEADING_TO_PICKUP, "heading_to_pickup_at"),
+    "arrive_at_pickup": Transition(
+        (DeliveryStatus.ASSIGNED, DeliveryStatus.HEADING_TO_PICKUP),
+        DeliveryStatus.AT_PICKUP,
+        "arrived_at_pickup_at",
+    ),
+    "pick_up": Transition((DeliveryStatus.AT_PICKUP,), DeliveryStatus.PICKED_UP, "picked_up_at"),
+    "start_transit": Transition((DeliveryStatus.PICKED_UP,), DeliveryStatus.IN_TRANSIT, "in_transit_at"),
+    "arrive_at_delivery": Transition((DeliveryStatus.IN_TRANSIT,), DeliveryStatus.AT_DELIVERY, "arrived_at_delivery_at"),
+    "deliver": Transition((DeliveryStatus.IN_TRANSIT, DeliveryStatus.AT_DELIVERY), DeliveryStatus.DELIVERED, "delivered_at"),
+    "fail": Transition(
+        (
+            DeliveryStatus.ASSIGNED,
+            DeliveryStatus.HEADING_TO_PICKUP,
+            DeliveryStatus.AT_PICKUP,
+            DeliveryStatus.PICKED_UP,
+            DeliveryStatus.IN_TRANSIT,
+            DeliveryStatus.AT_DELIVERY,
+        ),
+        DeliveryStatus.FAILED,
+        "failed_at",
+    ),
+    "cancel": Transition(
+        (DeliveryStatus.ASSIGNED, DeliveryStatus.HEADING_TO_PICKUP, DeliveryStatus.AT_PICKUP),
+        DeliveryStatus.CANCELLED,
+        "cancelled_at",
+    ),
+}
+
+
+PAYMENT_TRANSITIONS: Dict[str, Transition] = {
+    "start_processing": Transition((PaymentStatus.PENDING,), PaymentStatus.PROCESSING, "processing_started_at"),
+    "complete": Transition((PaymentStatus.PENDING, PaymentStatus.PROCESSING), PaymentStatus.COMPLETED, "completed_at"),
+    "fail": Transition((PaymentStatus.PENDING, PaymentStatus.PROCESSING), PaymentStatus.FAILED, "failed_at"),
+    "cancel": Transition((PaymentStatus.PENDING, PaymentStatus.PROCESSING), PaymentStatus.CANCELLED, "cancelled_at"),
+    # PIX charge not paid before pix_expiration (src.services.scheduler)
+    "expire": Transition((PaymentStatus.PENDING, PaymentStatus.PROCESSING), PaymentStatus.CANCELLED, "cancelled_at"),
+    "refund": Transition(
+        (PaymentStatus.COMPLETED, PaymentStatus.PARTIALLY_REFUNDED),
+        PaymentStatus.REFUNDED,
+        "refunded_at",
+    ),
+    "partially_refund": Transition((PaymentStatus.COMPLETED,), PaymentStatus.PARTIALLY_REFUNDED, "refunded_at"),
+}
+
+
+class FSMService:
+    """Applies transition-table events with atomic compare-and-set updates"""
+    
+    model: type
+    transitions: Dict[str, Transition]
+    
+    @property
+    def entity(self) -> str:
+        return self.model.__name__.lower()
+    
+    def transition(self, event: str) -> Transition:
+        """Look up an event, raising UnknownEvent"""
+        try:
+            return self.transitions[event]
+        except KeyError:
+            raise UnknownEvent(event, list(self.transitions)) from None
+    
+    def can_apply(self, status: Enum, event: str) -> bool:
+        """Whether ``event`` is allowed from ``status``"""
+        transition = self.transitions.get(event)
+        return transition is not None and status in transition.sources
+    
+    def available_events(self, status: Enum) -> List[str]:
+        """Events allowed from ``status``"""
+        return [event for event, transition in self.transitions.items() if status in transition.sources]
+    
+    def _returning(self) -> List[Any]:
+        tracked = tracked_status_context(self.model)
+        attributes = tracked[1] if tracked else ()
+        return [self.model.id, self.model.status, *(getattr(self.model, attribute) for attribute in attributes)]
+    
+    def statement(
+        self,
+        entity_id: str,
+        event: str,
+        expected: Optional[Enum] = None,
+        at: Optional[datetime] = None,
+        **values: Any
+    ) -> Update:
+        """
+        Build the conditional UPDATE for an event
+        
+        Args:
+            entity_id: Row to transition
+            event: Event name from the transition table
+            expected: Current status the caller read (must be one of the sources)
+            at: Transition time (default: now)
+            values: Other columns to set in the same statement (e.g. assigned_driver_id)
+        """
+        return self._update(self.model.id == entity_id, entity_id, event, expected, at, values)
+    
+    def _update(
+        self,
+        match: Any,
+        entity_id: str,
+        event: str,
+        expected: Optional[Enum],
+        at: Optional[datetime],
+        values: Dict[str, Any],
+        sources: Optional[Tuple[Enum, ...]] = None
+    ) -> Update:
+        """
+        Conditional UPDATE of the rows ``match`` selects (``entity_id`` only names them in errors)
+        
+        ``sources`` narrows the statuses matched (default: ``expected``, or
+        all the event's sources).
+        """
+        transition = self.transition(event)
+        if expected is not None and expected not in transition.sources:
+            raise InvalidTransition(self.entity, entity_id, event, expected)
+        
+        for column in values:
+            if column == "status" or column not in self.model.__table__.c:
+                raise ValueError(f"Cannot set '{column}' on {self.entity} through an FSM event")
+        
+        assignments = {"status": transition.target, **values}
+        if transition.timestamp:
+            assignments[transition.timestamp] = at or utcnow()
+        
+        if sources is None:
+            sources = (expected,) if expected is not None else transition.sources
+        return (
+            update(self.model)
+            .where(match, self.model.status.in_(sources))
+            .values(**assignments)
+            .returning(*self._returning())
+        )
+    
+    async def _execute(
+        self,
+        session: AsyncSession,
+        match: Any,
+        entity_id: str,
+        event: str,
+        expected: Optional[Enum],
+        at: datetime,
+        values: Dict[str, Any],
+        first_only: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Run the conditional UPDATE, returning the rows with their ``previous_status``
+        
+        With one possible source the previous status is known. Otherwise
+        PostgreSQL returns it from a self-join on the row's old version
+        (``UPDATE ... FROM <table> old ... RETURNING old.status``); other
+        databases (SQLite cannot return joined columns) get one UPDATE per
+        source status, stopping at the first match with ``first_only``.
+        """
+        transition = self.transition(event)
+        sources = (expected,) if expected is not None else transition.sources
+        
+        if len(sources) == 1:
+            statement = self._update(match, entity_id, event, expected, at, values)
+            return [
+                {**row, "previous_status": sources[0]}
+                for row in (await session.execute(statement)).mappings().all()
+            ]
+        
+        if session.get_bind().dialect.name == "postgresql":
+            old = self.model.__table__.alias("old")
+            statement = (
+                self._update(match, entity_id, event, expected, at, values)
+                # Equal statuses: a row changed concurrently is re-checked
+                # against its new status and not updated from a stale one
+                .where(old.c.id == self.model.id, old.c.status == self.model.status)
+                .returning(old.c.status.label("previous_status"))
+            )
+            return [dict(row) for row in (await session.execute(statement)).mappings().all()]
+        
+        rows = []
+        for source in sources:
+            statement = self._update(match, entity_id, event, expected, at, values, sources=(source,))
+            rows.extend({**row, "previous_status": source} for row in (await session.execute(statement)).mappings().all())
+            if rows and first_only:
+                break
+        return rows
+    
+    async def apply(
+        self,
+        session: AsyncSession,
+        entity_id: str,
+        event: str,
+        expected: Optional[Enum] = None,
+        actor: Optional[str] = None,
+        **values: Any
+    ) -> TransitionResult:
+        """
+        Apply an event in the session's transaction
+        
+        The outbox event and the status_events history row are added to the
+        session, so all transitions of a transaction are inserted in one
+        batch when it flushes. ``actor`` defaults to ``session.info["actor"]``.
+        
+        Raises:
+            UnknownEvent: Event not in the transition table
+            InvalidTransition: Row missing, or its status does not allow the event
+        """
+        at = utcnow()
+        rows = await self._execute(
+            session, self.model.id == entity_id, entity_id, event, expected, at, values, first_only=True
+        )
+        
+        if not rows:
+            current = await session.scalar(select(self.model.status).where(self.model.id == entity_id))
+            raise InvalidTransition(self.entity, entity_id, event, current)
+        
+        return self._record(session, rows[0], event, actor, at)
+    
+    async def apply_many(
+        self,
+        session: AsyncSession,
+        entity_ids: Sequence[str],
+        event: str,
+        expected: Optional[Enum] = None,
+        actor: Optional[str] = None,
+        **values: Any
+    ) -> List[TransitionResult]:
+        """
+        Apply an event to many rows with one ``UPDATE ... WHERE id IN (...)``
+        
+        Each row transitions at most once, as with ``apply``; rows that are
+        missing or whose status does not allow the event are left out of the
+        result instead of raising InvalidTransition.
+        
+        Raises:
+            UnknownEvent: Event not in the transition table
+        """
+        if not entity_ids:
+            return []
+        at = utcnow()
+        rows = await self._execute(
+            session, self.model.id.in_(entity_ids), ", ".join(entity_ids), event, expected, at, values
+        )
+        return [self._record(session, row, event, actor, at) for row in rows]
+    
+    def _record(
+        self,
+        session: AsyncSession,
+        row: Dict[str, Any],
+        event: str,
+        actor: Optional[str],
+        at: datetime
+    ) -> TransitionResult:
+        """Add the outbox event and status_events row of an applied transition"""
+        transition = self.transition(event)
+        previous = row.pop("previous_status")
+        
+        entity_id = row["id"]
+        tracked = tracked_status_context(self.model)
+        aggregate_type = tracked[0] if tracked else self.entity
+        if tracked is not None:
+            session.add(OutboxEvent(**status_change_values(
+                aggregate_type,
+                entity_id,
+                previous,
+                transition.target,
+                **{attribute: row[attribute] for attribute in tracked[1]},
+            )))
+        session.add(StatusEvent(**status_event_values(
+            aggregate_type,
+            entity_id,
+            previous,
+            transition.target,
+            event=event,
+            actor=actor or session.info.get("actor"),
+            created_at=at,
+        )))
+        
+        return TransitionResult(
+            id=entity_id,
+            event=event,
+            previous_status=previous,
+            status=transition.target,
+            at=at,
+            row=row,
+        )
+
+
+class OrderFSMService(FSMService):
+    """Order lifecycle: DRAFT → QUOTED → PAID → ASSIGNED → PICKED_UP → IN_TRANSIT → DELIVERED"""
+    model = Order
+    transitions = ORDER_TRANSITIONS
+
+
+class DeliveryFSMService(FSMService):
+    """Delivery execution by the driver: ASSIGNED → AT_PICKUP → PICKED_UP → IN_TRANSIT → DELIVERED"""
+    model = Delivery
+    transitions = DELIVERY_TRANSITIONS
+
+
+class PaymentFSMService(FSMService):
+    """Payment processing: PENDING → PROCESSING → COMPLETED, or FAILED/CANCELLED"""
+    model = Payment
+    transitions = PAYMENT_TRANSITIONS
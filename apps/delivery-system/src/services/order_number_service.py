@@ -0,0 +1,235 @@
+"""
+Human-readable order numbers
+
+    SP261019-0012345-7
+    │ │      │       └ check digit (Damm) of the date and sequence digits
+    │ │      └ sequence value, never reused
+    │ └ issue date, YYMMDD in ORDER_NUMBER_TIMEZONE
+    └ region: state (UF) of the pickup address
+
+Uniqueness comes from the sequence alone, so numbers never collide and are
+never retried. Each worker reserves a block of sequence values with one
+round trip (``nextval`` of the PostgreSQL sequence order_number_blocks, or
+INCRBY on a Redis counter) and hands them out from memory: issuing a number
+is a counter increment with no I/O, lock or retry. The next block is
+prefetched in the background when the current one runs low.
+
+Values left in a block when a worker stops are skipped, so numbers have
+gaps and are only roughly ordered across workers. Use one backend per
+deployment: the Redis counter and the database sequence are independent
+(when switching, move the new one past the other's current value).
+"""
+import asyncio
+import re
+import unicodedata
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select
+
+from ..core.cache import get_redis
+from ..core.config import settings
+from ..core.database import get_async_engine
+from ..core.metrics import ORDER_NUMBER_BLOCKS_RESERVED, ORDER_NUMBER_STALLS
+from ..core.partitioning import utcnow
+from ..models.order import ORDER_NUMBER_BLOCKS
+
+ORDER_NUMBER_PATTERN = re.compile(r"^([A-Z]{2})(\d{6})-(\d{7,9})-(\d)$")
+SEQUENCE_DIGITS = 7  # Zero-padded width; grows up to 9 digits (order_number is String(20))
+
+# Damm algorithm quasigroup: one check digit that catches every single-digit
+# error and every transposition of adjacent digits
+_DAMM = (
+    (0, 3, 1, 7, 5, 9, 8, 6, 4, 2),
+    (7, 0, 9, 2, 1, 5, 4, 8, 6, 3),
+    (4, 2, 0, 6, 8, 7, 1, 3, 5, 9),
+    (1, 7, 5, 0, 9, 8, 3, 4, 2, 6),
+    (6, 1, 2, 3, 0, 4, 5, 9, 7, 8),
+    (3, 6, 7, 4, 2, 0, 9, 5, 8, 1),
+    (5, 8, 6, 9, 7, 2, 0, 1, 3, 4),
+    (8, 9, 4, 5, 3, 6, 2, 0, 1, 7),
+    (9, 4, 3, 8, 6, 1, 7, 2, 0, 5),
+    (2, 5, 8, 1, 4, 3, 6, 7, 9, 0),
+)
+
+# Brazilian states by name (accents and case ignored), for addresses that
+# spell the state out instead of using the UF
+STATE_CODES = {
+    "acre": "AC", "alagoas": "AL", "amapa": "AP", "amazonas": "AM", "bahia": "BA",
+    "ceara": "CE", "distrito federal": "DF", "espirito santo": "ES", "goias": "GO",
+    "maranhao": "MA", "mato grosso": "MT", "mato grosso do sul": "MS", "minas gerais": "MG",
+    "para": "PA", "paraiba": "PB", "parana": "PR", "pernambuco": "PE", "piaui": "PI",
+    "rio de janeiro": "RJ", "rio grande do norte": "RN", "rio grande do sul": "RS",
+    "rondonia": "RO", "roraima": "RR", "santa catarina": "SC", "sao paulo": "SP",
+    "sergipe": "SE", "tocantins": "TO",
+}
+
+
+def check_digit(digits: str) -> int:
+    """Damm check digit of a string of digits"""
+    interim = 0
+    for digit in digits:
+        interim = _DAMM[interim][ord(digit) - 48]
+    return interim
+
+
+def region_code(state: Optional[str]) -> str:
+    """Two-letter region prefix for a state (UF or name), ORDER_NUMBER_DEFAULT_REGION if unknown"""
+    if state:
+        normalized = unicodedata.normalize("NFKD", state).encode("ascii", "ignore").decode().strip().lower()
+        if len(normalized) == 2 and normalized.isalpha():
+            return normalized.upper()
+        if normalized in STATE_CODES:
+            return STATE_CODES[normalized]
+    return settings.ORDER_NUMBER_DEFAULT_REGION
+
+
+def format_order_number(region: str, day: str, value: int) -> str:
+    """
+    Build an order number from its parts
+    
+    Args:
+        region: Two-letter prefix (see ``region_code``)
+        day: Issue date as YYMMDD
+        value: Sequence value
+    """
+    sequence = f"{value:0{SEQUENCE_DIGITS}d}"
+    if len(sequence) > 9:
+        raise ValueError(f"Order number sequence value {value} does not fit in order_number")
+    return f"{region}{day}-{sequence}-{check_digit(day + sequence)}"
+
+
+def is_valid_order_number(number: str) -> bool:
+    """Check the format and check digit of an order number (e.g. typed by a customer)"""
+    match = ORDER_NUMBER_PATTERN.match(number.strip().upper())
+    if match is None:
+        return False
+    _, day, sequence, digit = match.groups()
+    return check_digit(day + sequence) == int(digit)
+
+
+class BlockSource(ABC):
+    """Reserves ranges of sequence values shared by all workers"""
+    
+    name: str
+    
+    @abstractmethod
+    async def reserve(self) -> Tuple[int, int]:
+        """Reserve the next block, returned as a half-open range [start, end)"""
+
+
+class SequenceBlockSource(BlockSource):
+    """Blocks from the PostgreSQL sequence order_number_blocks (one nextval each)"""
+    
+    name = "sequence"
+    
+    async def reserve(self) -> Tuple[int, int]:
+        async with get_async_engine().connect() as conn:
+            start = await conn.scalar(select(ORDER_NUMBER_BLOCKS.next_value()))
+        return start, start + ORDER_NUMBER_BLOCKS.increment
+
+
+class RedisBlockSource(BlockSource):
+    """Blocks from a Redis counter on the queue workload (one INCRBY each)"""
+    
+    name = "redis"
+    
+    def __init__(self, key: Optional[str] = None, block_size: Optional[int] = None):
+        self.key = key or settings.ORDER_NUMBER_REDIS_KEY
+        self.block_size = block_size or settings.ORDER_NUMBER_BLOCK_SIZE
+    
+    async def reserve(self) -> Tuple[int, int]:
+        client = await get_redis("queue")
+        end = await client.incrby(self.key, self.block_size)
+        return end - self.block_size + 1, end + 1
+
+
+def default_block_source() -> BlockSource:
+    """Block source selected by ORDER_NUMBER_BACKEND ("auto": the sequence if the database has sequences)"""
+    backend = settings.ORDER_NUMBER_BACKEND
+    if backend == "auto":
+        backend = "sequence" if get_async_engine().dialect.supports_sequences else "redis"
+    if backend == "sequence":
+        return SequenceBlockSource()
+    if backend == "redis":
+        return RedisBlockSource()
+    raise ValueError(f"Unknown ORDER_NUMBER_BACKEND: {backend!r}")
+
+
+class OrderNumberService:
+    """
+    Issues order numbers from blocks reserved by this worker
+    
+    One instance per process (see ``order_numbers``); it is not shared
+    across event loops.
+    """
+    
+    def __init__(self, source: Optional[BlockSource] = None):
+        self._source = source
+        self._next = 0
+        self._end = 0
+        self._low_water = 0
+        self._prefetch: Optional[asyncio.Task] = None
+        self._refill_lock = asyncio.Lock()
+    
+    @property
+    def source(self) -> BlockSource:
+        if self._source is None:
+            self._source = default_block_source()
+        return self._source
+    
+    def _take(self) -> Optional[int]:
+        """Next value of the current block, or None if it is used up (never awaits)"""
+        if self._next >= self._end:
+            return None
+        value = self._next
+        self._next += 1
+        if self._end - self._next <= self._low_water and self._prefetch is None:
+            self._prefetch = asyncio.ensure_future(self._reserve())
+        return value
+    
+    async def _reserve(self) -> Tuple[int, int]:
+        block = await self.source.reserve()
+        ORDER_NUMBER_BLOCKS_RESERVED.labels(backend=self.source.name).inc()
+        return block
+    
+    async def _refill(self) -> None:
+        """Switch to the prefetched block, reserving one if no prefetch is running"""
+        async with self._refill_lock:
+            if self._next < self._end:
+                return  # Refilled by another caller while waiting for the lock
+            ORDER_NUMBER_STALLS.inc()
+            if self._prefetch is None:
+                self._prefetch = asyncio.ensure_future(self._reserve())
+            try:
+                start, end = await self._prefetch
+            finally:
+                self._prefetch = None
+            self._next, self._end = start, end
+            self._low_water = max(1, (end - start) // 4)
+    
+    async def next_value(self) -> int:
+        """Next sequence value; only awaits when no reserved value is left"""
+        value = self._take()
+        while value is None:
+            await self._refill()
+            value = self._take()
+        return value
+    
+    async def issue(self, state: Optional[str] = None, at: Optional[datetime] = None) -> str:
+        """
+        Issue a new order number
+        
+        Args:
+            state: State (UF or name) of the pickup address, for the region prefix
+            at: Issue time (default: now)
+        """
+        value = await self.next_value()
+        day = (at or utcnow()).astimezone(ZoneInfo(settings.ORDER_NUMBER_TIMEZONE)).strftime("%y%m%d")
+        return format_order_number(region_code(state), day, value)
+
+
+# Process-wide service
+order_numbers = OrderNumberService()
@@ -5,17 +5,29 @@ Integrates the existing OpenAI assistant configuration with the new system
 import json
 from typing import Dict, Any, Optional
 import logging
+import uuid
 from datetime import datetime
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from ..core.config import settings
 from ..core import cache
+from ..core.cache import hash_tag
+from ..core.database import get_async_sessionmaker
 from ..models.user import User
 from ..models.order import Order, OrderStatus
+from ..repositories.orders import get_active_orders_for_consumer
+from .fsm_service import OrderFSMService, TransitionError
 from ...packages.integrations.openai import OpenAIClient, OTTOAssistant
 from ...packages.integrations.whatsapp import WhatsAppClient
 
 logger = logging.getLogger(__name__)
 
+# FSM events a customer may trigger through O.T.T.O. The event comes from the
+# LLM reply, so payment, dispatch and delivery events are never taken from it.
+CUSTOMER_FSM_EVENTS = frozenset({"cancel"})
+
 
 class OTTOService:
     """
@@ -29,6 +41,7 @@ class OTTOService:
             assistant_id=settings.OPENAI_ASSISTANT_ID
         )
         self.otto_assistant = OTTOAssistant(self.openai_client)
+        self.order_fsm = OrderFSMService()
         
         if settings.WHATSAPP_API_TOKEN:
             self.whatsapp_client = WhatsAppClient(
@@ -43,7 +56,7 @@ class OTTOService:
         """Start a new conversation with O.T.T.O"""
         try:
             # Create or get existing thread
-            cache_key = f"otto:thread:{user_phone}"
+            cache_key = f"otto:thread:{hash_tag(user_phone)}"
             thread_id = await cache.get(cache_key)
             
             if not thread_id:
@@ -194,7 +207,7 @@ class OTTOService:
                 )
             
             # Store quote in cache for later confirmation
-            cache_key = f"otto:quote:{phone_number}"
+            cache_key = f"otto:quote:{hash_tag(phone_number)}"
             await cache.set(cache_key, otto_response, expire=30 * 60)  # 30 minutes
             
             return {
@@ -214,13 +227,24 @@ class OTTOService:
         phone_number: str,
         user: Optional[User] = None
     ) -> Dict[str, Any]:
-        """Handle FSM state change events"""
+        """Apply a customer FSM event from O.T.T.O to one of the user's orders"""
         try:
             event = otto_response.get("fsm_event")
             text = otto_response.get("text", "Estado atualizado")
+            entities = otto_response.get("entities") or {}
+            
+            if event not in CUSTOMER_FSM_EVENTS or user is None:
+                logger.warning(f"Refused FSM event {event} from O.T.T.O (phone {phone_number}, user {user.id if user else None})")
+                return {"success": False, "type": "fsm_event", "event": event, "error": "FSM event not allowed"}
             
-            # Here you would integrate with your FSM system
-            # For now, just send confirmation
+            async with get_async_sessionmaker()() as session:
+                async with session.begin():
+                    order_id = await self._customer_order_id(session, user, entities.get("order_id"))
+                    if not order_id:
+                        logger.warning(f"FSM event {event} from O.T.T.O without an order of user {user.id}")
+                        return {"success": False, "type": "fsm_event", "event": event, "error": "No order for FSM event"}
+                    
+                    result = await self.order_fsm.apply(session, order_id, event, actor=user.id)
             
             if self.whatsapp_client:
                 await self.whatsapp_client.send_text_message(phone_number, text)
@@ -229,13 +253,38 @@ class OTTOService:
                 "success": True,
                 "type": "fsm_event",
                 "event": event,
+                "order_id": result.id,
+                "status": result.status.value,
                 "response_text": text
             }
             
+        except TransitionError as e:
+            logger.warning(f"Rejected FSM event from O.T.T.O: {e}")
+            if self.whatsapp_client:
+                await self.whatsapp_client.send_text_message(
+                    phone_number,
+                    "Não foi possível atualizar o pedido neste momento. Verifique o status e tente novamente."
+                )
+            return {"success": False, "type": "fsm_event", "event": otto_response.get("fsm_event"), "error": str(e)}
+            
         except Exception as e:
             logger.error(f"Error handling FSM event: {e}")
             return {"success": False, "error": str(e)}
     
+    async def _customer_order_id(self, session: AsyncSession, user: User, order_id: Optional[str]) -> Optional[str]:
+        """The order an event targets: ``order_id`` if the user owns it, else their latest active order"""
+        if not order_id:
+            active_orders = await get_active_orders_for_consumer(session, user.id, limit=1)
+            return active_orders[0].id if active_orders else None
+        
+        try:
+            uuid.UUID(str(order_id))
+        except ValueError:
+            return None
+        return await session.scalar(
+            select(Order.id).where(Order.id == str(order_id), Order.consumer_id == user.id)
+        )
+    
     async def _handle_chat_response(
         self,
         otto_response: Dict[str, Any],
@@ -297,7 +346,7 @@ class OTTOService:
         """Confirm order and generate payment"""
         try:
             # Get cached quote
-            cache_key = f"otto:quote:{phone_number}"
+            cache_key = f"otto:quote:{hash_tag(phone_number)}"
             quote_data = await cache.get(cache_key)
             
             if not quote_data:
@@ -349,7 +398,7 @@ class OTTOService:
         """Cancel current order"""
         try:
             # Clear cached quote
-            cache_key = f"otto:quote:{phone_number}"
+            cache_key = f"otto:quote:{hash_tag(phone_number)}"
             await cache.delete(cache_key)
             
             message = "❌ Pedido cancelado. Posso ajudar com algo mais?"
@@ -0,0 +1,299 @@
+"""
+Payment gateway webhooks: ingestion and batched application
+
+PagSeguro (PagBank Orders API) posts an order with its ``charges`` whenever
+a charge changes status, and retries and redelivers in bursts. The webhook
+endpoint only verifies the ``x-authenticity-token`` signature and records
+each (charge, status) in the payment_webhook_events inbox; duplicates are
+dropped there by the unique key. The worker (src.jobs.payment_webhooks)
+then applies whole batches:
+
+- one SELECT for the batch's payments (by gateway_transaction_id); events
+  whose charge matches no payment yet are left unprocessed and retried
+  PAYMENT_WEBHOOK_UNKNOWN_RETRY_SECONDS later (the notification can arrive
+  before the charge id is committed), until
+  PAYMENT_WEBHOOK_UNKNOWN_GRACE_SECONDS after they were received, when they
+  are closed as unknown_payment,
+- one ``UPDATE ... WHERE id IN (...)`` per (FSM event, current status)
+  through ``FSMService.apply_many``; a redelivered PAID for a payment that
+  is already COMPLETED matches no row and is ignored,
+- one executemany UPDATE of the payments' webhook tracking columns,
+- ``confirm_payment`` of the orders whose payment completed, again as a
+  compare-and-set, so an order moves to PAID (the order.status_changed
+  event that starts dispatch) exactly once.
+
+Payments are matched on ``payments.gateway_transaction_id``, the PagSeguro
+charge id (CHAR_...) stored when the charge is created.
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+import hashlib
+import hmac
+import logging
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..core.metrics import PAYMENT_WEBHOOK_EVENTS
+from ..core.partitioning import utcnow
+from ..models.order import Order, OrderStatus
+from ..models.payment import Payment, PaymentStatus
+from ..models.payment_webhook import PaymentWebhookEvent, PaymentWebhookResult
+from ..repositories.bulk import bulk_create
+from .fsm_service import OrderFSMService, PaymentFSMService
+
+logger = logging.getLogger(__name__)
+
+PAGSEGURO = "pagseguro"
+
+# PagSeguro charge status -> payment FSM events, the first one allowed from
+# the payment's current status is applied. WAITING (charge created, not
+# paid yet) changes nothing.
+PAGSEGURO_STATUS_EVENTS: Dict[str, Tuple[str, ...]] = {
+    "AUTHORIZED": ("start_processing",),
+    "IN_ANALYSIS": ("start_processing",),
+    "PAID": ("complete",),
+    "DECLINED": ("fail",),
+    "CANCELED": ("cancel", "refund"),  # Before or after payment
+}
+
+# Order states a completed payment confirms
+UNPAID_ORDER_STATUSES = (OrderStatus.QUOTED, OrderStatus.PENDING_PAYMENT)
+
+
+class WebhookSignatureError(Exception):
+    """Notification without a valid signature"""
+    pass
+
+
+class WebhookPayloadError(ValueError):
+    """Notification the gateway integration cannot read"""
+    pass
+
+
+def verify_pagseguro_signature(body: bytes, signature: Optional[str], token: Optional[str]) -> None:
+    """
+    Check a notification's ``x-authenticity-token``: sha256 of ``<token>-<raw body>``
+    
+    Raises:
+        WebhookSignatureError: No token configured, header missing or wrong
+    """
+    if not token:
+        raise WebhookSignatureError("PAGSEGURO_TOKEN is not configured")
+    if not signature:
+        raise WebhookSignatureError("Missing x-authenticity-token header")
+    expected = hashlib.sha256(f"{token}-".encode() + body).hexdigest()
+    if not hmac.compare_digest(expected, signature.strip().lower()):
+        raise WebhookSignatureError("Invalid x-authenticity-token")
+
+
+def parse_pagseguro_notification(payload: Mapping[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Inbox rows (payment_webhook_events values) of a PagSeguro order notification
+    
+    Raises:
+        WebhookPayloadError: No charges with an id and a status
+    """
+    charges = payload.get("charges") if isinstance(payload, Mapping) else None
+    if not isinstance(charges, list):
+        raise WebhookPayloadError("Notification has no charges")
+    
+    rows = []
+    for charge in charges:
+        if not isinstance(charge, Mapping) or not charge.get("id") or not charge.get("status"):
+            raise WebhookPayloadError("Charge without id or status")
+        rows.append({
+            "gateway": PAGSEGURO,
+            "gateway_transaction_id": str(charge["id"]),
+            "gateway_status": str(charge["status"]).upper(),
+            "payload": dict(charge),
+        })
+    return rows
+
+
+async def record_notifications(session: AsyncSession, rows: Iterable[Mapping[str, Any]]) -> int:
+    """
+    Add notifications to the inbox in the session's transaction
+    
+    Returns:
+        Number of new (not previously received) charge statuses
+    """
+    result = await bulk_create(session, PaymentWebhookEvent, rows, ignore_conflicts=True)
+    return result.count
+
+
+@dataclass
+class _PaymentState:
+    id: str
+    order_id: str
+    status: Enum
+    steps: List[Tuple[str, Enum, str]] = field(default_factory=list)  # (event, from status, webhook event id)
+
+
+@dataclass
+class WebhookBatchResult:
+    """What a batch of webhook events changed"""
+    results: Dict[str, str]  # webhook event id -> PaymentWebhookResult
+    completed_payments: List[str]
+    paid_orders: List[Dict[str, Any]]  # id, is_scheduled, pickup_scheduled_at of orders moved to PAID
+    deferred: List[str] = field(default_factory=list)  # event ids left for a retry (payment not known yet)
+
+
+async def apply_webhook_events(session: AsyncSession, events: List[PaymentWebhookEvent]) -> WebhookBatchResult:
+    """
+    Apply inbox events (in ``received_at`` order) to their payments and orders
+    
+    Runs in the session's transaction and marks the events processed, except
+    those whose payment is not known yet, which are deferred to a retry.
+    """
+    now = utcnow()
+    grace = timedelta(seconds=settings.PAYMENT_WEBHOOK_UNKNOWN_GRACE_SECONDS)
+    payment_fsm = PaymentFSMService()
+    rows = (await session.execute(
+        select(Payment.id, Payment.order_id, Payment.status, Payment.gateway_transaction_id)
+        .where(
+            Payment.gateway == PAGSEGURO,
+            Payment.gateway_transaction_id.in_({event.gateway_transaction_id for event in events}),
+        )
+    )).all()
+    payments = {row.gateway_transaction_id: _PaymentState(row.id, row.order_id, row.status) for row in rows}
+    
+    # Plan each payment's transitions from its current status, event by event
+    results: Dict[str, str] = {}
+    deferred: List[str] = []
+    tracking: Dict[str, Dict[str, Any]] = {}
+    for event in events:
+        state = payments.get(event.gateway_transaction_id)
+        if state is None:
+            if _aware(event.received_at) + grace > now:
+                deferred.append(event.id)
+            else:
+                results[event.id] = PaymentWebhookResult.UNKNOWN_PAYMENT
+            continue
+        tracked = tracking.setdefault(state.id, {"b_id": state.id, "b_attempts": 0})
+        tracked["b_attempts"] += 1
+        tracked["b_status"] = event.gateway_status
+        results[event.id] = PaymentWebhookResult.IGNORED
+        for candidate in PAGSEGURO_STATUS_EVENTS.get(event.gateway_status, ()):
+            if payment_fsm.can_apply(state.status, candidate):
+                state.steps.append((candidate, state.status, event.id))
+                state.status = payment_fsm.transition(candidate).target
+                break
+        else:
+            if event.gateway_status == "PAID" and state.status != PaymentStatus.COMPLETED:
+                logger.warning(
+                    f"Charge {event.gateway_transaction_id} paid after payment {state.id} became {state.status.value}; "
+                    f"refund it"
+                )
+    
+    # Apply them in rounds: one UPDATE per (event, expected status) and round
+    completed = []
+    pending = [state for state in payments.values() if state.steps]
+    round_number = 0
+    while pending:
+        groups: Dict[Tuple[str, Enum], List[_PaymentState]] = defaultdict(list)
+        for state in pending:
+            event_name, expected, _ = state.steps[round_number]
+            groups[(event_name, expected)].append(state)
+        
+        moved = set()
+        for (event_name, expected), states in groups.items():
+            applied = await payment_fsm.apply_many(
+                session, [state.id for state in states], event_name, expected=expected, actor=PAGSEGURO
+            )
+            moved.update(result.id for result in applied)
+            if payment_fsm.transition(event_name).target == PaymentStatus.COMPLETED:
+                completed.extend(result.id for result in applied)
+        
+        # A payment that changed meanwhile (expired, cancelled) stops here
+        for state in pending:
+            if state.id in moved:
+                results[state.steps[round_number][2]] = PaymentWebhookResult.APPLIED
+        round_number += 1
+        pending = [state for state in pending if state.id in moved and len(state.steps) > round_number]
+    
+    for result in results.values():
+        PAYMENT_WEBHOOK_EVENTS.labels(result=result).inc()
+    if deferred:
+        PAYMENT_WEBHOOK_EVENTS.labels(result="deferred").inc(len(deferred))
+    
+    if tracking:
+        await session.execute(
+            update(Payment.__table__)
+            .where(Payment.__table__.c.id == bindparam("b_id"))
+            .values(
+                webhook_attempts=Payment.__table__.c.webhook_attempts + bindparam("b_attempts"),
+                gateway_status=bindparam("b_status"),
+                last_webhook_at=now,
+                webhook_status="processed",
+            ),
+            list(tracking.values()),
+        )
+    
+    paid_orders = await _confirm_orders(session, [state.order_id for state in payments.values() if state.id in completed])
+    await _mark_processed(session, results, now)
+    await _defer(session, deferred, now)
+    return WebhookBatchResult(
+        results=results, completed_payments=completed, paid_orders=paid_orders, deferred=deferred
+    )
+
+
+async def _confirm_orders(session: AsyncSession, order_ids: List[str]) -> List[Dict[str, Any]]:
+    """Move the orders of completed payments to PAID, each exactly once"""
+    if not order_ids:
+        return []
+    order_fsm = OrderFSMService()
+    orders = (await session.execute(
+        select(Order.id, Order.status, Order.is_scheduled, Order.pickup_scheduled_at)
+        .where(Order.id.in_(order_ids), Order.status.in_(UNPAID_ORDER_STATUSES))
+    )).all()
+    
+    by_status: Dict[Enum, List[str]] = defaultdict(list)
+    for order in orders:
+        by_status[order.status].append(order.id)
+    confirmed = set()
+    for status, ids in by_status.items():
+        applied = await order_fsm.apply_many(session, ids, "confirm_payment", expected=status, actor=PAGSEGURO)
+        confirmed.update(result.id for result in applied)
+    
+    return [
+        {"id": order.id, "is_scheduled": order.is_scheduled, "pickup_scheduled_at": order.pickup_scheduled_at}
+        for order in orders if order.id in confirmed
+    ]
+
+
+def _aware(value: datetime) -> datetime:
+    """SQLite returns naive UTC datetimes"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+async def _defer(session: AsyncSession, event_ids: List[str], now: datetime) -> None:
+    """Leave events unprocessed until their next attempt"""
+    if not event_ids:
+        return
+    await session.execute(
+        update(PaymentWebhookEvent)
+        .where(PaymentWebhookEvent.id.in_(event_ids))
+        .values(
+            attempts=PaymentWebhookEvent.attempts + 1,
+            retry_at=now + timedelta(seconds=settings.PAYMENT_WEBHOOK_UNKNOWN_RETRY_SECONDS),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def _mark_processed(session: AsyncSession, results: Dict[str, str], now: datetime) -> None:
+    by_result: Dict[str, List[str]] = defaultdict(list)
+    for event_id, result in results.items():
+        by_result[result].append(event_id)
+    for result, ids in by_result.items():
+        await session.execute(
+            update(PaymentWebhookEvent)
+            .where(PaymentWebhookEvent.id.in_(ids))
+            .values(processed_at=now, result=result)
+            .execution_options(synchronize_session=False)
+        )
@@ -0,0 +1,304 @@
+"""
+Delayed jobs on a Redis sorted set
+
+Work due at a given time (cancel an order whose PIX charge was not paid by
+``pix_expiration``, release a scheduled order for dispatch ahead of its
+``pickup_scheduled_at``) is a member ``<kind>:<entity id>`` of the
+SCHEDULER_KEY sorted set, scored by its due time in epoch seconds. The
+worker (src.jobs.scheduler) only reads the due head of the set:
+
+    ZRANGEBYSCORE scheduler:jobs -inf <now> LIMIT 0 <batch>
+
+so a poll costs O(log N + batch) whatever the size of the payments and
+orders tables, instead of a scan for expired rows.
+
+A job belongs to the worker whose ZREM removes it, so several workers can
+poll side by side and a job runs once per schedule. Handlers re-check the
+row (the charge may have been paid, the pickup moved) and may return a new
+due time. Scheduling the same job again moves it. ``reconcile`` re-adds
+the jobs of all awaiting payments and scheduled orders from the database,
+so jobs lost with Redis, or claimed by a worker that crashed, still run.
+
+Usage:
+    await schedule_payment_expiry(payment.id, payment.pix_expiration)
+    await schedule_pickup(order.id, order.pickup_scheduled_at)
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.cache import get_redis, open_pipeline
+from ..core.config import settings
+from ..core.database import get_async_sessionmaker
+from ..core.metrics import SCHEDULER_JOB_LAG, SCHEDULER_JOBS
+from ..core.partitioning import utcnow
+from ..models.notification import Notification, NotificationType
+from ..models.order import Order, OrderStatus
+from ..models.outbox import OutboxEvent
+from ..models.payment import AWAITING_PAYMENT_STATUSES, Payment
+from ..models.user import User
+from ..repositories.orders import scheduled_orders_query
+from ..repositories.payments import pix_expirations_query
+from .fsm_service import InvalidTransition, OrderFSMService, PaymentFSMService
+
+logger = logging.getLogger(__name__)
+
+PAYMENT_EXPIRY = "payment_expiry"
+SCHEDULED_PICKUP = "scheduled_pickup"
+
+# Order states an unpaid (expired) charge cancels
+UNPAID_ORDER_STATUSES = (OrderStatus.QUOTED, OrderStatus.PENDING_PAYMENT)
+
+# (session, entity id, now) -> None when done, or the time to run again
+JobHandler = Callable[[AsyncSession, str, datetime], Awaitable[Optional[datetime]]]
+
+
+def _aware(value: datetime) -> datetime:
+    """SQLite returns naive UTC datetimes"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+class DelayedJobScheduler:
+    """Jobs keyed by due time in a Redis sorted set (workload ``queue``)"""
+    
+    def __init__(self, key: Optional[str] = None):
+        self.key = key or settings.SCHEDULER_KEY
+        self.handlers: Dict[str, JobHandler] = {}
+    
+    def handler(self, kind: str) -> Callable[[JobHandler], JobHandler]:
+        """Register the handler of a job kind"""
+        def register(function: JobHandler) -> JobHandler:
+            self.handlers[kind] = function
+            return function
+        return register
+    
+    async def schedule_many(self, jobs: Iterable[Tuple[str, str, datetime]], only_new: bool = False) -> int:
+        """
+        Schedule ``(kind, entity id, due at)`` jobs in one round trip
+        
+        Args:
+            jobs: Jobs to add, or to move if already scheduled
+            only_new: Leave jobs that are already scheduled where they are
+        
+        Returns:
+            Number of jobs that were not scheduled before
+        """
+        mapping = {f"{kind}:{entity_id}": _aware(due_at).timestamp() for kind, entity_id, due_at in jobs}
+        if not mapping:
+            return 0
+        client = await get_redis("queue")
+        return await client.zadd(self.key, mapping, nx=only_new)
+    
+    async def schedule(self, kind: str, entity_id: str, due_at: datetime) -> None:
+        """Run a job at ``due_at`` (moving it if already scheduled)"""
+        await self.schedule_many([(kind, entity_id, due_at)])
+    
+    async def cancel(self, kind: str, entity_id: str) -> bool:
+        """Unschedule a job; False if it was not scheduled"""
+        client = await get_redis("queue")
+        return bool(await client.zrem(self.key, f"{kind}:{entity_id}"))
+    
+    async def pending(self) -> int:
+        """Number of scheduled jobs"""
+        client = await get_redis("queue")
+        return await client.zcard(self.key)
+    
+    async def claim_due(self, now: Optional[datetime] = None, limit: Optional[int] = None) -> List[Tuple[str, str, float]]:
+        """
+        Remove and return up to ``limit`` due jobs, oldest first
+        
+        Jobs another worker removed between the read and the ZREM are left
+        out, so each job is claimed by exactly one worker.
+        
+        Returns:
+            (kind, entity id, due timestamp) per claimed job
+        """
+        client = await get_redis("queue")
+        now = now or utcnow()
+        due = await client.zrangebyscore(
+            self.key, "-inf", now.timestamp(), start=0, num=limit or settings.SCHEDULER_BATCH_SIZE, withscores=True
+        )
+        if not due:
+            return []
+        
+        pipe = open_pipeline(client, transaction=False)
+        for member, _ in due:
+            pipe.zrem(self.key, member)
+        removed = await pipe.execute()
+        
+        claimed = []
+        for (member, score), won in zip(due, removed):
+            if won:
+                kind, _, entity_id = member.partition(":")
+                claimed.append((kind, entity_id, score))
+        return claimed
+    
+    async def run_job(self, kind: str, entity_id: str, now: datetime) -> Optional[datetime]:
+        """Run a job's handler in its own transaction; returns when to run it again, if ever"""
+        handler = self.handlers.get(kind)
+        if handler is None:
+            logger.error(f"No handler for scheduled job {kind}:{entity_id}, dropping it")
+            return None
+        async with get_async_sessionmaker()() as session:
+            session.info["actor"] = "scheduler"
+            async with session.begin():
+                return await handler(session, entity_id, now)
+    
+    async def run_due(self, now: Optional[datetime] = None, limit: Optional[int] = None) -> int:
+        """
+        Claim and run one batch of due jobs
+        
+        A job whose handler fails is retried SCHEDULER_RETRY_SECONDS later.
+        
+        Returns:
+            Number of jobs claimed
+        """
+        now = now or utcnow()
+        jobs = await self.claim_due(now, limit)
+        retry_at = now + timedelta(seconds=settings.SCHEDULER_RETRY_SECONDS)
+        
+        again = []
+        for kind, entity_id, due in jobs:
+            SCHEDULER_JOB_LAG.labels(kind=kind).observe(max(now.timestamp() - due, 0.0))
+            try:
+                next_due = await self.run_job(kind, entity_id, now)
+            except Exception as e:
+                logger.error(f"Scheduled job {kind}:{entity_id} failed, retrying at {retry_at.isoformat()}: {e}")
+                SCHEDULER_JOBS.labels(kind=kind, outcome="failed").inc()
+                again.append((kind, entity_id, retry_at))
+                continue
+            if next_due is not None:
+                SCHEDULER_JOBS.labels(kind=kind, outcome="rescheduled").inc()
+                again.append((kind, entity_id, next_due))
+            else:
+                SCHEDULER_JOBS.labels(kind=kind, outcome="done").inc()
+        
+        await self.schedule_many(again)
+        return len(jobs)
+    
+    async def reconcile(self, now: Optional[datetime] = None) -> int:
+        """
+        Schedule the jobs of every awaiting PIX payment and scheduled paid
+        order that are missing from the set
+        
+        Reads payments through ix_payments_awaiting_status_pix_expiration and
+        orders through ix_orders_active_status_created (the repository
+        filters match their partial index predicates), so the cost grows
+        with the number of open payments and orders only.
+        
+        Returns:
+            Number of jobs added
+        """
+        now = now or utcnow()
+        payments = pix_expirations_query().execution_options(yield_per=settings.SCHEDULER_BATCH_SIZE)
+        orders = scheduled_orders_query(now).execution_options(yield_per=settings.SCHEDULER_BATCH_SIZE)
+        
+        added = 0
+        async with get_async_sessionmaker()() as session:
+            for kind, query, due_at in (
+                (PAYMENT_EXPIRY, payments, lambda value: value),
+                (SCHEDULED_PICKUP, orders, pickup_due_at),
+            ):
+                result = await session.stream(query)
+                async for rows in result.partitions():
+                    added += await self.schedule_many(
+                        ((kind, entity_id, due_at(_aware(value))) for entity_id, value in rows), only_new=True
+                    )
+        return added
+
+
+scheduler = DelayedJobScheduler()
+
+
+def pickup_due_at(pickup_scheduled_at: datetime) -> datetime:
+    """When a scheduled order is released for dispatch"""
+    return pickup_scheduled_at - timedelta(minutes=settings.SCHEDULER_PICKUP_LEAD_MINUTES)
+
+
+async def schedule_payment_expiry(payment_id: str, pix_expiration: datetime) -> None:
+    """Cancel the payment (and its unpaid order) if still awaiting at ``pix_expiration``"""
+    await scheduler.schedule(PAYMENT_EXPIRY, payment_id, pix_expiration)
+
+
+async def schedule_pickup(order_id: str, pickup_scheduled_at: datetime) -> None:
+    """Release a scheduled order for dispatch SCHEDULER_PICKUP_LEAD_MINUTES before its pickup"""
+    await scheduler.schedule(SCHEDULED_PICKUP, order_id, pickup_due_at(pickup_scheduled_at))
+
+
+@scheduler.handler(PAYMENT_EXPIRY)
+async def expire_payment(session: AsyncSession, payment_id: str, now: datetime) -> Optional[datetime]:
+    """Expire an unpaid PIX charge, cancel its order and tell the customer"""
+    payment = (await session.execute(
+        select(Payment.status, Payment.pix_expiration, Payment.order_id).where(Payment.id == payment_id)
+    )).first()
+    if payment is None or payment.status not in AWAITING_PAYMENT_STATUSES or payment.pix_expiration is None:
+        return None
+    expiration = _aware(payment.pix_expiration)
+    if expiration > now:
+        return expiration  # A new charge extended it
+    
+    try:
+        await PaymentFSMService().apply(session, payment_id, "expire", expected=payment.status)
+    except InvalidTransition:
+        return None  # Paid (or cancelled) in the meantime
+    
+    order = (await session.execute(
+        select(Order.status, Order.order_number, Order.consumer_id, User.phone, User.whatsapp_id)
+        .join(User, User.id == Order.consumer_id)
+        .where(Order.id == payment.order_id)
+    )).first()
+    if order is None or order.status not in UNPAID_ORDER_STATUSES:
+        return None
+    try:
+        await OrderFSMService().apply(session, payment.order_id, "cancel", expected=order.status)
+    except InvalidTransition:
+        return None
+    
+    session.add(Notification(
+        user_id=order.consumer_id,
+        order_id=payment.order_id,
+        type=NotificationType.WHATSAPP,
+        title="Pagamento expirado",
+        message=(
+            f"O prazo do PIX do pedido {order.order_number} acabou e o pedido foi cancelado. "
+            f"Se ainda quiser a entrega, é só fazer um novo pedido."
+        ),
+        recipient_phone=order.phone,
+        recipient_whatsapp=order.whatsapp_id or order.phone,
+        category="order_update",
+        priority=8,
+    ))
+    logger.info(f"Payment {payment_id} expired, order {order.order_number} cancelled")
+    return None
+
+
+@scheduler.handler(SCHEDULED_PICKUP)
+async def release_scheduled_order(session: AsyncSession, order_id: str, now: datetime) -> Optional[datetime]:
+    """
+    Publish ``order.dispatch_due`` for a paid scheduled order
+    
+    Dispatch matches drivers for it from then on. The event can be
+    published again by a reconcile while the order is still PAID; driver
+    assignment goes through the FSM, so a repeat cannot assign twice.
+    """
+    order = (await session.execute(
+        select(Order.status, Order.is_scheduled, Order.pickup_scheduled_at, Order.order_number)
+        .where(Order.id == order_id)
+    )).first()
+    if order is None or order.status != OrderStatus.PAID or not order.is_scheduled or order.pickup_scheduled_at is None:
+        return None
+    pickup_at = _aware(order.pickup_scheduled_at)
+    due_at = pickup_due_at(pickup_at)
+    if due_at > now:
+        return due_at  # Pickup moved later
+    
+    session.add(OutboxEvent(
+        aggregate_type="order",
+        aggregate_id=order_id,
+        event_type="order.dispatch_due",
+        payload={"id": order_id, "order_number": order.order_number, "pickup_scheduled_at": pickup_at.isoformat()},
+    ))
+    return None
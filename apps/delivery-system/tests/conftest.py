@@ -0,0 +1,89 @@
+"""
+Test fixtures
+
+Tests run against a SQLite database migrated to head (in a temporary
+directory) and the in-process Redis stand-in. The environment is set here,
+before any application module reads the settings.
+"""
+import itertools
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1]
+DB_DIR = tempfile.mkdtemp(prefix="pyloto-tests-")
+
+os.environ["ENVIRONMENT"] = "test"
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DB_DIR}/test.db"
+os.environ["DATABASE_REPLICA_URLS"] = ""
+os.environ["REDIS_URL"] = "memory://"
+sys.path.insert(0, str(APP_DIR))
+
+import pytest  # noqa: E402
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+
+from src.core.cache import redis_clients  # noqa: E402
+from src.core.database import Base, close_db, get_async_engine, get_async_sessionmaker  # noqa: E402
+from src.models.order import Order  # noqa: E402
+from src.models.user import User, UserRole  # noqa: E402
+
+_order_numbers = itertools.count(1)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def migrated_database():
+    """Create the schema with the migrations, as in production"""
+    config = Config()
+    config.set_main_option("script_location", str(APP_DIR / "migrations"))
+    command.upgrade(config, "head")
+
+
+@pytest.fixture(autouse=True)
+async def clean_state():
+    """Empty every table and the Redis stand-in after each test"""
+    yield
+    async with get_async_engine().begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            await conn.execute(table.delete())
+    for client in redis_clients.values():
+        await client.flushdb()
+    await close_db()
+
+
+@pytest.fixture
+async def consumer() -> User:
+    """A consumer account"""
+    async with get_async_sessionmaker()() as session:
+        user = User(
+            email="consumer@pyloto.test", phone="+5541999990000", password_hash="-",
+            first_name="Test", last_name="Consumer", role=UserRole.CONSUMER,
+        )
+        session.add(user)
+        await session.commit()
+    return user
+
+
+@pytest.fixture
+def make_order(consumer):
+    """Factory inserting an order of ``consumer``"""
+    async def make(**values) -> Order:
+        async with get_async_sessionmaker()() as session:
+            order = Order(**{
+                "order_number": f"TST{next(_order_numbers):07d}",
+                "consumer_id": consumer.id,
+                "item_description": "Documentos",
+                "pickup_contact_name": "A", "pickup_contact_phone": "1",
+                "pickup_address_line1": "Rua A, 1", "pickup_city": "Curitiba", "pickup_state": "PR",
+                "pickup_latitude": -25.43, "pickup_longitude": -49.27,
+                "delivery_contact_name": "B", "delivery_contact_phone": "2",
+                "delivery_address_line1": "Rua B, 2", "delivery_city": "Curitiba", "delivery_state": "PR",
+                "delivery_latitude": -25.44, "delivery_longitude": -49.28,
+                **values,
+            })
+            session.add(order)
+            await session.commit()
+        return order
+    
+    return make
@@ -0,0 +1,86 @@
+"""
+FSM compare-and-set transitions
+"""
+import pytest
+from sqlalchemy import select
+
+from src.core.database import get_async_sessionmaker
+from src.models.order import Order, OrderStatus
+from src.models.outbox import OutboxEvent
+from src.models.status_event import StatusEvent
+from src.services.fsm_service import InvalidTransition, OrderFSMService, UnknownEvent
+
+fsm = OrderFSMService()
+
+
+async def apply(order_id, event, **kwargs):
+    async with get_async_sessionmaker()() as session:
+        async with session.begin():
+            return await fsm.apply(session, order_id, event, **kwargs)
+
+
+async def test_apply_moves_status_and_records_history(make_order):
+    order = await make_order(status=OrderStatus.PENDING_PAYMENT)
+    
+    result = await apply(order.id, "confirm_payment", actor="pagseguro")
+    
+    assert (result.previous_status, result.status) == (OrderStatus.PENDING_PAYMENT, OrderStatus.PAID)
+    async with get_async_sessionmaker()() as session:
+        stored = await session.get(Order, order.id)
+        history = (await session.execute(
+            select(StatusEvent).where(StatusEvent.entity_id == order.id, StatusEvent.event == "confirm_payment")
+        )).scalar_one()
+        outbox = (await session.execute(
+            select(OutboxEvent).where(OutboxEvent.aggregate_id == order.id, OutboxEvent.event_type == "order.status_changed")
+        )).scalars().all()
+    assert stored.status == OrderStatus.PAID
+    assert stored.payment_confirmed_at is not None
+    assert (history.from_status, history.to_status, history.actor) == ("pending_payment", "paid", "pagseguro")
+    assert any(event.payload["from"] == "pending_payment" and event.payload["to"] == "paid" for event in outbox)
+
+
+async def test_second_caller_loses_the_race(make_order):
+    order = await make_order(status=OrderStatus.PAID)
+    
+    # Both callers saw PAID; only the first UPDATE still matches
+    await apply(order.id, "assign_driver", expected=OrderStatus.PAID)
+    with pytest.raises(InvalidTransition) as raised:
+        await apply(order.id, "assign_driver", expected=OrderStatus.PAID)
+    assert raised.value.current_status == OrderStatus.ASSIGNED
+    
+    async with get_async_sessionmaker()() as session:
+        events = (await session.execute(
+            select(StatusEvent).where(StatusEvent.entity_id == order.id, StatusEvent.event == "assign_driver")
+        )).scalars().all()
+    assert len(events) == 1
+
+
+async def test_expected_status_must_match(make_order):
+    order = await make_order(status=OrderStatus.QUOTED)
+    with pytest.raises(InvalidTransition):
+        await apply(order.id, "confirm_payment", expected=OrderStatus.PENDING_PAYMENT)
+
+
+async def test_unknown_event(make_order):
+    order = await make_order()
+    with pytest.raises(UnknownEvent):
+        await apply(order.id, "teleport")
+
+
+async def test_apply_many_reports_each_previous_status(make_order):
+    quoted = await make_order(status=OrderStatus.QUOTED)
+    pending = await make_order(status=OrderStatus.PENDING_PAYMENT)
+    delivered = await make_order(status=OrderStatus.DELIVERED)
+    
+    async with get_async_sessionmaker()() as session:
+        async with session.begin():
+            results = await fsm.apply_many(session, [quoted.id, pending.id, delivered.id], "cancel")
+    
+    assert {result.id: result.previous_status for result in results} == {
+        quoted.id: OrderStatus.QUOTED,
+        pending.id: OrderStatus.PENDING_PAYMENT,
+    }
+    async with get_async_sessionmaker()() as session:
+        statuses = dict((await session.execute(select(Order.id, Order.status))).all())
+    assert statuses[delivered.id] == OrderStatus.DELIVERED
+    assert statuses[quoted.id] == statuses[pending.id] == OrderStatus.CANCELLED
@@ -0,0 +1,94 @@
+"""
+Idempotency-Key middleware: one execution per key, replays, lock handling
+"""
+import asyncio
+
+import pytest
+from fastapi import FastAPI, Request
+from httpx import AsyncClient
+
+from src.core.cache import get_redis
+from src.core.config import settings
+from src.middleware.idempotency import IdempotencyMiddleware, _lock_key, _record_key
+
+KEY = {"Idempotency-Key": "order-1"}
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def client(calls):
+    app = FastAPI()
+    app.add_middleware(IdempotencyMiddleware, prefixes=["/orders"])
+    
+    @app.post("/orders", status_code=201)
+    async def create_order(request: Request):
+        calls.append(await request.json())
+        await asyncio.sleep(float(request.query_params.get("delay", 0)))
+        return {"number": len(calls)}
+    
+    return AsyncClient(app=app, base_url="http://test")
+
+
+async def lock_holder():
+    redis = await get_redis("cache")
+    return await redis.get(_lock_key(_record_key(b"", KEY["Idempotency-Key"])))
+
+
+async def test_retry_replays_the_stored_response(client, calls):
+    async with client:
+        first = await client.post("/orders", json={"item": "a"}, headers=KEY)
+        retry = await client.post("/orders", json={"item": "a"}, headers=KEY)
+    
+    assert len(calls) == 1
+    assert (retry.status_code, retry.json()) == (201, first.json())
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert await lock_holder() is None
+
+
+async def test_key_reused_for_another_request(client, calls):
+    async with client:
+        await client.post("/orders", json={"item": "a"}, headers=KEY)
+        other = await client.post("/orders", json={"item": "b"}, headers=KEY)
+    assert other.status_code == 422
+    assert len(calls) == 1
+
+
+async def test_concurrent_duplicate_waits_for_the_first(client, calls):
+    async with client:
+        first, duplicate = await asyncio.gather(
+            client.post("/orders?delay=0.2", json={"item": "a"}, headers=KEY),
+            client.post("/orders?delay=0.2", json={"item": "a"}, headers=KEY),
+        )
+    assert len(calls) == 1
+    assert first.json() == duplicate.json()
+    assert "true" in (first.headers.get("idempotent-replayed"), duplicate.headers.get("idempotent-replayed"))
+
+
+async def test_lock_is_renewed_while_the_request_runs(client, calls, monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_LOCK_SECONDS", 0.15)
+    async with client:
+        request = asyncio.create_task(client.post("/orders?delay=0.5", json={"item": "a"}, headers=KEY))
+        await asyncio.sleep(0.4)
+        assert await lock_holder() is not None  # Past the initial TTL
+        assert (await request).status_code == 201
+    assert await lock_holder() is None
+
+
+async def test_lock_is_released_when_storing_the_response_fails(client, calls, monkeypatch):
+    redis = await get_redis("cache")
+    store = redis.set
+    
+    async def failing_set(name, value, **kwargs):
+        if "ex" in kwargs:
+            raise ConnectionError("store down")
+        return await store(name, value, **kwargs)
+    
+    monkeypatch.setattr(redis, "set", failing_set)
+    async with client:
+        response = await client.post("/orders", json={"item": "a"}, headers=KEY)
+    assert response.status_code == 201
+    assert await lock_holder() is None
@@ -0,0 +1,38 @@
+"""
+Shared integrations package (packages/integrations, outside the app)
+"""
+import sys
+
+import pytest
+
+from src.core import money
+
+from .conftest import APP_DIR
+
+sys.path.insert(0, str(APP_DIR.parents[1]))
+openai_integration = pytest.importorskip("packages.integrations.openai")
+
+
+@pytest.fixture
+def client():
+    return openai_integration.OpenAIClient(api_key="test")
+
+
+async def test_summarize_order_applies_the_markup_in_cents(client):
+    result = await client._summarize_order({"amount": 18.9, "markup_rate": 0.1, "distance_km": 4.2, "eta_min": 15})
+    
+    assert "error" not in result
+    assert (result["amount_base_cents"], result["markup_bps"], result["amount_final_cents"]) == (1890, 1000, 2079)
+    assert "R$ 20.79" in result["summary"]
+    
+    result = await client._summarize_order({"amount_cents": 1000})
+    assert result["amount_final_cents"] == 1100
+
+
+@pytest.mark.parametrize("amount, rate", [(0, 0), (18.9, 0.1), (0.05, 0.125), (1234.565, 0.0333), (-7.5, 0.2)])
+def test_money_helpers_match_the_app(amount, rate):
+    cents, bps = openai_integration._to_cents(amount), openai_integration._to_bps(rate)
+    
+    assert (cents, bps) == (money.to_cents(amount), money.to_bps(rate))
+    assert openai_integration._apply_bps(cents, bps) == money.apply_bps(cents, bps)
+    assert openai_integration._format_cents(cents) == money.format_cents(cents)
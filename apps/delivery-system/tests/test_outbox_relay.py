@@ -0,0 +1,74 @@
+"""
+Outbox relay: state changes reach the stream once, in order
+"""
+from datetime import timedelta
+import json
+
+import pytest
+from sqlalchemy import func, select
+
+from src.core.cache import get_redis
+from src.core.config import settings
+from src.core.database import get_async_sessionmaker
+from src.core.partitioning import utcnow
+from src.jobs import outbox_relay
+from src.models.order import OrderStatus
+from src.models.outbox import OutboxEvent
+from src.services.fsm_service import OrderFSMService
+
+
+async def unpublished() -> int:
+    async with get_async_sessionmaker()() as session:
+        return await session.scalar(
+            select(func.count()).select_from(OutboxEvent).where(OutboxEvent.published_at.is_(None))
+        )
+
+
+async def stream_events():
+    client = await get_redis("queue")
+    return [fields for _, fields in await client.xrange(settings.OUTBOX_STREAM)]
+
+
+async def test_relay_publishes_in_order_and_marks_published(make_order):
+    order = await make_order(status=OrderStatus.QUOTED)
+    async with get_async_sessionmaker()() as session:
+        async with session.begin():
+            await OrderFSMService().apply(session, order.id, "confirm_payment")
+    pending = await unpublished()
+    assert pending >= 1
+    
+    assert await outbox_relay.relay_batch() == pending
+    assert await outbox_relay.relay_batch() == 0
+    assert await unpublished() == 0
+    
+    messages = await stream_events()
+    assert len(messages) == pending
+    assert messages[-1]["event_type"] == "order.status_changed"
+    assert json.loads(messages[-1]["payload"])["to"] == "paid"
+
+
+async def test_failed_publish_leaves_events_for_the_next_batch(make_order, monkeypatch):
+    await make_order()
+    pending = await unpublished()
+    
+    async def unavailable(events):
+        raise ConnectionError("queue down")
+    
+    monkeypatch.setattr(outbox_relay, "publish_events", unavailable)
+    with pytest.raises(ConnectionError):
+        await outbox_relay.relay_batch()
+    assert await unpublished() == pending
+    
+    monkeypatch.undo()
+    assert await outbox_relay.relay_batch() == pending
+
+
+async def test_purge_keeps_recent_and_unpublished_events(make_order):
+    await make_order()
+    await outbox_relay.relay_batch()
+    
+    later = utcnow() + timedelta(hours=settings.OUTBOX_RETENTION_HOURS + 1)
+    assert await outbox_relay.purge_published_events(now=utcnow()) == 0
+    assert await outbox_relay.purge_published_events(now=later) >= 1
+    async with get_async_sessionmaker()() as session:
+        assert await session.scalar(select(func.count()).select_from(OutboxEvent)) == 0
@@ -0,0 +1,120 @@
+"""
+PagSeguro webhook inbox and batched application
+"""
+from datetime import timedelta
+import hashlib
+
+import pytest
+from sqlalchemy import select
+
+from src.core.config import settings
+from src.core.database import get_async_sessionmaker
+from src.core.partitioning import utcnow
+from src.jobs.payment_webhooks import process_batch, purge_processed_events
+from src.models.order import Order, OrderStatus
+from src.models.payment import Payment, PaymentStatus
+from src.models.payment_webhook import PaymentWebhookEvent, PaymentWebhookResult
+from src.models.status_event import StatusEvent
+from src.services.payment_webhooks import (
+    WebhookSignatureError,
+    parse_pagseguro_notification,
+    record_notifications,
+    verify_pagseguro_signature,
+)
+
+CHARGE = "CHAR_0001"
+
+
+async def notify(*statuses, charge=CHARGE) -> int:
+    payload = {"charges": [{"id": charge, "status": status} for status in statuses]}
+    async with get_async_sessionmaker()() as session:
+        async with session.begin():
+            return await record_notifications(session, parse_pagseguro_notification(payload))
+
+
+async def add_payment(order, charge=CHARGE) -> Payment:
+    async with get_async_sessionmaker()() as session:
+        payment = Payment(order_id=order.id, amount_cents=1890, gateway_transaction_id=charge)
+        session.add(payment)
+        await session.commit()
+    return payment
+
+
+async def inbox():
+    async with get_async_sessionmaker()() as session:
+        return {event.gateway_status: event for event in (await session.execute(select(PaymentWebhookEvent))).scalars()}
+
+
+def test_signature():
+    body = b'{"charges": []}'
+    signature = hashlib.sha256(b"secret-" + body).hexdigest()
+    verify_pagseguro_signature(body, signature.upper(), "secret")
+    with pytest.raises(WebhookSignatureError):
+        verify_pagseguro_signature(body, signature, "other")
+    with pytest.raises(WebhookSignatureError):
+        verify_pagseguro_signature(body, None, "secret")
+
+
+async def test_paid_confirms_the_order_once(make_order):
+    order = await make_order(status=OrderStatus.PENDING_PAYMENT)
+    payment = await add_payment(order)
+    
+    assert await notify("AUTHORIZED", "PAID") == 2
+    assert await notify("PAID") == 0  # Redelivery
+    assert await process_batch() == 2
+    assert await process_batch() == 0
+    
+    async with get_async_sessionmaker()() as session:
+        assert (await session.get(Payment, payment.id)).status == PaymentStatus.COMPLETED
+        assert (await session.get(Order, order.id)).status == OrderStatus.PAID
+        confirmations = (await session.execute(
+            select(StatusEvent).where(StatusEvent.entity_id == order.id, StatusEvent.event == "confirm_payment")
+        )).scalars().all()
+    assert len(confirmations) == 1
+    assert {status: event.result for status, event in (await inbox()).items()} == {
+        "AUTHORIZED": PaymentWebhookResult.APPLIED,
+        "PAID": PaymentWebhookResult.APPLIED,
+    }
+
+
+async def test_notification_before_the_charge_id_is_stored_is_retried(make_order):
+    order = await make_order(status=OrderStatus.PENDING_PAYMENT)
+    await notify("PAID")
+    
+    assert await process_batch() == 1
+    event = (await inbox())["PAID"]
+    assert (event.processed_at, event.attempts) == (None, 1)
+    assert await process_batch() == 0  # Held back until retry_at
+    
+    await add_payment(order)
+    async with get_async_sessionmaker()() as session:
+        async with session.begin():
+            (await session.get(PaymentWebhookEvent, event.id)).retry_at = utcnow()
+    assert await process_batch() == 1
+    
+    assert (await inbox())["PAID"].result == PaymentWebhookResult.APPLIED
+    async with get_async_sessionmaker()() as session:
+        assert (await session.get(Order, order.id)).status == OrderStatus.PAID
+
+
+async def test_unknown_charge_is_closed_after_the_grace_period(monkeypatch):
+    await notify("PAID", charge="CHAR_UNKNOWN")
+    monkeypatch.setattr(settings, "PAYMENT_WEBHOOK_UNKNOWN_GRACE_SECONDS", 0)
+    
+    assert await process_batch() == 1
+    event = (await inbox())["PAID"]
+    assert event.result == PaymentWebhookResult.UNKNOWN_PAYMENT
+    assert event.processed_at is not None
+
+
+async def test_purge_only_removes_processed_events_past_retention(make_order):
+    order = await make_order(status=OrderStatus.PENDING_PAYMENT)
+    await add_payment(order)
+    await notify("PAID")
+    await notify("PAID", charge="CHAR_LATER")  # Stays unprocessed (deferred)
+    await process_batch()
+    
+    later = utcnow() + timedelta(days=settings.PAYMENT_WEBHOOK_RETENTION_DAYS + 1)
+    assert await purge_processed_events(now=utcnow()) == 0
+    assert await purge_processed_events(now=later) == 1
+    assert list(await inbox()) == ["PAID"]
@@ -0,0 +1,72 @@
+"""
+Query budget: assert_max_queries and the per-request budget of the middleware
+"""
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from src.core.config import settings
+from src.core.database import get_async_sessionmaker
+from src.core.query_stats import QueryBudgetExceeded, assert_max_queries
+from src.middleware.query_stats import QueryStatsMiddleware
+from src.models.order import Order
+
+
+async def test_counts_statements_within_budget(make_order):
+    await make_order()
+    async with get_async_sessionmaker()() as session:
+        with assert_max_queries(2) as stats:
+            await session.execute(select(Order))
+            await session.execute(select(Order.id))
+    assert stats.count == 2
+
+
+async def test_raises_over_budget(make_order):
+    await make_order()
+    async with get_async_sessionmaker()() as session:
+        with pytest.raises(QueryBudgetExceeded, match="2 queries executed, at most 1"):
+            with assert_max_queries(1):
+                await session.execute(select(Order))
+                await session.execute(select(Order.id))
+
+
+async def test_lazy_load_is_an_n_plus_one(make_order):
+    await make_order()
+    async with get_async_sessionmaker()() as session:
+        order = (await session.execute(select(Order))).scalar_one()
+        with pytest.raises(QueryBudgetExceeded, match="Order.consumer"):
+            with assert_max_queries(10):
+                await session.run_sync(lambda _: order.consumer)
+
+
+async def test_lazy_loads_can_be_allowed(make_order):
+    await make_order()
+    async with get_async_sessionmaker()() as session:
+        order = (await session.execute(select(Order))).scalar_one()
+        with assert_max_queries(1, allow_lazy_loads=True) as stats:
+            await session.run_sync(lambda _: order.consumer)
+    assert stats.lazy_loads == ["Order.consumer"]
+
+
+async def test_middleware_enforces_request_budget(make_order, monkeypatch):
+    await make_order()
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware)
+    
+    @app.get("/orders")
+    async def list_orders():
+        async with get_async_sessionmaker()() as session:
+            await session.execute(select(Order))
+            await session.execute(select(Order.id))
+        return {}
+    
+    monkeypatch.setattr(settings, "DATABASE_QUERY_BUDGET", 2)
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/orders")
+    assert "2 queries" in response.headers["server-timing"]
+    
+    monkeypatch.setattr(settings, "DATABASE_QUERY_BUDGET", 1)
+    with pytest.raises(QueryBudgetExceeded):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            await client.get("/orders")
@@ -0,0 +1,21 @@
+"""
+Query plan regression tests: the hot queries keep using their indexes
+
+The expectations live in benchmarks/explain_plans.py, which runs them
+against any database (PostgreSQL included).
+"""
+import pytest
+
+from benchmarks.explain_plans import EXPECTED_PLANS, check_plan
+from src.core.database import get_async_engine
+
+
+@pytest.mark.parametrize(
+    "query, index_names",
+    [(query, index_names) for _, query, index_names in EXPECTED_PLANS],
+    ids=[description for description, _, _ in EXPECTED_PLANS],
+)
+async def test_query_uses_its_index(query, index_names):
+    async with get_async_engine().connect() as conn:
+        ok, plan = await check_plan(conn, query, index_names)
+    assert ok, f"expected {index_names}, got:\n{plan}"
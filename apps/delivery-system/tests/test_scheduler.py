@@ -0,0 +1,83 @@
+"""
+Delayed job scheduler: claims, handlers and reconciliation
+"""
+from datetime import timedelta
+
+from src.core.database import get_async_sessionmaker
+from src.core.partitioning import utcnow
+from src.models.order import Order, OrderStatus
+from src.models.payment import Payment, PaymentStatus
+from src.services.scheduler import PAYMENT_EXPIRY, SCHEDULED_PICKUP, DelayedJobScheduler, scheduler
+
+
+async def test_each_due_job_is_claimed_once():
+    jobs = DelayedJobScheduler(key="test:jobs")
+    now = utcnow()
+    await jobs.schedule_many([("ping", str(number), now - timedelta(seconds=number)) for number in range(5)])
+    await jobs.schedule("ping", "later", now + timedelta(minutes=5))
+    
+    first = await jobs.claim_due(now, limit=3)
+    second = await jobs.claim_due(now, limit=3)
+    
+    assert [entity_id for _, entity_id, _ in first] == ["4", "3", "2"]  # Oldest first
+    assert [entity_id for _, entity_id, _ in second] == ["1", "0"]
+    assert await jobs.claim_due(now) == []
+    assert await jobs.pending() == 1
+
+
+async def test_handler_result_reschedules_and_failures_retry():
+    jobs = DelayedJobScheduler(key="test:jobs")
+    now = utcnow()
+    runs = []
+    
+    @jobs.handler("again")
+    async def again(session, entity_id, at):
+        runs.append(entity_id)
+        return at + timedelta(minutes=1)
+    
+    @jobs.handler("broken")
+    async def broken(session, entity_id, at):
+        raise RuntimeError("boom")
+    
+    await jobs.schedule_many([("again", "a", now), ("broken", "b", now)])
+    assert await jobs.run_due(now) == 2
+    assert runs == ["a"]
+    assert await jobs.pending() == 2
+    assert await jobs.claim_due(now) == []
+
+
+async def test_expired_pix_payment_cancels_its_order(make_order):
+    order = await make_order(status=OrderStatus.PENDING_PAYMENT)
+    now = utcnow()
+    async with get_async_sessionmaker()() as session:
+        payment = Payment(order_id=order.id, amount_cents=1890, pix_expiration=now - timedelta(minutes=1))
+        session.add(payment)
+        await session.commit()
+    
+    await scheduler.schedule(PAYMENT_EXPIRY, payment.id, payment.pix_expiration)
+    assert await scheduler.run_due(now) == 1
+    
+    async with get_async_sessionmaker()() as session:
+        assert (await session.get(Payment, payment.id)).status == PaymentStatus.CANCELLED
+        assert (await session.get(Order, order.id)).status == OrderStatus.CANCELLED
+
+
+async def test_reconcile_adds_missing_jobs_only(make_order):
+    now = utcnow()
+    pickup = now + timedelta(days=1)
+    scheduled = await make_order(status=OrderStatus.PAID, is_scheduled=True, pickup_scheduled_at=pickup)
+    await make_order(status=OrderStatus.PAID, is_scheduled=True, pickup_scheduled_at=pickup, deleted_at=now)
+    await make_order(status=OrderStatus.DELIVERED, is_scheduled=True, pickup_scheduled_at=pickup)
+    async with get_async_sessionmaker()() as session:
+        awaiting = Payment(order_id=scheduled.id, amount_cents=1890, pix_expiration=now + timedelta(minutes=30))
+        session.add(awaiting)
+        await session.commit()
+    
+    assert await scheduler.reconcile(now) == 2
+    assert await scheduler.reconcile(now) == 0
+    
+    claimed = await scheduler.claim_due(pickup)
+    assert sorted((kind, entity_id) for kind, entity_id, _ in claimed) == sorted([
+        (PAYMENT_EXPIRY, awaiting.id),
+        (SCHEDULED_PICKUP, scheduled.id),
+    ])
@@ -0,0 +1,64 @@
+"""
+Compiled model serializers behind to_dict and Page.to_dict
+"""
+from datetime import timedelta
+
+import orjson
+import pytest
+
+from src.core.database import get_async_sessionmaker
+from src.core.pagination import PageParams
+from src.core.partitioning import utcnow
+from src.models.order import OrderStatus
+from src.models.payment import Payment, PaymentMethod
+from src.models.serialization import ORDER_FIELDS, ORDER_SENSITIVE_FIELDS, UnloadedAttributeError, serialize
+from src.repositories.orders import list_order_summaries, list_orders
+
+KEYS = [field if isinstance(field, str) else field[0] for field in ORDER_FIELDS]
+SENSITIVE_KEYS = [field if isinstance(field, str) else field[0] for field in ORDER_SENSITIVE_FIELDS]
+
+
+async def test_to_dict_uses_the_compiled_serializer(make_order):
+    order = await make_order(status=OrderStatus.PAID)
+    
+    data = order.to_dict()
+    assert list(data) == KEYS
+    assert data["status"] is OrderStatus.PAID
+    assert data == serialize(order)
+    assert list(order.to_dict(include_sensitive=True)) == SENSITIVE_KEYS
+    assert orjson.loads(orjson.dumps(data))["status"] == "paid"
+    
+    payment = Payment(order_id=order.id, amount_cents=1890, method=PaymentMethod.PIX)
+    assert payment.to_dict()["amount_cents"] == 1890
+    assert "pix_code" in payment.to_dict(include_sensitive=True)
+
+
+async def test_to_dict_does_not_load_expired_columns(make_order):
+    order = await make_order()
+    async with get_async_sessionmaker()() as session:
+        order = await session.merge(order)
+        session.expire(order)
+        with pytest.raises(UnloadedAttributeError):
+            order.to_dict()
+
+
+async def test_page_to_dict_defaults_to_the_compiled_serializers(make_order):
+    now = utcnow()
+    first = await make_order(created_at=now - timedelta(minutes=1))
+    second = await make_order(created_at=now)
+    
+    async with get_async_sessionmaker()() as session:
+        page = await list_orders(session, PageParams(limit=1))
+        summaries = await list_order_summaries(session, PageParams(limit=5))
+    
+    data = page.to_dict()
+    assert data["has_more"] and data["next_cursor"] == page.next_cursor
+    assert [item["id"] for item in data["items"]] == [second.id]
+    assert set(KEYS) <= set(data["items"][0])
+    assert [item["id"] for item in summaries.to_dict()["items"]] == [second.id, first.id]
+    assert page.to_dict(lambda order: order.order_number)["items"] == [second.order_number]
+
+
+def test_serialize_rejects_unknown_types():
+    with pytest.raises(TypeError):
+        serialize(object())
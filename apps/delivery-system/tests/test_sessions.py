@@ -0,0 +1,92 @@
+"""
+Redis sessions: one round trip per read, per-user index without a TTL
+"""
+import pytest
+
+from src.core.cache import SessionManager, get_redis
+
+
+@pytest.fixture
+def sessions():
+    return SessionManager()
+
+
+@pytest.fixture
+async def round_trips(monkeypatch):
+    """Count pipelines and standalone commands sent to the session workload"""
+    client = await get_redis("session")
+    calls = []
+    pipeline = client.pipeline
+    
+    def spy_pipeline(*args, **kwargs):
+        calls.append("pipeline")
+        return pipeline(*args, **kwargs)
+    
+    monkeypatch.setattr(client, "pipeline", spy_pipeline)
+    for command in ("smembers", "srem", "expire", "exists", "delete"):
+        original = getattr(client, command)
+        
+        async def spy(*args, _command=command, _original=original, **kwargs):
+            calls.append(_command)
+            return await _original(*args, **kwargs)
+        
+        monkeypatch.setattr(client, command, spy)
+    return calls
+
+
+async def test_get_session_is_one_pipeline(sessions, round_trips):
+    session_id = await sessions.create_session("user-1", {"role": "consumer", "visits": 1})
+    round_trips.clear()
+    
+    session = await sessions.get_session(session_id)
+    
+    assert session["user_id"] == "user-1" and session["visits"] == 1
+    assert round_trips == ["pipeline"]
+    assert await sessions.get_session("missing") is None
+
+
+async def test_create_does_not_scan_or_expire_the_index(sessions, round_trips):
+    await sessions.create_session("user-1", {})
+    await sessions.create_session("user-1", {})
+    
+    assert round_trips == ["pipeline", "pipeline"]
+    client = await get_redis("session")
+    assert await client.scard("session:user:user-1") == 2
+    assert await client.ttl("session:user:user-1") == -1
+
+
+async def test_create_prunes_a_large_index(sessions):
+    client = await get_redis("session")
+    sessions.index_prune_threshold = 3
+    expired = [await sessions.create_session("user-1", {}) for _ in range(3)]
+    await client.delete(*(f"session:{sid}" for sid in expired))
+    
+    live = await sessions.create_session("user-1", {})
+    
+    assert await client.smembers("session:user:user-1") == {live}
+
+
+async def test_updates_and_increments_only_touch_existing_sessions(sessions):
+    session_id = await sessions.create_session("user-1", {"visits": 1})
+    
+    assert await sessions.update_session(session_id, {"step": "address"})
+    assert await sessions.increment_field(session_id, "visits", 2) == 3
+    assert await sessions.touch_session(session_id)
+    assert (await sessions.get_session(session_id))["step"] == "address"
+    
+    assert not await sessions.update_session("missing", {"step": "address"})
+    assert await sessions.increment_field("missing", "visits") is None
+    assert not await (await get_redis("session")).exists("session:missing")
+
+
+async def test_delete_user_sessions_removes_sessions_and_index(sessions):
+    first = await sessions.create_session("user-1", {})
+    second = await sessions.create_session("user-1", {})
+    other = await sessions.create_session("user-2", {})
+    assert await sessions.delete_session(first)
+    
+    assert await sessions.delete_user_sessions("user-1") == 1
+    
+    client = await get_redis("session")
+    assert not await client.exists("session:user:user-1", f"session:{second}")
+    assert await sessions.get_session(other) is not None
@@ -7,9 +7,37 @@ from typing import Optional, Dict, Any, List
 import json
 import logging
 from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
 
 logger = logging.getLogger(__name__)
 
+BPS = 10_000  # basis points in 100%
+
+
+# Integer money helpers, as in src.core.money (this package is not part of
+# the delivery-system app, so it cannot import it)
+def _to_cents(amount: Any) -> int:
+    """Amount in reais in cents, rounded half up"""
+    return int((Decimal(str(amount)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def _to_bps(rate: Any) -> int:
+    """Fractional rate (0.1 for 10%) in basis points, rounded half up"""
+    return int((Decimal(str(rate)) * BPS).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def _apply_bps(cents: int, bps: int) -> int:
+    """``cents`` increased by ``bps`` basis points, rounded half up"""
+    return (cents * (BPS + bps) * 2 + BPS) // (2 * BPS)
+
+
+def _format_cents(cents: int) -> str:
+    """Amount for display, e.g. 1890 -> "18.90" """
+    sign = "-" if cents < 0 else ""
+    whole, fraction = divmod(abs(int(cents)), 100)
+    return f"{sign}{whole}.{fraction:02d}"
+
+
 
 class OpenAIClient:
     """OpenAI API client wrapper"""
@@ -207,9 +235,13 @@ class OpenAIClient:
     async def _summarize_order(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Generate order summary with markup"""
         try:
-            base_amount = args.get("amount", 0)
-            markup_rate = args.get("markup_rate", 0.10)  # 10% default markup
-            final_amount = base_amount * (1 + markup_rate)
+            # Integer cents and basis points from here on (no float rounding)
+            if "amount_cents" in args:
+                base_cents = int(args["amount_cents"])
+            else:
+                base_cents = _to_cents(args.get("amount", 0))
+            markup_bps = _to_bps(args.get("markup_rate", 0.10))  # 10% default markup
+            final_cents = _apply_bps(base_cents, markup_bps)
             
             summary_text = f"""
 📦 **Resumo do Pedido**
@@ -225,16 +257,16 @@ class OpenAIClient:
 ⏱️ **Tempo estimado:** {args.get('eta_min', 0)} min
 🚦 **Trânsito:** {args.get('traffic_level', 'Normal')}
 
-💰 **Valor total: R$ {final_amount:.2f}**
+💰 **Valor total: R$ {_format_cents(final_cents)}**
 
 Confirma o pedido? Após a confirmação, enviaremos o PIX para pagamento.
 """
             
             return {
                 "summary": summary_text.strip(),
-                "amount_base": base_amount,
-                "amount_final": final_amount,
-                "markup_applied": markup_rate
+                "amount_base_cents": base_cents,
+                "amount_final_cents": final_cents,
+                "markup_bps": markup_bps
             }
             
         except Exception as e:
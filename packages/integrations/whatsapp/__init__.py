@@ -299,6 +299,13 @@ class WhatsAppClient:
             return None
 
 
+def _format_cents(cents: int) -> str:
+    """Amount for display, e.g. 1890 -> "18.90" (as src.core.money.format_cents)"""
+    sign = "-" if cents < 0 else ""
+    whole, fraction = divmod(abs(int(cents)), 100)
+    return f"{sign}{whole}.{fraction:02d}"
+
+
 class WhatsAppMessageTemplates:
     """Pre-defined message templates for common scenarios"""
     
@@ -318,13 +325,13 @@ Como posso ajudar você hoje?
 Digite sua mensagem ou escolha uma das opções! 😊"""
 
     @staticmethod  
-    def order_confirmation(order_number: str, pickup_address: str, delivery_address: str, price: float) -> str:
+    def order_confirmation(order_number: str, pickup_address: str, delivery_address: str, price_cents: int) -> str:
         return f"""✅ **Pedido Confirmado!**
 
 📋 **Número:** {order_number}
 📍 **Coleta:** {pickup_address}
 🎯 **Entrega:** {delivery_address}
-💰 **Valor:** R$ {price:.2f}
+💰 **Valor:** R$ {_format_cents(price_cents)}
 
 Estamos procurando um entregador para você! Você receberá atualizações em tempo real sobre o status da sua entrega.
 